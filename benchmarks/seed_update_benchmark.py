@@ -0,0 +1,265 @@
+"""
+End-to-end benchmark of the seeder and updater.
+
+Runs seed_services() and seed_movies_and_streams(), then get_updated_movies_and_streaming_options(), against a local
+PostgreSQL database and a local stand-in of Streaming Availability API that serves a synthetic catalog of
+N countries x M shows x K streaming options.  Reports rows written per second, API pages per second, peak RSS, and
+database transaction counts for each phase, and appends the results to benchmarks/results/seed_update.jsonl, so that
+results can be compared across commits.
+
+The database is dropped and recreated on every run, so do not point this at a database with real data.
+
+Example:
+    > py benchmarks/seed_update_benchmark.py --countries 4 --shows 2000 --options 2
+"""
+
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from werkzeug.serving import make_server
+
+from src.stand_in.streaming_availability_stand_in import create_stand_in_app
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+RESULTS_FILE_LOCATION = join(root_dir, 'benchmarks', 'results', 'seed_update.jsonl')
+
+PHASES = ('seed', 'update')
+
+# --------------------------------------------------
+
+
+def get_git_commit() -> str:
+    """Gets the current commit's short hash, with "-dirty" added if there are uncommitted changes."""
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        is_dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root_dir,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if is_dirty else '')
+
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def read_database_stats(db) -> dict:
+    """
+    Reads the cumulative transaction and row counts of the current database from pg_stat_database.
+    Connections are closed first, since PostgreSQL only reports a connection's stats after some delay or when the
+    connection ends.
+    """
+
+    from sqlalchemy import text
+
+    db.session.remove()
+    db.engine.dispose()
+    time.sleep(0.5)
+
+    row = db.session.execute(text(
+        'SELECT xact_commit, xact_rollback, tup_inserted, tup_updated, tup_deleted '
+        'FROM pg_stat_database WHERE datname = current_database()'
+    )).one()
+    db.session.remove()
+
+    return {
+        'transactions': row.xact_commit + row.xact_rollback,
+        'rows_written': row.tup_inserted + row.tup_updated + row.tup_deleted
+    }
+
+
+def run_phase(phase: str, db_name: str, result_queue: multiprocessing.Queue) -> None:
+    """
+    Runs one phase of the benchmark in its own process, so that peak RSS is measured for that phase only.
+
+    :param phase: "seed" or "update".
+    :param db_name: The name of the database to use.
+    :param result_queue: Where to put the phase's measurements.
+    """
+
+    from src.app import create_app
+    from src.models.common import connect_db, db
+    from src.models.movie import Movie
+    from src.models.movie_poster import MoviePoster
+    from src.models.streaming_option import StreamingOption
+    from src.seed.streaming_availability_seeder import (
+        seed_movies_and_streams, seed_services)
+    from src.seed.streaming_availability_updater import \
+        get_updated_movies_and_streaming_options
+
+    app = create_app(db_name)
+    connect_db(app)
+
+    with app.app_context():
+        if phase == 'seed':
+            db.drop_all()
+            db.create_all()
+
+        stats_before = read_database_stats(db)
+        start = time.perf_counter()
+
+        if phase == 'seed':
+            seed_services()
+            seed_movies_and_streams()
+        else:
+            get_updated_movies_and_streaming_options()
+
+        elapsed = time.perf_counter() - start
+        stats_after = read_database_stats(db)
+
+        table_counts = {
+            model.__tablename__: db.session.query(model).count()
+            for model in (Movie, MoviePoster, StreamingOption)
+        }
+
+    result_queue.put({
+        'seconds': elapsed,
+        'transactions': stats_after['transactions'] - stats_before['transactions'],
+        'rows_written': stats_after['rows_written'] - stats_before['rows_written'],
+        'table_counts': table_counts,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    })
+
+
+def wait_for_phase(phase: str, process, result_queue) -> dict:
+    """
+    Waits for a phase's process to put its measurements into the queue.
+
+    :raise RuntimeError: If the process ended without putting measurements into the queue.
+    """
+
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f'Benchmark phase "{phase}" failed.  See its output above.')
+
+
+def find_previous_result(parameters: dict) -> dict | None:
+    """Finds the latest saved result that was run with the same parameters."""
+
+    previous_result = None
+
+    try:
+        with open(RESULTS_FILE_LOCATION, encoding='utf-8') as f:
+            for line in f:
+                result = json.loads(line)
+                if result['parameters'] == parameters:
+                    previous_result = result
+    except OSError:
+        pass
+
+    return previous_result
+
+
+def print_results(result: dict, previous_result: dict | None) -> None:
+    """Prints the results of each phase, and the change in throughput since the previous result."""
+
+    print(f'\nCommit {result['commit']}, parameters {result['parameters']}')
+    if previous_result:
+        print(f'Compared to commit {previous_result['commit']} ({previous_result['timestamp']})')
+
+    for phase, measurements in result['phases'].items():
+        line = (f'{phase:>6}: {measurements['seconds']:8.2f} s, '
+                f'{measurements['rows_per_second']:10.1f} rows/s, '
+                f'{measurements['api_pages_per_second']:8.1f} API pages/s, '
+                f'{measurements['peak_rss_mb']:7.1f} MB peak RSS, '
+                f'{measurements['transactions']:6d} DB transactions')
+
+        if previous_result and phase in previous_result['phases']:
+            previous_rows_per_second = previous_result['phases'][phase]['rows_per_second']
+            if previous_rows_per_second:
+                change = (measurements['rows_per_second'] / previous_rows_per_second - 1) * 100
+                line += f' ({change:+.1f}% rows/s)'
+
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks the seeder and updater against a synthetic catalog.')
+    parser.add_argument('--countries', type=int, default=2, help='N, the number of countries')
+    parser.add_argument('--shows', type=int, default=1000, help='M, the number of shows')
+    parser.add_argument('--options', type=int, default=2,
+                        help='K, the number of streaming options per show and country')
+    parser.add_argument('--services', type=int, default=3, help='number of services per country')
+    parser.add_argument('--db-name', default='freestreammovies_benchmark',
+                        help='database to use; it is dropped and recreated')
+    parser.add_argument('--label', default='', help='a note to save with the results')
+    parser.add_argument('--no-save', action='store_true', help='do not save the results')
+    args = parser.parse_args()
+
+    parameters = {'countries': args.countries, 'shows': args.shows, 'options': args.options,
+                  'services': args.services}
+
+    # start the stand-in API in this process, and run each phase in a new process
+    catalog = SyntheticCatalog(args.countries, args.shows, args.options, args.services)
+    stand_in_app = create_stand_in_app(catalog)
+    stand_in_state = stand_in_app.extensions['stand_in']
+    server = make_server('localhost', 0, stand_in_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # the API rate limits do not apply to the stand-in
+    os.environ['STREAMING_AVAILABILITY_BASE_URL'] = f'http://localhost:{server.server_port}'
+    os.environ.setdefault('RAPID_API_KEY', 'benchmark')
+    os.environ['SA_API_REQUEST_RATE_LIMIT_PER_SECOND'] = '1000000'
+    os.environ['SA_API_REQUEST_RATE_LIMIT_PER_DAY'] = '1000000000'
+
+    context = multiprocessing.get_context('spawn')
+    result = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'label': args.label,
+        'parameters': parameters,
+        'phases': {}
+    }
+
+    try:
+        for phase in PHASES:
+            api_pages_before = stand_in_state.request_counts.total()
+
+            result_queue = context.Queue()
+            process = context.Process(target=run_phase, args=(phase, args.db_name, result_queue))
+            process.start()
+            measurements = wait_for_phase(phase, process, result_queue)
+            process.join()
+
+            measurements['api_pages'] = stand_in_state.request_counts.total() - api_pages_before
+            measurements['rows_per_second'] = measurements['rows_written'] / measurements['seconds']
+            measurements['api_pages_per_second'] = measurements['api_pages'] / measurements['seconds']
+            result['phases'][phase] = measurements
+
+    finally:
+        server.shutdown()
+
+    print_results(result, find_previous_result(parameters))
+
+    if not args.no_save:
+        os.makedirs(dirname(RESULTS_FILE_LOCATION), exist_ok=True)
+        with open(RESULTS_FILE_LOCATION, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    main()
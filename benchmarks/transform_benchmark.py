@@ -0,0 +1,198 @@
+"""
+Microbenchmark of the Streaming Availability adapter's transforms.
+
+Transforms a full page of synthetic shows (the same shape and size as a page from /shows/search/filters) and reports
+the cost per show of transform_show(), of its movie and streaming option field transforms, and of transform_page().  Results are appended
+to benchmarks/results/transform.jsonl, so that results can be compared across commits.
+
+With --workers, the cost per show of transforming many pages with transform_pages() across that many worker processes
+is also reported, including sending pages to and from the workers, both as parsed shows and as raw response bodies.
+
+Logging from the adapter is turned off while measuring, so that only the transforms are measured.
+
+Example:
+    > py benchmarks/transform_benchmark.py --countries 1 --options 3
+    > py benchmarks/transform_benchmark.py --workers 4
+"""
+
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+import json
+import logging
+import os
+import timeit
+from datetime import datetime, timezone
+
+from benchmarks.seed_update_benchmark import get_git_commit
+from src.adapters import streaming_availability_adapter
+from src.adapters.parallel_transform import (read_shows_from_response_body,
+                                             transform_pages)
+from src.adapters.streaming_availability_adapter import (
+    transform_page, transform_show, transform_show_json_into_movie_dict,
+    transform_streaming_option_json_into_dict)
+from src.stand_in.streaming_availability_stand_in import SEARCH_PAGE_SIZE
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+RESULTS_FILE_LOCATION = join(root_dir, 'benchmarks', 'results', 'transform.jsonl')
+
+# --------------------------------------------------
+
+
+def make_page(num_countries: int, num_options: int) -> list[dict]:
+    """Creates a page of synthetic shows, with streaming options in every country."""
+
+    catalog = SyntheticCatalog(num_countries, SEARCH_PAGE_SIZE, num_options, max(num_options, 1))
+    return [catalog.make_show(index) for index in range(SEARCH_PAGE_SIZE)]
+
+
+def measure_microseconds_per_show(
+        func, page: list[dict], repeat: int, number: int, is_page_func: bool = False
+) -> float:
+    """
+    Runs func on every show of a page, or on the whole page if is_page_func is True, and returns the best time per
+    show, in microseconds.
+    """
+
+    def run_page():
+        if is_page_func:
+            func(page)
+        else:
+            for show in page:
+                func(show)
+
+    best_seconds = min(timeit.repeat(run_page, repeat=repeat, number=number))
+    return best_seconds / (number * len(page)) * 1_000_000
+
+
+def measure_microseconds_per_show_with_workers(
+        page: list[dict], repeat: int, number: int, num_workers: int, is_raw: bool = False
+) -> float:
+    """
+    Transforms number copies of a page with transform_pages() across num_workers worker processes, and returns the
+    best time per show, in microseconds.  Starting the worker processes is included.  If is_raw is True, then the
+    pages are sent to the workers as response bodies, which the workers parse.
+    """
+
+    if is_raw:
+        pages = [json.dumps({'shows': page}).encode()] * number
+        read_page = read_shows_from_response_body
+    else:
+        pages = [page] * number
+        read_page = None
+
+    def run_pages():
+        for _ in transform_pages(pages, num_workers, read_page):
+            pass
+
+    best_seconds = min(timeit.repeat(run_pages, repeat=repeat, number=1))
+    return best_seconds / (number * len(page)) * 1_000_000
+
+
+def transform_streaming_options(show: dict) -> None:
+    """Transforms the fields of every streaming option of a show, without filtering."""
+
+    for country_code, streaming_options in show['streamingOptions'].items():
+        for streaming_option in streaming_options:
+            transform_streaming_option_json_into_dict(streaming_option, show['id'], country_code)
+
+
+def find_previous_result(parameters: dict) -> dict | None:
+    """Finds the latest saved result that was run with the same parameters."""
+
+    previous_result = None
+
+    try:
+        with open(RESULTS_FILE_LOCATION, encoding='utf-8') as f:
+            for line in f:
+                result = json.loads(line)
+                if result['parameters'] == parameters:
+                    previous_result = result
+    except OSError:
+        pass
+
+    return previous_result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks the Streaming Availability adapter transforms.')
+    parser.add_argument('--countries', type=int, default=1, help='number of countries with streaming options')
+    parser.add_argument('--options', type=int, default=3,
+                        help='number of streaming options per show and country')
+    parser.add_argument('--repeat', type=int, default=7, help='number of timing runs; the best is reported')
+    parser.add_argument('--number', type=int, default=200, help='number of pages transformed per timing run')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='also measure transform_pages() with this many worker processes')
+    parser.add_argument('--label', default='', help='a note to save with the results')
+    parser.add_argument('--no-save', action='store_true', help='do not save the results')
+    args = parser.parse_args()
+
+    parameters = {'countries': args.countries, 'options': args.options, 'page_size': SEARCH_PAGE_SIZE}
+    page = make_page(args.countries, args.options)
+
+    streaming_availability_adapter.logger.setLevel(logging.WARNING)
+
+    benchmarks = {
+        'transform_show': transform_show,
+        'movie_fields': transform_show_json_into_movie_dict,
+        'streaming_option_fields': transform_streaming_options,
+    }
+    page_benchmarks = {
+        'transform_page': transform_page,
+    }
+
+    result = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'label': args.label,
+        'parameters': parameters,
+        'microseconds_per_show': {
+            name: measure_microseconds_per_show(func, page, args.repeat, args.number)
+            for name, func in benchmarks.items()
+        } | {
+            name: measure_microseconds_per_show(func, page, args.repeat, args.number, is_page_func=True)
+            for name, func in page_benchmarks.items()
+        }
+    }
+
+    if args.workers:
+        result['microseconds_per_show'][f'transform_pages_{args.workers}_workers'] = \
+            measure_microseconds_per_show_with_workers(page, args.repeat, args.number, args.workers)
+        result['microseconds_per_show'][f'transform_pages_{args.workers}_workers_raw'] = \
+            measure_microseconds_per_show_with_workers(page, args.repeat, args.number, args.workers, is_raw=True)
+
+    previous_result = find_previous_result(parameters)
+
+    print(f'\nCommit {result['commit']}, parameters {parameters}')
+    if previous_result:
+        print(f'Compared to commit {previous_result['commit']} ({previous_result['timestamp']})')
+
+    for name, microseconds in result['microseconds_per_show'].items():
+        line = f'{name:>30}: {microseconds:8.2f} us/show'
+
+        if previous_result and name in previous_result['microseconds_per_show']:
+            change = (microseconds / previous_result['microseconds_per_show'][name] - 1) * 100
+            line += f' ({change:+.1f}%)'
+
+        print(line)
+
+    if not args.no_save:
+        os.makedirs(dirname(RESULTS_FILE_LOCATION), exist_ok=True)
+        with open(RESULTS_FILE_LOCATION, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    main()
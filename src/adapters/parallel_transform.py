@@ -0,0 +1,91 @@
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+from src.adapters.streaming_availability_adapter import transform_page
+from src.util.column_batch import ColumnBatch
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/parallel_transform.log')
+
+# --------------------------------------------------
+
+
+def read_shows_from_response_body(body: bytes) -> list[dict]:
+    """
+    Parses the shows from the body of a response from Streaming Availability API, where shows are either a list (such
+    as from /shows/search/filters) or an object of shows by ID (such as from /changes), or where the body is one show
+    (such as from /shows/{id}).
+
+    :param body: The response body, as JSON bytes.
+    :return: The JSON Show objects.
+    """
+
+    body = json.loads(body)
+    if 'shows' not in body:
+        return [body] if 'id' in body else []
+
+    shows = body['shows']
+    return list(shows.values()) if isinstance(shows, dict) else shows
+
+
+def _read_and_transform_page(page, read_page: Callable | None) -> dict[str, ColumnBatch]:
+    """Reads a page with read_page, if given, and transforms it.  This is run in a worker process."""
+
+    return transform_page(read_page(page) if read_page else page)
+
+
+def transform_pages(
+        pages: Iterable, num_workers: int = 1, read_page: Callable = None
+) -> Iterator[dict[str, ColumnBatch]]:
+    """
+    Transforms pages of show JSON dicts with transform_page(), using a pool of worker processes when num_workers is
+    more than 1, so that transforming many pages, such as when reprocessing saved pages, can use more than one core.
+
+    Pages are sent to the worker processes by pickling them, which costs about half as much as transforming them.  If
+    the pages are available as raw response bodies, then pass those with read_page=read_shows_from_response_body, so
+    that parsing is also done in the workers and sending each page is almost free.
+
+    The transformed pages are yielded in the same order as the pages, no matter which worker finishes first, so
+    merging them in the order that they are yielded gives the same rows, in the same order, as transforming the pages
+    one at a time in a single process.  Only a few pages per worker are transformed ahead of the page that is being
+    yielded, so that pages are not all read into memory at once.
+
+    :param pages: Lists of JSON Show objects, such as the shows of each response from Streaming Availability, or
+        anything that read_page turns into one.
+    :param num_workers: The number of worker processes.  1 or less transforms the pages in this process.
+    :param read_page: A module-level function that turns a page into a list of JSON Show objects.  It is called in
+        the worker processes, so it has to be picklable.
+    :return: A generator of {'movies': ColumnBatch, 'movie_posters': ColumnBatch, 'streaming_options': ColumnBatch},
+        one for each page.
+    """
+
+    if num_workers <= 1:
+        for page in pages:
+            yield _read_and_transform_page(page, read_page)
+        return
+
+    max_pending_pages = num_workers * 2
+
+    logger.info('Transforming pages with %d worker processes.', num_workers)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = deque()
+
+        try:
+            for page in pages:
+                futures.append(executor.submit(_read_and_transform_page, page, read_page))
+
+                if len(futures) >= max_pending_pages:
+                    yield futures.popleft().result()
+
+            while futures:
+                yield futures.popleft().result()
+
+        finally:
+            # pages that have not started are not needed if there was an error or the caller stopped early
+            for future in futures:
+                future.cancel()
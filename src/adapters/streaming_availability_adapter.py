@@ -1,12 +1,21 @@
+import logging
 import time
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
+import requests
+
+from src.adapters.streaming_availability_decoders import decode_show
 from src.common_constants import BLACKLISTED_SERVICES
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
 from src.models.movie import Movie
 from src.models.movie_poster import MoviePoster
 from src.models.streaming_option import StreamingOption
-from src.util.case_transform import CamelToSnake
-from src.util.logger import create_logger
+from src.util.case_transform import SnakeToCamel
+from src.util.column_batch import ColumnBatch
+from src.util.json_stream import JsonObjectStream
+from src.util.logger import SAMPLED, create_logger
 
 # ==================================================
 
@@ -16,6 +25,64 @@ logger = create_logger(__name__, f'src/logs/{log_file_name}.log')
 # --------------------------------------------------
 
 
+def make_field_map(model, converters: dict = None) -> dict[str, tuple[str, Callable | None]]:
+    """
+    Precomputes which keys of Streaming Availability API's camelCase JSON go into which columns of a model, so that
+    JSON objects can be transformed with dict lookups instead of converting every key's case.
+
+    :param model: The model class, such as Movie.
+    :param converters: Extra fields, as {JSON key: (column name, function that converts the JSON value)}.
+    :return: {JSON key: (column name, converter or None)}.
+    """
+
+    field_map = {SnakeToCamel.transform(column_name): (column_name, None)
+                 for column_name in model.__table__.columns.keys()}
+    field_map.update(converters or {})
+
+    return field_map
+
+
+def apply_field_map(field_map: dict[str, tuple[str, Callable | None]], data: dict) -> dict:
+    """
+    Transforms a JSON object into a dict of column names and values, using a field map from make_field_map().
+    Keys that are not in the field map are left out.
+
+    :param field_map: {JSON key: (column name, converter or None)}.
+    :param data: A JSON object from Streaming Availability API.
+    :return: A dict containing model attributes.
+    """
+
+    output = {}
+
+    for attr, val in data.items():
+        field = field_map.get(attr)
+
+        if field:
+            column_name, converter = field
+            output[column_name] = converter(val) if converter else val
+
+    return output
+
+
+MOVIE_FIELD_MAP = make_field_map(Movie)
+
+STREAMING_OPTION_FIELD_MAP = make_field_map(
+    StreamingOption,
+    {'service': ('service_id', lambda service: service['id'])}
+)
+
+# columns and keys of the batches made by transform_page()
+# (Movie columns are in the same order as the model's columns, which is also the order of decode_show()'s values)
+MOVIE_BATCH_COLUMNS = tuple(column_name for column_name, converter in MOVIE_FIELD_MAP.values())
+MOVIE_BATCH_KEY = ('id',)
+MOVIE_POSTER_BATCH_COLUMNS = ('movie_id', 'type', 'size', 'link')
+MOVIE_POSTER_BATCH_KEY = ('movie_id', 'type', 'size')
+STREAMING_OPTION_BATCH_COLUMNS = ('movie_id', 'country_code', 'service_id', 'link', 'expires_soon', 'expires_on')
+STREAMING_OPTION_BATCH_KEY = ('movie_id', 'country_code', 'service_id', 'link')
+
+# --------------------------------------------------
+
+
 def convert_show_json_into_movie_object(show: dict, existing_obj: Movie = None) -> Movie:
     """
     Converts Streaming Availability's Show object into a Movie object.
@@ -40,7 +107,7 @@ def convert_show_json_into_movie_object(show: dict, existing_obj: Movie = None)
     movie.rating = show['rating']
     movie.runtime = show.get('runtime')
 
-    logger.debug(f'Movie = {movie}.')
+    logger.debug('Movie = %s.', movie)
     return movie
 
 
@@ -53,15 +120,9 @@ def transform_show_json_into_movie_dict(show: dict) -> dict:
     :return: A dict containing Movie attributes.
     """
 
-    movie = {}
+    movie = apply_field_map(MOVIE_FIELD_MAP, show)
 
-    for attr, val in show.items():
-        attr = CamelToSnake.transform(attr)
-
-        if attr in Movie.__table__.columns.keys():
-            movie[attr] = val
-
-    logger.debug(f'Transformed movie = {movie}.')
+    logger.debug('Transformed movie = %s.', movie, extra=SAMPLED)
     return movie
 
 
@@ -78,19 +139,11 @@ def transform_streaming_option_json_into_dict(
     :return: A dict containing StreamingOption attributes.
     """
 
-    streaming_option = {}
-
-    for attr, val in streaming_option_data.items():
-        attr = CamelToSnake.transform(attr)
-
-        if attr in StreamingOption.__table__.columns.keys():
-            streaming_option[attr] = val
-
+    streaming_option = apply_field_map(STREAMING_OPTION_FIELD_MAP, streaming_option_data)
     streaming_option['movie_id'] = movie_id
     streaming_option['country_code'] = country_code
-    streaming_option['service_id'] = streaming_option_data['service']['id']
 
-    logger.debug(f'Transformed streaming option = {streaming_option}.')
+    logger.debug('Transformed streaming option = %s.', streaming_option, extra=SAMPLED)
     return streaming_option
 
 
@@ -118,10 +171,25 @@ def transform_image_set_json_into_movie_poster_list(image_set: dict, movie_id: s
                     'link': link
                 })
 
-    logger.debug(f'Transformed movie posters = {movie_posters}')
+    logger.debug('Transformed movie posters = %s.', movie_posters, extra=SAMPLED)
     return movie_posters
 
 
+def is_free_streaming_option(streaming_option_data: dict, current_timestamp: float) -> bool:
+    """
+    Checks if a streaming option is free, is not from a blacklisted service, and has not expired.
+
+    :param streaming_option_data: JSON data for one streaming option.
+    :param current_timestamp: The current time, to check the expiry date against.
+    :return: True if the streaming option should be saved.
+    """
+
+    return streaming_option_data['type'] == 'free' \
+        and streaming_option_data['service']['id'].lower() not in BLACKLISTED_SERVICES \
+        and (streaming_option_data['expiresOn'] > current_timestamp
+             if 'expiresOn' in streaming_option_data else True)
+
+
 def gather_streaming_options(country_streaming_options_data: dict, movie_id: str) -> list[dict]:
     """
     Goes through lists of streaming options from within a Show object from Streaming Availability
@@ -140,19 +208,13 @@ def gather_streaming_options(country_streaming_options_data: dict, movie_id: str
     for country_code, streaming_options_data in country_streaming_options_data.items():
 
         for streaming_option_data in streaming_options_data:
-            if streaming_option_data['type'] == 'free' \
-                    and streaming_option_data['service']['id'].lower() not in BLACKLISTED_SERVICES \
-                    and (streaming_option_data['expiresOn'] > current_timestamp
-                         if 'expiresOn' in streaming_option_data else True):
+            if is_free_streaming_option(streaming_option_data, current_timestamp):
 
                 streaming_option = transform_streaming_option_json_into_dict(
                     streaming_option_data, movie_id, country_code)
                 streaming_options.append(streaming_option)
 
-    for streaming_option in streaming_options:
-        logger.info(f'Transformed {streaming_option['movie_id']}-'
-                    f'{streaming_option['country_code']}-'
-                    f'{streaming_option['service_id']}.')
+    logger.debug('Gathered %d free streaming options for Movie %s.', len(streaming_options), movie_id, extra=SAMPLED)
     return streaming_options
 
 
@@ -172,18 +234,147 @@ def transform_show(show: dict) -> dict:
     output = {}
 
     movie = transform_show_json_into_movie_dict(show)
-    logger.info(f'Transformed Movie {movie['id']} ({movie['title']}).')
     output['movies'] = [movie]
 
     movie_posters = transform_image_set_json_into_movie_poster_list(
         show['imageSet'], show['id'])
-    logger.info(f'Transformed {len(movie_posters)} posters from Movie {show['id']} '
-                f'({show['title']}).')
     output['movie_posters'] = movie_posters
 
     streaming_options = gather_streaming_options(show['streamingOptions'], show['id'])
-    logger.info(f'Transformed {len(streaming_options)} streaming options for Movie {show['id']} '
-                f'({show['title']}).')
     output['streaming_options'] = streaming_options
 
+    logger.debug('Transformed Movie %s (%s) into %d posters and %d streaming options.',
+                 show['id'], show['title'], len(movie_posters), len(streaming_options), extra=SAMPLED)
+
     return output
+
+
+def _pass_chunks_to(chunks: Iterable[bytes], on_chunk: Callable[[bytes], None]) -> Iterator[bytes]:
+    """Yields chunks, after passing each one to on_chunk."""
+
+    for chunk in chunks:
+        on_chunk(chunk)
+        yield chunk
+
+
+def read_show_page(
+        resp: requests.Response, stream: bool = False, chunk_size: int = 65536,
+        on_chunk: Callable[[bytes], None] = None
+) -> tuple[Iterator[dict], dict]:
+    """
+    Reads the shows from a successful response from Streaming Availability API, where the shows are either a list or a
+    dict of {show ID: show}.
+
+    If stream is True, then the response body is parsed incrementally while the shows are iterated over, so that only
+    one show is decoded at a time, instead of the whole body.  The response has to have been requested with
+    stream=True.  The other fields of the body, such as hasMore, are only complete after all shows are iterated over.
+
+    :param resp: The response.
+    :param stream: Whether to parse the response body incrementally.
+    :param chunk_size: The number of bytes to read from the response at a time, when streaming.
+    :param on_chunk: Called with the raw bytes of the body, as they are read, such as for archiving the body.  When
+        streaming, the whole body has been passed to it after all shows are iterated over.
+    :return: An iterator of the JSON Show objects and a dict of the body's other fields.
+    """
+
+    if stream:
+        chunks = resp.iter_content(chunk_size=chunk_size)
+        if on_chunk:
+            chunks = _pass_chunks_to(chunks, on_chunk)
+
+        body = JsonObjectStream(chunks, 'shows')
+        return body.iter_items(), body.fields
+
+    if on_chunk:
+        on_chunk(resp.content)
+
+    body = resp.json()
+    shows = body.pop('shows')
+    if isinstance(shows, dict):
+        shows = shows.values()
+
+    return iter(shows), body
+
+
+def make_page_batches() -> dict[str, ColumnBatch]:
+    """
+    Creates empty batches for the tables that shows are saved into.
+
+    :return: {'movies': ColumnBatch, 'movie_posters': ColumnBatch, 'streaming_options': ColumnBatch}
+    """
+
+    return {
+        'movies': ColumnBatch(MOVIE_BATCH_COLUMNS, MOVIE_BATCH_KEY),
+        'movie_posters': ColumnBatch(MOVIE_POSTER_BATCH_COLUMNS, MOVIE_POSTER_BATCH_KEY),
+        'streaming_options': ColumnBatch(STREAMING_OPTION_BATCH_COLUMNS, STREAMING_OPTION_BATCH_KEY)
+    }
+
+
+def transform_page(shows: Iterable[dict]) -> dict[str, ColumnBatch]:
+    """
+    Transforms a page of show JSON dicts from Streaming Availability API into column-oriented batches of Movie,
+    MoviePoster, and StreamingOption data, which can be written in bulk.  This does the same as transform_show(),
+    but for many shows at once, and rows with the same key are only kept once (the last one is kept).
+
+    Each show is decoded and validated with decode_show() before any of its rows are added.  A show that is missing a
+    field or has a field of the wrong type is skipped, and the field is logged.
+
+    :param shows: The JSON Show objects retrieved from a response from Streaming Availability.
+    :return: {'movies': ColumnBatch, 'movie_posters': ColumnBatch, 'streaming_options': ColumnBatch}
+    """
+
+    batches = make_page_batches()
+    movies = batches['movies']
+    movie_posters = batches['movie_posters']
+    streaming_options = batches['streaming_options']
+
+    current_timestamp = time.time()
+    is_debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+    # counters for the summary that is logged for the whole page, instead of logging each row
+    num_shows = 0
+    num_invalid_shows = 0
+    num_streaming_options_skipped = 0
+
+    for show_data in shows:
+        num_shows += 1
+
+        try:
+            show = decode_show(show_data)
+        except StreamingAvailabilityPayloadError as e:
+            num_invalid_shows += 1
+            logger.warning('Skipping a malformed show: %s', e.message)
+            continue
+
+        movie_id = show.id
+
+        if is_debug_enabled:
+            logger.debug('Transforming Movie %s (%s).', movie_id, show.title, extra=SAMPLED)
+
+        movies.add_row(*show.movie_values)
+
+        for poster_type, poster_size, link in show.posters:
+            movie_posters.add_row(movie_id, poster_type, poster_size, link)
+
+        for country_code, country_streaming_options in show.streaming_options.items():
+            for streaming_option in country_streaming_options:
+                if streaming_option.type == 'free' \
+                        and streaming_option.service_id.lower() not in BLACKLISTED_SERVICES \
+                        and (streaming_option.expires_on is None or streaming_option.expires_on > current_timestamp):
+                    streaming_options.add_row(
+                        movie_id,
+                        country_code,
+                        streaming_option.service_id,
+                        streaming_option.link,
+                        streaming_option.expires_soon,
+                        streaming_option.expires_on
+                    )
+                else:
+                    num_streaming_options_skipped += 1
+
+    logger.info('Transformed a page of %d shows into %d movies, %d posters, and %d streaming options '
+                '(%d malformed shows were skipped, and %d streaming options were not free or had expired).',
+                num_shows, len(movies), len(movie_posters), len(streaming_options),
+                num_invalid_shows, num_streaming_options_skipped)
+
+    return batches
@@ -0,0 +1,249 @@
+from collections.abc import Mapping
+
+from sqlalchemy import Integer
+from sqlalchemy.dialects import postgresql
+
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
+from src.models.movie import Movie
+from src.models.movie_poster import MoviePoster
+from src.util.case_transform import SnakeToCamel
+
+# ==================================================
+
+_POSTER_TYPES = tuple(poster_type.value for poster_type in MoviePoster.Types)
+_VERTICAL_POSTER_SIZES = frozenset(MoviePoster.VerticalSizes)
+
+# --------------------------------------------------
+
+
+def _compile_movie_fields() -> tuple[tuple[str, type, bool], ...]:
+    """
+    Creates the decoding rules for the Movie fields of a Show object from the Movie model, in the same order as the
+    model's columns.
+
+    :return: ((JSON key, expected type, is required), ...)
+    """
+
+    fields = []
+
+    for column in Movie.__table__.columns:
+        if isinstance(column.type, postgresql.ARRAY):
+            expected_type = list
+        elif isinstance(column.type, Integer):
+            expected_type = int
+        else:
+            expected_type = str
+
+        fields.append((SnakeToCamel.transform(column.name), expected_type, not column.nullable))
+
+    return tuple(fields)
+
+
+_MOVIE_FIELDS = _compile_movie_fields()
+_MOVIE_ID_INDEX = Movie.__table__.columns.keys().index('id')
+_MOVIE_TITLE_INDEX = Movie.__table__.columns.keys().index('title')
+
+
+def _make_error(field: str, problem: str) -> StreamingAvailabilityPayloadError:
+    """Creates an error for a field, where the message starts with the quoted field."""
+
+    return StreamingAvailabilityPayloadError(f'"{field}" {problem}.', field)
+
+
+def _prefix_error(e: StreamingAvailabilityPayloadError, path: str) -> StreamingAvailabilityPayloadError:
+    """
+    Creates an error for the same problem, with the path of the object that contains the field in front of the field.
+    Paths are only built when there is an error, so that decoding valid data does not build strings.
+    """
+
+    field = f'{path}.{e.field}' if e.field else path
+    return StreamingAvailabilityPayloadError(e.message.replace(f'"{e.field}"', f'"{field}"', 1), field)
+
+
+def _check_object(data, field: str = '') -> None:
+    """Checks that a value is a JSON object.  Read-only mappings are also accepted, since they are only read."""
+
+    # most values are plain dicts, so this is checked first
+    if type(data) is not dict and not isinstance(data, Mapping):
+        raise _make_error(field, f'should be an object, but is {type(data).__name__}')
+
+
+def _decode_field(data: dict, key: str, expected_type: type, is_required: bool = True):
+    """
+    Gets a field from a JSON object and checks its type.  Lists are checked to only contain strings.
+
+    :param data: The JSON object.
+    :param key: The field's key.
+    :param expected_type: The type that the field's value should be.
+    :param is_required: Whether the field can be missing or null.
+    :return: The field's value, or None if it is missing and not required.
+    :raise StreamingAvailabilityPayloadError: If the field is required but missing, or has the wrong type.
+    """
+
+    value = data.get(key)
+
+    # most values have exactly the expected type, so this is checked first
+    if type(value) is not expected_type:
+        if value is None:
+            if is_required:
+                raise _make_error(key, 'is missing')
+            return None
+
+        # bool is a subclass of int, but is not a valid int here
+        if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+            raise _make_error(key, f'should be {expected_type.__name__}, but is {type(value).__name__}')
+
+    if expected_type is list:
+        for i, item in enumerate(value):
+            if type(item) is not str:
+                raise _make_error(f'{key}[{i}]', f'should be str, but is {type(item).__name__}')
+
+    return value
+
+
+class DecodedStreamingOption:
+    """The fields of a StreamingOption JSON object that are saved."""
+
+    __slots__ = ('type', 'service_id', 'link', 'expires_soon', 'expires_on')
+
+    def __init__(self, type: str, service_id: str, link: str, expires_soon: bool, expires_on: int | None):
+        self.type = type
+        self.service_id = service_id
+        self.link = link
+        self.expires_soon = expires_soon
+        self.expires_on = expires_on
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.service_id!r}, {self.type!r}, {self.link!r})'
+
+
+class DecodedShow:
+    """
+    The fields of a Show JSON object that are saved.
+
+    movie_values are the Movie column values, in the same order as the Movie model's columns.
+    posters are (type, size, link) tuples of the vertical posters.
+    streaming_options are {country code: (DecodedStreamingOption, ...)}.
+    """
+
+    __slots__ = ('id', 'title', 'movie_values', 'posters', 'streaming_options')
+
+    def __init__(self, movie_values: tuple, posters: tuple, streaming_options: dict):
+        self.id = movie_values[_MOVIE_ID_INDEX]
+        self.title = movie_values[_MOVIE_TITLE_INDEX]
+        self.movie_values = movie_values
+        self.posters = posters
+        self.streaming_options = streaming_options
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.id!r}, {self.title!r})'
+
+
+def decode_streaming_option(data: dict) -> DecodedStreamingOption:
+    """
+    Decodes and validates a StreamingOption JSON object.
+
+    :param data: The StreamingOption JSON object.
+    :return: A DecodedStreamingOption.
+    :raise StreamingAvailabilityPayloadError: If a field is missing or has the wrong type.
+    """
+
+    _check_object(data)
+
+    service = _decode_field(data, 'service', dict)
+    try:
+        service_id = _decode_field(service, 'id', str)
+    except StreamingAvailabilityPayloadError as e:
+        raise _prefix_error(e, 'service')
+
+    streaming_option_type = data.get('type')
+    link = data.get('link')
+    expires_soon = data.get('expiresSoon')
+    expires_on = data.get('expiresOn')
+
+    # only fields that do not have exactly the expected type need to be checked further
+    if type(streaming_option_type) is not str:
+        streaming_option_type = _decode_field(data, 'type', str)
+    if type(link) is not str:
+        link = _decode_field(data, 'link', str)
+    if type(expires_soon) is not bool:
+        expires_soon = _decode_field(data, 'expiresSoon', bool)
+    if expires_on is not None and type(expires_on) is not int:
+        expires_on = _decode_field(data, 'expiresOn', int, is_required=False)
+
+    return DecodedStreamingOption(streaming_option_type, service_id, link, expires_soon, expires_on)
+
+
+def decode_image_set(data: dict) -> tuple[tuple[str, str, str], ...]:
+    """
+    Decodes and validates an ImageSet JSON object, keeping only the poster types and sizes that are saved.
+
+    :param data: The ImageSet JSON object.
+    :return: ((poster type, size, link), ...)
+    :raise StreamingAvailabilityPayloadError: If a poster type is missing or a link is not a string.
+    """
+
+    posters = []
+
+    for poster_type in _POSTER_TYPES:
+        links = _decode_field(data, poster_type, dict)
+
+        for poster_size, link in links.items():
+            if poster_size.lower() in _VERTICAL_POSTER_SIZES:
+                if type(link) is not str:
+                    raise _make_error(f'{poster_type}.{poster_size}', f'should be str, but is {type(link).__name__}')
+                posters.append((poster_type, poster_size, link))
+
+    return tuple(posters)
+
+
+def decode_show(data: dict) -> DecodedShow:
+    """
+    Decodes and validates a Show JSON object from Streaming Availability API in one pass, keeping only the fields that
+    are saved.  This way, a malformed show is found before anything is saved for it, and the error names the field.
+
+    :param data: The Show JSON object.
+    :return: A DecodedShow.
+    :raise StreamingAvailabilityPayloadError: If a field is missing or has the wrong type.  The field's path starts
+        with the show's ID, if it has one, such as "show 123.streamingOptions.us[0].service.id".
+    """
+
+    show_id = data.get('id') if type(data) is dict else None
+    path = f'show {show_id}' if type(show_id) is str else 'show'
+
+    try:
+        _check_object(data)
+
+        # values that have exactly the expected type are taken without calling _decode_field(), since most do
+        movie_values = []
+        for key, expected_type, is_required in _MOVIE_FIELDS:
+            value = data.get(key)
+            if type(value) is not expected_type or expected_type is list:
+                value = _decode_field(data, key, expected_type, is_required)
+            movie_values.append(value)
+
+        try:
+            posters = decode_image_set(_decode_field(data, 'imageSet', dict))
+        except StreamingAvailabilityPayloadError as e:
+            raise _prefix_error(e, 'imageSet') if e.field != 'imageSet' else e
+
+        streaming_options = {}
+        for country_code, streaming_options_data in _decode_field(data, 'streamingOptions', dict).items():
+            if type(streaming_options_data) is not list:
+                raise _make_error(f'streamingOptions.{country_code}',
+                                  f'should be list, but is {type(streaming_options_data).__name__}')
+
+            decoded_streaming_options = []
+            for i, streaming_option_data in enumerate(streaming_options_data):
+                try:
+                    decoded_streaming_options.append(decode_streaming_option(streaming_option_data))
+                except StreamingAvailabilityPayloadError as e:
+                    raise _prefix_error(e, f'streamingOptions.{country_code}[{i}]')
+
+            streaming_options[country_code] = tuple(decoded_streaming_options)
+
+    except StreamingAvailabilityPayloadError as e:
+        raise _prefix_error(e, path)
+
+    return DecodedShow(tuple(movie_values), posters, streaming_options)
@@ -8,7 +8,9 @@ sys.path.append(root_dir)  # nopep8
 
 # --------------------------------------------------
 
+import atexit
 import os
+import re
 
 import flask_login
 from dotenv import load_dotenv
@@ -18,29 +20,60 @@ from flask_login import LoginManager
 
 from src.exceptions.base_exceptions import FreeStreamMoviesError
 from src.exceptions.DatabaseError import DatabaseError
+from src.exceptions.StreamingAvailabilityApiUnavailableError import \
+    StreamingAvailabilityApiUnavailableError
 from src.exceptions.UserRegistrationError import UserRegistrationError
 from src.forms.user_forms import LoginUserForm, RegisterUserForm
 from src.models.common import connect_db, db
 from src.models.country_service import CountryService
+from src.models.country_traffic import CountryTraffic
 from src.models.movie import Movie
+from src.models.movie_fetch import MovieFetch
 from src.models.movie_poster import MoviePoster
 from src.models.service import Service
 from src.models.streaming_option import StreamingOption
 from src.models.user import User
+from src.seed.seed_updater_constants import (
+    SA_API_KEY_COOLDOWN_SECONDS, SA_RESPONSE_ARCHIVE_DIR,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND)
 from src.services.app_service import AppService
+from src.util.api_key_pool import ApiKeyPool
+from src.util.batched_counter import BatchedCounter
 from src.util.client_input_validations import has_comma_in_query_parameters
 from src.util.logger import create_logger
+from src.util.response_archive import ResponseArchive
 
 # ==================================================
 
 load_dotenv()
 RAPID_API_KEY = os.environ.get('RAPID_API_KEY')
-STREAMING_AVAILABILITY_BASE_URL = "https://streaming-availability.p.rapidapi.com"
+# several keys can be given as a comma-separated list, each with its own rate limit and daily quota
+RAPID_API_KEYS = [key.strip() for key in os.environ.get('RAPID_API_KEYS', '').split(',') if key.strip()] \
+    or [RAPID_API_KEY]
+# can be pointed at a local stand-in of Streaming Availability API (see src/stand_in) for testing
+STREAMING_AVAILABILITY_BASE_URL = os.environ.get(
+    'STREAMING_AVAILABILITY_BASE_URL', "https://streaming-availability.p.rapidapi.com")
 
 COOKIE_COUNTRY_CODE_NAME = 'countryCode'
 DEFAULT_COUNTRY_CODE = 'us'
 
-app_service = AppService(RAPID_API_KEY)
+# how often the numbers of requests from each country are saved, in seconds
+TRAFFIC_FLUSH_INTERVAL_SECONDS = int(os.environ.get('TRAFFIC_FLUSH_INTERVAL_SECONDS', 60))
+
+# shared by the web app, the seeder, and the updater, when they run in the same process.  Each key's daily quota is
+# also shared through the database with the other processes.
+api_key_pool = ApiKeyPool(
+    RAPID_API_KEYS,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY,
+    SA_API_KEY_COOLDOWN_SECONDS,
+    'streaming_availability_api_key_daily')
+
+# raw response bodies from the web app, the seeder, and the updater are kept, so that they can be reprocessed
+response_archive = ResponseArchive(SA_RESPONSE_ARCHIVE_DIR)
+
+app_service = AppService(api_key_pool, STREAMING_AVAILABILITY_BASE_URL, response_archive)
 
 logger = create_logger(__name__, 'src/logs/app.log')
 
@@ -73,6 +106,38 @@ def create_app(db_name, testing=False):
             SQLALCHEMY_ECHO=True
         )
 
+    # requests are counted in memory, and saved in batches, so that counting does not add a write to every request
+    traffic_counter = BatchedCounter(CountryTraffic.add_counts, TRAFFIC_FLUSH_INTERVAL_SECONDS)
+
+    # details page views of movies in each country are counted the same way, so that the refresher can refresh the
+    # movies that are viewed the most
+    movie_view_counter = BatchedCounter(MovieFetch.add_views, TRAFFIC_FLUSH_INTERVAL_SECONDS)
+
+    def flush_traffic_counter():
+        with app.app_context():
+            traffic_counter.flush()
+            movie_view_counter.flush()
+
+    # counts that have not been saved yet are saved when the app's process exits
+    if not testing:
+        atexit.register(flush_traffic_counter)
+
+    @app.before_request
+    def count_country_traffic():
+        """
+        Counts the request for the country that it is for, so that the seeder and updater can spend the Streaming
+        Availability API request quota on the countries that users view.
+        """
+
+        if request.endpoint in (None, 'static'):
+            return
+
+        country_code = (request.view_args or {}).get('country_code') \
+            or request.cookies.get(COOKIE_COUNTRY_CODE_NAME, DEFAULT_COUNTRY_CODE)
+
+        if re.fullmatch('[a-z]{2}', country_code):
+            traffic_counter.increment(country_code)
+
     # --------------------------------------------------
     #
     # --------------------------------------------------
@@ -245,7 +310,10 @@ def create_app(db_name, testing=False):
 
     @app.route('/movies')
     def search_titles():
-        """Calls Streaming Availability API to search for a specific movie."""
+        """
+        Calls Streaming Availability API to search for a specific movie.  If the API is unavailable, then searches
+        the movies in the database instead.
+        """
 
         try:
             country_code = request.cookies.get(COOKIE_COUNTRY_CODE_NAME, DEFAULT_COUNTRY_CODE)
@@ -254,8 +322,14 @@ def create_app(db_name, testing=False):
             if not title:
                 return redirect(url_for("home"))
 
-            movies = app_service.search_movies_by_title(country_code, title)
-            return render_template("movies/search_results.html", movies=movies)
+            try:
+                movies = app_service.search_movies_by_title(country_code, title)
+                is_local_search = False
+            except StreamingAvailabilityApiUnavailableError:
+                movies = app_service.search_local_movies_by_title(country_code, title)
+                is_local_search = True
+
+            return render_template("movies/search_results.html", movies=movies, is_local_search=is_local_search)
 
         except FreeStreamMoviesError as e:
             return render_template(
@@ -273,15 +347,20 @@ def create_app(db_name, testing=False):
 
     @app.route('/movie/<movie_id>')
     def movie_details_page(movie_id):
-        """Displays a specified movie's details page."""
+        """
+        Displays a specified movie's details page.  Movies that are in the database are displayed without calling
+        Streaming Availability API, so they can still be displayed while the API is unavailable.
+        """
 
         try:
+            country_code = request.cookies.get(COOKIE_COUNTRY_CODE_NAME, DEFAULT_COUNTRY_CODE)
             movie = db.session.get(Movie, movie_id)
 
             if not movie:
-                movie = app_service.get_movie_data(movie_id)
+                movie = app_service.get_movie_data(movie_id, country_code)
+
+            movie_view_counter.increment((movie.id, country_code))
 
-            country_code = request.cookies.get(COOKIE_COUNTRY_CODE_NAME, DEFAULT_COUNTRY_CODE)
             streaming_options = db.session.query(StreamingOption).filter_by(
                 country_code=country_code, movie_id=movie.id).all()
 
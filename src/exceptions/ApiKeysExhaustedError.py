@@ -0,0 +1,9 @@
+from src.exceptions.StreamingAvailabilityApiUnavailableError import \
+    StreamingAvailabilityApiUnavailableError
+
+
+class ApiKeysExhaustedError(StreamingAvailabilityApiUnavailableError):
+    """Represents when no API key can make another call, because every key is out of its daily quota or is refused."""
+
+    def __init__(self, message, status_code=503):
+        super().__init__(message, status_code)
@@ -0,0 +1,9 @@
+from src.exceptions.StreamingAvailabilityApiError import \
+    StreamingAvailabilityApiError
+
+
+class StreamingAvailabilityApiUnavailableError(StreamingAvailabilityApiError):
+    """Represents when calls to Streaming Availability API are stopped, because it has been failing."""
+
+    def __init__(self, message, status_code=503):
+        super().__init__(message, status_code)
@@ -0,0 +1,10 @@
+from src.exceptions.StreamingAvailabilityApiError import \
+    StreamingAvailabilityApiError
+
+
+class StreamingAvailabilityPayloadError(StreamingAvailabilityApiError):
+    """Represents when Streaming Availability API returns JSON that is missing a field or has a wrongly typed field."""
+
+    def __init__(self, message, field, status_code=502):
+        super().__init__(message, status_code)
+        self.field = field
@@ -0,0 +1,84 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+
+from src.models.common import db
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/checkpoint.log')
+
+# --------------------------------------------------
+
+
+class Checkpoint(db.Model):
+    """
+    Represents where a job (such as seeding or updating) should continue from for a country.  For example, this can be
+    the next cursor for seeding or the next "from" timestamp for updating.
+    """
+
+    __tablename__ = 'checkpoints'
+
+    job = db.Column(
+        db.Text,
+        primary_key=True
+    )
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    value = db.Column(
+        db.Text,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """Show info about checkpoint."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def get_checkpoints(cls, job: str) -> dict:
+        """
+        Retrieves all of the checkpoints for a job.
+
+        :param job: The name of the job to get checkpoints for.
+        :return: {country_code: value}.
+        """
+
+        try:
+            checkpoints = db.session.query(cls).filter_by(job=job).all()
+        except DBAPIError as e:
+            db.session.rollback()
+            logger.error(f'Error occurred when retrieving checkpoints for job "{job}".\n'
+                         f'exception =\n{str(e)}')
+            raise e
+
+        return {checkpoint.country_code: checkpoint.value for checkpoint in checkpoints}
+
+    @classmethod
+    def upsert_database(cls, job: str, checkpoints: dict) -> None:
+        """
+        Inserts new checkpoints for a job, or overwrites the existing ones.  Values are stored as strings.
+
+        This performs an session.execute(), which will later need to be committed.  Checkpoints should be committed
+        in the same transaction as the data that they are for, so that a job never skips data that was not saved.
+
+        :param job: The name of the job that the checkpoints belong to.
+        :param checkpoints: {country_code: value}.
+        """
+
+        if len(checkpoints) > 0:
+            stmt = postgresql.insert(cls).values([
+                {'job': job, 'country_code': country_code, 'value': str(value)}
+                for country_code, value in checkpoints.items()
+            ])
+
+            stmt = stmt.on_conflict_do_update(
+                constraint=f'{cls.__tablename__}_pkey',
+                set_={'value': stmt.excluded.value}
+            )
+
+            db.session.execute(stmt)
@@ -1,6 +1,14 @@
 
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import (Select, bindparam, cast, func, literal_column, or_,
+                        select)
+from sqlalchemy.dialects import postgresql
+
+from src.util.column_batch import ColumnBatch
 
 # ==================================================
 
@@ -15,3 +23,128 @@ def connect_db(app: Flask):
     with app.app_context():
         db.app = app
         db.init_app(app)
+
+
+@contextmanager
+def advisory_lock(name: str, is_shared: bool = False) -> Iterator[bool]:
+    """
+    Tries to take a PostgreSQL session-level advisory lock, without waiting, and holds it until the with block ends.
+    The lock is held by its own database connection, so commits and rollbacks of the session do not release it, and
+    it is released by PostgreSQL if the process dies.
+
+    A shared lock can be held by any number of processes at once, but not while another process holds the exclusive
+    lock of the same name.
+
+    Example:
+        with advisory_lock('jobs') as is_locked:
+            if is_locked:
+                ...
+
+    :param name: The name of the lock.  Processes that use the same name exclude each other.
+    :param is_shared: Whether to take the lock in shared mode, instead of exclusive mode.
+    :return: A context manager that gives True if the lock was taken, or False if another process holds it.
+    """
+
+    key = func.hashtext(name)
+    try_lock, unlock = (func.pg_try_advisory_lock_shared, func.pg_advisory_unlock_shared) if is_shared \
+        else (func.pg_try_advisory_lock, func.pg_advisory_unlock)
+
+    with db.engine.connect() as connection:
+        is_locked = connection.execute(select(try_lock(key))).scalar()
+        connection.commit()
+
+        try:
+            yield is_locked
+        finally:
+            if is_locked:
+                connection.execute(select(unlock(key)))
+                connection.commit()
+
+
+def to_array_literal(values: list[str] | None) -> str | None:
+    """Converts a list of strings into a PostgreSQL array literal, such as '{"a","b"}'."""
+
+    if values is None:
+        return None
+
+    elements = ('"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values)
+    return '{' + ','.join(elements) + '}'
+
+
+def select_from_column_batch(model, batch: ColumnBatch) -> Select:
+    """
+    Creates a SELECT that returns a batch's rows, by passing each column as one array parameter and unnesting
+    the arrays together.  This can be used with insert().from_select() to write a whole batch in one statement, with
+    one parameter per column instead of one per value.
+
+    Array columns (such as Movie.cast) are passed as array literals, since unnesting an array of arrays would flatten
+    it.
+
+    :param model: The model class of the table that the batch is for.
+    :param batch: The rows to select.
+    :return: A SELECT of the batch's columns, in the same order as batch.column_names.
+    """
+
+    arrays = []
+    array_column_names = set()
+
+    for column_name in batch.column_names:
+        column_type = model.__table__.columns[column_name].type
+        values = batch.columns[column_name]
+
+        if isinstance(column_type, postgresql.ARRAY):
+            array_column_names.add(column_name)
+            column_type = db.Text()
+            values = [to_array_literal(value) for value in values]
+
+        array_type = postgresql.ARRAY(column_type)
+        arrays.append(cast(bindparam(f'{column_name}_values', values, type_=array_type), array_type))
+
+    unnested = func.unnest(*arrays).table_valued(*batch.column_names).render_derived()
+
+    return select(*[
+        cast(unnested.c[column_name], model.__table__.columns[column_name].type)
+        if column_name in array_column_names else unnested.c[column_name]
+        for column_name in batch.column_names
+    ])
+
+
+def make_upsert_counts(num_inserted: int = 0, num_updated: int = 0, num_unchanged: int = 0) -> dict[str, int]:
+    """Makes the counts of rows that an upsert inserted, updated, and left unchanged."""
+
+    return {'num_inserted': num_inserted, 'num_updated': num_updated, 'num_unchanged': num_unchanged}
+
+
+def upsert_if_changed(
+        model, stmt: postgresql.Insert, column_names: Iterable[str], num_rows: int
+) -> dict[str, int]:
+    """
+    Executes an INSERT as an upsert on the table's primary key, which only updates an existing row when at least one
+    of the given columns has a different value (IS DISTINCT FROM, so that NULLs are compared too).  Rows that have not
+    changed are not written at all, so that they do not leave dead tuples, write-ahead log, or index entries behind.
+
+    Inserted rows are told apart from updated ones by PostgreSQL's xmax system column, which is 0 for a row that was
+    just inserted.
+
+    This performs an session.execute(), which will later need to be committed.
+
+    :param model: The model class of the table.
+    :param stmt: The INSERT statement, with its values or SELECT.
+    :param column_names: The columns to compare and update, which should not include the primary key.
+    :param num_rows: The number of rows that stmt inserts.
+    :return: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}.
+    """
+
+    columns = model.__table__.columns
+    column_names = list(column_names)
+
+    stmt = stmt.on_conflict_do_update(
+        constraint=f'{model.__tablename__}_pkey',
+        set_={name: stmt.excluded[name] for name in column_names},
+        where=or_(*[columns[name].is_distinct_from(stmt.excluded[name]) for name in column_names])
+    ).returning(literal_column('xmax = 0'))
+
+    were_inserted = db.session.execute(stmt).scalars().all()
+    num_inserted = sum(were_inserted)
+
+    return make_upsert_counts(num_inserted, len(were_inserted) - num_inserted, num_rows - len(were_inserted))
@@ -0,0 +1,96 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+
+from src.models.common import db
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/country_change_rate.log')
+
+# --------------------------------------------------
+
+
+class CountryChangeRate(db.Model):
+    """
+    Represents how often a country's movies and streaming options change, according to a job's past requests for
+    changes, and when the job should next request the country's changes.
+    """
+
+    __tablename__ = 'country_change_rates'
+
+    job = db.Column(
+        db.Text,
+        primary_key=True
+    )
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    # average number of changed movies per day
+    changes_per_day = db.Column(
+        db.Float,
+        nullable=False
+    )
+
+    next_poll_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """Show info about country change rate."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def get_change_rates(cls, job: str) -> dict:
+        """
+        Retrieves the change rates of all countries for a job.
+
+        :param job: The name of the job to get change rates for.
+        :return: {country_code: {'changes_per_day': float, 'next_poll_at': datetime}}.
+        """
+
+        try:
+            change_rates = db.session.query(cls).filter_by(job=job).all()
+        except DBAPIError as e:
+            db.session.rollback()
+            logger.error(f'Error occurred when retrieving change rates for job "{job}".\n'
+                         f'exception =\n{str(e)}')
+            raise e
+
+        return {
+            change_rate.country_code: {
+                'changes_per_day': change_rate.changes_per_day,
+                'next_poll_at': change_rate.next_poll_at
+            }
+            for change_rate in change_rates
+        }
+
+    @classmethod
+    def upsert_database(cls, job: str, change_rates: dict) -> None:
+        """
+        Inserts new change rates for a job, or overwrites the existing ones.
+
+        This performs an session.execute(), which will later need to be committed.  Change rates should be committed
+        in the same transaction as the checkpoints that they were measured up to.
+
+        :param job: The name of the job that the change rates belong to.
+        :param change_rates: {country_code: {'changes_per_day': float, 'next_poll_at': datetime}}.
+        """
+
+        if len(change_rates) > 0:
+            stmt = postgresql.insert(cls).values([
+                {'job': job, 'country_code': country_code, **change_rate}
+                for country_code, change_rate in change_rates.items()
+            ])
+
+            stmt = stmt.on_conflict_do_update(
+                constraint=f'{cls.__tablename__}_pkey',
+                set_={'changes_per_day': stmt.excluded.changes_per_day, 'next_poll_at': stmt.excluded.next_poll_at}
+            )
+
+            db.session.execute(stmt)
@@ -1,5 +1,8 @@
 from typing import Self
 
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects import postgresql
+
 from src.models.common import db
 
 # ==================================================
@@ -45,3 +48,40 @@ class CountryService(db.Model):
             output[country_service.country_code] = services
 
         return output
+
+    @classmethod
+    def upsert_database(cls, country_codes_and_service_ids: list[tuple[str, str]]) -> None:
+        """
+        Inserts mappings of countries and streaming services into the PostgreSQL database, in one statement.  Mappings
+        that already exist are left as they are.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param country_codes_and_service_ids: (country code, service ID) pairs.
+        """
+
+        if len(country_codes_and_service_ids) > 0:
+            stmt = postgresql.insert(cls).values([
+                {'country_code': country_code, 'service_id': service_id}
+                for country_code, service_id in country_codes_and_service_ids
+            ])
+
+            db.session.execute(stmt.on_conflict_do_nothing(constraint=f'{cls.__tablename__}_pkey'))
+
+    @classmethod
+    def delete_all_except(cls, country_codes_and_service_ids: list[tuple[str, str]]) -> int:
+        """
+        Deletes every mapping of a country and a streaming service that is not one of the given ones, in one statement,
+        such as after a service stops being available in a country.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param country_codes_and_service_ids: (country code, service ID) pairs to keep.  This can not be empty.
+        :return: The number of mappings deleted.
+        """
+
+        result = db.session.execute(
+            delete(cls).where(tuple_(cls.country_code, cls.service_id).not_in(country_codes_and_service_ids))
+        )
+
+        return result.rowcount
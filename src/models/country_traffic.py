@@ -0,0 +1,83 @@
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql
+
+from src.models.common import db
+
+# ==================================================
+
+
+class CountryTraffic(db.Model):
+    """
+    Represents the number of requests that the web app received from users in one country, on one day.  This is used
+    to spend the Streaming Availability API request quota on the countries that users actually view.
+    """
+
+    __tablename__ = 'country_traffic'
+
+    # number of days of traffic that are kept, before they are deleted
+    NUM_DAYS_KEPT = 30
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    day = db.Column(
+        db.Date,
+        primary_key=True
+    )
+
+    num_requests = db.Column(
+        db.BigInteger,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """Show info about country traffic."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def add_counts(cls, counts: dict[str, int]) -> None:
+        """
+        Adds numbers of requests to today's counts, by the database's clock.  Counts older than NUM_DAYS_KEPT days are
+        deleted at the same time.
+
+        The counts are committed in their own transaction, separate from the session, so that a web request's session
+        is not committed or rolled back by this.
+
+        :param counts: {country_code: number of requests}.
+        """
+
+        if not counts:
+            return
+
+        stmt = postgresql.insert(cls).values([
+            {'country_code': country_code, 'day': func.current_date(), 'num_requests': num_requests}
+            for country_code, num_requests in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint=f'{cls.__tablename__}_pkey',
+            set_={'num_requests': cls.num_requests + stmt.excluded.num_requests}
+        )
+
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
+            connection.execute(delete(cls).where(cls.day < func.current_date() - cls.NUM_DAYS_KEPT))
+
+    @classmethod
+    def get_recent_counts(cls, num_days: int) -> dict[str, int]:
+        """
+        Gets the total number of requests from each country over the last num_days days, including today.
+
+        :param num_days: The number of days to count.
+        :return: {country_code: number of requests}.  Countries without requests are left out.
+        """
+
+        stmt = select(cls.country_code, func.sum(cls.num_requests)) \
+            .where(cls.day > func.current_date() - num_days) \
+            .group_by(cls.country_code)
+
+        # a separate connection is used, the same as for writing counts
+        with db.engine.connect() as connection:
+            return {country_code: int(num_requests) for country_code, num_requests in connection.execute(stmt)}
@@ -0,0 +1,185 @@
+from datetime import datetime
+from enum import StrEnum
+
+from sqlalchemy import func, insert, select, update
+
+from src.models.common import db
+
+# ==================================================
+
+
+class JobRun(db.Model):
+    """
+    Represents one run of a job, such as the updater or the seeder, for a history of how long runs took and how much
+    they did.  A run that was skipped, because another run was in progress, is also recorded.
+    """
+
+    __tablename__ = 'job_runs'
+
+    Statuses = StrEnum('Statuses', ['RUNNING', 'SUCCEEDED', 'FAILED', 'SKIPPED'])
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=True
+    )
+
+    job = db.Column(
+        db.Text,
+        nullable=False,
+        index=True
+    )
+
+    status = db.Column(
+        db.Text,
+        nullable=False
+    )
+
+    started_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    finished_at = db.Column(
+        db.DateTime(timezone=True)
+    )
+
+    num_requests = db.Column(
+        db.Integer
+    )
+
+    num_rows = db.Column(
+        db.Integer
+    )
+
+    error = db.Column(
+        db.Text
+    )
+
+    def __repr__(self) -> str:
+        """Show info about job run."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @property
+    def duration_seconds(self) -> float | None:
+        """How long the run took, or None if it has not finished."""
+
+        if self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+
+    @classmethod
+    def start(cls, job: str, status: str = Statuses.RUNNING) -> int:
+        """
+        Records the start of a run.
+
+        The run is committed in its own transaction, separate from the session, so that it is saved even if the job's
+        own transaction is rolled back.
+
+        :param job: The name of the job.
+        :param status: The status of the run, such as SKIPPED for a run that will not do anything.
+        :return: The ID of the run.
+        """
+
+        stmt = insert(cls).values(job=job, status=status).returning(cls.id)
+
+        with db.engine.begin() as connection:
+            return connection.execute(stmt).scalar_one()
+
+    @classmethod
+    def finish(cls, run_id: int, status: str, num_requests: int = None, num_rows: int = None,
+               error: str = None) -> None:
+        """
+        Records the end of a run.
+
+        The run is committed in its own transaction, separate from the session.
+
+        :param run_id: The ID of the run.
+        :param status: SUCCEEDED, FAILED, or SKIPPED.
+        :param num_requests: The number of API requests that the run made.
+        :param num_rows: The number of rows that the run wrote.
+        :param error: What went wrong, if the run failed.
+        """
+
+        stmt = update(cls) \
+            .where(cls.id == run_id) \
+            .values(status=status, finished_at=func.now(), num_requests=num_requests, num_rows=num_rows, error=error)
+
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
+
+    @classmethod
+    def add_progress(cls, run_id: int, num_requests: int, num_rows: int) -> None:
+        """
+        Adds to the numbers of requests and rows of a run while it is running, so that its requests are counted in the
+        daily request quota right away.
+
+        The run is committed in its own transaction, separate from the session.
+
+        :param run_id: The ID of the run.
+        :param num_requests: The number of API requests to add.
+        :param num_rows: The number of rows to add.
+        """
+
+        stmt = update(cls) \
+            .where(cls.id == run_id) \
+            .values(num_requests=func.coalesce(cls.num_requests, 0) + num_requests,
+                    num_rows=func.coalesce(cls.num_rows, 0) + num_rows)
+
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
+
+    @classmethod
+    def get_last_start_time(cls, job: str) -> datetime | None:
+        """
+        Gets when the last run of a job, that was not skipped, started.
+
+        :param job: The name of the job.
+        :return: The start time, or None if the job has not run.
+        """
+
+        stmt = select(func.max(cls.started_at)).where(cls.job == job, cls.status != cls.Statuses.SKIPPED)
+
+        # a separate connection is used, so that the session is not left in a transaction while a scheduler waits
+        with db.engine.connect() as connection:
+            return connection.execute(stmt).scalar()
+
+    @classmethod
+    def get_num_requests_since(cls, since: datetime, job: str = None) -> int:
+        """
+        Gets the total number of API requests made by runs of all jobs, or of one job, that started at or after a
+        time, such as to find how much of the daily request quota has been used.
+
+        :param since: The earliest start time of runs to count.
+        :param job: The name of the job to count runs of, or None for all jobs.
+        :return: The number of requests.
+        """
+
+        stmt = select(func.coalesce(func.sum(cls.num_requests), 0)).where(cls.started_at >= since)
+        if job is not None:
+            stmt = stmt.where(cls.job == job)
+
+        with db.engine.connect() as connection:
+            return connection.execute(stmt).scalar()
+
+    @classmethod
+    def get_average_rows_per_request(cls, job: str, num_runs: int = 10) -> float | None:
+        """
+        Gets the average number of rows written per API request, over a job's latest successful runs.
+
+        :param job: The name of the job.
+        :param num_runs: The number of latest runs to average over.
+        :return: The average, or None if there are no successful runs that made requests.
+        """
+
+        latest_runs = select(cls.num_requests, cls.num_rows) \
+            .where(cls.job == job, cls.status == cls.Statuses.SUCCEEDED, cls.num_requests > 0) \
+            .order_by(cls.started_at.desc()) \
+            .limit(num_runs) \
+            .subquery()
+
+        stmt = select(func.sum(latest_runs.c.num_rows) / func.sum(latest_runs.c.num_requests).cast(db.Float))
+
+        with db.engine.connect() as connection:
+            return connection.execute(stmt).scalar()
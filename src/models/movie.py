@@ -1,6 +1,8 @@
 from sqlalchemy.dialects import postgresql
 
-from src.models.common import db
+from src.models.common import (db, make_upsert_counts,
+                               select_from_column_batch, upsert_if_changed)
+from src.util.column_batch import ColumnBatch
 
 # ==================================================
 
@@ -76,27 +78,48 @@ class Movie(db.Model):
         return "{}({!r})".format(self.__class__.__name__, self.__dict__)
 
     @classmethod
-    def upsert_database(cls, attributes: list[dict]) -> None:
+    def upsert_database(cls, attributes: list[dict]) -> dict[str, int]:
         """
         Use a list of dictionaries, where each dictionary contains all the attributes for one movie (including id),
         and inserts new movies into the PostgreSQL database.  If a movie already exists, it will be overwritten
-        with the new data.
+        with the new data, but only if any of the data is different (see upsert_if_changed()).
 
         This performs an session.execute(), which will later need to be committed.
 
         :param attributes: A list of dicts.  A dict contains id, imdb_id, tmdb_id, ... for keys.  Values are movie
             data to put into database.
+        :return: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}.
         """
 
-        if len(attributes) > 0:
-            stmt = postgresql.insert(cls).values(attributes)
+        if len(attributes) == 0:
+            return make_upsert_counts()
 
-            # all columns except id
-            columns_to_replace = {name: column for name, column in stmt.excluded.items() if name != 'id'}
+        stmt = postgresql.insert(cls).values(attributes)
 
-            stmt = stmt.on_conflict_do_update(
-                constraint=f'{cls.__tablename__}_pkey',
-                set_=columns_to_replace
-            )
+        # all columns except id
+        column_names = [name for name in stmt.excluded.keys() if name != 'id']
 
-            db.session.execute(stmt)
+        return upsert_if_changed(cls, stmt, column_names, len(attributes))
+
+    @classmethod
+    def upsert_batch(cls, batch: ColumnBatch) -> dict[str, int]:
+        """
+        Inserts new movies from a column-oriented batch into the PostgreSQL database, in one statement.  If a movie
+        already exists, it will be overwritten with the new data, but only if any of the data is different (see
+        upsert_if_changed()).
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param batch: Movie data, with one list per column.  Must include the id column.
+        :return: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}.
+        """
+
+        if len(batch) == 0:
+            return make_upsert_counts()
+
+        stmt = postgresql.insert(cls).from_select(batch.column_names, select_from_column_batch(cls, batch))
+
+        # all columns in batch except id
+        column_names = [name for name in batch.column_names if name != 'id']
+
+        return upsert_if_changed(cls, stmt, column_names, len(batch))
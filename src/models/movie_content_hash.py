@@ -0,0 +1,132 @@
+from typing import Iterable
+
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+
+from src.models.common import db
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/movie_content_hash.log')
+
+# --------------------------------------------------
+
+
+class MovieContentHash(db.Model):
+    """
+    Represents a hash of what was last saved for a movie in a country: the movie, its posters, and its free streaming
+    options in that country, as they were transformed from Streaming Availability API.  A change for the movie with the
+    same hash does not need to be saved again.
+    """
+
+    __tablename__ = 'movie_content_hashes'
+
+    movie_id = db.Column(
+        db.Text,
+        db.ForeignKey('movies.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    content_hash = db.Column(
+        db.Text,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """Show info about movie content hash."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def get_content_hashes(cls, movie_ids_and_country_codes: Iterable[tuple[str, str]]) -> dict:
+        """
+        Retrieves the stored hashes of movies in countries, in one query.
+
+        :param movie_ids_and_country_codes: (movie ID, country code) pairs.
+        :return: {(movie_id, country_code): content_hash}, for the pairs that have a stored hash.
+        """
+
+        movie_ids_and_country_codes = list(movie_ids_and_country_codes)
+
+        if len(movie_ids_and_country_codes) == 0:
+            return {}
+
+        try:
+            rows = db.session.execute(
+                db.select(cls.movie_id, cls.country_code, cls.content_hash)
+                .where(tuple_(cls.movie_id, cls.country_code).in_(movie_ids_and_country_codes))
+            ).all()
+        except DBAPIError as e:
+            db.session.rollback()
+            logger.error('Error occurred when retrieving movie content hashes.\n'
+                         f'exception =\n{str(e)}')
+            raise e
+
+        return {(movie_id, country_code): content_hash for movie_id, country_code, content_hash in rows}
+
+    @classmethod
+    def upsert_database(cls, content_hashes: dict) -> None:
+        """
+        Inserts new hashes of movies in countries, or overwrites the existing ones.
+
+        This performs an session.execute(), which will later need to be committed.  Hashes should be committed in the
+        same transaction as the data that they were made from.
+
+        :param content_hashes: {(movie_id, country_code): content_hash}.
+        """
+
+        if len(content_hashes) > 0:
+            stmt = postgresql.insert(cls).values([
+                {'movie_id': movie_id, 'country_code': country_code, 'content_hash': content_hash}
+                for (movie_id, country_code), content_hash in content_hashes.items()
+            ])
+
+            stmt = stmt.on_conflict_do_update(
+                constraint=f'{cls.__tablename__}_pkey',
+                set_={'content_hash': stmt.excluded.content_hash}
+            )
+
+            db.session.execute(stmt)
+
+    @classmethod
+    def delete_movies_in_countries(cls, movie_ids_and_country_codes: Iterable[tuple[str, str]]) -> None:
+        """
+        Deletes the stored hashes of movies in countries, in one statement, such as when their data is saved without
+        a hash, so that the next change for them is not skipped.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param movie_ids_and_country_codes: (movie ID, country code) pairs.
+        """
+
+        movie_ids_and_country_codes = list(movie_ids_and_country_codes)
+
+        if len(movie_ids_and_country_codes) > 0:
+            db.session.execute(
+                delete(cls).where(tuple_(cls.movie_id, cls.country_code).in_(movie_ids_and_country_codes))
+            )
+
+    @classmethod
+    def delete_movies(cls, movie_ids: Iterable[str]) -> None:
+        """
+        Deletes the stored hashes of movies in every country, in one statement, such as when all of their streaming
+        options are replaced.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param movie_ids: The IDs of the movies.
+        """
+
+        movie_ids = list(movie_ids)
+
+        if len(movie_ids) > 0:
+            db.session.execute(
+                delete(cls).where(cls.movie_id.in_(movie_ids))
+            )
@@ -0,0 +1,144 @@
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+
+from src.models.common import db
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/movie_fetch.log')
+
+# --------------------------------------------------
+
+
+class MovieFetch(db.Model):
+    """
+    Represents when a movie's data, and its streaming options in a country, were last fetched by the movie's ID, such as
+    when its details page was visited before it was in the database, and how many times its details page was viewed
+    from the country since then.  These movies are not in the seeded catalogs, so this is how they are kept fresh.
+
+    A movie is fetched along with its streaming options in every country at once, so all of a movie's rows have the
+    same fetch time.  There is a row for each country that the movie had streaming options in, and for the country of
+    the visit that first fetched it.
+    """
+
+    __tablename__ = 'movie_fetches'
+
+    movie_id = db.Column(
+        db.Text,
+        db.ForeignKey('movies.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    last_fetched_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False
+    )
+
+    # number of details page views from the country since the movie was last fetched
+    num_views = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0
+    )
+
+    def __repr__(self) -> str:
+        """Show info about movie fetch."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def record_fetch(cls, movie_id: str, country_codes: Iterable[str], fetched_at: datetime) -> None:
+        """
+        Records that a movie was fetched, along with its streaming options in every country.  Each of the movie's rows,
+        and a new row for each of the given countries that does not have one, gets the fetch time, and its number of
+        views is started over.
+
+        This performs an session.execute(), which will later need to be committed.  Fetches should be committed in the
+        same transaction as the movie data that was fetched.
+
+        :param movie_id: The ID of the movie that was fetched.
+        :param country_codes: The countries to add rows for, such as the ones that the movie has streaming options in.
+        :param fetched_at: When the movie was fetched.
+        """
+
+        db.session.execute(
+            update(cls).where(cls.movie_id == movie_id).values(last_fetched_at=fetched_at, num_views=0)
+        )
+
+        country_codes = sorted(set(country_codes))
+
+        if len(country_codes) > 0:
+            db.session.execute(
+                postgresql.insert(cls).values([
+                    {'movie_id': movie_id, 'country_code': country_code, 'last_fetched_at': fetched_at,
+                     'num_views': 0}
+                    for country_code in country_codes
+                ]).on_conflict_do_nothing(constraint=f'{cls.__tablename__}_pkey')
+            )
+
+    @classmethod
+    def add_views(cls, counts: dict[tuple[str, str], int]) -> None:
+        """
+        Adds numbers of details page views to movies in countries.  Views of movies and countries without a row, such
+        as movies from the seeded catalogs, are not kept.
+
+        The counts are committed in their own transaction, separate from the session, so that a web request's session
+        is not committed or rolled back by this.
+
+        :param counts: {(movie_id, country_code): number of views}.
+        """
+
+        if not counts:
+            return
+
+        stmt = update(cls) \
+            .where(cls.movie_id == bindparam('b_movie_id'), cls.country_code == bindparam('b_country_code')) \
+            .values(num_views=cls.num_views + bindparam('b_num_views'))
+
+        with db.engine.begin() as connection:
+            connection.execute(stmt, [
+                {'b_movie_id': movie_id, 'b_country_code': country_code, 'b_num_views': num_views}
+                for (movie_id, country_code), num_views in counts.items()
+            ])
+
+    @classmethod
+    def get_stale_movie_ids(cls, fetched_before: datetime, min_views: int, limit: int) -> list[str]:
+        """
+        Gets the movies that were last fetched before a time, with the most viewed since then first, and the least
+        recently fetched first among movies with the same number of views.
+
+        :param fetched_before: The time that movies have to be last fetched before.
+        :param min_views: The minimum number of views, from all countries, that movies need.
+        :param limit: The max number of movies to get.
+        :return: The movies' IDs.
+        """
+
+        if limit <= 0:
+            return []
+
+        total_views = func.sum(cls.num_views)
+        last_fetched_at = func.min(cls.last_fetched_at)
+
+        stmt = select(cls.movie_id) \
+            .group_by(cls.movie_id) \
+            .having(last_fetched_at < fetched_before, total_views >= min_views) \
+            .order_by(total_views.desc(), last_fetched_at, cls.movie_id) \
+            .limit(limit)
+
+        try:
+            return list(db.session.execute(stmt).scalars())
+        except DBAPIError as e:
+            db.session.rollback()
+            logger.error('Error occurred when retrieving stale movies.\n'
+                         f'exception =\n{str(e)}')
+            raise e
@@ -5,7 +5,9 @@ from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import DBAPIError
 
 from src.exceptions.UnrecognizedValueError import UnrecognizedValueError
-from src.models.common import db
+from src.models.common import (db, make_upsert_counts,
+                               select_from_column_batch, upsert_if_changed)
+from src.util.column_batch import ColumnBatch
 from src.util.logger import create_logger
 
 # ==================================================
@@ -117,26 +119,42 @@ class MoviePoster(db.Model):
         return output
 
     @classmethod
-    def upsert_database(cls, attributes: list[dict]) -> None:
+    def upsert_database(cls, attributes: list[dict]) -> dict[str, int]:
         """
         Use a list of dictionaries, where each dictionary contains all the attributes for one movie poster,
         and inserts new movie posters into the PostgreSQL database.  If a poster already exists, it will be
-        overwritten with the new data.
+        overwritten with the new data, but only if its link is different (see upsert_if_changed()).
 
         This performs an session.execute(), which will later need to be committed.
 
         :param attributes: A list of dicts.  A dict contains movie_id, type, size, and link for keys.
             Values are poster data to put into database.
+        :return: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}.
         """
 
-        if len(attributes) > 0:
-            stmt = postgresql.insert(cls).values(attributes)
+        if len(attributes) == 0:
+            return make_upsert_counts()
 
-            columns_to_replace = {'link': stmt.excluded.link}
+        stmt = postgresql.insert(cls).values(attributes)
 
-            stmt = stmt.on_conflict_do_update(
-                constraint=f'{cls.__tablename__}_pkey',
-                set_=columns_to_replace
-            )
+        return upsert_if_changed(cls, stmt, ['link'], len(attributes))
 
-            db.session.execute(stmt)
+    @classmethod
+    def upsert_batch(cls, batch: ColumnBatch) -> dict[str, int]:
+        """
+        Inserts new movie posters from a column-oriented batch into the PostgreSQL database, in one statement.  If
+        a poster already exists, it will be overwritten with the new data, but only if its link is different (see
+        upsert_if_changed()).
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param batch: Poster data, with one list per column (movie_id, type, size, and link).
+        :return: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}.
+        """
+
+        if len(batch) == 0:
+            return make_upsert_counts()
+
+        stmt = postgresql.insert(cls).from_select(batch.column_names, select_from_column_batch(cls, batch))
+
+        return upsert_if_changed(cls, stmt, ['link'], len(batch))
@@ -0,0 +1,73 @@
+from sqlalchemy import BigInteger, cast, delete, func
+from sqlalchemy.dialects import postgresql
+
+from src.models.common import db
+
+# ==================================================
+
+
+class RateLimitWindow(db.Model):
+    """
+    Represents the number of calls made to a rate limited resource, such as an API, within one fixed window of time.
+    Windows are shared through the database, so that processes on any number of machines stay within one rate limit.
+    """
+
+    __tablename__ = 'rate_limit_windows'
+
+    # number of past windows that are kept for each name, before they are deleted
+    NUM_WINDOWS_KEPT = 60
+
+    name = db.Column(
+        db.Text,
+        primary_key=True
+    )
+
+    # the start of the window, as a number of periods since the Unix epoch, by the database's clock
+    window_start = db.Column(
+        db.BigInteger,
+        primary_key=True
+    )
+
+    num_calls = db.Column(
+        db.Integer,
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        """Show info about rate limit window."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def try_acquire(cls, name: str, max_calls: int, period: int = 1) -> bool:
+        """
+        Records a call in the current window, if the window has fewer than max_calls calls.  The database's clock is
+        used, so that the windows of all processes line up.
+
+        The call is committed in its own transaction, separate from the session, so that other processes can see it
+        right away.
+
+        :param name: The name of the rate limited resource.
+        :param max_calls: The maximum number of calls allowed within a window.
+        :param period: The length of a window, in seconds.
+        :return: True if the call was recorded, or False if the window is full.
+        """
+
+        window_start = cast(func.floor(func.extract('epoch', func.clock_timestamp()) / period), BigInteger)
+
+        stmt = postgresql.insert(cls).values(name=name, window_start=window_start, num_calls=1)
+        stmt = stmt.on_conflict_do_update(
+            constraint=f'{cls.__tablename__}_pkey',
+            set_={'num_calls': cls.num_calls + 1},
+            where=cls.num_calls < max_calls
+        ).returning(cls.window_start, cls.num_calls)
+
+        with db.engine.begin() as connection:
+            row = connection.execute(stmt).one_or_none()
+
+            # the first call of a window deletes old windows
+            if row and row.num_calls == 1:
+                connection.execute(
+                    delete(cls).where(cls.name == name, cls.window_start < row.window_start - cls.NUM_WINDOWS_KEPT))
+
+        return row is not None
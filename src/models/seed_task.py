@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects import postgresql
+
+from src.models.common import db
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/seed_task.log')
+
+# --------------------------------------------------
+
+
+class SeedTask(db.Model):
+    """
+    Represents the seeding work that is left for a country, which is the next page of shows to request, given by its
+    cursor.  Seeding workers, in any number of processes or machines, claim tasks with SELECT ... FOR UPDATE SKIP
+    LOCKED, so that each task is only worked on by one worker at a time.
+
+    A claim is a lease that expires.  If a worker crashes, its task can be claimed by another worker once the lease
+    has expired.
+    """
+
+    __tablename__ = 'seed_tasks'
+
+    country_code = db.Column(
+        db.String(2),
+        primary_key=True
+    )
+
+    service_ids = db.Column(
+        postgresql.ARRAY(db.Text),
+        nullable=False
+    )
+
+    cursor = db.Column(
+        db.Text
+    )
+
+    is_done = db.Column(
+        db.Boolean,
+        nullable=False,
+        default=False
+    )
+
+    claimed_by = db.Column(
+        db.Text
+    )
+
+    lease_expires_at = db.Column(
+        db.DateTime(timezone=True)
+    )
+
+    def __repr__(self) -> str:
+        """Show info about seed task."""
+
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+    @classmethod
+    def enqueue(cls, countries_services: dict, cursors: dict) -> None:
+        """
+        Adds a task for each country that does not have one yet, starting from the country's saved cursor.  Existing
+        tasks keep their cursors, but get the latest service IDs.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param countries_services: {country_code: [service_id, ...]}.
+        :param cursors: {country_code: cursor}, where a cursor of "end" means that the country is done.
+        """
+
+        if len(countries_services) > 0:
+            stmt = postgresql.insert(cls).values([
+                {
+                    'country_code': country_code,
+                    'service_ids': service_ids,
+                    'cursor': cursors.get(country_code),
+                    'is_done': cursors.get(country_code) == 'end'
+                }
+                for country_code, service_ids in countries_services.items()
+            ])
+
+            stmt = stmt.on_conflict_do_update(
+                constraint=f'{cls.__tablename__}_pkey',
+                set_={'service_ids': stmt.excluded.service_ids}
+            )
+
+            db.session.execute(stmt)
+
+    @classmethod
+    def claim(cls, worker_id: str, lease_seconds: float, excluded_country_codes=()) -> dict | None:
+        """
+        Claims a task that is not done and is not claimed by a worker with an unexpired lease.  Tasks that are locked
+        by another worker's claim, at the same time, are skipped instead of waited on.
+
+        The claim is committed in its own transaction, separate from the session, so that other workers can see it
+        right away.
+
+        :param worker_id: The ID of the worker that is claiming a task.
+        :param lease_seconds: How long the claim lasts before another worker can claim the task.
+        :param excluded_country_codes: Countries whose tasks should not be claimed.
+        :return: {'country_code', 'service_ids', 'cursor'} of the claimed task, or None if there are none to claim.
+        """
+
+        claimable_country_code = select(cls.country_code) \
+            .where(cls.is_done.is_(False),
+                   or_(cls.lease_expires_at.is_(None), cls.lease_expires_at < func.now()),
+                   cls.country_code.not_in(excluded_country_codes)) \
+            .order_by(cls.country_code) \
+            .limit(1) \
+            .with_for_update(skip_locked=True) \
+            .scalar_subquery()
+
+        stmt = update(cls) \
+            .where(cls.country_code == claimable_country_code) \
+            .values(claimed_by=worker_id, lease_expires_at=func.now() + timedelta(seconds=lease_seconds)) \
+            .returning(cls.country_code, cls.service_ids, cls.cursor)
+
+        with db.engine.begin() as connection:
+            row = connection.execute(stmt).one_or_none()
+
+        if row:
+            logger.info('Worker "%s" claimed the seed task for "%s".', worker_id, row.country_code)
+            return row._asdict()
+
+    @classmethod
+    def complete_page(cls, country_code: str, worker_id: str, next_cursor: str) -> bool:
+        """
+        Moves a claimed task to its next cursor and releases the claim.  The task is done if the next cursor is "end".
+
+        This performs an session.execute(), which will later need to be committed, in the same transaction as the
+        page's data, so that a page is never skipped without its data being saved.
+
+        :param country_code: The country of the task.
+        :param worker_id: The ID of the worker that claimed the task.
+        :param next_cursor: The cursor of the next page.
+        :return: False if the task is no longer claimed by the worker, such as when its lease expired and another
+            worker claimed it, in which case the page's data should not be committed.
+        """
+
+        stmt = update(cls) \
+            .where(cls.country_code == country_code, cls.claimed_by == worker_id) \
+            .values(cursor=next_cursor, is_done=next_cursor == 'end', claimed_by=None, lease_expires_at=None) \
+            .returning(cls.country_code)
+
+        return db.session.execute(stmt).one_or_none() is not None
+
+    @classmethod
+    def release(cls, country_code: str, worker_id: str) -> None:
+        """
+        Releases a claimed task without moving it forward, so that another worker can claim it right away.
+
+        The release is committed in its own transaction, separate from the session.
+
+        :param country_code: The country of the task.
+        :param worker_id: The ID of the worker that claimed the task.
+        """
+
+        stmt = update(cls) \
+            .where(cls.country_code == country_code, cls.claimed_by == worker_id) \
+            .values(claimed_by=None, lease_expires_at=None)
+
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
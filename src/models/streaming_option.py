@@ -1,11 +1,13 @@
 import json
+from typing import Iterable
 
 from flask_sqlalchemy.pagination import Pagination
-from sqlalchemy import insert
+from sqlalchemy import delete, func, insert, tuple_
 from sqlalchemy.exc import DBAPIError
 
-from src.models.common import db
+from src.models.common import db, select_from_column_batch
 from src.models.movie import Movie
+from src.util.column_batch import ColumnBatch
 from src.util.logger import create_logger
 
 # ==================================================
@@ -112,6 +114,28 @@ class StreamingOption(db.Model):
                          f'exception =\n{str(e)}')
             raise e
 
+    @classmethod
+    def count_movies_by_country(cls) -> dict[str, int]:
+        """
+        Counts the movies that have streaming options in each country.
+
+        :return: {country_code: number of movies}.
+        """
+
+        try:
+            rows = db.session\
+                .query(cls.country_code, func.count(cls.movie_id.distinct()))\
+                .group_by(cls.country_code)\
+                .all()
+
+        except DBAPIError as e:
+            db.session.rollback()
+            logger.error('Error occurred when counting movies by country.\n'
+                         f'exception =\n{str(e)}')
+            raise e
+
+        return dict(rows)
+
     @classmethod
     def insert_database(cls, attributes: list[dict]) -> None:
         """
@@ -129,3 +153,71 @@ class StreamingOption(db.Model):
                 insert(cls),
                 attributes
             )
+
+    @classmethod
+    def insert_batch(cls, batch: ColumnBatch) -> None:
+        """
+        Inserts new streaming options from a column-oriented batch into the PostgreSQL database, in one statement.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param batch: Streaming option data, with one list per column (movie_id, country_code, service_id, ...).
+        """
+
+        if len(batch) > 0:
+            db.session.execute(
+                insert(cls).from_select(batch.column_names, select_from_column_batch(cls, batch))
+            )
+
+    @classmethod
+    def delete_movies_in_countries(cls, movie_ids_and_country_codes: Iterable[tuple[str, str]]) -> None:
+        """
+        Deletes all streaming options of each movie in a country, in one statement, such as before inserting the
+        movies' current streaming options.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param movie_ids_and_country_codes: (movie ID, country code) pairs.
+        """
+
+        movie_ids_and_country_codes = list(movie_ids_and_country_codes)
+
+        if len(movie_ids_and_country_codes) > 0:
+            db.session.execute(
+                delete(cls).where(tuple_(cls.movie_id, cls.country_code).in_(movie_ids_and_country_codes))
+            )
+
+    @classmethod
+    def delete_movies(cls, movie_ids: Iterable[str]) -> None:
+        """
+        Deletes all streaming options of movies, in every country, in one statement, such as before inserting the
+        movies' current streaming options in every country.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param movie_ids: The IDs of the movies.
+        """
+
+        movie_ids = list(movie_ids)
+
+        if len(movie_ids) > 0:
+            db.session.execute(
+                delete(cls).where(cls.movie_id.in_(movie_ids))
+            )
+
+    @classmethod
+    def delete_expired(cls, timestamp: int) -> int:
+        """
+        Deletes all streaming options that expired before a time, in one statement.
+
+        This performs an session.execute(), which will later need to be committed.
+
+        :param timestamp: The time, in seconds since the epoch.
+        :return: The number of streaming options deleted.
+        """
+
+        result = db.session.execute(
+            delete(cls).where(cls.expires_on < timestamp)
+        )
+
+        return result.rowcount
@@ -0,0 +1,208 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import requests
+from requests.exceptions import RequestException
+from sqlalchemy.exc import DBAPIError
+
+from src.adapters.streaming_availability_adapter import transform_page
+from src.app import (STREAMING_AVAILABILITY_BASE_URL, api_key_pool,
+                     create_app, response_archive)
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
+from src.exceptions.StreamingAvailabilityApiError import \
+    StreamingAvailabilityApiError
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
+from src.exceptions.UpsertError import UpsertError
+from src.models.common import connect_db, db
+from src.models.job_run import JobRun
+from src.models.movie import Movie
+from src.models.movie_content_hash import MovieContentHash
+from src.models.movie_fetch import MovieFetch
+from src.models.movie_poster import MoviePoster
+from src.models.streaming_option import StreamingOption
+from src.seed.planner import (get_daily_limit, get_num_requests_used_today,
+                              get_refresh_limit)
+from src.seed.seed_updater_constants import (
+    SA_REFRESH_MIN_AGE_DAYS, SA_REFRESH_MIN_VIEWS,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND)
+from src.seed.seeder_updater_helpers import run_job
+from src.util.logger import create_logger
+from src.util.rate_limiter import RateLimiter
+from src.util.resilience import call_with_backoff
+
+# ==================================================
+
+job = 'refresher'
+
+logger = create_logger(__name__, 'src/logs/refresh.log')
+
+# --------------------------------------------------
+
+
+def get_refresh_budget() -> int:
+    """
+    Gets the number of requests that the refresher can make now, which is what is left of its reserved share of the
+    daily request quota (see get_refresh_limit()), after its runs in the last 24 hours.  It is never more than what is
+    left of the daily request quota.
+
+    :return: The number of requests.
+    """
+
+    try:
+        num_requests_used_by_refresher = JobRun.get_num_requests_since(
+            datetime.now(timezone.utc) - timedelta(days=1), job)
+    except DBAPIError:
+        logger.warning('Could not read the job history.  Assuming that the refresher made no requests today.')
+        num_requests_used_by_refresher = 0
+
+    return max(0, min(get_refresh_limit() - num_requests_used_by_refresher,
+                      get_daily_limit() - get_num_requests_used_today()))
+
+
+def get_movie_from_one_request(movie_id: str) -> dict | None:
+    """
+    Gets a movie by ID, along with its streaming options in every country, and transforms it into records for the
+    movies, movie_posters, and streaming_options tables.  The response body is archived.
+
+    If Streaming Availability API is rate limiting requests or failing (status code 429 or 5xx), then the request is
+    retried with backoff before giving up.
+
+    :param movie_id: The ID of the movie to get.
+    :return: The batches from transform_page(), or None if Streaming Availability API does not have the movie anymore.
+    :raise StreamingAvailabilityApiError: If Streaming Availability API returns a response with a status code that is
+        not 200 or 404.
+    :raise StreamingAvailabilityPayloadError: If the movie is malformed, and is skipped by transform_page().
+    :raise ApiKeysExhaustedError: If every API key is out of its daily quota.
+    """
+
+    url = f'{STREAMING_AVAILABILITY_BASE_URL}/shows/{movie_id}'
+
+    resp = call_with_backoff(lambda: api_key_pool.call(
+        lambda api_key: requests.get(url, headers={'X-RapidAPI-Key': api_key})))
+    logger.info(f'Called {url} and received status {resp.status_code}.')
+
+    if resp.status_code == 200:
+        response_archive.add(resp.content, job, url)
+
+        # a malformed movie is skipped by transform_page(), which logs the field
+        data = transform_page([resp.json()])
+        if len(data['movies']) == 0:
+            raise StreamingAvailabilityPayloadError(
+                f'Error when reading movie details for movie ID {movie_id}.', 'show')
+
+        return data
+
+    if resp.status_code == 404:
+        logger.warning(f'Movie {movie_id} is not in Streaming Availability API anymore.')
+        return None
+
+    message = resp.json().get('message', 'Message not found.')
+    logger.error(f'Unsuccessful response from API: status code {resp.status_code}: {message}.')
+    raise StreamingAvailabilityApiError(message, resp.status_code)
+
+
+def refresh_stale_movies(max_requests: int = None) -> dict:
+    """
+    Refreshes movies that were first saved from a details page visit (see MovieFetch), which the updater does not
+    update, since they are not in the seeded catalogs.
+
+    Movies that were last fetched over SA_REFRESH_MIN_AGE_DAYS days ago, and were viewed at least SA_REFRESH_MIN_VIEWS
+    times since then, are requested again, one request per movie, starting with the most viewed, and then the least
+    recently fetched.  Only the refresher's reserved share of the daily request quota is used (see
+    get_refresh_budget()).
+
+    Each refreshed movie and its posters are upserted, and all of its streaming options, in every country, are replaced
+    with its current ones.  Its stored content hashes are deleted, so that the updater does not skip its next changes.
+    A movie that Streaming Availability API does not have anymore has all of its streaming options deleted.  A movie
+    whose request fails, or whose response is malformed, is tried again in the next run.  Everything is saved in one
+    transaction.
+
+    :param max_requests: The max number of requests to make, if it is less than the budget, or None for the budget.
+    :return: {'num_requests': number of API requests made, 'num_rows': number of rows written}.
+    """
+
+    now = datetime.now(timezone.utc)
+
+    budget = get_refresh_budget()
+    if max_requests is not None:
+        budget = min(budget, max_requests)
+
+    movie_ids = MovieFetch.get_stale_movie_ids(now - timedelta(days=SA_REFRESH_MIN_AGE_DAYS), SA_REFRESH_MIN_VIEWS,
+                                               budget)
+    logger.info(f'Refreshing {len(movie_ids)} stale movies, with a budget of {budget} requests.')
+
+    # each API key has its own rate limit and daily quota
+    rate_limiter = RateLimiter(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND * len(api_key_pool))
+
+    num_requests = 0
+    num_rows = 0
+
+    for movie_id in movie_ids:
+        rate_limiter.acquire()
+        num_requests += 1
+
+        try:
+            data = get_movie_from_one_request(movie_id)
+        except ApiKeysExhaustedError:
+            # the request was not made
+            num_requests -= 1
+            logger.warning('Every API key is out of its daily quota.  Stopping early.')
+            break
+        except (StreamingAvailabilityApiError, RequestException) as e:
+            logger.warning(f'Unable to refresh movie {movie_id}.  It will be tried again in the next run.\n'
+                           f'Error is {type(e)}:\n'
+                           f'{str(e)}')
+            continue
+
+        StreamingOption.delete_movies([movie_id])
+        MovieContentHash.delete_movies([movie_id])
+
+        if data is None:
+            MovieFetch.record_fetch(movie_id, [], now)
+            continue
+
+        Movie.upsert_batch(data['movies'])
+        MoviePoster.upsert_batch(data['movie_posters'])
+        StreamingOption.insert_batch(data['streaming_options'])
+        MovieFetch.record_fetch(movie_id, set(data['streaming_options'].columns['country_code']), now)
+
+        num_rows += len(data['movies']) + len(data['movie_posters']) + len(data['streaming_options'])
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        message = 'Exception encountered when committing refreshed movie data.'
+        logger.error(f'{message}\n'
+                     f'Error is {type(e)}:\n'
+                     f'{str(e)}')
+        raise UpsertError(message)
+
+    return {'num_requests': num_requests, 'num_rows': num_rows}
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Refreshes the stalest, most viewed movies that were first saved from '
+                                                 'a details page visit, within the reserved share of the daily quota.')
+    parser.add_argument('--max-requests', type=int,
+                        help='make at most this many requests, if it is less than what is left of the reserved share')
+    args = parser.parse_args()
+
+    app = create_app("freestreammovies")
+    connect_db(app)
+    with app.app_context():
+        db.create_all()
+        run_job(job, lambda: refresh_stale_movies(args.max_requests))
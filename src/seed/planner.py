@@ -0,0 +1,194 @@
+import math
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import DBAPIError
+
+from src.app import api_key_pool
+from src.models.common import db
+from src.models.job_run import JobRun
+from src.seed.seed_updater_constants import (
+    SA_REFRESH_QUOTA_SHARE, STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY)
+from src.seed.seeder_updater_helpers import pop_next_turn
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/planner.log')
+
+# --------------------------------------------------
+
+
+def allocate_requests_in_order(country_codes: list[str], budget: int, estimated_pages: dict) -> dict[str, int]:
+    """
+    Allocates requests the way that the seeder makes them: each country, in order, until it has no pages left.
+
+    :param country_codes: The countries, in the order that they are requested.
+    :param budget: The number of requests that can be made.
+    :param estimated_pages: {country_code: estimated number of pages left, or None if unknown}.  A country with an
+        unknown number of pages gets the rest of the budget.
+    :return: {country_code: number of requests}.
+    """
+
+    allocation = {}
+
+    for country_code in country_codes:
+        num_pages = estimated_pages.get(country_code)
+        allocation[country_code] = budget if num_pages is None else min(budget, num_pages)
+        budget -= allocation[country_code]
+
+    return allocation
+
+
+def allocate_requests_in_turns(country_codes: list[str], budget: int, weights: dict = None) -> dict[str, int]:
+    """
+    Allocates requests the way that the updater makes them: countries take turns, one request each, as long as they
+    have more changes, and countries with more weight take more turns.  Every country is assumed to have more changes.
+
+    :param country_codes: The countries, in the order that they take turns.
+    :param budget: The number of requests that can be made.
+    :param weights: {country_code: weight}.  Defaults to the same weight for every country.
+    :return: {country_code: number of requests}.
+    """
+
+    weights = weights or {country_code: 1 for country_code in country_codes}
+    waiting_country_codes = deque(country_codes)
+    num_turns = {country_code: 0 for country_code in country_codes}
+
+    for _ in range(budget if country_codes else 0):
+        waiting_country_codes.append(pop_next_turn(waiting_country_codes, num_turns, weights))
+
+    return num_turns
+
+
+def get_daily_limit() -> int:
+    """Gets the number of requests that can be made in a day, which is the daily quota of each API key in the pool."""
+
+    return STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY * len(api_key_pool)
+
+
+def get_refresh_limit() -> int:
+    """Gets the number of requests a day that are reserved for the refresher, out of the daily limit."""
+
+    return math.floor(get_daily_limit() * SA_REFRESH_QUOTA_SHARE)
+
+
+def get_num_requests_used_today() -> int:
+    """
+    Gets the number of requests made in the last 24 hours, by runs of all jobs in the job history.
+
+    :return: The number of requests, or 0 if there is no job history yet.
+    """
+
+    try:
+        return JobRun.get_num_requests_since(datetime.now(timezone.utc) - timedelta(days=1))
+    except DBAPIError:
+        logger.warning('Could not read the job history.  Assuming that no requests were made today.')
+        return 0
+
+
+def get_average_rows_per_request(job: str) -> float | None:
+    """Gets the average number of rows written per request in a job's recent runs, or None if it is not known."""
+
+    try:
+        return JobRun.get_average_rows_per_request(job)
+    except DBAPIError:
+        return None
+
+
+def read_for_plan(read: Callable[[], dict], table: str, warnings: list[str]) -> dict:
+    """
+    Reads saved data for a plan.  If the table can not be read, such as when it has not been created yet by a first
+    run, then the data is planned as empty, and a warning is added to the plan, instead of planning failing.
+
+    :param read: A function that reads the data, and raises DBAPIError if the table can not be read.
+    :param table: The name of the table, for the warning.
+    :param warnings: The plan's warnings, which a warning is added to.
+    :return: The data, or {} if the table can not be read.
+    """
+
+    try:
+        return read()
+    except DBAPIError:
+        logger.warning(f'Could not read the {table} table.  Planning as if it is empty.')
+        warnings.append(f'The {table} table could not be read (it is created by the first run), '
+                        f'so it is planned as empty.')
+        return {}
+
+
+def make_plan(
+        job: str, checkpoints: dict, estimated_pages: dict, allocation: dict, budget: int, num_requests_used: int,
+        num_transactions: int, num_service_requests: int = 0, warnings: list[str] = ()
+) -> dict:
+    """
+    Puts together a plan of what a run will do, with an estimate of rows from the job history.
+
+    :param job: The name of the job.
+    :param checkpoints: {country_code: checkpoint for display}.
+    :param estimated_pages: {country_code: estimated number of pages left, or None if unknown}.
+    :param allocation: {country_code: number of requests}.
+    :param budget: The number of requests that the run can make.
+    :param num_requests_used: The number of requests made in the last 24 hours.
+    :param num_transactions: The number of transactions that the run commits its data in.
+    :param num_service_requests: The number of requests that the run makes for the streaming services, besides the
+        requests for countries.
+    :param warnings: Anything that the plan could not read, and planned around.
+    :return: The plan.
+    """
+
+    num_requests = sum(allocation.values()) + num_service_requests
+    average_rows_per_request = get_average_rows_per_request(job)
+
+    # nothing is written by planning, so the session only has reads to discard
+    db.session.rollback()
+
+    return {
+        'job': job,
+        'daily_limit': get_daily_limit(),
+        'num_requests_used': num_requests_used,
+        'budget': budget,
+        'countries': [
+            {
+                'country_code': country_code,
+                'checkpoint': checkpoints.get(country_code),
+                'estimated_pages': estimated_pages.get(country_code),
+                'num_requests': num_requests
+            }
+            for country_code, num_requests in allocation.items()
+        ],
+        'num_service_requests': num_service_requests,
+        'num_requests': num_requests,
+        'average_rows_per_request': average_rows_per_request,
+        'estimated_rows': None if average_rows_per_request is None else round(num_requests * average_rows_per_request),
+        'num_transactions': num_transactions,
+        'warnings': list(warnings)
+    }
+
+
+def print_plan(plan: dict) -> None:
+    """Prints a plan from make_plan() as a table."""
+
+    print(f'\nPlan for the {plan['job']} (no API requests are made, and nothing is written to the database)')
+    print(f'  Requests made in the last 24 hours: {plan['num_requests_used']} of {plan['daily_limit']}')
+    print(f'  Request budget for this run: {plan['budget']}\n')
+
+    print(f'  {'Country':<8}{'Checkpoint':<40}{'Pages left':>12}{'Requests':>10}')
+    for country in plan['countries']:
+        checkpoint = '(start)' if country['checkpoint'] is None else str(country['checkpoint'])
+        estimated_pages = 'unknown' if country['estimated_pages'] is None else country['estimated_pages']
+        print(f'  {country['country_code']:<8}{checkpoint[:39]:<40}{estimated_pages:>12}{country['num_requests']:>10}')
+    if plan['num_service_requests']:
+        print(f'  {'Services':<8}{'':<40}{'':>12}{plan['num_service_requests']:>10}')
+
+    if plan['estimated_rows'] is None:
+        rows = 'unknown (no recent successful runs)'
+    else:
+        rows = f'about {plan['estimated_rows']:,} ({plan['average_rows_per_request']:.1f} per request in recent runs)'
+
+    print(f'\n  Requests: {plan['num_requests']}')
+    print(f'  Rows: {rows}')
+    print(f'  Transactions: {plan['num_transactions']}')
+
+    for warning in plan['warnings']:
+        print(f'  Warning: {warning}')
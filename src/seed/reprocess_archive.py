@@ -0,0 +1,219 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+import json
+import os
+from typing import Iterable, Iterator
+
+from src.adapters.parallel_transform import (read_shows_from_response_body,
+                                             transform_pages)
+from src.app import create_app, response_archive
+from src.exceptions.UpsertError import UpsertError
+from src.models.common import connect_db, db
+from src.seed.seed_updater_constants import SA_TRANSFORM_WORKERS
+from src.seed.seeder_updater_helpers import (group_streaming_options,
+                                             make_staging_store, run_job,
+                                             write_staged_data)
+from src.seed.streaming_availability_seeder import get_countries_services
+from src.util.logger import create_logger
+from src.util.response_archive import ResponseArchive
+from src.util.staging_store import StagingStore
+
+# ==================================================
+
+job = 'reprocessor'
+
+# the sources of archived responses, which are the jobs and the web app that requested them
+SOURCES = ('seeder', 'updater', 'refresher', 'app')
+
+# the sources whose responses are one movie's details, which have its streaming options in every country
+SHOW_DETAILS_SOURCES = ('refresher', 'app')
+
+logger = create_logger(__name__, 'src/logs/reprocess.log')
+
+# --------------------------------------------------
+
+
+def select_archived_responses(
+        archive: ResponseArchive, sources: list[str] = None, country_codes: list[str] = None
+) -> list[dict]:
+    """
+    Selects archived responses from the archive's index, in the order that they were archived.  Responses whose bodies
+    are missing from the archive are left out.
+
+    :param archive: The response archive.
+    :param sources: The sources of the responses to select, such as "seeder", or None for all sources.
+    :param country_codes: The countries of the responses to select, or None for all responses.  Responses that were
+        not requested for one country, such as the web app's, are only selected when this is None.
+    :return: The index entries of the selected responses.
+    """
+
+    entries = []
+
+    for entry in archive.iter_entries():
+        if sources and entry['source'] not in sources:
+            continue
+        if country_codes and entry['params'].get('country') not in country_codes:
+            continue
+
+        if not os.path.exists(archive.get_path(entry['digest'])):
+            logger.warning(f'The body of the archived response {entry} is missing.  Skipping it.')
+            continue
+
+        entries.append(entry)
+
+    return entries
+
+
+def read_archived_bodies(archive: ResponseArchive, entries: Iterable[dict]) -> Iterator[bytes]:
+    """Reads the bodies of archived responses, one at a time."""
+
+    for entry in entries:
+        yield archive.read(entry['digest'])
+
+
+def read_removed_movie_ids(archive: ResponseArchive, entry: dict) -> list[str]:
+    """
+    Reads the IDs of the movies in an archived page of removed changes that are not in the page's shows, which have no
+    streaming options left in the page's country (see get_updated_movies_and_streams_from_one_request()).
+
+    :param archive: The response archive.
+    :param entry: The index entry of the response.
+    :return: The movie IDs, or an empty list if the response is not a page of removed changes.
+    """
+
+    if entry['source'] != 'updater' or entry['params'].get('change_type') != 'removed':
+        return []
+
+    body = json.loads(archive.read(entry['digest']))
+
+    shows = body.get('shows') or []
+    if isinstance(shows, dict):
+        shows = shows.values()
+    show_ids = {show.get('id') for show in shows if isinstance(show, dict)}
+
+    return [change['showId'] for change in body.get('changes', []) if change['showId'] not in show_ids]
+
+
+def stage_archived_responses(
+        archive: ResponseArchive, entries: list[dict], num_workers: int = SA_TRANSFORM_WORKERS,
+        all_country_codes: Iterable[str] = ()
+) -> StagingStore:
+    """
+    Transforms archived responses, across num_workers processes, and stages their rows in the order that the
+    responses were archived, so that rows from later responses replace rows from earlier ones.  Streaming options are
+    staged in groups (see group_streaming_options()), so that a movie's streaming options in a country come from the
+    latest response that has them, the same as when they were first saved.
+
+    Deletions are replayed too: a removed movie that is only in the changes of an archived page of removed changes gets
+    an empty group for the page's country, and a movie's details replace its streaming options in all_country_codes,
+    the same as the refresher.
+
+    :param archive: The response archive.
+    :param entries: The index entries of the responses, from select_archived_responses().
+    :param num_workers: The number of worker processes to transform responses with.
+    :param all_country_codes: The countries that a movie's details have all of its streaming options in.
+    :return: A StagingStore with movies, movie_posters, and streaming_option_groups.
+    """
+
+    all_country_codes = sorted(all_country_codes)
+
+    store = make_staging_store(grouped_streaming_options=True)
+
+    try:
+        transformed_pages = transform_pages(
+            read_archived_bodies(archive, entries), num_workers, read_shows_from_response_body)
+
+        for entry, transformed_page in zip(entries, transformed_pages):
+            if entry['source'] in SHOW_DETAILS_SOURCES:
+                streaming_option_groups = group_streaming_options(transformed_page, all_country_codes)
+            else:
+                streaming_option_groups = group_streaming_options(
+                    transformed_page, entry['params'].get('country'), read_removed_movie_ids(archive, entry))
+
+            store.extend({
+                'movies': transformed_page['movies'],
+                'movie_posters': transformed_page['movie_posters'],
+                'streaming_option_groups': streaming_option_groups
+            })
+    except Exception:
+        store.close()
+        raise
+
+    return store
+
+
+def reprocess_archive(
+        archive: ResponseArchive, sources: list[str] = None, country_codes: list[str] = None,
+        num_workers: int = SA_TRANSFORM_WORKERS
+) -> dict:
+    """
+    Rebuilds the movies, movie_posters, and streaming_options tables from archived Streaming Availability API
+    responses, without making any API requests, such as after the transform or the database schema changes.
+
+    Movies and movie posters are upserted.  The streaming options of each movie, in each country that an archived
+    response has, are replaced with the ones from the latest archived response.  A movie's details have its streaming
+    options in every country that has free streaming services, or that an archived response was requested for.
+    Everything is saved in one transaction.  Seeder cursors and updater timestamps are not changed.
+
+    :param archive: The response archive.
+    :param sources: The sources of the responses to reprocess, such as "seeder", or None for all sources.
+    :param country_codes: The countries of the responses to reprocess, or None for all responses.
+    :param num_workers: The number of worker processes to transform responses with.
+    :return: {'num_requests': 0, 'num_rows': number of rows written}.
+    """
+
+    entries = select_archived_responses(archive, sources, country_codes)
+    logger.info(f'Reprocessing {len(entries)} archived responses.')
+
+    all_country_codes = set()
+    if any(entry['source'] in SHOW_DETAILS_SOURCES for entry in entries):
+        all_country_codes.update(get_countries_services())
+        all_country_codes.update(entry['params']['country'] for entry in entries if 'country' in entry['params'])
+
+    num_rows = write_staged_data(stage_archived_responses(archive, entries, num_workers, all_country_codes))
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        message = 'Exception encountered when committing reprocessed movie data.'
+        logger.error(f'{message}\n'
+                     f'Error is {type(e)}:\n'
+                     f'{str(e)}')
+        raise UpsertError(message)
+
+    logger.info(f'Reprocessed {len(entries)} archived responses into {num_rows} rows.')
+
+    return {'num_requests': 0, 'num_rows': num_rows}
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuilds movies and streaming options from archived Streaming '
+                                                 'Availability API responses, without making API requests.')
+    parser.add_argument('--source', action='append', choices=SOURCES, dest='sources',
+                        help='reprocess only responses from this source (can be repeated)')
+    parser.add_argument('--country', action='append', type=str.lower, dest='country_codes', metavar='COUNTRY_CODE',
+                        help='reprocess only responses for this country (can be repeated)')
+    parser.add_argument('--workers', type=int, default=SA_TRANSFORM_WORKERS,
+                        help='number of worker processes that transform responses')
+    args = parser.parse_args()
+
+    if response_archive.directory is None:
+        parser.error('archiving is turned off, since SA_RESPONSE_ARCHIVE_DIR is empty')
+
+    app = create_app("freestreammovies")
+    connect_db(app)
+    with app.app_context():
+        db.create_all()
+        run_job(job, lambda: reprocess_archive(response_archive, args.sources, args.country_codes, args.workers))
@@ -0,0 +1,137 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.job_run import JobRun
+from src.seed import (movie_refresher, streaming_availability_seeder,
+                      streaming_availability_updater)
+from src.seed.seed_updater_constants import (
+    SCHEDULER_REFRESHER_INTERVAL_SECONDS, SCHEDULER_RETRY_SECONDS,
+    SCHEDULER_SEEDER_INTERVAL_SECONDS, SCHEDULER_UPDATER_INTERVAL_SECONDS)
+from src.seed.seeder_updater_helpers import run_job
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/scheduler.log')
+
+# --------------------------------------------------
+
+
+def get_seconds_until_due(job: str, interval_seconds: int) -> float:
+    """
+    Gets how long until a job should run again, which is interval_seconds after its last run started.  Runs by any
+    process are counted, so that several schedulers, or runs by hand, do not run a job more often.
+
+    :param job: The name of the job.
+    :param interval_seconds: How often the job should run.
+    :return: The number of seconds until the job is due, which is 0 or less if it is due now.
+    """
+
+    last_start_time = JobRun.get_last_start_time(job)
+
+    if last_start_time is None:
+        return 0
+
+    next_start_time = last_start_time + timedelta(seconds=interval_seconds)
+    return (next_start_time - datetime.now(timezone.utc)).total_seconds()
+
+
+def run_due_jobs(jobs: dict[str, tuple[Callable, int]]) -> float:
+    """
+    Runs each job that is due, one at a time.  A job that fails is logged and is run again at its next interval.  A job
+    that is skipped, because another job is running in another process, is tried again after SCHEDULER_RETRY_SECONDS.
+
+    :param jobs: {job name: (function, interval in seconds)}.
+    :return: The number of seconds until the next job is due.
+    """
+
+    seconds_until_next_job = math.inf
+
+    for job, (func, interval_seconds) in jobs.items():
+        seconds_until_due = get_seconds_until_due(job, interval_seconds)
+
+        if seconds_until_due <= 0:
+            try:
+                status = run_job(job, func)
+            except Exception as e:
+                logger.error(f'Job "{job}" raised an exception.  It will run again at its next interval.\n'
+                             f'Error is {type(e)}:\n'
+                             f'{str(e)}')
+                status = JobRun.Statuses.FAILED
+
+            if status == JobRun.Statuses.SKIPPED:
+                seconds_until_due = SCHEDULER_RETRY_SECONDS
+            else:
+                seconds_until_due = get_seconds_until_due(job, interval_seconds)
+
+        seconds_until_next_job = min(seconds_until_next_job, seconds_until_due)
+
+    return seconds_until_next_job
+
+
+def run_scheduler(jobs: dict[str, tuple[Callable, int]]) -> None:
+    """
+    Runs jobs at their intervals, forever.
+
+    :param jobs: {job name: (function, interval in seconds)}.
+    """
+
+    while True:
+        seconds_until_next_job = run_due_jobs(jobs)
+
+        logger.info(f'Next job is due in {seconds_until_next_job:.0f} seconds.')
+        time.sleep(max(seconds_until_next_job, 1))
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Runs the updater, the refresher, and optionally the seeder, at intervals.  Runs never overlap, '
+                    'even with runs in other processes, and each run is recorded in the job_runs table.')
+    parser.add_argument('--updater-interval', type=int, default=SCHEDULER_UPDATER_INTERVAL_SECONDS,
+                        help='seconds between updater runs; 0 does not run the updater')
+    parser.add_argument('--seeder-interval', type=int, default=SCHEDULER_SEEDER_INTERVAL_SECONDS,
+                        help='seconds between seeder runs; 0 does not run the seeder')
+    parser.add_argument('--refresher-interval', type=int, default=SCHEDULER_REFRESHER_INTERVAL_SECONDS,
+                        help='seconds between refresher runs; 0 does not run the refresher')
+    parser.add_argument('--once', action='store_true', help='run the jobs that are due, and then exit')
+    args = parser.parse_args()
+
+    jobs = {}
+    if args.updater_interval > 0:
+        jobs[streaming_availability_updater.checkpoint_job] = (
+            streaming_availability_updater.get_updated_movies_and_streaming_options, args.updater_interval)
+    if args.seeder_interval > 0:
+        jobs[streaming_availability_seeder.checkpoint_job] = (
+            streaming_availability_seeder.seed_movies_and_streams, args.seeder_interval)
+    if args.refresher_interval > 0:
+        jobs[movie_refresher.job] = (movie_refresher.refresh_stale_movies, args.refresher_interval)
+
+    if not jobs:
+        parser.error('at least one of --updater-interval, --seeder-interval, and --refresher-interval has to be more '
+                     'than 0')
+
+    app = create_app("freestreammovies")
+    connect_db(app)
+    with app.app_context():
+        db.create_all()
+        if args.once:
+            run_due_jobs(jobs)
+        else:
+            run_scheduler(jobs)
@@ -1,3 +1,89 @@
-STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND = 10
-STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY = 100
-SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY = STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY * 0.8
+import os
+
+# ==================================================
+
+# The rate limits of the Streaming Availability API plan.  These can be overridden with environment variables,
+# such as when running against a local stand-in of the API for load testing.
+STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND = int(
+    os.environ.get('SA_API_REQUEST_RATE_LIMIT_PER_SECOND', 10))
+STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY = int(
+    os.environ.get('SA_API_REQUEST_RATE_LIMIT_PER_DAY', 100))
+
+# The share of the daily request quota that is reserved for the refresher (see src/seed/movie_refresher.py), which is
+# left out of the updater's and the seeder's budgets.
+SA_REFRESH_QUOTA_SHARE = float(os.environ.get('SA_REFRESH_QUOTA_SHARE', 0.05))
+SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY = \
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY * (0.8 - SA_REFRESH_QUOTA_SHARE)
+
+# How long an API key is taken out of rotation after it is rate limited, if the response does not say how long to wait.
+SA_API_KEY_COOLDOWN_SECONDS = float(os.environ.get('SA_API_KEY_COOLDOWN_SECONDS', 60))
+
+# The max number of shows in one page of results from /shows/search/filters and from /changes.
+SA_API_SEARCH_PAGE_SIZE = 20
+SA_API_CHANGES_PAGE_SIZE = 25
+
+# Max number of Streaming Availability API requests that can be waiting on a response at the same time.
+# Each request can use a database connection, so this is kept within the default database connection pool size.
+SA_API_MAX_CONCURRENT_REQUESTS = min(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND, 10)
+
+# Whether to parse Streaming Availability API responses incrementally, one show at a time, instead of loading the whole
+# response body at once.  This keeps memory low for large pages of changes.
+SA_API_STREAM_RESPONSES = os.environ.get('SA_API_STREAM_RESPONSES', 'true').lower() in ('true', '1', 'yes')
+SA_API_RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Where the raw bodies of successful Streaming Availability API responses are archived, so that they can be reprocessed
+# without requesting them again (see src/seed/reprocess_archive.py).  An empty value turns archiving off.
+SA_RESPONSE_ARCHIVE_DIR = os.environ.get('SA_RESPONSE_ARCHIVE_DIR', 'src/seed/response_archive') or None
+
+# Max number of deduplicated rows that the seeder and updater keep in memory before spilling them into a temporary
+# SQLite database.  The database's directory can be set with the SQLITE_TMPDIR environment variable.
+SA_STAGING_MEMORY_BUDGET_ROWS = int(os.environ.get('SA_STAGING_MEMORY_BUDGET_ROWS', 500_000))
+
+# How long a seeding worker's claim on a seed task lasts.  If a worker crashes, its task can be claimed by another
+# worker after this many seconds.  This should be longer than it takes to request and save one page.
+SA_SEED_TASK_LEASE_SECONDS = int(os.environ.get('SA_SEED_TASK_LEASE_SECONDS', 300))
+
+# Number of worker processes that transform pages of shows when many pages are processed at once, such as when
+# reprocessing saved pages.  1 transforms the pages in the same process.
+SA_TRANSFORM_WORKERS = int(os.environ.get('SA_TRANSFORM_WORKERS', 1))
+
+# The web app's traffic from each country, over the last SA_TRAFFIC_NUM_DAYS days, decides the order that the seeder
+# seeds countries in, and the share of requests that each country gets from the updater.  Every country is weighted as
+# if it had at least SA_TRAFFIC_MIN_WEIGHT of the total traffic, so that countries with little traffic still get
+# updated.
+SA_TRAFFIC_NUM_DAYS = int(os.environ.get('SA_TRAFFIC_NUM_DAYS', 7))
+SA_TRAFFIC_MIN_WEIGHT = float(os.environ.get('SA_TRAFFIC_MIN_WEIGHT', 0.05))
+
+# The updater requests a country's changes again once about SA_UPDATE_CHANGES_PER_POLL changes are expected to have
+# built up, according to the country's change rate, and at least every SA_UPDATE_MAX_POLL_INTERVAL_DAYS days, which is
+# kept under the 31 days that Streaming Availability API accepts for the "from" timestamp.  Each new measurement of a
+# country's change rate is weighted by SA_UPDATE_CHANGE_RATE_SMOOTHING against the earlier ones.
+SA_UPDATE_CHANGES_PER_POLL = int(os.environ.get('SA_UPDATE_CHANGES_PER_POLL', SA_API_CHANGES_PAGE_SIZE))
+SA_UPDATE_MAX_POLL_INTERVAL_DAYS = float(os.environ.get('SA_UPDATE_MAX_POLL_INTERVAL_DAYS', 28))
+SA_UPDATE_CHANGE_RATE_SMOOTHING = 0.5
+
+# The types of changes that the updater gets from Streaming Availability API, in the order that each country gets them.
+# "new" and "updated" changes add and replace streaming options, "removed" changes delete them, and "expiring" changes
+# mark the ones that are about to expire.  Each type has its own "from" timestamps.
+SA_UPDATE_CHANGE_TYPES = tuple(
+    os.environ.get('SA_UPDATE_CHANGE_TYPES', 'new,updated,removed,expiring').replace(' ', '').split(','))
+
+# Movies that were first saved from a details page visit are not in any seeded catalog, so the updater does not update
+# them.  The refresher requests them again once they were last fetched over SA_REFRESH_MIN_AGE_DAYS days ago, starting
+# with the ones that were viewed the most since then.  Movies with fewer than SA_REFRESH_MIN_VIEWS views are not
+# refreshed.
+SA_REFRESH_MIN_AGE_DAYS = float(os.environ.get('SA_REFRESH_MIN_AGE_DAYS', 7))
+SA_REFRESH_MIN_VIEWS = int(os.environ.get('SA_REFRESH_MIN_VIEWS', 1))
+
+# Max number of rows written to the database in one statement.
+DB_WRITE_BATCH_SIZE = 10_000
+
+# How often the scheduler runs the updater and the seeder, in seconds.  0 means that the scheduler does not run the job.
+# The updater uses most of the daily request quota in each run, so it runs once a day by default.
+SCHEDULER_UPDATER_INTERVAL_SECONDS = int(os.environ.get('SCHEDULER_UPDATER_INTERVAL_SECONDS', 24 * 60 * 60))
+SCHEDULER_SEEDER_INTERVAL_SECONDS = int(os.environ.get('SCHEDULER_SEEDER_INTERVAL_SECONDS', 0))
+# The refresher only uses its reserved share of the quota, so it can run more often than the updater.
+SCHEDULER_REFRESHER_INTERVAL_SECONDS = int(os.environ.get('SCHEDULER_REFRESHER_INTERVAL_SECONDS', 6 * 60 * 60))
+
+# How long the scheduler waits before trying a job again, after it was skipped because another job was running.
+SCHEDULER_RETRY_SECONDS = 60
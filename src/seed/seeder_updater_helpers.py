@@ -1,80 +1,515 @@
-from src.adapters.streaming_availability_adapter import transform_show
-from src.exceptions.DatabaseError import DatabaseError
-from src.models.common import db
+import hashlib
+import json
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+from flask import Flask
+from sqlalchemy.exc import DBAPIError
+
+from src.adapters.parallel_transform import transform_pages
+from src.adapters.streaming_availability_adapter import (
+    MOVIE_BATCH_COLUMNS, MOVIE_POSTER_BATCH_COLUMNS,
+    STREAMING_OPTION_BATCH_COLUMNS, STREAMING_OPTION_BATCH_KEY,
+    make_page_batches)
+from src.models.checkpoint import Checkpoint
+from src.models.common import advisory_lock, db
+from src.models.country_traffic import CountryTraffic
+from src.models.job_run import JobRun
+from src.models.movie import Movie
+from src.models.movie_content_hash import MovieContentHash
+from src.models.movie_poster import MoviePoster
 from src.models.streaming_option import StreamingOption
+from src.seed.seed_updater_constants import (DB_WRITE_BATCH_SIZE,
+                                             SA_STAGING_MEMORY_BUDGET_ROWS,
+                                             SA_TRAFFIC_MIN_WEIGHT,
+                                             SA_TRAFFIC_NUM_DAYS,
+                                             SA_TRANSFORM_WORKERS)
+from src.util.column_batch import ColumnBatch
+from src.util.file_handling import read_json_file_helper
 from src.util.logger import create_logger
+from src.util.staging_store import StagingStore
 
 # ==================================================
 
+# the advisory lock that is held while a job that uses the Streaming Availability API is running
+JOBS_LOCK_NAME = 'streaming_availability_jobs'
+
+# each movie's streaming options in a country can be staged together, so that a later response replaces all of them
+# (a group's content_hash is a hash of its movie, movie posters, and streaming options, or None without a movie)
+STREAMING_OPTION_GROUP_COLUMNS = ('movie_id', 'country_code', 'streaming_options', 'content_hash')
+STREAMING_OPTION_GROUP_KEY = ('movie_id', 'country_code')
+
 logger = create_logger(__name__, 'src/logs/seeder_updater_helpers.log')
 
 # --------------------------------------------------
 
 
-def delete_country_movie_streaming_options(movie_id, country_code) -> None:
+def call_in_app_context(app: Flask, func, *args):
+    """
+    Calls a function within a new app context.  This is needed for functions, that use the database, to be run in
+    another thread, since each thread needs its own app context (and therefore, its own database session).
+
+    :param app: The Flask app to create the app context from.
+    :param func: The function to call.
+    :param args: Positional arguments to pass to the function.
+    :return: The return value of the function.
     """
-    Deletes old streaming options belonging to both provided movie ID and country code,
-    since "updated" changes from Streaming Availability API can contain additions, removals,
-    and modifications.
 
-    It is not easy to find an old StreamingOption, since there can be multiple streaming options
-    for a movie, country, and streaming service, such as when there are different languages for a movie.
-    Once there is a change, for example if the link changes, it might not be possible to find the old one.
+    with app.app_context():
+        return func(*args)
+
 
-    :param movie_id: The movie ID to delete streaming options for.
-    :param country_code: The country to delete streaming options for.
+def read_checkpoints(job: str, legacy_file_location: str = None) -> dict:
     """
+    Reads the saved checkpoints for a job.  If there are none in the database, then the checkpoints are read from the
+    JSON file that was used to store them before, so that the job continues from where it left off.  Those checkpoints
+    will then be saved into the database the next time the job commits.
 
-    try:
-        db.session.query(StreamingOption).filter_by(
-            movie_id=movie_id,
-            country_code=country_code
-        ).delete()
-        db.session.commit()
-
-    except Exception as e:
-        db.session.rollback()
-        logger.error('Exception encountered when deleting StreamingOptions.'
-                     f'Error is {type(e)}:\n'
-                     f'{e}')
-        raise DatabaseError('Server exception encountered when deleting streaming options.')
-
-
-def make_unique_transformed_show_data(show) -> dict:
-    """
-    Transforms the show JSON and puts results into dictionaries to remove duplicates.
-
-    :param show: The JSON Show object retrieved from a response from Streaming Availability.
-    :return: {
-        'movies': {
-            'movie identifier': {movie attributes}
-        },
-        'movie_posters': {
-            'poster identifier': {movie poster attributes},
-            ...
-        },
-        'streaming_options': {
-            'streaming options identifier': {streaming option attributes},
-            ...
-        }
-    }
+    :param job: The name of the job to read checkpoints for.
+    :param legacy_file_location: The location of the JSON file that used to store the job's checkpoints, or None if
+        the job never stored them in a file.
+    :return: {country_code: value}.
     """
 
-    output = {
-        'movies': {},
-        'movie_posters': {},
-        'streaming_options': {},
+    checkpoints = Checkpoint.get_checkpoints(job)
+
+    if not checkpoints and legacy_file_location:
+        logger.info(f'No checkpoints in database for job "{job}".  Reading from {legacy_file_location}.')
+        checkpoints = read_json_file_helper(legacy_file_location)
+
+    return checkpoints
+
+
+def get_checkpoint_job(job: str, service_ids: list[str] = None) -> str:
+    """
+    Gets the name that a job's checkpoints are saved under.  A run for only some streaming services walks different
+    pages than a run for all of them, so its checkpoints are kept apart, such as "seeder:tubi", and the checkpoints of
+    full runs are left as they are.
+
+    :param job: The name of the job.
+    :param service_ids: The streaming services that the run is for, or None if it is for all of them.
+    :return: The name to save and read checkpoints under.
+    """
+
+    if not service_ids:
+        return job
+
+    return f'{job}:{','.join(sorted(service_ids))}'
+
+
+def select_countries_services(
+        countries_services: dict, country_codes: list[str] = None, service_ids: list[str] = None
+) -> dict:
+    """
+    Selects some countries and streaming services, such as to re-seed one country or one newly added service.
+    Countries that are left without any of the selected services are dropped.
+
+    :param countries_services: {country_code: [service_id, ...]}.
+    :param country_codes: The countries to select, or None for all of them.
+    :param service_ids: The streaming services to select, or None for all of them.
+    :return: {country_code: [service_id, ...]}, with only the selected countries and services.
+    """
+
+    unknown_country_codes = set(country_codes or ()) - set(countries_services)
+    unknown_service_ids = set(service_ids or ()) - {
+        service_id for country_service_ids in countries_services.values() for service_id in country_service_ids
     }
+    if unknown_country_codes or unknown_service_ids:
+        logger.warning(f'Countries {sorted(unknown_country_codes)} and services {sorted(unknown_service_ids)} '
+                       'do not have free streaming services in the database, and are skipped.')
+
+    selected = {}
+
+    for country_code, country_service_ids in countries_services.items():
+        if country_codes and country_code not in country_codes:
+            continue
+
+        selected_service_ids = [service_id for service_id in country_service_ids
+                                if not service_ids or service_id in service_ids]
+        if selected_service_ids:
+            selected[country_code] = selected_service_ids
+
+    return selected
+
+
+def get_country_weights(country_codes: Iterable[str]) -> dict[str, float]:
+    """
+    Weights countries by the web app's traffic from them, over the last SA_TRAFFIC_NUM_DAYS days.  Every country is
+    weighted at least SA_TRAFFIC_MIN_WEIGHT of the total traffic.  If there is no traffic, or it can not be read, then
+    every country has the same weight.
+
+    :param country_codes: The countries to weight.
+    :return: {country_code: weight}.
+    """
+
+    country_codes = list(country_codes)
+
+    try:
+        traffic = CountryTraffic.get_recent_counts(SA_TRAFFIC_NUM_DAYS)
+    except DBAPIError as e:
+        logger.warning('Unable to read country traffic.  Countries are weighted the same.\n'
+                       f'Error is {type(e)}:\n'
+                       f'{str(e)}')
+        traffic = {}
+
+    total_traffic = sum(traffic.get(country_code, 0) for country_code in country_codes)
+
+    if not total_traffic:
+        return {country_code: 1 for country_code in country_codes}
+
+    return {country_code: max(traffic.get(country_code, 0), total_traffic * SA_TRAFFIC_MIN_WEIGHT)
+            for country_code in country_codes}
+
+
+def order_by_weight(countries_services: dict, weights: dict) -> dict:
+    """
+    Orders countries from the highest weight to the lowest.  Countries with the same weight keep their order.
+
+    :param countries_services: {country_code: [service_id, ...]}.
+    :param weights: {country_code: weight}.
+    :return: The same countries and services, in order.
+    """
+
+    return dict(sorted(countries_services.items(), key=lambda item: -weights[item[0]]))
+
+
+def pop_next_turn(waiting_country_codes: deque, num_turns: dict, weights: dict) -> str:
+    """
+    Removes and returns the waiting country that is furthest behind on its share of turns, where each country's share
+    is in proportion to its weight, and counts the turn.  Ties go to the country that has waited the longest, so
+    countries with the same weight take turns round-robin.
+
+    :param waiting_country_codes: The countries that are waiting for a turn, with the longest waiting first.
+    :param num_turns: {country_code: number of turns taken}, which is updated.
+    :param weights: {country_code: weight}.
+    :return: The country whose turn is next.
+    """
+
+    country_code = min(waiting_country_codes,
+                       key=lambda country_code: (num_turns.get(country_code, 0) + 1) / weights[country_code])
+
+    waiting_country_codes.remove(country_code)
+    num_turns[country_code] = num_turns.get(country_code, 0) + 1
+
+    return country_code
+
+
+def make_content_hash(movie_row: list, movie_poster_rows: list[list], streaming_option_rows: list[list]) -> str:
+    """
+    Hashes the transformed data of a movie in a country, so that it can be compared with what was saved before.  The
+    rows of movie posters and streaming options are hashed regardless of their order.
+
+    :param movie_row: The movie's values, in the order of MOVIE_BATCH_COLUMNS.
+    :param movie_poster_rows: The movie posters' values, in the order of MOVIE_POSTER_BATCH_COLUMNS.
+    :param streaming_option_rows: The streaming options' values in the country, in the order of
+        STREAMING_OPTION_BATCH_COLUMNS.
+    :return: The SHA-256 hash, in hex.
+    """
+
+    content = [
+        list(movie_row),
+        sorted(json.dumps(list(row), default=str) for row in movie_poster_rows),
+        sorted(json.dumps(list(row), default=str) for row in streaming_option_rows)
+    ]
+
+    return hashlib.sha256(json.dumps(content, default=str).encode()).hexdigest()
+
+
+def group_streaming_options(
+        transformed_page: dict[str, ColumnBatch], country_code: str | Iterable[str] = None,
+        movie_ids: Iterable[str] = ()
+) -> ColumnBatch:
+    """
+    Groups a transformed page's streaming options by movie and country, and hashes each group along with its movie and
+    movie posters (see make_content_hash()).
+
+    A page that was requested for one country has every movie's current streaming options in that country, so each of
+    its movies gets a group for that country, even if the group is empty.  The same goes for every country of a page
+    that has its movies' streaming options in all countries, such as a movie's details.  Other pages only have groups
+    for the countries that their movies have streaming options in.
+
+    :param transformed_page: A page from transform_page().
+    :param country_code: The country that the page was requested for, the countries that the page has every movie's
+        streaming options in, or None.
+    :param movie_ids: The IDs of other movies that have no streaming options left in the country, such as movies that
+        were removed from Streaming Availability API.  They get empty groups for the country, without hashes.
+    :return: A ColumnBatch of (movie_id, country_code, streaming_options, content_hash), where streaming_options is a
+        list of rows with the columns of STREAMING_OPTION_BATCH_COLUMNS.
+    """
+
+    movies = transformed_page['movies']
+    movie_rows = dict(zip(movies.columns['id'],
+                          zip(*[movies.columns[column_name] for column_name in MOVIE_BATCH_COLUMNS])))
+
+    movie_posters = transformed_page['movie_posters']
+    movie_poster_rows = {}
+    for row in zip(*[movie_posters.columns[column_name] for column_name in MOVIE_POSTER_BATCH_COLUMNS]):
+        movie_poster_rows.setdefault(row[0], []).append(row)
+
+    groups = {}
+
+    country_codes = [country_code] if isinstance(country_code, str) else country_code or []
+    for page_country_code in country_codes:
+        for movie_id in [*movies.columns['id'], *movie_ids]:
+            groups[(movie_id, page_country_code)] = []
+
+    streaming_options = transformed_page['streaming_options']
+    for row in zip(*[streaming_options.columns[column_name] for column_name in STREAMING_OPTION_BATCH_COLUMNS]):
+        movie_id, row_country_code = row[0], row[1]
+        groups.setdefault((movie_id, row_country_code), []).append(list(row))
+
+    batch = ColumnBatch(STREAMING_OPTION_GROUP_COLUMNS, STREAMING_OPTION_GROUP_KEY)
+    for (movie_id, group_country_code), rows in groups.items():
+        movie_row = movie_rows.get(movie_id)
+        content_hash = None if movie_row is None \
+            else make_content_hash(movie_row, movie_poster_rows.get(movie_id, []), rows)
+        batch.add_row(movie_id, group_country_code, rows, content_hash)
+
+    return batch
+
+
+def make_staging_store(grouped_streaming_options: bool = False) -> StagingStore:
+    """
+    Creates an empty store for the Movie, MoviePoster, and StreamingOption rows from all requests of a run.  Rows are
+    kept in memory up to SA_STAGING_MEMORY_BUDGET_ROWS rows, and after that, they are spilled to disk.
+
+    :param grouped_streaming_options: Whether streaming options are staged in groups, from
+        group_streaming_options(), instead of one row at a time.  A group that is staged again replaces the earlier
+        one, and write_staged_data() replaces each group's streaming options in the database.
+    :return: A StagingStore with the same tables as transform_page(), but with streaming_option_groups instead of
+        streaming_options if the streaming options are grouped.
+    """
+
+    empty_batches = make_page_batches()
+
+    if grouped_streaming_options:
+        del empty_batches['streaming_options']
+        empty_batches['streaming_option_groups'] = ColumnBatch(
+            STREAMING_OPTION_GROUP_COLUMNS, STREAMING_OPTION_GROUP_KEY)
+
+    return StagingStore(empty_batches, SA_STAGING_MEMORY_BUDGET_ROWS)
+
+
+def stage_pages(
+        pages: Iterable, num_workers: int = SA_TRANSFORM_WORKERS, read_page: Callable = None
+) -> StagingStore:
+    """
+    Transforms pages of shows, across num_workers processes, and merges the deduplicated rows into a new staging
+    store, in the same order as if the pages were transformed one at a time.
+
+    :param pages: Lists of JSON Show objects, or anything that read_page turns into one, such as raw response bodies.
+    :param num_workers: The number of worker processes to transform pages with.
+    :param read_page: A module-level function that turns a page into a list of JSON Show objects, in a worker process.
+    :return: A StagingStore with the rows of all pages, which can be written with write_staged_data().
+    """
+
+    store = make_staging_store()
+
+    try:
+        for transformed_page in transform_pages(pages, num_workers, read_page):
+            store.extend(transformed_page)
+    except Exception:
+        store.close()
+        raise
+
+    return store
+
+
+def find_unchanged_groups(store: StagingStore) -> set[tuple[str, str]]:
+    """
+    Finds the staged streaming option groups whose content hashes match the stored ones, reading the stored hashes in
+    batches of DB_WRITE_BATCH_SIZE groups.  Groups without hashes are never unchanged.
+
+    :param store: The StagingStore holding streaming_option_groups.
+    :return: The (movie_id, country_code) keys of the unchanged groups.
+    """
+
+    unchanged_keys = set()
+
+    for groups in store.iter_batches('streaming_option_groups', DB_WRITE_BATCH_SIZE):
+        keys = list(zip(groups.columns['movie_id'], groups.columns['country_code']))
+        stored_content_hashes = MovieContentHash.get_content_hashes(keys)
+
+        for key, content_hash in zip(keys, groups.columns['content_hash']):
+            if content_hash is not None and stored_content_hashes.get(key) == content_hash:
+                unchanged_keys.add(key)
+
+    return unchanged_keys
+
+
+def remove_movie_rows(batch: ColumnBatch, movie_id_column_name: str, movie_ids: set[str]) -> ColumnBatch:
+    """
+    Removes the rows of some movies from a batch.
+
+    :param batch: The batch to remove rows from, which is not changed.
+    :param movie_id_column_name: The name of the batch's column that has movie IDs.
+    :param movie_ids: The IDs of the movies to remove rows for.
+    :return: A new batch without the movies' rows, or the same batch if there are no movies to remove.
+    """
+
+    if not movie_ids:
+        return batch
+
+    remaining = ColumnBatch(batch.column_names, batch.key_column_names)
+    movie_id_index = batch.column_names.index(movie_id_column_name)
+
+    for row in zip(*[batch.columns[column_name] for column_name in batch.column_names]):
+        if row[movie_id_index] not in movie_ids:
+            remaining.add_row(*row)
+
+    return remaining
+
+
+def write_staged_data(store: StagingStore, skip_unchanged_content: bool = False) -> int:
+    """
+    Adds the staged movies, movie posters, and streaming options to the database session, in batches of
+    DB_WRITE_BATCH_SIZE rows, reading the rows back from the store one batch at a time.  Then closes the store.
+    Does not commit.
+
+    Grouped streaming options replace all streaming options of their movies and countries, with one set-based delete
+    per batch of groups, before they are inserted, and their content hashes are stored.  Movies and movie posters that
+    have not changed are left as they are, and the numbers of inserted, updated, and unchanged ones are logged.
+
+    :param store: The StagingStore holding the rows.
+    :param skip_unchanged_content: Whether to skip groups whose content hashes match the stored ones, before anything
+        is written, along with the movies and movie posters of movies that have only unchanged groups.
+    :return: The number of rows written.
+    """
+
+    num_rows = 0
+    # {table name: {'num_inserted': int, 'num_updated': int, 'num_unchanged': int}}
+    upsert_counts = {'movies': Counter(), 'movie_posters': Counter()}
+
+    unchanged_keys = set()
+    skipped_movie_ids = set()
+
+    try:
+        if skip_unchanged_content and 'streaming_option_groups' in store.table_names:
+            unchanged_keys = find_unchanged_groups(store)
+
+            if unchanged_keys:
+                skipped_movie_ids = {movie_id for movie_id, country_code in unchanged_keys}
+                for groups in store.iter_batches('streaming_option_groups', DB_WRITE_BATCH_SIZE):
+                    for key in zip(groups.columns['movie_id'], groups.columns['country_code']):
+                        if key not in unchanged_keys:
+                            skipped_movie_ids.discard(key[0])
+
+        for batch in store.iter_batches('movies', DB_WRITE_BATCH_SIZE):
+            batch = remove_movie_rows(batch, 'id', skipped_movie_ids)
+            upsert_counts['movies'].update(Movie.upsert_batch(batch))
+            num_rows += len(batch)
+        for batch in store.iter_batches('movie_posters', DB_WRITE_BATCH_SIZE):
+            batch = remove_movie_rows(batch, 'movie_id', skipped_movie_ids)
+            upsert_counts['movie_posters'].update(MoviePoster.upsert_batch(batch))
+            num_rows += len(batch)
+        if 'streaming_options' in store.table_names:
+            for batch in store.iter_batches('streaming_options', DB_WRITE_BATCH_SIZE):
+                StreamingOption.insert_batch(batch)
+                num_rows += len(batch)
+
+        if 'streaming_option_groups' in store.table_names:
+            for groups in store.iter_batches('streaming_option_groups', DB_WRITE_BATCH_SIZE):
+                keys = []
+                content_hashes = {}
+                keys_without_hashes = []
+                streaming_options = ColumnBatch(STREAMING_OPTION_BATCH_COLUMNS, STREAMING_OPTION_BATCH_KEY)
+
+                for movie_id, country_code, rows, content_hash in zip(*[groups.columns[column_name]
+                                                                       for column_name in groups.column_names]):
+                    key = (movie_id, country_code)
+                    if key in unchanged_keys:
+                        continue
+
+                    keys.append(key)
+                    if content_hash is None:
+                        keys_without_hashes.append(key)
+                    else:
+                        content_hashes[key] = content_hash
+                    for row in rows:
+                        streaming_options.add_row(*row)
+
+                StreamingOption.delete_movies_in_countries(keys)
+                StreamingOption.insert_batch(streaming_options)
+                MovieContentHash.delete_movies_in_countries(keys_without_hashes)
+                MovieContentHash.upsert_database(content_hashes)
+                num_rows += len(streaming_options)
+    finally:
+        store.close()
+
+    if skip_unchanged_content:
+        logger.info(f'Skipped {len(unchanged_keys)} unchanged movies in countries, and {len(skipped_movie_ids)} '
+                    'movies that are unchanged in every country.')
+    for name, counts in upsert_counts.items():
+        logger.info(f'Upserting {name}: {counts['num_inserted']} inserted, {counts['num_updated']} updated, '
+                    f'{counts['num_unchanged']} unchanged.')
+
+    return num_rows
+
+
+@contextmanager
+def job_run(job: str, is_shared: bool = False) -> Iterator[int | None]:
+    """
+    Starts a run of a job, unless another job that uses the Streaming Availability API is already running, in any
+    process.  Jobs exclude each other through a PostgreSQL advisory lock, so that runs can not overlap and spend the API
+    quota twice, or delete each other's streaming options.  Jobs that take the lock in shared mode, such as seeding
+    workers, can run alongside each other, but not alongside other jobs.
+
+    Each run, including a skipped one, is recorded in the job_runs table.  A run that raises an exception is recorded
+    as failed, and the with block has to record a run that succeeds with JobRun.finish().
+
+    Example:
+        with job_run('seeder') as run_id:
+            if run_id is not None:
+                ...
+                JobRun.finish(run_id, JobRun.Statuses.SUCCEEDED, num_requests, num_rows)
+
+    :param job: The name of the job, which is recorded with the run.
+    :param is_shared: Whether the job can run alongside other jobs that are also shared.
+    :return: A context manager that gives the ID of the run, or None if the run is skipped.
+    :raise Exception: Any exception raised in the with block, after the run is recorded as failed.
+    """
+
+    with advisory_lock(JOBS_LOCK_NAME, is_shared) as is_locked:
+        if not is_locked:
+            run_id = JobRun.start(job, JobRun.Statuses.SKIPPED)
+            JobRun.finish(run_id, JobRun.Statuses.SKIPPED)
+            logger.warning(f'Skipping job "{job}", since another job is running.')
+            yield None
+            return
+
+        logger.info(f'Starting job "{job}".')
+        run_id = JobRun.start(job)
+
+        try:
+            yield run_id
+        except Exception as e:
+            JobRun.finish(run_id, JobRun.Statuses.FAILED, error=f'{type(e).__name__}: {e}')
+            logger.error(f'Job "{job}" failed.')
+            raise
+
+
+def run_job(job: str, func: Callable[[], dict | None]) -> str:
+    """
+    Runs a job, such as the updater or the seeder, unless another job that uses the Streaming Availability API is
+    already running, in any process (see job_run()).
+
+    Each run, including a skipped one, is recorded in the job_runs table, along with its duration and the numbers of
+    requests and rows that func returns.
+
+    :param job: The name of the job, which is recorded with the run.
+    :param func: The job's function.  It can return {'num_requests', 'num_rows'}.
+    :return: The status of the run: "succeeded" or "skipped".
+    :raise Exception: Any exception raised by func, after the run is recorded as failed.
+    """
+
+    with job_run(job) as run_id:
+        if run_id is None:
+            return JobRun.Statuses.SKIPPED
+
+        stats = func() or {}
+
+        JobRun.finish(run_id, JobRun.Statuses.SUCCEEDED, stats.get('num_requests'), stats.get('num_rows'))
+        logger.info(f'Finished job "{job}": {stats}.')
 
-    transformed_show = transform_show(show)
-    output['movies'].update({movie['id']: movie for movie in transformed_show['movies']})
-    output['movie_posters'].update({
-        f'{poster['movie_id']}-{poster['type']}-{poster['size']}': poster
-        for poster in transformed_show['movie_posters']
-    })
-    output['streaming_options'].update({
-        f'{option['movie_id']}-{option['country_code']}-{option['service_id']}-{option['link']}': option
-        for option in transformed_show['streaming_options']
-    })
-
-    return output
+        return JobRun.Statuses.SUCCEEDED
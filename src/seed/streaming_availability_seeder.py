@@ -8,56 +8,97 @@ sys.path.append(root_dir)  # nopep8
 
 # --------------------------------------------------
 
+import argparse
+import math
+import os
+import socket
 import time
+from typing import Iterable
 
 import requests
 from requests.exceptions import RequestException
 from sqlalchemy.exc import DBAPIError
 
-from src.app import RAPID_API_KEY, create_app
+from src.adapters.streaming_availability_adapter import (read_show_page,
+                                                        transform_page)
+from src.app import (STREAMING_AVAILABILITY_BASE_URL, api_key_pool,
+                     create_app, response_archive)
 from src.common_constants import BLACKLISTED_SERVICES
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
 from src.exceptions.base_exceptions import FreeStreamMoviesServerError
 from src.exceptions.DatabaseError import DatabaseError
 from src.exceptions.UpsertError import UpsertError
+from src.models.checkpoint import Checkpoint
 from src.models.common import connect_db, db
 from src.models.country_service import CountryService
-from src.models.movie import Movie
-from src.models.movie_poster import MoviePoster
+from src.models.job_run import JobRun
+from src.models.seed_task import SeedTask
 from src.models.service import Service
 from src.models.streaming_option import StreamingOption
-from src.seed.seed_updater_constants import \
-    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND
-from src.seed.seeder_updater_helpers import (
-    delete_country_movie_streaming_options, make_unique_transformed_show_data)
-from src.util.file_handling import (read_json_file_helper,
-                                    write_json_file_helper)
-from src.util.logger import create_logger
+from src.seed.planner import (allocate_requests_in_order, get_daily_limit,
+                              get_num_requests_used_today, get_refresh_limit,
+                              make_plan, print_plan, read_for_plan)
+from src.seed.seed_updater_constants import (
+    SA_API_RESPONSE_CHUNK_SIZE, SA_API_SEARCH_PAGE_SIZE,
+    SA_API_STREAM_RESPONSES, SA_SEED_TASK_LEASE_SECONDS,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND)
+from src.seed.seeder_updater_helpers import (get_checkpoint_job,
+                                             get_country_weights,
+                                             group_streaming_options,
+                                             job_run, make_staging_store,
+                                             order_by_weight,
+                                             read_checkpoints, run_job,
+                                             select_countries_services,
+                                             write_staged_data)
+from src.util.logger import SAMPLED, create_logger
+from src.util.rate_limiter import DatabaseRateLimiter
+from src.util.resilience import call_with_backoff
 
 # ==================================================
 
+checkpoint_job = 'seeder'
+
+# seeding workers record their runs under their own job, so that they are not mistaken for runs of the seeder
+worker_job = 'seeder_worker'
+
+# cursors used to be stored in this file, before they were stored in the database
 cursor_file_location = 'src/seed/streaming_availability_cursors.json'
 
+# the name of the Streaming Availability API rate limit that is shared by seeding workers through the database
+api_rate_limit_name = 'streaming_availability_api'
+
 logger = create_logger(__name__, 'src/logs/seed.log')
 
 # --------------------------------------------------
 
 
-def seed_services() -> None:
+def seed_services() -> int:
     """
-    Adds records to the services and countries_services tables.
+    Adds or updates records in the services and countries_services tables, and deletes countries_services records of
+    services that are no longer available for free in a country.  Services are never deleted, since their streaming
+    options would be deleted with them.
+
+    Everything is written with one set-based upsert per table and one delete, in one transaction, so this can be run
+    again at any time, such as before every update, and new services show up without seeding again.  If the response
+    has no free services at all, then nothing is changed.
 
     See https://docs.movieofthenight.com/resource/countries#get-all-countries
+
+    :return: The number of API requests made.
+    :raise DatabaseError: If the services can not be saved.
     """
 
     # set up variables
-    url = "https://streaming-availability.p.rapidapi.com/countries"
-    headers = {'X-RapidAPI-Key': RAPID_API_KEY}
+    url = f'{STREAMING_AVAILABILITY_BASE_URL}/countries'
 
-    # call API
-    resp = requests.get(url, headers=headers)
+    # call API, retrying if API is rate limiting or failing
+    resp = call_with_backoff(lambda: api_key_pool.call(
+        lambda api_key: requests.get(url, headers={'X-RapidAPI-Key': api_key})))
 
     if resp.status_code == 200:
-        added_services = set()
+        # {service_id: service attributes}, since countries will have the same services
+        services = {}
+        countries_services = []
 
         # storing data for each service
         for country_code, country_data in resp.json().items():
@@ -66,40 +107,29 @@ def seed_services() -> None:
 
                 # only services that have free movies and not those that are incorrectly labeled as free
                 if service['streamingOptionTypes']['free'] and service_id.lower() not in BLACKLISTED_SERVICES:
-                    # creating Service Object
-                    s = Service(
-                        id=service_id,
-                        name=service['name'],
-                        home_page=service['homePage'],
-                        theme_color_code=service['themeColorCode'],
-                        light_theme_image=service['imageSet']['lightThemeImage'],
-                        dark_theme_image=service['imageSet']['darkThemeImage'],
-                        white_image=service['imageSet']['whiteImage']
-                    )
-                    logger.debug(f'Service = {s}.')
-
-                    # creating CountryService Object
-                    cs = CountryService(
-                        country_code=country_code,
-                        service_id=service_id
-                    )
-                    logger.debug(f'CountryService = {cs}.')
-
-                    # adding Service to session while prevent duplicate service data,
-                    # which will happen because countries will have the same services
-                    if service_id not in added_services:
-                        logger.info(f'Adding {service_id} to session.')
-                        db.session.add(s)
-                        added_services.add(service_id)
-
-                    # adding CountryService to session
-                    logger.info(
-                        f'Adding {country_code}-{service['id']} to session.')
-                    db.session.add(cs)
+                    services[service_id] = {
+                        'id': service_id,
+                        'name': service['name'],
+                        'home_page': service['homePage'],
+                        'theme_color_code': service['themeColorCode'],
+                        'light_theme_image': service['imageSet']['lightThemeImage'],
+                        'dark_theme_image': service['imageSet']['darkThemeImage'],
+                        'white_image': service['imageSet']['whiteImage']
+                    }
+                    logger.debug('Service = %s.', services[service_id], extra=SAMPLED)
+
+                    countries_services.append((country_code, service_id))
+
+        if not countries_services:
+            logger.warning('There are no free services in the response.  Keeping the saved services.')
+            return 1
 
         # finally committing the data, all at once, to avoid multiple writes to database
-        logger.debug('Committing services and countries-services.')
+        logger.info('Upserting %d services and %d countries-services.', len(services), len(countries_services))
         try:
+            Service.upsert_database(list(services.values()))
+            CountryService.upsert_database(countries_services)
+            num_deleted = CountryService.delete_all_except(countries_services)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -109,17 +139,24 @@ def seed_services() -> None:
                          f'{str(e)}')
             raise DatabaseError(message)
 
+        logger.info('Deleted %d countries-services that are no longer available.', num_deleted)
+
     else:
         logger.error(f'Unsuccessful response from API: '
                      f'status code {resp.status_code}: {resp.text}.')
 
+    return 1
+
 
 def get_movies_and_streams_from_one_request(country_code: str, service_ids: list[str], cursor: str = None) -> dict:
     """
     Gets data for movies, movie_posters, and streaming_options tables from one API request, and returns it.
     Returns the next cursor if there are more records to get, or returns 'end' if there aren't.
-    Deletes existing movies' streaming options, since it is not possible to find the outdated option belonging
-    to an updated option.
+    Streaming options are grouped by movie and country (see group_streaming_options()), and each movie gets a group for
+    the country, so that write_staged_data() replaces the movie's old streaming options in the country, since it is not
+    possible to find the outdated option belonging to an updated option.  Nothing is written to the database here.
+    The response body is parsed one show at a time, if SA_API_STREAM_RESPONSES is set, and is archived while it is
+    read (see ResponseArchive).
     If the HTTP response status code from the API is not 200, then None is returned.
 
     See https://docs.movieofthenight.com/resource/shows#search-shows-by-filters
@@ -129,17 +166,17 @@ def get_movies_and_streams_from_one_request(country_code: str, service_ids: list
     :param cursor: The next cursor (movie) to use for getting the next page of results.
         This has the form "ID:NAME" or "ID:RATING".
         This would be None if getting the first page of results.
-    :return: A dict {'movies', 'movie_posters', 'streaming_options', 'next_cursor'}.
-        movies, movie_posters, and streaming_options contain all the necessary model data,
+    :return: A dict {'movies', 'movie_posters', 'streaming_option_groups', 'next_cursor'}.
+        movies, movie_posters, and streaming_option_groups are ColumnBatches, containing all the necessary model data,
         transformed from the Show JSON.
         next_cursor contains the next cursor (movie) to start at, if there are more results, or
         "end" if there is no more results to get.
         Returns None if response is not 200.
+    :raise ApiKeysExhaustedError: If every API key is out of its daily quota, in which case no request was made.
     """
 
     # set up variables
-    url = "https://streaming-availability.p.rapidapi.com/shows/search/filters"
-    headers = {'X-RapidAPI-Key': RAPID_API_KEY}
+    url = f'{STREAMING_AVAILABILITY_BASE_URL}/shows/search/filters'
 
     catalogs = ', '.join([service_id + '.free' for service_id in service_ids])
     querystring = {"country": country_code,
@@ -149,9 +186,11 @@ def get_movies_and_streams_from_one_request(country_code: str, service_ids: list
     if cursor:
         querystring['cursor'] = cursor
 
-    # call API
+    # call API, retrying if API is rate limiting or failing
     try:
-        resp = requests.get(url, headers=headers, params=querystring)
+        resp = call_with_backoff(lambda: api_key_pool.call(
+            lambda api_key: requests.get(
+                url, headers={'X-RapidAPI-Key': api_key}, params=querystring, stream=SA_API_STREAM_RESPONSES)))
     except RequestException as e:
         message = 'Exception occurred when attempting to make one HTTP request to ' + \
             'Streaming Availability API to search shows by filters.'
@@ -161,22 +200,19 @@ def get_movies_and_streams_from_one_request(country_code: str, service_ids: list
         raise FreeStreamMoviesServerError(message)
 
     if resp.status_code == 200:
-        body = resp.json()
+        with response_archive.open(checkpoint_job, url, querystring) as archived_response:
+            shows, body = read_show_page(
+                resp, SA_API_STREAM_RESPONSES, SA_API_RESPONSE_CHUNK_SIZE, archived_response.write)
+
+            # store data
+            transformed_page = transform_page(shows)
 
         output = {
-            'movies': {},
-            'movie_posters': {},
-            'streaming_options': {},
-            'next_cursor': None
+            'movies': transformed_page['movies'],
+            'movie_posters': transformed_page['movie_posters'],
+            'streaming_option_groups': group_streaming_options(transformed_page, country_code)
         }
 
-        # store data
-        for show in body['shows']:
-            delete_country_movie_streaming_options(show['id'], country_code)
-            unique_transformed_show_data = make_unique_transformed_show_data(show)
-            for k in unique_transformed_show_data:
-                output[k].update(unique_transformed_show_data[k])
-
         # if there's another page of data, return next starting point, else return 'end'
         if body['hasMore']:
             logger.info(f'Response has more results.  '
@@ -192,20 +228,11 @@ def get_movies_and_streams_from_one_request(country_code: str, service_ids: list
                      f'status code {resp.status_code}: {resp.json()['message']}.')
 
 
-def seed_movies_and_streams() -> None:
+def get_countries_services() -> dict:
     """
-    Adds records to the movies, movie_posters, and streaming_options tables for all countries
-    and free streaming services.
+    Gets the countries and their free streaming services.
 
-    This will save the next cursor (movie), which will be used to get the next page of
-    movie data for a specified country.  In other words, there is bookmarking.
-
-    Cursors will be in a dictionary containing country codes, where each country code
-    contains the next cursor to use.  When reading the cursors file, it is possible that
-    cursors will be an empty dict.
-    ({country: cursor, country: cursor, ...})
-
-    Cursors will be saved into a JSON file.
+    :return: {country_code: [service_id, ...]}.
     """
 
     try:
@@ -218,44 +245,136 @@ def seed_movies_and_streams() -> None:
                      f'{str(e)}')
         raise DatabaseError(message)
 
-    countries_services = CountryService.convert_list_to_dict(countries_services)
+    return CountryService.convert_list_to_dict(countries_services)
+
+
+def read_cursors(job: str, reset_country_codes: Iterable[str] = ()) -> dict:
+    """
+    Reads the saved cursors for seeding.  Cursors of countries that are reset are left out, so that those countries
+    start from the first page, and their saved cursors are overwritten when seeding commits.
+
+    :param job: The name that the cursors are saved under, from get_checkpoint_job().
+    :param reset_country_codes: The countries to start from the first page.
+    :return: {country_code: cursor}.
+    """
+
+    # only full runs ever saved their cursors in a file
+    cursors = read_checkpoints(job, cursor_file_location if job == checkpoint_job else None)
+
+    for country_code in reset_country_codes:
+        cursors.pop(country_code, None)
+
+    return cursors
+
 
-    cursors = read_json_file_helper(cursor_file_location)
+def get_seeding_budget(num_requests_used: int = None) -> int:
+    """
+    Gets the number of requests that seeding can make now, which is what is left of the daily request limit, other than
+    the share that is reserved for the refresher (see get_refresh_limit()).
+
+    :param num_requests_used: The number of requests made in the last 24 hours, or None to read it from the job history.
+    :return: The number of requests.
+    """
+
+    if num_requests_used is None:
+        num_requests_used = get_num_requests_used_today()
+
+    return max(0, get_daily_limit() - get_refresh_limit() - num_requests_used)
+
+
+def seed_movies_and_streams(
+        country_codes: list[str] = None, service_ids: list[str] = None, reset_cursor: bool = False
+) -> dict:
+    """
+    Adds records to the movies, movie_posters, and streaming_options tables for all countries
+    and free streaming services, or for only some of them.
 
-    data_for_all_shows = {'movies': {}, 'movie_posters': {}, 'streaming_options': {}}
+    This will save the next cursor (movie), which will be used to get the next page of
+    movie data for a specified country.  In other words, there is bookmarking.
 
+    Cursors will be in a dictionary containing country codes, where each country code
+    contains the next cursor to use.  When reading the cursors file, it is possible that
+    cursors will be an empty dict.
+    ({country: cursor, country: cursor, ...})
+
+    Cursors will be saved into the database as checkpoints, in the same transaction as the movie data and the
+    replacements of the movies' old streaming options, so that a crash during seeding can not save a cursor without
+    also saving the movies before it, or leave movies without their streaming options.
+
+    Countries are seeded in order of the web app's recent traffic from them (see get_country_weights()), so that the
+    countries that users view are seeded first.  Seeding stops when what is left of the daily request limit is used up,
+    leaving the refresher's share for it (see get_seeding_budget()).
+
+    Seeding only some services walks a different list of movies, so its cursors are saved separately from the cursors
+    for all services (see get_checkpoint_job()).
+
+    :param country_codes: The countries to seed, or None for all countries.
+    :param service_ids: The streaming services to seed, or None for all free streaming services.
+    :param reset_cursor: Whether to start the selected countries from the first page, instead of their saved cursors.
+    :return: {'num_requests': number of API requests made, 'num_rows': number of rows written}.
+    """
+
+    countries_services = select_countries_services(get_countries_services(), country_codes, service_ids)
+    countries_services = order_by_weight(countries_services, get_country_weights(countries_services))
+
+    job = get_checkpoint_job(checkpoint_job, service_ids)
+    cursors = read_cursors(job, countries_services if reset_cursor else ())
+
+    # rows are deduplicated and staged, in memory or on disk, until they are written after all requests, along with
+    # the replacements of the movies' streaming options in each country
+    data_for_all_shows = make_staging_store(grouped_streaming_options=True)
+
+    # the refresher's share of the daily limit is left for it
+    budget = get_seeding_budget()
+    logger.info(f'Seeding with a budget of {budget} requests.')
+
+    num_requests = 0
+    should_continue = True
     for country_code, service_ids in countries_services.items():
         logger.info(f'Seeding movies and streaming options for '
                     f'country "{country_code}" and services "{service_ids}".')
 
         cursor = cursors.get(country_code)
-        logger.debug(f'Saved next cursor is: "{cursor}".')
+        logger.debug('Saved next cursor is: "%s".', cursor)
 
-        # repeat requests due to Streaming Availability API rate limit
+        # repeat requests due to Streaming Availability API rate limit, which each API key has
         while cursor != 'end':
-            for i in range(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND):
-                cursor_and_data = get_movies_and_streams_from_one_request(country_code, service_ids, cursor)
+            for i in range(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND * len(api_key_pool)):
+                if num_requests >= budget:
+                    logger.warning('The request budget is used up.  Stopping early.')
+                    should_continue = False
+                    break
+
+                try:
+                    cursor_and_data = get_movies_and_streams_from_one_request(country_code, service_ids, cursor)
+                except ApiKeysExhaustedError as e:
+                    # no request was made, and no other country can be requested either, so stop but keep data that
+                    # was retrieved
+                    logger.error(f'Unable to request page: {e.message}  Stopping early.')
+                    should_continue = False
+                    break
+                num_requests += 1
 
                 if cursor_and_data:
-                    for k in data_for_all_shows:
-                        data_for_all_shows[k].update(cursor_and_data[k])
+                    data_for_all_shows.extend(cursor_and_data)
 
                     cursor = cursor_and_data['next_cursor']
                     cursors[country_code] = cursor
-                    write_json_file_helper(cursor_file_location, cursors)
 
                 if not cursor_and_data or cursor == 'end':
                     break
 
-            if not cursor_and_data or cursor == 'end':
+            if not should_continue or not cursor_and_data or cursor == 'end':
                 break
 
             # sleep needed due to Streaming Availability API request rate limit per second
             time.sleep(1)
 
-    Movie.upsert_database(list(data_for_all_shows['movies'].values()))
-    MoviePoster.upsert_database(list(data_for_all_shows['movie_posters'].values()))
-    StreamingOption.insert_database(list(data_for_all_shows['streaming_options'].values()))
+        if not should_continue:
+            break
+
+    num_rows = write_staged_data(data_for_all_shows)
+    Checkpoint.upsert_database(job, cursors)
 
     try:
         db.session.commit()
@@ -267,13 +386,246 @@ def seed_movies_and_streams() -> None:
                      f'{str(e)}')
         raise UpsertError(message)
 
+    return {'num_requests': num_requests, 'num_rows': num_rows}
+
+
+def plan_seeding(
+        country_codes: list[str] = None, service_ids: list[str] = None, reset_cursor: bool = False,
+        is_worker: bool = False, is_seeding_services: bool = False
+) -> dict:
+    """
+    Plans what seed_movies_and_streams(), or seed_movies_and_streams_from_work_queue(), would do, with the same
+    arguments, without making API requests or writing to the database.
+
+    The number of pages left for each country is estimated from the movies that have already been seeded: countries
+    that are done show how many pages a whole country takes, and a country's seeded movies show how many of those
+    pages are done.  If no countries are done, then the number of pages left is unknown.
+
+    Requests are allocated to countries in the order that the seeder requests them, from what is left of the daily
+    request quota, according to the job history, other than the share that is reserved for the refresher.
+
+    A seeding run commits all of its data in one transaction, while a worker commits its seed tasks, and then each
+    page, in a transaction of its own.  Seeding the services first takes one more request and transaction.  If the
+    checkpoints table has not been created yet, then every country is planned from the first page, with a warning.
+
+    :param country_codes: The countries to seed, or None for all countries.
+    :param service_ids: The streaming services to seed, or None for all free streaming services.
+    :param reset_cursor: Whether to start the selected countries from the first page, instead of their saved cursors.
+    :param is_worker: Whether to plan seeding as a worker (see seed_movies_and_streams_from_work_queue()).
+    :param is_seeding_services: Whether the services are seeded first (see seed_services()).
+    :return: A plan, which can be printed with print_plan().
+    """
+
+    warnings = []
+
+    countries_services = select_countries_services(get_countries_services(), country_codes, service_ids)
+    countries_services = order_by_weight(countries_services, get_country_weights(countries_services))
+
+    cursors = read_for_plan(
+        lambda: read_cursors(get_checkpoint_job(checkpoint_job, service_ids),
+                             countries_services if reset_cursor else ()),
+        Checkpoint.__tablename__, warnings)
+    pages_seeded = {
+        country_code: math.ceil(num_movies / SA_API_SEARCH_PAGE_SIZE)
+        for country_code, num_movies in StreamingOption.count_movies_by_country().items()
+    }
+
+    # countries that start over have all of their pages left
+    pages_seeded.update({country_code: 0 for country_code in countries_services if reset_cursor})
+
+    pages_of_done_countries = [
+        pages_seeded.get(country_code, 0) for country_code, cursor in cursors.items() if cursor == 'end'
+    ]
+    average_pages = sum(pages_of_done_countries) / len(pages_of_done_countries) if pages_of_done_countries else None
+
+    remaining_country_codes = [country_code for country_code in countries_services
+                               if cursors.get(country_code) != 'end']
+    estimated_pages = {
+        country_code: None if average_pages is None
+        else max(1, math.ceil(average_pages - pages_seeded.get(country_code, 0)))
+        for country_code in remaining_country_codes
+    }
+
+    num_requests_used = get_num_requests_used_today()
+    budget = get_seeding_budget(num_requests_used)
+
+    allocation = allocate_requests_in_order(remaining_country_codes, budget, estimated_pages)
+    num_service_requests = 1 if is_seeding_services else 0
+    num_page_transactions = sum(allocation.values()) + 1 if is_worker else 1
+
+    return make_plan(
+        worker_job if is_worker else checkpoint_job, cursors, estimated_pages, allocation, budget, num_requests_used,
+        num_page_transactions + num_service_requests, num_service_requests, warnings)
+
+
+def enqueue_seed_tasks() -> None:
+    """
+    Adds a seed task for each country that does not have one yet, starting from the country's saved cursor, so that
+    seeding workers can claim them.  This can be called by every worker, since existing tasks are kept.
+    """
+
+    SeedTask.enqueue(get_countries_services(), read_checkpoints(checkpoint_job, cursor_file_location))
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        message = 'Exception encountered when adding seed tasks.'
+        logger.error(f'{message}\n'
+                     f'Error is {type(e)}:\n'
+                     f'{str(e)}')
+        raise DatabaseError(message)
+
+
+def seed_movies_and_streams_from_work_queue(worker_id: str = None) -> int:
+    """
+    Seeds movies, movie posters, and streaming options as one of any number of workers, in any number of processes or
+    machines, that share the seed tasks in the database.
+
+    The worker repeatedly claims a country's seed task, requests its next page, and then saves the page's data, the
+    task's next cursor, and the country's checkpoint in one transaction.  Requests of all workers are kept within the
+    Streaming Availability API rate limit through the database, so adding workers raises throughput up to that limit.
+    If a worker crashes, its task is claimed by another worker after SA_SEED_TASK_LEASE_SECONDS.
+
+    Workers run alongside each other, but not alongside other jobs, such as the updater (see job_run()).  Each worker's
+    run is recorded in the job history, and its requests are added to the run as they are made, so that every worker
+    and job counts them in the daily request limit right away.
+
+    The worker stops when there are no tasks left that it can claim, when the daily request limit is used up, other
+    than the refresher's share (see get_seeding_budget()), or when every API key is out of its daily quota.  A country
+    whose request is unsuccessful is released for other workers, and is not claimed again by this worker.
+
+    :param worker_id: An ID that is unique to this worker.  Defaults to the host name and process ID.
+    :return: The number of pages that were saved.
+    """
+
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    rate_limiter = DatabaseRateLimiter(
+        api_rate_limit_name, STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND * len(api_key_pool))
+
+    with job_run(worker_job, is_shared=True) as run_id:
+        if run_id is None:
+            return 0
+
+        enqueue_seed_tasks()
+
+        num_pages = 0
+        num_requests = 0
+        num_rows = 0
+        unsuccessful_country_codes = set()
+
+        while True:
+            # other workers add their requests to the job history as they make them
+            if get_seeding_budget() <= 0:
+                logger.warning(f'Worker "{worker_id}" is stopping, since the seeding budget is used up.')
+                break
+
+            task = SeedTask.claim(worker_id, SA_SEED_TASK_LEASE_SECONDS, unsuccessful_country_codes)
+            if not task:
+                logger.info(f'There are no seed tasks left for worker "{worker_id}" to claim.')
+                break
+
+            country_code = task['country_code']
+
+            rate_limiter.acquire()
+
+            try:
+                cursor_and_data = get_movies_and_streams_from_one_request(
+                    country_code, task['service_ids'], task['cursor'])
+            except ApiKeysExhaustedError as e:
+                # no request was made, and no other task can be requested either
+                SeedTask.release(country_code, worker_id)
+                logger.error(f'Unable to request page: {e.message}  Stopping early.')
+                break
+            except Exception:
+                SeedTask.release(country_code, worker_id)
+                raise
+
+            num_requests += 1
+
+            if not cursor_and_data:
+                SeedTask.release(country_code, worker_id)
+                unsuccessful_country_codes.add(country_code)
+                JobRun.add_progress(run_id, 1, 0)
+                continue
+
+            next_cursor = cursor_and_data['next_cursor']
+
+            # the page's data, the replacements of its movies' old streaming options, the task's next cursor, and the
+            # checkpoint are saved together, or not at all
+            try:
+                store = make_staging_store(grouped_streaming_options=True)
+                store.extend(cursor_and_data)
+                page_num_rows = write_staged_data(store)
+                Checkpoint.upsert_database(checkpoint_job, {country_code: next_cursor})
+
+                is_still_claimed = SeedTask.complete_page(country_code, worker_id, next_cursor)
+                if is_still_claimed:
+                    db.session.commit()
+                else:
+                    db.session.rollback()
+
+            except Exception as e:
+                db.session.rollback()
+                SeedTask.release(country_code, worker_id)
+                JobRun.add_progress(run_id, 1, 0)
+                message = 'Exception encountered when committing new movie data.'
+                logger.error(f'{message}\n'
+                             f'Error is {type(e)}:\n'
+                             f'{str(e)}')
+                raise UpsertError(message)
+
+            if is_still_claimed:
+                num_pages += 1
+                num_rows += page_num_rows
+                JobRun.add_progress(run_id, 1, page_num_rows)
+            else:
+                JobRun.add_progress(run_id, 1, 0)
+                logger.warning(f'Worker "{worker_id}" lost its claim on the seed task for "{country_code}".  '
+                               'The page was not saved.')
+
+        JobRun.finish(run_id, JobRun.Statuses.SUCCEEDED, num_requests, num_rows)
+        logger.info(f'Worker "{worker_id}" saved {num_pages} pages.')
+
+    return num_pages
+
 # ==================================================
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Seeds movies and streaming options from Streaming Availability API.')
+    parser.add_argument('--seed-services', action='store_true',
+                        help='seed the services and countries-services tables first')
+    parser.add_argument('--country', action='append', type=str.lower, dest='country_codes', metavar='COUNTRY_CODE',
+                        help='seed only this country (can be repeated)')
+    parser.add_argument('--service', action='append', type=str.lower, dest='service_ids', metavar='SERVICE_ID',
+                        help='seed only this streaming service (can be repeated); its cursors are saved separately')
+    parser.add_argument('--reset-cursor', action='store_true',
+                        help='start the selected countries from the first page, instead of their saved cursors')
+    parser.add_argument('--worker', action='store_true',
+                        help='seed as one of many workers that share seed tasks through the database')
+    parser.add_argument('--worker-id', help='a unique ID for this worker (defaults to the host name and process ID)')
+    parser.add_argument('--plan', action='store_true',
+                        help='print what seeding would do, without making API requests or writing to the database')
+    args = parser.parse_args()
+
+    if args.worker and (args.country_codes or args.service_ids or args.reset_cursor):
+        parser.error('--country, --service, and --reset-cursor can not be used with --worker')
+
     app = create_app("freestreammovies")
     connect_db(app)
     with app.app_context():
+        if args.plan:
+            print_plan(plan_seeding(
+                args.country_codes, args.service_ids, args.reset_cursor, args.worker, args.seed_services))
+            sys.exit()
+
         db.create_all()
-        # seed_services()
-        seed_movies_and_streams()
+        if args.seed_services:
+            seed_services()
+
+        if args.worker:
+            seed_movies_and_streams_from_work_queue(args.worker_id)
+        else:
+            run_job(checkpoint_job, lambda: seed_movies_and_streams(
+                args.country_codes, args.service_ids, args.reset_cursor))
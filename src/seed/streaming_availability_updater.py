@@ -8,30 +8,57 @@ sys.path.append(root_dir)  # nopep8
 
 # --------------------------------------------------
 
-import time
+import argparse
+import math
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
 
 import requests
-
-from src.app import RAPID_API_KEY, create_app
+from flask import current_app
+from requests.exceptions import RequestException
+
+from src.adapters.streaming_availability_adapter import (read_show_page,
+                                                        transform_page)
+from src.app import (STREAMING_AVAILABILITY_BASE_URL, api_key_pool,
+                     create_app, response_archive)
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
+from src.exceptions.DatabaseError import DatabaseError
 from src.exceptions.StreamingAvailabilityApiError import \
     StreamingAvailabilityApiError
 from src.exceptions.UpsertError import UpsertError
+from src.models.checkpoint import Checkpoint
 from src.models.common import connect_db, db
+from src.models.country_change_rate import CountryChangeRate
 from src.models.country_service import CountryService
-from src.models.movie import Movie
-from src.models.movie_poster import MoviePoster
 from src.models.streaming_option import StreamingOption
+from src.seed.planner import (allocate_requests_in_turns, get_daily_limit,
+                              get_num_requests_used_today, make_plan,
+                              print_plan, read_for_plan)
 from src.seed.seed_updater_constants import (
-    SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY,
+    SA_API_MAX_CONCURRENT_REQUESTS,
+    SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY, SA_API_RESPONSE_CHUNK_SIZE,
+    SA_API_STREAM_RESPONSES, SA_UPDATE_CHANGE_RATE_SMOOTHING,
+    SA_UPDATE_CHANGE_TYPES, SA_UPDATE_CHANGES_PER_POLL,
+    SA_UPDATE_MAX_POLL_INTERVAL_DAYS,
     STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND)
 from src.seed.seeder_updater_helpers import (
-    delete_country_movie_streaming_options, make_unique_transformed_show_data)
-from src.util.file_handling import (read_json_file_helper,
-                                    write_json_file_helper)
+    call_in_app_context, get_checkpoint_job, get_country_weights,
+    group_streaming_options, make_staging_store, order_by_weight,
+    pop_next_turn, read_checkpoints, run_job, select_countries_services,
+    write_staged_data)
+from src.seed.streaming_availability_seeder import seed_services
 from src.util.logger import create_logger
+from src.util.rate_limiter import RateLimiter
+from src.util.resilience import call_with_backoff
 
 # ==================================================
 
+checkpoint_job = 'updater'
+
+# timestamps used to be stored in this file, before they were stored in the database
 next_timestamps_file_location = 'src/seed/streaming_availability_updater_next_timestamps.json'
 
 logger = create_logger(__name__, 'src/logs/update.log')
@@ -39,75 +66,299 @@ logger = create_logger(__name__, 'src/logs/update.log')
 # --------------------------------------------------
 
 
-def get_updated_movies_and_streaming_options() -> None:
+def get_change_type_checkpoint_job(job: str, change_type: str) -> str:
     """
-    Updates records for movies and streaming options for all countries and free streaming services. This will
-    make multiple calls to Streaming Availability API, up to 80% of the daily limit.
+    Gets the name that the "from" timestamps of a type of changes are saved under.  "updated" changes keep the job's
+    own name, which all timestamps were saved under before other types of changes were requested.
 
-    This will retrieve and save the next timestamps to start at.  The timestamps will be saved into a JSON file.
-    Timestamps will be in the format {country: timestamp}, because all streaming services at SA API will be queried for
-    a given country.  If a new service is introduced in SA API, its movies will be added at a later timestamp, and
-    therefore, will be covered using this format.
+    :param job: The name from get_checkpoint_job().
+    :param change_type: The type of changes, such as "removed".
+    :return: The name, such as "updater/removed".
+    """
+
+    if change_type == 'updated':
+        return job
 
-    If the rate limit is reached or if there is an exception when retrieving updated data, then this function will
-    save all data retrieved so far and exit.
+    return f'{job}/{change_type}'
+
+
+def read_from_timestamps(
+        job: str, country_codes: Iterable[str], since: int = None, reset_cursor: bool = False
+) -> dict[str, int]:
+    """
+    Reads the saved "from" timestamps for updating.  The timestamps of the given countries can be replaced with a
+    chosen one, or left out, so that Streaming Availability API starts from its own default.
+
+    :param job: The name that the timestamps are saved under, from get_change_type_checkpoint_job().
+    :param country_codes: The countries that since and reset_cursor apply to.
+    :param since: A timestamp to start the given countries from, instead of their saved timestamps.
+    :param reset_cursor: Whether to leave out the saved timestamps of the given countries.
+    :return: {country_code: timestamp}.
     """
 
-    countries_services = db.session.query(CountryService).all()
-    countries_services = CountryService.convert_list_to_dict(countries_services)
+    # only full runs ever saved their timestamps in a file
+    from_timestamps = {
+        country_code: int(timestamp)
+        for country_code, timestamp in read_checkpoints(
+            job, next_timestamps_file_location if job == checkpoint_job else None).items()
+    }
 
-    from_timestamps = read_json_file_helper(next_timestamps_file_location)
+    for country_code in country_codes:
+        if since:
+            from_timestamps[country_code] = since
+        elif reset_cursor:
+            from_timestamps.pop(country_code, None)
 
-    data_for_all_shows = {'movies': {}, 'movie_posters': {}, 'streaming_options': {}}
+    return from_timestamps
 
-    num_requests = 0
-    should_continue = True
-    for country_code, service_ids in countries_services.items():
-        has_more = True
-
-        while has_more and should_continue:
-            for i in range(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND):
-                # make a request
-                try:
-                    transformed_request_data = get_updated_movies_and_streams_from_one_request(
-                        country_code, service_ids, from_timestamps.get(country_code))
-                except StreamingAvailabilityApiError:
-                    should_continue = False
-                    break
-
-                # update and check total number of requests made
-                num_requests += 1
-                if num_requests >= SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY:
-                    should_continue = False
 
-                # add transformed movie and etc. data to data_for_all_shows
-                for k in data_for_all_shows:
-                    if k in transformed_request_data:
-                        data_for_all_shows[k].update(transformed_request_data[k])
+def get_poll_interval(changes_per_day: float) -> timedelta:
+    """
+    Gets how long to wait before requesting a country's changes again: until about SA_UPDATE_CHANGES_PER_POLL changes
+    are expected to have built up, but no longer than SA_UPDATE_MAX_POLL_INTERVAL_DAYS days.
+
+    :param changes_per_day: The country's average number of changed movies per day.
+    :return: The time to wait.
+    """
+
+    if changes_per_day <= 0:
+        return timedelta(days=SA_UPDATE_MAX_POLL_INTERVAL_DAYS)
+
+    return timedelta(days=min(SA_UPDATE_CHANGES_PER_POLL / changes_per_day, SA_UPDATE_MAX_POLL_INTERVAL_DAYS))
+
+
+def measure_change_rate(change_rate: dict | None, num_changes: int, from_timestamp: int, now: datetime) -> dict:
+    """
+    Measures a country's change rate from the changes that were received from from_timestamp until now, averages it
+    with the earlier measurements, and schedules the country's next request for changes.
+
+    :param change_rate: The country's saved change rate, from CountryChangeRate.get_change_rates(), or None.
+    :param num_changes: The number of movies with changes of any type that were received.
+    :param from_timestamp: The "from" timestamp that the changes were requested from.
+    :param now: The time that the changes were requested at.
+    :return: {'changes_per_day': float, 'next_poll_at': datetime}.
+    """
+
+    # at least an hour, so that a country that was requested again right away does not get an unrealistic rate
+    num_days = max((now.timestamp() - from_timestamp) / (24 * 60 * 60), 1 / 24)
+    changes_per_day = num_changes / num_days
+
+    if change_rate is not None:
+        changes_per_day = SA_UPDATE_CHANGE_RATE_SMOOTHING * changes_per_day \
+            + (1 - SA_UPDATE_CHANGE_RATE_SMOOTHING) * change_rate['changes_per_day']
+
+    return {'changes_per_day': changes_per_day, 'next_poll_at': now + get_poll_interval(changes_per_day)}
+
+
+def select_due_countries(countries_services: dict, change_rates: dict, now: datetime) -> dict:
+    """
+    Selects the countries whose next request for changes is due.  Countries without a change rate are always due.
+
+    :param countries_services: {country_code: [service_id, ...]}.
+    :param change_rates: {country_code: {'changes_per_day': float, 'next_poll_at': datetime}}.
+    :param now: The current time.
+    :return: {country_code: [service_id, ...]}, with only the countries that are due.
+    """
+
+    due_countries_services = {
+        country_code: service_ids for country_code, service_ids in countries_services.items()
+        if country_code not in change_rates or change_rates[country_code]['next_poll_at'] <= now
+    }
+
+    logger.info(f'{len(due_countries_services)} of {len(countries_services)} countries are due for updates.')
+
+    return due_countries_services
 
-                # saving the next from_timestamp
-                if transformed_request_data['next_from_timestamp']:
-                    from_timestamps[country_code] = transformed_request_data['next_from_timestamp']
-                    write_json_file_helper(next_timestamps_file_location, from_timestamps)
 
-                has_more = transformed_request_data['has_more']
+def refresh_services() -> int:
+    """
+    Refreshes the free streaming services of every country (see seed_services()), so that new services are updated
+    without seeding the services again.  If this fails, then the saved services are used.
+
+    :return: The number of API requests made.
+    """
+
+    try:
+        return seed_services()
+    except (StreamingAvailabilityApiError, RequestException, DatabaseError) as e:
+        logger.warning(f'Unable to refresh the streaming services.  Using the saved services.\n'
+                       f'Error is {type(e)}:\n'
+                       f'{str(e)}')
+        return 0
+
+
+def get_updated_movies_and_streaming_options(
+        country_codes: list[str] = None, service_ids: list[str] = None, since: int = None, reset_cursor: bool = False
+) -> dict:
+    """
+    Updates records for movies and streaming options for all countries and free streaming services, or for only some
+    of them. This will make multiple calls to Streaming Availability API, up to 80% of the daily limit of all API keys.
+    The streaming services of every country are refreshed first (see refresh_services()).
+
+    Countries are updated in parallel.  Each country has at most one request in progress at a time, and countries take
+    turns making requests, so that every country gets a share of the daily limit.  Each country's share is in
+    proportion to the web app's recent traffic from it (see get_country_weights()), and the share of a country that
+    runs out of changes goes to the others.  Requests are spread out to stay within the per second rate limit.
+
+    Countries are only updated when they are due, according to how often their changes came in before (see
+    CountryChangeRate), so that countries with few changes do not use requests every run.  Countries that are
+    selected with country_codes are always updated.  A country's change rate is measured each time it has no more
+    changes to get, and is saved along with its timestamps.
+
+    Every type of changes in SA_UPDATE_CHANGE_TYPES is requested, one type after another for each country.  The
+    streaming options of every movie with a change in a country are replaced with the movie's current ones, so that
+    removed streaming options are deleted.  The replacements are staged until all requests are done, and then are
+    written with one set-based delete and insert per batch of movies, along with one delete of all streaming options
+    that have expired.  Movies whose transformed data in a country has the same content hash as what was saved before
+    are skipped before anything is written (see write_staged_data()).
+
+    This will retrieve and save the next timestamps to start at.  The timestamps will be saved into the database as
+    checkpoints, in the same transaction as the updated movie data.
+    Timestamps will be in the format {country: timestamp}, because all streaming services at SA API will be queried for
+    a given country.  If a new service is introduced in SA API, its movies will be added at a later timestamp, and
+    therefore, will be covered using this format.  Each country's timestamp is advanced independently, as soon as that
+    country's response has been handled.  Each type of changes has its own timestamps (see
+    get_change_type_checkpoint_job()).
+
+    Updating only some services gets different changes, so its timestamps are saved separately from the timestamps for
+    all services (see get_checkpoint_job()).
+
+    If the rate limit is reached, if there is an exception when retrieving updated data, even after retrying, or if a
+    response body can not be read, then this function will stop making new requests, save all data retrieved so far,
+    and exit.
+
+    :param country_codes: The countries to update, or None for all countries.
+    :param service_ids: The streaming services to update, or None for all free streaming services.
+    :param since: A timestamp, within the last 31 days, to get the selected countries' changes from, instead of their
+        saved timestamps.
+    :param reset_cursor: Whether to ignore the selected countries' saved timestamps, so that Streaming Availability
+        API starts from its default.
+    :return: {'num_requests': number of API requests made, 'num_rows': number of rows written}.
+    """
+
+    now = datetime.now(timezone.utc)
 
-                if not has_more:
-                    break
+    # new services and services that are no longer free are picked up before the countries' services are read
+    num_requests = refresh_services()
 
-            if has_more and should_continue:
-                # sleep needed due to Streaming Availability API request rate limit per second
-                time.sleep(1)
+    countries_services = db.session.query(CountryService).all()
+    countries_services = select_countries_services(
+        CountryService.convert_list_to_dict(countries_services), country_codes, service_ids)
+
+    job = get_checkpoint_job(checkpoint_job, service_ids)
+    change_rates = CountryChangeRate.get_change_rates(job)
+    if not country_codes:
+        countries_services = select_due_countries(countries_services, change_rates, now)
+
+    weights = get_country_weights(countries_services)
+    countries_services = order_by_weight(countries_services, weights)
+
+    # {change_type: {country_code: timestamp}}
+    from_timestamps = {
+        change_type: read_from_timestamps(
+            get_change_type_checkpoint_job(job, change_type), countries_services, since, reset_cursor)
+        for change_type in SA_UPDATE_CHANGE_TYPES
+    }
+    start_from_timestamps = {change_type: timestamps.copy() for change_type, timestamps in from_timestamps.items()}
+    # {country_code: index in SA_UPDATE_CHANGE_TYPES of the type of changes that the country is getting}
+    change_type_indexes = dict.fromkeys(countries_services, 0)
+    # {country_code: number of movies with changes received}
+    num_changes = dict.fromkeys(countries_services, 0)
+    new_change_rates = {}
+
+    # rows are deduplicated and staged, in memory or on disk, until they are written after all requests, and a later
+    # change to a movie replaces all of its staged streaming options in the country
+    data_for_all_shows = make_staging_store(grouped_streaming_options=True)
+
+    app = current_app._get_current_object()
+    # each API key has its own rate limit and daily quota
+    rate_limiter = RateLimiter(STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_SECOND * len(api_key_pool))
+    max_requests = math.ceil(SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY * len(api_key_pool))
+
+    # countries waiting to make their next request, with the longest waiting first
+    waiting_country_codes = deque(countries_services)
+    # {country_code: number of requests made}
+    num_turns = {}
+    # (country code, Future) of requests that have been made, in the order that they were made
+    requests_in_progress = deque()
 
-        if not should_continue:
-            break
+    should_continue = True
+    with ThreadPoolExecutor(max_workers=SA_API_MAX_CONCURRENT_REQUESTS) as executor:
+        while requests_in_progress or (waiting_country_codes and should_continue and num_requests < max_requests):
+
+            # make requests for waiting countries, counting requests in progress toward the max number of requests
+            while waiting_country_codes and should_continue \
+                    and len(requests_in_progress) < SA_API_MAX_CONCURRENT_REQUESTS \
+                    and num_requests + len(requests_in_progress) < max_requests:
+                country_code = pop_next_turn(waiting_country_codes, num_turns, weights)
+                change_type = SA_UPDATE_CHANGE_TYPES[change_type_indexes[country_code]]
+
+                rate_limiter.acquire()
+                future = executor.submit(
+                    call_in_app_context, app, get_updated_movies_and_streams_from_one_request,
+                    country_code, countries_services[country_code], from_timestamps[change_type].get(country_code),
+                    change_type)
+                requests_in_progress.append((country_code, future))
+
+            # handle the oldest request, so that results are handled in the same order as the requests
+            country_code, future = requests_in_progress.popleft()
+            change_type = SA_UPDATE_CHANGE_TYPES[change_type_indexes[country_code]]
+            try:
+                transformed_request_data = future.result()
+            except ApiKeysExhaustedError:
+                # no request was made, since no API key could make another call
+                should_continue = False
+                continue
+            except (StreamingAvailabilityApiError, RequestException, ValueError, KeyError) as e:
+                # API is still failing after retries, or its response body is truncated or is missing a field, so stop
+                # making requests but keep data that was retrieved
+                logger.error(f'Unable to get {change_type} changes for "{country_code}".  Stopping early.\n'
+                             f'Error is {type(e)}:\n'
+                             f'{str(e)}')
+                num_requests += 1
+                should_continue = False
+                continue
+
+            num_requests += 1
+
+            # add transformed movie and etc. data to data_for_all_shows
+            data_for_all_shows.extend(transformed_request_data)
+            num_changes[country_code] += len(transformed_request_data.get('streaming_option_groups', ()))
+
+            # saving the next from_timestamp
+            if transformed_request_data['next_from_timestamp']:
+                from_timestamps[change_type][country_code] = transformed_request_data['next_from_timestamp']
+
+            # country goes to the back of the line if it has more to get
+            if transformed_request_data['has_more']:
+                waiting_country_codes.append(country_code)
+
+            # or if it has more types of changes to get
+            elif change_type_indexes[country_code] + 1 < len(SA_UPDATE_CHANGE_TYPES):
+                change_type_indexes[country_code] += 1
+                waiting_country_codes.append(country_code)
+
+            # otherwise, all of its changes since its starting timestamps are in, which gives its change rate
+            else:
+                country_start_from_timestamps = [
+                    timestamps[country_code] for timestamps in start_from_timestamps.values()
+                    if timestamps.get(country_code)
+                ]
+                if country_start_from_timestamps:
+                    new_change_rates[country_code] = measure_change_rate(
+                        change_rates.get(country_code), num_changes[country_code],
+                        min(country_start_from_timestamps), now)
 
     logger.info(f'Number of requests made: {num_requests}.')
 
-    # adding movie, poster, and streaming option data to database
-    Movie.upsert_database(list(data_for_all_shows['movies'].values()))
-    MoviePoster.upsert_database(list(data_for_all_shows['movie_posters'].values()))
-    StreamingOption.insert_database(list(data_for_all_shows['streaming_options'].values()))
+    # adding movie, poster, and streaming option data to database, skipping movies that have not changed in a country
+    num_rows = write_staged_data(data_for_all_shows, skip_unchanged_content=True)
+    num_expired = StreamingOption.delete_expired(int(now.timestamp()))
+    logger.info(f'Deleted {num_expired} expired streaming options.')
+
+    for change_type, timestamps in from_timestamps.items():
+        Checkpoint.upsert_database(get_change_type_checkpoint_job(job, change_type), timestamps)
+    CountryChangeRate.upsert_database(job, new_change_rates)
 
     try:
         db.session.commit()
@@ -119,17 +370,103 @@ def get_updated_movies_and_streaming_options() -> None:
                      f'{str(e)}')
         raise UpsertError(message)
 
+    return {'num_requests': num_requests, 'num_rows': num_rows}
+
+
+def plan_updates(
+        country_codes: list[str] = None, service_ids: list[str] = None, since: int = None, reset_cursor: bool = False
+) -> dict:
+    """
+    Plans what get_updated_movies_and_streaming_options() would do, with the same arguments, without making API
+    requests or writing to the database.
+
+    Requests are allocated to countries in weighted turns, the same way that the updater makes them, from the updater's
+    preferred number of requests per day, or from what is left of the daily request quota according to the job
+    history, if that is less.  Only countries that are due are included, unless they are selected with country_codes.
+    The number of pages of changes is not known before requesting them, so every country is assumed to have enough
+    changes to use its share.
+
+    The request that refreshes the streaming services (see refresh_services()) is made first, out of the same budget,
+    and commits the services in a transaction of its own, before the run commits all of its changes in one more.  If
+    the checkpoints or country_change_rates tables have not been created yet, then they are planned as empty, with a
+    warning.
+
+    :param country_codes: The countries to update, or None for all countries.
+    :param service_ids: The streaming services to update, or None for all free streaming services.
+    :param since: A timestamp to get the selected countries' changes from, instead of their saved timestamps.
+    :param reset_cursor: Whether to ignore the selected countries' saved timestamps.
+    :return: A plan, which can be printed with print_plan().
+    """
+
+    warnings = []
+    job = get_checkpoint_job(checkpoint_job, service_ids)
+
+    countries_services = select_countries_services(
+        CountryService.convert_list_to_dict(db.session.query(CountryService).all()), country_codes, service_ids)
+    if not country_codes:
+        change_rates = read_for_plan(
+            lambda: CountryChangeRate.get_change_rates(job), CountryChangeRate.__tablename__, warnings)
+        countries_services = select_due_countries(countries_services, change_rates, datetime.now(timezone.utc))
+    weights = get_country_weights(countries_services)
+
+    from_timestamps = read_for_plan(
+        lambda: read_from_timestamps(job, countries_services, since, reset_cursor), Checkpoint.__tablename__, warnings)
+    checkpoints = {
+        country_code: datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='minutes')
+        for country_code, timestamp in from_timestamps.items()
+    }
+
+    num_requests_used = get_num_requests_used_today()
+    budget = max(0, min(math.ceil(SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY * len(api_key_pool)),
+                        get_daily_limit() - num_requests_used))
+
+    # the services are refreshed before any country is requested, and their request counts toward the budget
+    num_service_requests = 1
+    allocation = allocate_requests_in_turns(
+        list(order_by_weight(countries_services, weights)), max(0, budget - num_service_requests), weights)
+
+    return make_plan(
+        checkpoint_job, checkpoints, {}, allocation, budget, num_requests_used, 2, num_service_requests, warnings)
+
+
+def record_show_ids(shows: Iterable, show_ids: set) -> Iterator:
+    """
+    Yields the shows of a page, while adding the ID of each one to a set.  IDs are recorded before the shows are
+    decoded, so that shows that are skipped as malformed are also recorded.
+
+    :param shows: The JSON Show objects of a page.
+    :param show_ids: The set to add show IDs to.
+    :return: A generator of the same shows.
+    """
+
+    for show in shows:
+        if isinstance(show, Mapping):
+            show_ids.add(show.get('id'))
+        yield show
+
 
 def get_updated_movies_and_streams_from_one_request(
-        country_code: str, service_ids: list[str], from_timestamp: int = None
+        country_code: str, service_ids: list[str], from_timestamp: int = None, change_type: str = 'updated'
 ) -> dict:
     """
-    Updates records for movies and streaming_options tables with data from one API request.  Can optionally accept
-    a "from" timestamp to start getting changes from.
+    Gets one page of changes of one type, and transforms it into records for the movies, movie_posters, and
+    streaming_options tables.  Can optionally accept a "from" timestamp to start getting changes from.
+
+    Streaming options are grouped by movie (see group_streaming_options()), since a change can add, remove, or modify
+    any of a movie's streaming options in the country, so that each group replaces all of the movie's streaming
+    options in the country when it is written.  A removed movie that is no longer in the response's shows gets an
+    empty group, so that all of its streaming options in the country are deleted.
 
     If "from" timestamp is too old, Streaming Availability API will return a response with status code 400.
     This function will attempt to make another call, but without the "from" timestamp.
 
+    If Streaming Availability API is rate limiting requests or failing (status code 429 or 5xx), then the request is
+    retried with backoff before giving up.
+
+    If SA_API_STREAM_RESPONSES is set, then the response body is parsed one show at a time, so that a large page of
+    changes is never fully loaded into memory.  A successful response body is archived while it is read (see
+    ResponseArchive).
+
     If there are no updates, then this function will exit immediately, indicating that there is no more data to
     retrieve, as well as no next "from" timestamp to start at.  Otherwise, a next "from" timestamp will be returned, so
     that the same updates are not retrieved again from SA API.
@@ -143,68 +480,67 @@ def get_updated_movies_and_streams_from_one_request(
     :param from_timestamp: An optional timestamp to use for the "from" query parameter for fetching changes from
         Streaming Availability API.  This is the start time to begin looking up changes and must be within 31 days
         from right now.
+    :param change_type: The type of changes to get, which is one of "new", "updated", "removed", and "expiring".
     :return: A dict containing movie and etc. data, whether there is more data to get, and the next timestamp to
         start at.
         {
-            'movies': {
-                'movie identifier': {movie attributes}
-            },
-            'movie_posters': {
-                'poster identifier': {movie poster attributes},
-                ...
-            },
-            'streaming_options': {
-                'streaming options identifier': {streaming option attributes},
-                ...
-            },
+            'movies': ColumnBatch of movie attributes,
+            'movie_posters': ColumnBatch of movie poster attributes,
+            'streaming_option_groups': ColumnBatch of each movie's streaming options in the country,
             'has_more': bool,
             'next_from_timestamp': int | None
         }
+        If there are no updates, then only has_more and next_from_timestamp are returned.
     :raise StreamingAvailabilityApiError: If Streaming Availability API returns a response with status code that is
         not 200, or a response that does not indicate that it is due to client error.
+    :raise ApiKeysExhaustedError: If every API key is out of its daily quota.
     """
 
     # set up variables
-    url = 'https://streaming-availability.p.rapidapi.com/changes'
-    headers = {'X-RapidAPI-Key': RAPID_API_KEY}
+    url = f'{STREAMING_AVAILABILITY_BASE_URL}/changes'
 
     catalogs = ', '.join([service_id + '.free' for service_id in service_ids])
-    querystring = {'change_type': 'updated', 'country': country_code, 'item_type': 'show',
+    querystring = {'change_type': change_type, 'country': country_code, 'item_type': 'show',
                    'show_type': 'movie', 'catalogs': catalogs}
     if from_timestamp:
         querystring['from'] = from_timestamp
 
-    # call API
-    resp = requests.get(url, headers=headers, params=querystring)
+    # call API, retrying if API is rate limiting or failing
+    resp = call_with_backoff(lambda: api_key_pool.call(
+        lambda api_key: requests.get(
+            url, headers={'X-RapidAPI-Key': api_key}, params=querystring, stream=SA_API_STREAM_RESPONSES)))
     logger.info(f'Called {url} for country "{country_code}" and received status {resp.status_code}.')
 
     # handle response
-    body = resp.json()
     if resp.status_code == 200:
-
-        # if there are no updates, then exit immediately
-        if not body['shows']:
-            logger.warn(f'There are no updates for {country_code}.')
+        with response_archive.open(checkpoint_job, url, querystring) as archived_response:
+            shows, body = read_show_page(
+                resp, SA_API_STREAM_RESPONSES, SA_API_RESPONSE_CHUNK_SIZE, archived_response.write)
+
+            # store data
+            show_ids = set()
+            transformed_page = transform_page(record_show_ids(shows, show_ids))
+
+        # a removed movie that Streaming Availability API no longer has is only in the changes.  A removed movie that is
+        # still in the shows, even a malformed one, keeps its streaming options that are not in the page.
+        removed_movie_ids = [change['showId'] for change in body['changes'] if change['showId'] not in show_ids] \
+            if change_type == 'removed' else []
+
+        # if there are no updates, then exit.  This goes by the changes, since a page of shows that were all skipped
+        # when transforming still has to be moved past.
+        if not body['changes']:
+            logger.warning(f'There are no {change_type} changes for {country_code}.')
             return {
                 'has_more': False,
                 'next_from_timestamp': None
             }
 
-        # store data
         output = {
-            'movies': {},
-            'movie_posters': {},
-            'streaming_options': {},
-            'has_more': None,
-            'next_from_timestamp': None
+            'movies': transformed_page['movies'],
+            'movie_posters': transformed_page['movie_posters'],
+            'streaming_option_groups': group_streaming_options(transformed_page, country_code, removed_movie_ids)
         }
 
-        for show in body['shows'].values():
-            delete_country_movie_streaming_options(show['id'], country_code)
-            unique_transformed_show_data = make_unique_transformed_show_data(show)
-            for k in unique_transformed_show_data:
-                output[k].update(unique_transformed_show_data[k])
-
         if body['hasMore']:
             # if there's another page of data, return first part of next cursor
             next_from_timestamp = int(body['nextCursor'].split(':', 1)[0])
@@ -221,10 +557,12 @@ def get_updated_movies_and_streams_from_one_request(
 
         return output
 
-    elif resp.status_code == 400 and 'parameter "from" cannot be more than 31 days in the past' in body['message']:
-        # if "from" timestamp is too old, try again without "from" attribute
-        logger.warn('"from" timestamp is too old, retrying without "from".')
-        return get_updated_movies_and_streams_from_one_request(country_code, service_ids)
+    body = resp.json()
+    if (resp.status_code == 400 and from_timestamp
+            and 'parameter "from" cannot be more than 31 days in the past' in body['message']):
+        # if "from" timestamp is too old, try again without "from" attribute, which can only happen once
+        logger.warning('"from" timestamp is too old, retrying without "from".')
+        return get_updated_movies_and_streams_from_one_request(country_code, service_ids, change_type=change_type)
 
     else:
         logger.error(f'Unsuccessful response from API: '
@@ -234,11 +572,53 @@ def get_updated_movies_and_streams_from_one_request(
             resp.status_code
         )
 
+
+def parse_since(value: str) -> int:
+    """
+    Parses an ISO date or time, such as "2024-05-01" or "2024-05-01T12:00+02:00", into a "from" timestamp.  Times
+    without a time zone are in UTC.
+
+    :param value: The ISO date or time.
+    :return: The timestamp, in seconds.
+    :raise ValueError: If value is not an ISO date or time.
+    """
+
+    since = datetime.fromisoformat(value)
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return int(since.timestamp())
+
 # ==================================================
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Gets changes to movies and streaming options from Streaming '
+                                                 'Availability API.')
+    parser.add_argument('--country', action='append', type=str.lower, dest='country_codes', metavar='COUNTRY_CODE',
+                        help='update only this country (can be repeated)')
+    parser.add_argument('--service', action='append', type=str.lower, dest='service_ids', metavar='SERVICE_ID',
+                        help='update only this streaming service (can be repeated); its timestamps are saved '
+                             'separately')
+    from_group = parser.add_mutually_exclusive_group()
+    from_group.add_argument('--since', type=parse_since, metavar='DATE',
+                            help='get changes of the selected countries from this ISO date or time (UTC if no time '
+                                 'zone is given), within the last 31 days, instead of from their saved timestamps')
+    from_group.add_argument('--reset-cursor', action='store_true',
+                            help='ignore the saved timestamps of the selected countries')
+    parser.add_argument('--plan', action='store_true',
+                        help='print what updating would do, without making API requests or writing to the database')
+    args = parser.parse_args()
+
+    options = (args.country_codes, args.service_ids, args.since, args.reset_cursor)
+
     app = create_app("freestreammovies")
     connect_db(app)
     with app.app_context():
-        get_updated_movies_and_streaming_options()
+        if args.plan:
+            print_plan(plan_updates(*options))
+            sys.exit()
+
+        db.create_all()
+        run_job(checkpoint_job, lambda: get_updated_movies_and_streaming_options(*options))
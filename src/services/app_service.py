@@ -1,15 +1,28 @@
+import logging
+from datetime import datetime, timezone
+
 import requests
+from requests.exceptions import RequestException
 
 from src.adapters.streaming_availability_adapter import (
-    convert_show_json_into_movie_object, transform_show)
+    convert_show_json_into_movie_object, transform_page)
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
 from src.exceptions.StreamingAvailabilityApiError import \
     StreamingAvailabilityApiError
+from src.exceptions.StreamingAvailabilityApiUnavailableError import \
+    StreamingAvailabilityApiUnavailableError
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
 from src.exceptions.UpsertError import UpsertError
 from src.models.common import db
 from src.models.movie import Movie
+from src.models.movie_fetch import MovieFetch
 from src.models.movie_poster import MoviePoster
 from src.models.streaming_option import StreamingOption
+from src.util.api_key_pool import ApiKeyPool
 from src.util.logger import create_logger
+from src.util.response_archive import ResponseArchive
+from src.util.resilience import CircuitBreaker, is_upstream_failure
 
 # ==================================================
 
@@ -19,11 +32,60 @@ logger = create_logger(__name__, 'src/logs/app.log')
 
 
 class AppService:
-    """Service-level code for app."""
+    """
+    Service-level code for app.
+
+    Calls to Streaming Availability API go through a circuit breaker.  Requests are not retried, so that webpages do
+    not wait on a failing API, and after several failures in a row, calls are stopped for a while.  Each call uses a
+    key from a pool of API keys.
+    """
+
+    def __init__(
+            self, api_key_pool: ApiKeyPool,
+            STREAMING_AVAILABILITY_BASE_URL='https://streaming-availability.p.rapidapi.com',
+            response_archive: ResponseArchive = None
+    ):
+        self.STREAMING_AVAILABILITY_BASE_URL = STREAMING_AVAILABILITY_BASE_URL
+        self.api_key_pool = api_key_pool
+        self.response_archive = response_archive
+        self.circuit_breaker = CircuitBreaker('Streaming Availability API')
+
+    def _call_api(self, url: str, **kwargs) -> requests.Response:
+        """
+        Makes a GET request to Streaming Availability API, with a key from the API key pool, if the circuit breaker
+        allows it, and records whether the API is healthy.  Responses with status code 429 or 5xx count as failures.
+
+        :param url: The URL to send the request to.
+        :param kwargs: Passed to requests.get(), along with the API key's header.
+        :return: The response.
+        :raise StreamingAvailabilityApiUnavailableError: If calls to the API are stopped because it has been failing,
+            or because every API key is out of its daily quota.
+        :raise RequestException: If the request fails.
+        """
+
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f'Not calling {url}, because Streaming Availability API has been failing.')
+            raise StreamingAvailabilityApiUnavailableError(
+                'Streaming Availability API is temporarily unavailable.  Please try again later.')
+
+        try:
+            resp = self.api_key_pool.call(
+                lambda api_key: requests.get(url, headers={'X-RapidAPI-Key': api_key}, **kwargs))
+        except ApiKeysExhaustedError:
+            # no call could be made, which counts as a failure, so that a half-open circuit's trial call is not left
+            # in progress
+            self.circuit_breaker.record_failure()
+            raise
+        except RequestException:
+            self.circuit_breaker.record_failure()
+            raise
+
+        if is_upstream_failure(resp):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
 
-    def __init__(self, RAPID_API_KEY):
-        self.STREAMING_AVAILABILITY_BASE_URL = 'https://streaming-availability.p.rapidapi.com'
-        self.RAPID_API_KEY = RAPID_API_KEY
+        return resp
 
     def search_movies_by_title(self, country_code: str, title: str) -> list:
         """
@@ -35,27 +97,27 @@ class AppService:
         :return: The JSON movies data retrieved from Streaming Availability API.
             See "https://docs.movieofthenight.com/resource/shows#search-shows-by-title".
         :raise StreamingAvailabilityApiError: If the API response status code is not 200.
+        :raise StreamingAvailabilityApiUnavailableError: If calls to the API are stopped because it has been failing.
         """
 
         logger.info(f'Searching for movie "{title}" in country "{country_code}".')
 
         url = f'{self.STREAMING_AVAILABILITY_BASE_URL}/shows/search/title'
-        headers = {'X-RapidAPI-Key': self.RAPID_API_KEY}
         querystring = {'country': country_code,
                        'title': title,
                        'show_type': 'movie'}
 
         logger.info(f'url = {url}')
-        logger.info(f'headers = {headers}')
         logger.info(f'querystring = {querystring}')
 
-        resp = requests.get(url, headers=headers, params=querystring)
+        resp = self._call_api(url, params=querystring)
 
         if resp.status_code == 200:
             movies = resp.json()
 
             logger.info(f'{len(movies)} movies found.')
-            logger.debug([f'{movie['id']}: {movie['title']}' for movie in movies])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug([f'{movie['id']}: {movie['title']}' for movie in movies])
 
             return movies
 
@@ -65,32 +127,53 @@ class AppService:
                          f'Message: {resp.json()['message']}.')
             raise StreamingAvailabilityApiError(f'Error when searching for movie "{title}".', resp.status_code)
 
-    def get_movie_data(self, movie_id: str) -> Movie:
+    def get_movie_data(self, movie_id: str, country_code: str = None) -> Movie:
         """
         Calls Streaming Availability API to retrieve data for a movie by ID.  Stores movie, poster, and streaming
-        option data into database.
+        option data into database, and archives the response body, if there is a response archive.  The show is
+        decoded and validated the same way as the seeder's and updater's shows (see transform_page()), so nothing is
+        saved for a malformed show.
+
+        The fetch is recorded (see MovieFetch), for the countries that the movie has streaming options in and for the
+        visitor's country, so that the movie is refreshed later by the refresher.
 
         :param movie_id: The movie ID to get data for.
+        :param country_code: The country of the visitor that the movie is retrieved for, or None.
         :return: A Movie object belonging to the movie ID.
         :raise UpsertError: If committing data to database fails.
         :raise StreamingAvailabilityApiError: If Streaming Availability API returns a status code that is not 200.
+        :raise StreamingAvailabilityPayloadError: If the show is missing a field or has a field of the wrong type.
+        :raise StreamingAvailabilityApiUnavailableError: If calls to the API are stopped because it has been failing.
         """
 
         logger.info(f'Retrieving details for movie ID {movie_id}.')
 
         url = f"{self.STREAMING_AVAILABILITY_BASE_URL}/shows/{movie_id}"
-        headers = {'X-RapidAPI-Key': self.RAPID_API_KEY}
 
-        resp = requests.get(url, headers=headers)
+        resp = self._call_api(url)
         show = resp.json()
 
         if resp.status_code == 200:
+            if self.response_archive:
+                self.response_archive.add(resp.content, 'app', url)
+
+            # a malformed show is skipped by transform_page(), which logs the field
+            data = transform_page([show])
+            if len(data['movies']) == 0:
+                logger.error(f'Malformed movie details from Streaming Availability API for movie ID {movie_id}.')
+                raise StreamingAvailabilityPayloadError(
+                    f'Error when reading movie details for movie ID {movie_id}.', 'show')
+
             logger.info(f'Successfully retrieved movie details for {show['id']}: {show['title']}.')
 
-            data = transform_show(show)
-            Movie.upsert_database(data['movies'])
-            MoviePoster.upsert_database(data['movie_posters'])
-            StreamingOption.insert_database(data['streaming_options'])
+            Movie.upsert_batch(data['movies'])
+            MoviePoster.upsert_batch(data['movie_posters'])
+            StreamingOption.insert_batch(data['streaming_options'])
+
+            fetched_country_codes = set(data['streaming_options'].columns['country_code'])
+            if country_code:
+                fetched_country_codes.add(country_code)
+            MovieFetch.record_fetch(show['id'], fetched_country_codes, datetime.now(timezone.utc))
 
             try:
                 db.session.commit()
@@ -110,7 +193,7 @@ class AppService:
             movie = convert_show_json_into_movie_object(show)
 
             logger.info(f'Returning Movie object for {show['id']}: {show['title']}.')
-            logger.debug(f'Returning Movie object:\n{movie}')
+            logger.debug('Returning Movie object:\n%s', movie)
 
             return movie
 
@@ -123,3 +206,46 @@ class AppService:
                 f'Error when getting movie details for movie ID {movie_id}.',
                 resp.status_code
             )
+
+    def search_local_movies_by_title(self, country_code: str, title: str, limit: int = 20) -> list[dict]:
+        """
+        Searches the database for movies by title, that have streaming options in a country.  This is used instead of
+        search_movies_by_title() when Streaming Availability API is unavailable, so that only movies that have already
+        been saved can be found.
+
+        :param country_code: The country to find the streaming options for.
+        :param title: The movie title to search for.
+        :param limit: The max number of movies to return.
+        :return: Movies in the same format as Streaming Availability API shows, with only the attributes that are
+            displayed in search results.
+        """
+
+        logger.info(f'Searching database for movie "{title}" in country "{country_code}".')
+
+        movies = db.session\
+            .query(Movie)\
+            .filter(
+                Movie.title.icontains(title, autoescape=True),
+                Movie.streaming_options.any(StreamingOption.country_code == country_code)
+            )\
+            .order_by(Movie.title)\
+            .limit(limit)\
+            .all()
+
+        movie_posters = {}
+        for movie_poster in MoviePoster.get_movie_posters(
+                [movie.id for movie in movies], ['verticalPoster'], ['w240', 'w480']):
+            movie_posters.setdefault(movie_poster.movie_id, {})[movie_poster.size] = movie_poster.link
+
+        logger.info(f'{len(movies)} movies found in database.')
+
+        return [
+            {
+                'id': movie.id,
+                'title': movie.title,
+                'releaseYear': movie.release_year,
+                'overview': movie.overview,
+                'imageSet': {'verticalPoster': movie_posters.get(movie.id, {})}
+            }
+            for movie in movies
+        ]
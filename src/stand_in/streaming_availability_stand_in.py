@@ -0,0 +1,327 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from flask import Flask, request
+
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+SEARCH_PAGE_SIZE = 20
+CHANGES_PAGE_SIZE = 25
+TITLE_SEARCH_MAX_RESULTS = 20
+
+# how far back the "from" parameter of /changes is allowed to go, in seconds
+MAX_FROM_AGE = 31 * 24 * 60 * 60
+
+FROM_TOO_OLD_MESSAGE = 'parameter "from" cannot be more than 31 days in the past'
+
+# --------------------------------------------------
+
+
+class RecordedResponses:
+    """
+    Responses that were recorded from Streaming Availability API, to be replayed.
+
+    Recordings are JSON files in a directory, where each file contains one request and its response:
+    {"path": "/changes", "params": {"country": "us", ...}, "status": 200, "body": {...}}
+    If the same request was recorded more than once, then the responses are replayed in file name order, and the last
+    one keeps being replayed after that.
+    """
+
+    def __init__(self, directory: str):
+        self._responses = {}
+        self._lock = threading.Lock()
+
+        for file_path in sorted(Path(directory).glob('*.json')):
+            with open(file_path, encoding='utf-8') as f:
+                recording = json.load(f)
+
+            key = self.make_key(recording['path'], recording.get('params', {}))
+            self._responses.setdefault(key, deque()).append((recording['body'], recording.get('status', 200)))
+
+    @staticmethod
+    def make_key(path: str, params: dict) -> tuple:
+        """Creates the key that a request is matched with.  The order of query parameters does not matter."""
+
+        return (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def get(self, path: str, params: dict) -> tuple | None:
+        """Gets (body, status code) of the recorded response for a request, or None if it was not recorded."""
+
+        with self._lock:
+            responses = self._responses.get(self.make_key(path, params))
+            if not responses:
+                return None
+
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+
+class StandInState:
+    """Request limits and counters of a stand-in server.  Counters can be read to see how many requests were made."""
+
+    def __init__(self, rate_limit_per_second: int = None, rate_limit_per_day: int = None, api_keys: set = None):
+        self.rate_limit_per_second = rate_limit_per_second
+        self.rate_limit_per_day = rate_limit_per_day
+        self.api_keys = api_keys
+
+        self.request_counts = Counter()
+        self.rejected_counts = Counter()
+
+        self._recent_request_times = {}
+        self._daily_request_counts = Counter()
+        self._lock = threading.Lock()
+
+    def check_rate_limits(self, api_key: str) -> bool:
+        """
+        Records a request for an API key, if it is within the rate limits.
+
+        :param api_key: The API key that made the request.
+        :return: True if the request is allowed, False if it is over a rate limit.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            recent_request_times = self._recent_request_times.setdefault(api_key, deque())
+
+            while recent_request_times and now - recent_request_times[0] >= 1:
+                recent_request_times.popleft()
+
+            if self.rate_limit_per_second is not None and len(recent_request_times) >= self.rate_limit_per_second:
+                return False
+
+            if self.rate_limit_per_day is not None and self._daily_request_counts[api_key] >= self.rate_limit_per_day:
+                return False
+
+            recent_request_times.append(now)
+            self._daily_request_counts[api_key] += 1
+            return True
+
+    def count(self, path: str, rejected: bool = False) -> None:
+        """Counts a request to an endpoint."""
+
+        with self._lock:
+            (self.rejected_counts if rejected else self.request_counts)[path] += 1
+
+
+# --------------------------------------------------
+
+
+def parse_catalogs(catalogs: str | None) -> list[str]:
+    """Gets the service IDs from a catalogs query parameter, such as "service00.free, service01.free"."""
+
+    if not catalogs:
+        return []
+
+    return [catalog.strip().split('.', 1)[0] for catalog in catalogs.split(',') if catalog.strip()]
+
+
+def create_stand_in_app(
+        catalog: SyntheticCatalog = None,
+        recordings_directory: str = None,
+        rate_limit_per_second: int = None,
+        rate_limit_per_day: int = None,
+        api_keys: set = None
+) -> Flask:
+    """
+    Creates a Flask app that stands in for Streaming Availability API, for testing without using up the real API's
+    rate limits.  Implements /countries, /shows/search/filters, /shows/search/title, /changes, and /shows/{id}, with
+    the same pagination, cursors, and 400 and 429 responses as the real API.
+
+    Recorded responses are served first.  Requests that were not recorded are served from the synthetic catalog.
+
+    :param catalog: The synthetic catalog to serve.  If None, only recorded responses are served.
+    :param recordings_directory: A directory of recorded responses to replay.
+    :param rate_limit_per_second: Max requests per second for each API key.  None for no limit.
+    :param rate_limit_per_day: Max total requests for each API key, for the lifetime of the app.  None for no limit.
+    :param api_keys: The accepted API keys.  If None, any API key is accepted.
+    :return: A Flask app.  Its StandInState is in app.extensions['stand_in'].
+    """
+
+    app = Flask(__name__)
+
+    state = StandInState(rate_limit_per_second, rate_limit_per_day, api_keys)
+    app.extensions['stand_in'] = state
+
+    recordings = RecordedResponses(recordings_directory) if recordings_directory else None
+
+    # --------------------------------------------------
+
+    @app.before_request
+    def check_api_key_and_rate_limits():
+        """Rejects requests the same way as RapidAPI, and serves recorded responses."""
+
+        api_key = request.headers.get('X-RapidAPI-Key')
+
+        if not api_key or (api_keys is not None and api_key not in api_keys):
+            state.count(request.path, rejected=True)
+            return {'message': 'You are not subscribed to this API.'}, 403
+
+        if not state.check_rate_limits(api_key):
+            state.count(request.path, rejected=True)
+            return {'message': 'Too many requests'}, 429
+
+        state.count(request.path)
+
+        if recordings:
+            recorded_response = recordings.get(request.path, request.args.to_dict())
+            if recorded_response:
+                return recorded_response
+
+        if not catalog:
+            return {'message': 'No recorded response for this request.'}, 404
+
+    @app.route('/countries')
+    def get_countries():
+        return catalog.get_countries()
+
+    @app.route('/shows/search/filters')
+    def search_shows_by_filters():
+        country_code = request.args.get('country')
+        if country_code not in catalog.country_codes:
+            return {'message': 'parameter "country" must be a valid country code'}, 400
+
+        service_ids = parse_catalogs(request.args.get('catalogs'))
+
+        start_index = 0
+        cursor = request.args.get('cursor')
+        if cursor:
+            start_index = catalog.show_index(cursor.split(':', 1)[0])
+            if start_index is None:
+                return {'message': 'parameter "cursor" is invalid'}, 400
+
+        shows = []
+        next_cursor = None
+        for index in range(start_index, catalog.num_shows):
+            if not catalog.show_is_in_catalogs(index, service_ids):
+                continue
+
+            if len(shows) == SEARCH_PAGE_SIZE:
+                next_cursor = f'{catalog.show_id(index)}:{catalog.original_title(index)}'
+                break
+
+            shows.append(catalog.make_show(index, [country_code]))
+
+        output = {'shows': shows, 'hasMore': next_cursor is not None}
+        if next_cursor:
+            output['nextCursor'] = next_cursor
+
+        return output
+
+    @app.route('/shows/search/title')
+    def search_shows_by_title():
+        country_code = request.args.get('country')
+        title = request.args.get('title')
+        if country_code not in catalog.country_codes or not title:
+            return {'message': 'parameters "country" and "title" are required'}, 400
+
+        shows = []
+        for index in range(catalog.num_shows):
+            if title.lower() in catalog.original_title(index).lower():
+                shows.append(catalog.make_show(index, [country_code]))
+
+                if len(shows) == TITLE_SEARCH_MAX_RESULTS:
+                    break
+
+        return shows
+
+    @app.route('/shows/<show_id>')
+    def get_show(show_id):
+        index = catalog.show_index(show_id)
+        if index is None:
+            return {'message': 'show not found'}, 404
+
+        country_code = request.args.get('country')
+        return catalog.make_show(index, [country_code] if country_code else None)
+
+    @app.route('/changes')
+    def get_changes():
+        country_code = request.args.get('country')
+        change_type = request.args.get('change_type')
+        if country_code not in catalog.country_codes or not change_type:
+            return {'message': 'parameters "country" and "change_type" are required'}, 400
+
+        from_timestamp = request.args.get('from', type=int)
+        if from_timestamp is not None and from_timestamp < time.time() - MAX_FROM_AGE:
+            return {'message': FROM_TOO_OLD_MESSAGE}, 400
+
+        # only "updated" changes are made up by the synthetic catalog
+        if change_type != 'updated':
+            return {'changes': [], 'shows': {}, 'hasMore': False}
+
+        service_ids = parse_catalogs(request.args.get('catalogs'))
+
+        start_index = 0
+        cursor = request.args.get('cursor')
+        if cursor:
+            start_index = catalog.show_index(cursor.split(':', 1)[-1])
+            if start_index is None:
+                return {'message': 'parameter "cursor" is invalid'}, 400
+        elif from_timestamp is not None:
+            while start_index < catalog.num_shows and catalog.change_timestamp(start_index) < from_timestamp:
+                start_index += 1
+
+        changes = []
+        shows = {}
+        next_cursor = None
+        for index in range(start_index, catalog.num_shows):
+            if not catalog.show_is_in_catalogs(index, service_ids):
+                continue
+
+            show_id = catalog.show_id(index)
+            timestamp = catalog.change_timestamp(index)
+
+            if len(changes) == CHANGES_PAGE_SIZE:
+                next_cursor = f'{timestamp}:{show_id}'
+                break
+
+            changes.append({'changeType': 'updated', 'itemType': 'show', 'showId': show_id,
+                            'showType': 'movie', 'timestamp': timestamp})
+            shows[show_id] = catalog.make_show(index, [country_code])
+
+        output = {'changes': changes, 'shows': shows, 'hasMore': next_cursor is not None}
+        if next_cursor:
+            output['nextCursor'] = next_cursor
+
+        return output
+
+    return app
+
+# ==================================================
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Runs a local stand-in of Streaming Availability API.')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--countries', type=int, default=2, help='number of countries in the synthetic catalog')
+    parser.add_argument('--shows', type=int, default=100, help='number of shows in the synthetic catalog')
+    parser.add_argument('--options', type=int, default=2,
+                        help='number of streaming options per show and country in the synthetic catalog')
+    parser.add_argument('--services', type=int, default=3, help='number of services per country')
+    parser.add_argument('--seed', type=int, default=0, help='changes the generated synthetic data')
+    parser.add_argument('--recordings', help='directory of recorded responses to replay')
+    parser.add_argument('--no-catalog', action='store_true', help='only serve recorded responses')
+    parser.add_argument('--rate-limit-per-second', type=int, default=10)
+    parser.add_argument('--rate-limit-per-day', type=int, default=None)
+    args = parser.parse_args()
+
+    catalog = None if args.no_catalog else SyntheticCatalog(
+        args.countries, args.shows, args.options, args.services, args.seed)
+
+    stand_in_app = create_stand_in_app(
+        catalog, args.recordings, args.rate_limit_per_second, args.rate_limit_per_day)
+    stand_in_app.run(port=args.port, threaded=True)
@@ -0,0 +1,219 @@
+import random
+import time
+from itertools import product
+from string import ascii_lowercase
+
+# ==================================================
+
+# real country codes are used first, so that small catalogs look like real data
+COMMON_COUNTRY_CODES = ['us', 'ca', 'gb', 'au', 'de', 'fr', 'it', 'es', 'br', 'mx', 'in', 'jp']
+
+# how far back in time the changes of a catalog are spread out, in seconds
+CHANGES_TIME_SPAN = 30 * 24 * 60 * 60
+
+POSTER_SIZES = {
+    'verticalPoster': ['w240', 'w360', 'w480', 'w600', 'w720'],
+    'horizontalPoster': ['w360', 'w480', 'w720', 'w1080', 'w1440'],
+}
+
+_WORDS = ['Dark', 'Truth', 'Blue', 'Shade', 'Night', 'River', 'Last', 'Star', 'Gate', 'City', 'Storm', 'Silent',
+          'Golden', 'Road', 'Winter', 'Secret', 'Ocean', 'Fire', 'Dream', 'Shadow']
+
+_FIRST_NAMES = ['Kurt', 'James', 'Jaye', 'Viveca', 'Alexis', 'Mili', 'Erick', 'Roland', 'Heath', 'Michael']
+
+_LAST_NAMES = ['Russell', 'Spader', 'Davidson', 'Lindfors', 'Cruz', 'Avital', 'Avari', 'Emmerich', 'Ledger', 'Caine']
+
+# --------------------------------------------------
+
+
+class SyntheticCatalog:
+    """
+    A deterministic, made-up catalog of movies, in the same JSON format as Streaming Availability API.
+
+    Shows are generated on demand from their index, so that very large catalogs do not need to be held in memory.
+    The same parameters always generate the same catalog.  Show IDs go from "1" to str(num_shows), and shows are
+    sorted by original title in the same order as their IDs.  Every show has streaming options in every country,
+    and every show has one change per country, spread out evenly over the last 30 days.
+    """
+
+    def __init__(
+            self,
+            num_countries: int = 2,
+            num_shows: int = 100,
+            num_options: int = 2,
+            num_services: int = 3,
+            seed: int = 0,
+            now: int = None
+    ):
+        """
+        :param num_countries: The number of countries in the catalog.
+        :param num_shows: The number of shows (movies) in the catalog.
+        :param num_options: The number of free streaming options that each show has in each country.
+        :param num_services: The number of streaming services in each country.
+        :param seed: Changes the generated titles, cast, and etc.
+        :param now: The timestamp that the catalog's changes end at.  Defaults to the current time.
+        """
+
+        self.num_shows = num_shows
+        self.num_options = num_options
+        self.num_services = num_services
+        self.seed = seed
+        self.now = int(now if now is not None else time.time())
+
+        self.country_codes = self._make_country_codes(num_countries)
+        self.service_ids = [f'service{i:02d}' for i in range(num_services)]
+
+    # --------------------------------------------------
+
+    @staticmethod
+    def _make_country_codes(num_countries: int) -> list[str]:
+        """Creates unique two-letter country codes."""
+
+        country_codes = COMMON_COUNTRY_CODES[:num_countries]
+
+        for letters in product(ascii_lowercase, repeat=2):
+            if len(country_codes) >= num_countries:
+                break
+
+            country_code = ''.join(letters)
+            if country_code not in country_codes:
+                country_codes.append(country_code)
+
+        return country_codes
+
+    def make_service(self, service_id: str) -> dict:
+        """Creates the JSON Service object for a streaming service."""
+
+        return {
+            'id': service_id,
+            'name': f'Service TV {service_id[-2:]}',
+            'homePage': f'https://www.{service_id}.example.com/',
+            'themeColorCode': '#ffff13',
+            'imageSet': {
+                'lightThemeImage': f'https://media.example.com/services/{service_id}/logo-light-theme.svg',
+                'darkThemeImage': f'https://media.example.com/services/{service_id}/logo-dark-theme.svg',
+                'whiteImage': f'https://media.example.com/services/{service_id}/logo-white.svg'
+            }
+        }
+
+    def get_countries(self) -> dict:
+        """Creates the response body for GET /countries."""
+
+        output = {}
+
+        for country_code in self.country_codes:
+            services = []
+            for service_id in self.service_ids:
+                service = self.make_service(service_id)
+                service['streamingOptionTypes'] = {
+                    'addon': False, 'buy': False, 'rent': False, 'free': True, 'subscription': False}
+                service['addons'] = []
+                services.append(service)
+
+            output[country_code] = {
+                'countryCode': country_code,
+                'name': f'Country {country_code.upper()}',
+                'services': services
+            }
+
+        return output
+
+    # --------------------------------------------------
+
+    def show_id(self, index: int) -> str:
+        """Gets the show ID of the show at an index."""
+
+        return str(index + 1)
+
+    def show_index(self, show_id: str) -> int | None:
+        """Gets the index of a show from its ID, or None if the show is not in the catalog."""
+
+        try:
+            index = int(show_id) - 1
+        except ValueError:
+            return None
+
+        return index if 0 <= index < self.num_shows else None
+
+    def original_title(self, index: int) -> str:
+        """Gets the original title of the show at an index.  Zero-padding keeps titles sorted in index order."""
+
+        rng = random.Random(f'{self.seed}-title-{index}')
+        return f'Movie {index:09d} {rng.choice(_WORDS)} {rng.choice(_WORDS)}'
+
+    def change_timestamp(self, index: int) -> int:
+        """Gets the timestamp of the change for the show at an index.  Later indexes have later timestamps."""
+
+        step = CHANGES_TIME_SPAN / max(self.num_shows, 1)
+        return self.now - CHANGES_TIME_SPAN + int(index * step)
+
+    def service_ids_of_show(self, index: int) -> list[str]:
+        """Gets the IDs of the services that have a streaming option for the show at an index."""
+
+        if not self.service_ids:
+            return []
+
+        return [self.service_ids[(index + i) % self.num_services] for i in range(self.num_options)]
+
+    def make_show(self, index: int, country_codes: list[str] = None) -> dict:
+        """
+        Creates the JSON Show object for the show at an index.
+
+        :param index: The index of the show.
+        :param country_codes: The countries to include streaming options for.  Defaults to all countries.
+        :return: A Show object.
+        """
+
+        rng = random.Random(f'{self.seed}-show-{index}')
+        show_id = self.show_id(index)
+        original_title = self.original_title(index)
+
+        image_set = {
+            poster_type: {
+                size: f'https://cdn.example.com/show/{show_id}/poster/{poster_type}/{size}.jpg'
+                for size in sizes
+            }
+            for poster_type, sizes in POSTER_SIZES.items()
+        }
+
+        streaming_options = {}
+        for country_code in (country_codes if country_codes is not None else self.country_codes):
+            streaming_options[country_code] = [
+                {
+                    'service': self.make_service(service_id),
+                    'type': 'free',
+                    'link': f'https://www.{service_id}.example.com/{country_code}/movies/{show_id}/{i}',
+                    'videoLink': f'https://www.{service_id}.example.com/{country_code}/watch/{show_id}/{i}',
+                    'quality': 'hd',
+                    'audios': [{'language': 'eng'}],
+                    'subtitles': [],
+                    'expiresSoon': False,
+                    'availableSince': self.change_timestamp(index)
+                }
+                for i, service_id in enumerate(self.service_ids_of_show(index))
+            ]
+
+        return {
+            'itemType': 'show',
+            'showType': 'movie',
+            'id': show_id,
+            'imdbId': f'tt{index:07d}',
+            'tmdbId': f'movie/{index + 1}',
+            'title': original_title,
+            'overview': f'Overview of {original_title}.',
+            'releaseYear': rng.randint(1950, 2024),
+            'originalTitle': original_title,
+            'genres': [{'id': 'drama', 'name': 'Drama'}],
+            'directors': [f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}'],
+            'cast': [f'{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}' for i in range(3)],
+            'rating': rng.randint(0, 100),
+            'runtime': rng.randint(80, 180),
+            'imageSet': image_set,
+            'streamingOptions': streaming_options
+        }
+
+    def show_is_in_catalogs(self, index: int, service_ids: list[str] = None) -> bool:
+        """Checks if a show has a streaming option from any of the services.  No services means all services."""
+
+        return not service_ids or any(
+            service_id in service_ids for service_id in self.service_ids_of_show(index))
@@ -0,0 +1,221 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+import requests
+
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
+from src.models.rate_limit_window import RateLimitWindow
+from src.util.logger import create_logger
+from src.util.resilience import get_retry_after
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/resilience.log')
+
+# --------------------------------------------------
+
+
+class ApiKey:
+    """One API key in an ApiKeyPool, with the times of its recent calls and whether it is in rotation."""
+
+    def __init__(self, number: int, key: str):
+        """
+        :param number: The key's number in the pool, which is logged instead of the key.
+        :param key: The API key.
+        """
+
+        self.number = number
+        self.key = key
+        self.call_times_in_last_second = deque()
+        self.call_times_in_last_day = deque()
+        self.cooldown_until = 0.0
+        self.is_refused = False
+        # when the key's shared daily quota is used up, this is when the quota's day ends
+        self.quota_reset_at = 0.0
+
+
+class ApiKeyPool:
+    """
+    Thread-safe pool of API keys, where each key has its own per second rate limit and daily quota.  Calls are counted
+    in this process, and, if shared_quota_name is given, each key's calls in the current day (UTC) are also counted in
+    the database (see RateLimitWindow), so that every process that uses the same keys, such as the web app, the
+    seeder, the updater, and the seeding workers, shares one daily quota for each key.
+
+    Each call uses the key with the most calls left in its daily quota, out of the keys that are in rotation and under
+    their per second rate limit.  A key that receives a 429 response is taken out of rotation for the time in the
+    response's Retry-After header, or else for cooldown_seconds.  A key that receives a 403 response is taken out of
+    rotation for good, since it is refused by the API.  If no key can make a call right now, then the call waits until
+    the first key that can.
+    """
+
+    SECONDS_PER_DAY = 24 * 60 * 60
+
+    def __init__(
+            self, keys: list[str], max_calls_per_second: int = None, max_calls_per_day: int = None,
+            cooldown_seconds: float = 60.0, shared_quota_name: str = None
+    ):
+        """
+        :param keys: The API keys.
+        :param max_calls_per_second: The max number of calls per second for each key, or None for no limit.
+        :param max_calls_per_day: The max number of calls in any 24 hours for each key, or None for no limit.
+        :param cooldown_seconds: How long a key is out of rotation after a 429 response without Retry-After.
+        :param shared_quota_name: The name that each key's daily calls are counted under in the database, or None to
+            only count them in this process.  Keys are identified by a hash, so that keys are not saved.
+        """
+
+        self.max_calls_per_second = max_calls_per_second
+        self.max_calls_per_day = max_calls_per_day
+        self.cooldown_seconds = cooldown_seconds
+        self.shared_quota_name = shared_quota_name
+        self._keys = [ApiKey(number, key) for number, key in enumerate(keys, start=1)]
+        self._keys_by_value = {api_key.key: api_key for api_key in self._keys}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _forget_old_calls(self, api_key: ApiKey, now: float) -> None:
+        """Forgets calls that are outside of a key's windows.  Lock must be held."""
+
+        while api_key.call_times_in_last_second and now - api_key.call_times_in_last_second[0] >= 1:
+            api_key.call_times_in_last_second.popleft()
+        while api_key.call_times_in_last_day and now - api_key.call_times_in_last_day[0] >= self.SECONDS_PER_DAY:
+            api_key.call_times_in_last_day.popleft()
+
+    def _get_num_calls_left_today(self, api_key: ApiKey) -> float:
+        """Gets the number of calls left in a key's daily quota.  Lock must be held."""
+
+        if self.max_calls_per_day is None:
+            return float('inf')
+
+        return self.max_calls_per_day - len(api_key.call_times_in_last_day)
+
+    def _is_usable(self, api_key: ApiKey, now: float) -> bool:
+        """Checks that a key is not refused or out of its daily quota.  Lock must be held."""
+
+        return not api_key.is_refused and api_key.quota_reset_at <= now and self._get_num_calls_left_today(api_key) > 0
+
+    def _try_acquire_shared_quota(self, api_key: ApiKey) -> bool:
+        """
+        Records a call of a key in its shared daily quota, if the key has calls left in it today.  Lock should not be
+        held, since this waits on the database.
+
+        :return: True if the call was recorded, or False if the key is out of its shared daily quota.
+        """
+
+        key_hash = hashlib.sha256(str(api_key.key).encode()).hexdigest()[:16]
+        return RateLimitWindow.try_acquire(
+            f'{self.shared_quota_name}:{key_hash}', self.max_calls_per_day, self.SECONDS_PER_DAY)
+
+    def _get_wait_seconds(self, api_key: ApiKey, now: float) -> float:
+        """
+        Gets how long until a key is back in rotation and under its per second rate limit, which is 0 if it can make a
+        call now.  Lock must be held.
+        """
+
+        wait_seconds = max(api_key.cooldown_until - now, 0)
+
+        if self.max_calls_per_second is not None \
+                and len(api_key.call_times_in_last_second) >= self.max_calls_per_second:
+            wait_seconds = max(wait_seconds, 1 - (now - api_key.call_times_in_last_second[0]))
+
+        return wait_seconds
+
+    def get_num_calls_left_today(self) -> int | float:
+        """Gets the total number of calls left in the daily quotas of the keys that are not refused."""
+
+        with self._lock:
+            now = time.monotonic()
+            for api_key in self._keys:
+                self._forget_old_calls(api_key, now)
+
+            return sum(self._get_num_calls_left_today(api_key)
+                       for api_key in self._keys if self._is_usable(api_key, now))
+
+    def acquire(self) -> str:
+        """
+        Picks the key with the most calls left today, out of the keys that can make a call now, and records the call.
+        If no key can make a call now, then this blocks until one can, without holding up other threads.  A key that
+        turns out to be out of its shared daily quota is left out until the day ends, and another key is picked.
+
+        :return: The API key.
+        :raise ApiKeysExhaustedError: If every key is refused or out of its daily quota.
+        """
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                for api_key in self._keys:
+                    self._forget_old_calls(api_key, now)
+
+                usable_keys = [api_key for api_key in self._keys if self._is_usable(api_key, now)]
+                if not usable_keys:
+                    raise ApiKeysExhaustedError('Every Streaming Availability API key is out of its daily quota.  '
+                                                'Please try again later.')
+
+                available_keys = [api_key for api_key in usable_keys if self._get_wait_seconds(api_key, now) == 0]
+                if available_keys:
+                    api_key = max(available_keys, key=self._get_num_calls_left_today)
+                    api_key.call_times_in_last_second.append(now)
+                    api_key.call_times_in_last_day.append(now)
+                else:
+                    api_key = None
+                    wait_seconds = min(self._get_wait_seconds(usable_key, now) for usable_key in usable_keys)
+
+            if api_key is None:
+                # the lock is not held while waiting, so that other threads can report responses
+                time.sleep(wait_seconds)
+                continue
+
+            if self.shared_quota_name is None or self.max_calls_per_day is None \
+                    or self._try_acquire_shared_quota(api_key):
+                return api_key.key
+
+            with self._lock:
+                # the call was not made.  The shared quota is counted in days of the database's clock, which is assumed
+                # to be close to this machine's clock.
+                api_key.call_times_in_last_day.remove(now)
+                api_key.quota_reset_at = now + self.SECONDS_PER_DAY - time.time() % self.SECONDS_PER_DAY
+                logger.warning(f'API key {api_key.number} of {len(self._keys)} is out of its daily quota, which is '
+                               'shared with other processes.  It is taken out of rotation until the end of the day.')
+
+    def report(self, key: str, resp: requests.Response) -> None:
+        """
+        Takes a key out of rotation if its response shows that the key is rate limited (429) or refused (403).
+
+        :param key: The API key that made the call.
+        :param resp: The response.
+        """
+
+        with self._lock:
+            api_key = self._keys_by_value[key]
+
+            if resp.status_code == 403:
+                api_key.is_refused = True
+                logger.warning(f'API key {api_key.number} of {len(self._keys)} was refused (403).  '
+                               'It is taken out of rotation.')
+
+            elif resp.status_code == 429:
+                retry_after = get_retry_after(resp)
+                cooldown_seconds = self.cooldown_seconds if retry_after is None else retry_after
+                api_key.cooldown_until = time.monotonic() + cooldown_seconds
+                logger.warning(f'API key {api_key.number} of {len(self._keys)} was rate limited (429).  '
+                               f'It is taken out of rotation for {cooldown_seconds:.0f} seconds.')
+
+    def call(self, make_request: Callable[[str], requests.Response]) -> requests.Response:
+        """
+        Makes a request with a key from the pool, and reports the response.
+
+        :param make_request: A function that makes the request with the given API key and returns the response.
+        :return: The response.
+        :raise ApiKeysExhaustedError: If every key is refused or out of its daily quota.
+        """
+
+        key = self.acquire()
+        resp = make_request(key)
+        self.report(key, resp)
+
+        return resp
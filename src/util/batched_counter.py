@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Hashable
+
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/app.log')
+
+# --------------------------------------------------
+
+
+class BatchedCounter:
+    """
+    Thread-safe counter that keeps counts in memory and flushes them in one batch, at most once every flush_interval
+    seconds, instead of writing on every increment.  Flushing happens in whichever thread increments after the interval
+    has passed, so that no background thread is needed.
+    """
+
+    def __init__(self, flush: Callable[[dict], None], flush_interval: float):
+        """
+        :param flush: Saves a batch of counts, {key: count}.
+        :param flush_interval: The minimum number of seconds between flushes.
+        """
+
+        self._flush = flush
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._last_flush_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def increment(self, key: Hashable, amount: int = 1) -> None:
+        """
+        Adds to a key's count, and flushes all counts if flush_interval seconds have passed since the last flush.
+
+        :param key: The key to count.
+        :param amount: The amount to add.
+        """
+
+        with self._lock:
+            self._counts[key] += amount
+
+            if time.monotonic() - self._last_flush_time < self.flush_interval:
+                return
+
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Flushes all counts, and then starts counting from 0.  If the counts can not be saved, then they are dropped and
+        the error is logged, since losing a batch of counts is better than failing the request that is flushing them.
+        """
+
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._last_flush_time = time.monotonic()
+
+        if not counts:
+            return
+
+        try:
+            self._flush(dict(counts))
+        except Exception as e:
+            logger.error(f'Unable to flush {sum(counts.values())} counts.  They are dropped.\n'
+                         f'Error is {type(e)}:\n'
+                         f'{str(e)}')
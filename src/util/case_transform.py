@@ -13,3 +13,13 @@ class CamelToSnake():
         cls.pattern = cls.pattern or re.compile(r'(?<!^)(?=[A-Z])')
         name = cls.pattern.sub('_', str).lower()
         return name
+
+
+class SnakeToCamel():
+    """Reverses CamelToSnake, such as "release_year" to "releaseYear"."""
+
+    @classmethod
+    def transform(cls, str):
+        first_word, *other_words = str.split('_')
+        name = first_word + ''.join(word.capitalize() for word in other_words)
+        return name
@@ -0,0 +1,73 @@
+class ColumnBatch:
+    """
+    Rows for one database table, stored as one list per column, so that rows can be written in bulk without creating
+    a dict for each row.
+
+    Each row has a key, made from its key columns.  Adding a row with the same key as an earlier row replaces the
+    earlier row, the same way that dict.update() does, so a batch never has duplicate keys.
+    """
+
+    def __init__(self, column_names: tuple[str, ...], key_column_names: tuple[str, ...]):
+        """
+        :param column_names: The names of the columns, in the order that values are given to add_row().
+        :param key_column_names: The names of the columns that identify a row.
+        """
+
+        self.column_names = tuple(column_names)
+        self.key_column_names = tuple(key_column_names)
+        self.columns = {column_name: [] for column_name in self.column_names}
+
+        self._column_lists = [self.columns[column_name] for column_name in self.column_names]
+        self._key_indexes = tuple(self.column_names.index(column_name) for column_name in self.key_column_names)
+        self._row_indexes = {}
+
+    def __len__(self) -> int:
+        return len(self._row_indexes)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ColumnBatch):
+            return NotImplemented
+
+        return self.column_names == other.column_names \
+            and self.key_column_names == other.key_column_names \
+            and self.columns == other.columns
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.column_names!r}, {len(self)} rows)'
+
+    def add_row(self, *values) -> None:
+        """
+        Adds a row, or replaces the row that has the same key.
+
+        :param values: The row's values, in the same order as column_names.
+        """
+
+        key = tuple([values[i] for i in self._key_indexes])
+        num_rows = len(self._row_indexes)
+        row_index = self._row_indexes.setdefault(key, num_rows)
+
+        if row_index == num_rows:
+            for column_list, value in zip(self._column_lists, values):
+                column_list.append(value)
+        else:
+            for column_list, value in zip(self._column_lists, values):
+                column_list[row_index] = value
+
+    def extend(self, other: 'ColumnBatch') -> None:
+        """
+        Adds all rows from another batch for the same table.  Rows from the other batch replace rows with the same key.
+
+        :param other: A batch with the same columns.
+        :raise ValueError: If the other batch has different columns.
+        """
+
+        if other.column_names != self.column_names or other.key_column_names != self.key_column_names:
+            raise ValueError(f'Can not extend a batch of {self.column_names} with a batch of {other.column_names}.')
+
+        for values in zip(*other._column_lists):
+            self.add_row(*values)
+
+    def to_dicts(self) -> list[dict]:
+        """Converts the rows into a list of dicts, such as for logging or for writers that need dicts."""
+
+        return [dict(zip(self.column_names, values)) for values in zip(*self._column_lists)]
@@ -46,7 +46,7 @@ def read_json_file_helper(file_location: str) -> dict:
         with open(file_location) as f:
             contents = json.loads(f.read())
             logger.info("JSON file successfully read and parsed.")
-            logger.debug(f'Contents are {contents}.')
+            logger.debug('Contents are %s.', contents)
             return contents
 
     except OSError as e:
@@ -64,7 +64,7 @@ def write_json_file_helper(file_location: str, contents: dict) -> None:
     :raise FreeStreamMoviesServerError: If there is an issue with opening or writing to the file.
     """
 
-    logger.debug(f'Writing contents to file. Contents are {contents}.')
+    logger.debug('Writing contents to file. Contents are %s.', contents)
 
     try:
         with open(file_location, 'w') as f:
@@ -0,0 +1,172 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
+# ==================================================
+
+_WHITESPACE = ' \t\n\r'
+
+# --------------------------------------------------
+
+
+class JsonObjectStream:
+    """
+    Incrementally parses a JSON object from chunks of bytes, such as from requests.Response.iter_content(), so that
+    the items of one of its members can be processed one at a time, without first loading the whole object.
+
+    The streamed member can be an array, whose items are yielded, or an object, whose values are yielded.  Only one
+    item is decoded at a time, so the memory used is about the size of one chunk plus one item.  All other members of
+    the object are decoded normally and are stored in fields, which is complete after iter_items() is exhausted.
+
+    Example:
+        body = JsonObjectStream(resp.iter_content(chunk_size=65536), 'shows')
+        for show in body.iter_items():
+            ...
+        has_more = body.fields['hasMore']
+    """
+
+    def __init__(self, chunks: Iterable[bytes], streamed_key: str):
+        """
+        :param chunks: The chunks of bytes of a UTF-8 encoded JSON object.
+        :param streamed_key: The name of the member whose items will be yielded one at a time.
+        """
+
+        self.streamed_key = streamed_key
+        self.fields = {}
+
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._is_exhausted = False
+        self._has_started = False
+
+    def iter_items(self) -> Iterator:
+        """
+        Parses the whole object, yielding the items of the streamed member as they are parsed.
+        This can only be called once.
+
+        :return: A generator of the items of the streamed member.
+        :raise json.JSONDecodeError: If the data is not a valid JSON object.
+        """
+
+        if self._has_started:
+            raise RuntimeError('JsonObjectStream can only be iterated once.')
+        self._has_started = True
+
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+
+        while True:
+            key = self._decode_value()
+            if not isinstance(key, str):
+                self._raise_error('Expecting property name enclosed in double quotes')
+            self._expect(':')
+
+            if key == self.streamed_key and self._peek() in '[{':
+                yield from self._iter_container_items()
+            else:
+                self.fields[key] = self._decode_value()
+
+            if self._expect(',}') == '}':
+                break
+
+        if self._peek() != '':
+            self._raise_error('Extra data')
+
+    def _iter_container_items(self) -> Iterator:
+        """Yields the items of the array, or the values of the object, that starts at the current position."""
+
+        is_object = self._expect('[{') == '{'
+        closing_char = '}' if is_object else ']'
+
+        if self._peek() == closing_char:
+            self._position += 1
+            return
+
+        while True:
+            if is_object:
+                self._decode_value()
+                self._expect(':')
+
+            yield self._decode_value()
+
+            if self._expect(',' + closing_char) == closing_char:
+                return
+
+    def _read_more(self, min_num_chars: int = 1) -> bool:
+        """
+        Appends at least min_num_chars characters to the buffer, if there are that many left, and drops the part of the
+        buffer that has already been parsed.
+
+        :return: False if there was nothing left to read.
+        """
+
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+
+        num_chars_read = 0
+        while num_chars_read < min_num_chars and not self._is_exhausted:
+            try:
+                text = self._text_decoder.decode(next(self._chunks))
+            except StopIteration:
+                text = self._text_decoder.decode(b'', final=True)
+                self._is_exhausted = True
+
+            self._buffer += text
+            num_chars_read += len(text)
+
+        return num_chars_read > 0
+
+    def _peek(self) -> str:
+        """Skips whitespace and returns the next character, or an empty string if there is nothing left."""
+
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            if not self._read_more():
+                return ''
+
+    def _expect(self, chars: str) -> str:
+        """Skips whitespace and consumes the next character, which has to be one of chars."""
+
+        char = self._peek()
+        if char == '' or char not in chars:
+            self._raise_error(f'Expecting one of {chars!r}')
+
+        self._position += 1
+        return char
+
+    def _decode_value(self):
+        """
+        Decodes the JSON value at the current position.  If the buffer ends in the middle of the value, then more is
+        read, doubling the unparsed part of the buffer each time, so that a large value is only re-scanned a few times.
+        """
+
+        self._peek()
+
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read_more(len(self._buffer) - self._position):
+                    raise
+                continue
+
+            # a number at the end of the buffer might continue in the next chunk
+            if end == len(self._buffer) and not self._is_exhausted \
+                    and self._read_more(len(self._buffer) - self._position):
+                continue
+
+            self._position = end
+            return value
+
+    def _raise_error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self._buffer, self._position)
@@ -1,7 +1,50 @@
+import itertools
 import logging
+import os
+import threading
+from collections import defaultdict
 
 # ==================================================
 
+# The level of the loggers.  This can be set to DEBUG with an environment variable, when more detail is needed.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# For high-volume events, such as one for every row, only 1 of every N records from the same line is logged.
+LOG_SAMPLE_EVERY_N = int(os.environ.get('LOG_SAMPLE_EVERY_N', 100))
+
+# Pass as extra to mark a log record as a high-volume event that can be sampled.
+# For example, logger.debug('Transformed %s.', movie_id, extra=SAMPLED)
+SAMPLED = {'sampled': True}
+
+# --------------------------------------------------
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through 1 of every every_n log records that are marked as sampled (see SAMPLED), counted separately for each
+    line that logs them.  Records that are not marked are always let through.
+    """
+
+    def __init__(self, every_n: int):
+        """
+        :param every_n: Lets through 1 of every every_n marked records.  1 or less lets through every record.
+        """
+
+        super().__init__()
+        self.every_n = every_n
+
+        self._counters = defaultdict(itertools.count)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or self.every_n <= 1:
+            return True
+
+        with self._lock:
+            count = next(self._counters[(record.pathname, record.lineno)])
+
+        return count % self.every_n == 0
+
 
 def create_logger(module_name: str, filepath: str) -> logging.Logger:
     """
@@ -14,7 +57,8 @@ def create_logger(module_name: str, filepath: str) -> logging.Logger:
     """
 
     logger = logging.getLogger(module_name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
+    logger.addFilter(SamplingFilter(LOG_SAMPLE_EVERY_N))
 
     formatter = logging.Formatter(
         fmt='%(asctime)s %(levelname)s, %(filename)s - line %(lineno)d, %(funcName)s: %(message)s')
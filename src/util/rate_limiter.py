@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import deque
+
+from src.models.rate_limit_window import RateLimitWindow
+
+# ==================================================
+
+
+class RateLimiter:
+    """
+    Thread-safe sliding window rate limiter.  Allows at most max_calls calls within any window of period seconds.
+    """
+
+    def __init__(self, max_calls: int, period: float = 1.0):
+        """
+        :param max_calls: The maximum number of calls allowed within a window.
+        :param period: The length of the window, in seconds.
+        """
+
+        self.max_calls = max_calls
+        self.period = period
+        self._call_times = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a call can be made without going over the rate limit, then records the call.
+        Callers waiting at the same time are let through one at a time.
+        """
+
+        with self._lock:
+            while True:
+                now = time.monotonic()
+
+                # forget calls that are outside of the current window
+                while self._call_times and now - self._call_times[0] >= self.period:
+                    self._call_times.popleft()
+
+                if len(self._call_times) < self.max_calls:
+                    self._call_times.append(now)
+                    return
+
+                time.sleep(self.period - (now - self._call_times[0]))
+
+
+class DatabaseRateLimiter:
+    """
+    Fixed window rate limiter that is shared through the database, so that any number of processes, on any number of
+    machines, together make at most max_calls calls per period.  Windows follow the database's clock.
+    """
+
+    def __init__(self, name: str, max_calls: int, period: int = 1, poll_interval: float = 0.02):
+        """
+        :param name: The name of the rate limited resource, which is shared by all processes that use it.
+        :param max_calls: The maximum number of calls allowed within a window.
+        :param period: The length of a window, in seconds.
+        :param poll_interval: The number of seconds to wait between tries, when a window is full.
+        """
+
+        self.name = name
+        self.max_calls = max_calls
+        self.period = period
+        self.poll_interval = poll_interval
+
+    def acquire(self) -> None:
+        """Blocks until a call can be made without going over the rate limit, then records the call."""
+
+        while not RateLimitWindow.try_acquire(self.name, self.max_calls, self.period):
+            time.sleep(self.poll_interval)
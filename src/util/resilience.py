@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+import requests
+from requests.exceptions import RequestException
+
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/resilience.log')
+
+# status codes that mean that the same request might succeed if it is made again later
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# --------------------------------------------------
+
+
+def is_upstream_failure(resp: requests.Response) -> bool:
+    """Checks if a response means that the API is unhealthy or is limiting requests, instead of a client error."""
+
+    return resp.status_code in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(resp: requests.Response) -> float | None:
+    """
+    Gets the number of seconds to wait from a response's Retry-After header, which can either be a number of seconds
+    or an HTTP date.
+
+    :param resp: A response.
+    :return: Seconds to wait, or None if the header is missing or can not be read.
+    """
+
+    retry_after = resp.headers.get('Retry-After')
+    if not isinstance(retry_after, str):
+        return None
+
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_backoff(
+        make_request: Callable[[], requests.Response],
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+) -> requests.Response:
+    """
+    Makes a request, and makes it again if the response has a status code of 429 or 5xx, or if the request raises
+    a RequestException.  Waits between attempts for the time in the response's Retry-After header, or else for an
+    exponentially increasing time (with jitter).  If Retry-After asks to wait longer than max_delay, such as when a
+    daily limit is reached, then the request is not retried.
+
+    :param make_request: A function that makes the request and returns the response.
+    :param max_attempts: The max number of times to make the request.
+    :param base_delay: The number of seconds to wait after the first attempt.  This doubles after each attempt.
+    :param max_delay: The max number of seconds to wait between attempts.
+    :return: The response of the last attempt.
+    :raise RequestException: If the last attempt raises a RequestException.
+    """
+
+    for attempt in range(1, max_attempts + 1):
+        backoff_delay = min(base_delay * 2 ** (attempt - 1), max_delay)
+        backoff_delay = random.uniform(backoff_delay / 2, backoff_delay)
+
+        try:
+            resp = make_request()
+
+        except RequestException as e:
+            if attempt == max_attempts:
+                raise
+
+            delay = backoff_delay
+            logger.warning(f'Request raised {type(e)} on attempt {attempt} of {max_attempts}.  '
+                           f'Retrying in {delay:.2f} seconds.')
+
+        else:
+            if not is_upstream_failure(resp) or attempt == max_attempts:
+                return resp
+
+            retry_after = get_retry_after(resp)
+            if retry_after is not None and retry_after > max_delay:
+                logger.warning(f'Received status {resp.status_code} with Retry-After of {retry_after} seconds, '
+                               'which is too long to wait.  Not retrying.')
+                return resp
+
+            delay = backoff_delay if retry_after is None else retry_after
+            logger.warning(f'Received status {resp.status_code} on attempt {attempt} of {max_attempts}.  '
+                           f'Retrying in {delay:.2f} seconds.')
+
+            # release the connection of a streamed response that will not be read
+            resp.close()
+
+        time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Keeps track of failures when calling an external service, and stops calls to it while it is unhealthy.
+
+    The circuit starts closed, where all calls are allowed.  After failure_threshold failures in a row, the circuit
+    opens, and calls are not allowed.  After reset_timeout seconds, the circuit becomes half-open, where one trial call
+    is allowed.  If the trial call succeeds, then the circuit closes.  Otherwise, the circuit opens again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        :param name: The name of the external service, for logging.
+        :param failure_threshold: The number of failures in a row that opens the circuit.
+        :param reset_timeout: The number of seconds that the circuit stays open before allowing a trial call.
+        """
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = self.CLOSED
+        self._num_failures = 0
+        self._opened_at = None
+        self._is_trial_call_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The current state of the circuit."""
+
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def _update_state(self) -> None:
+        """Changes an open circuit to half-open, if it has been open for long enough.  Lock must be held."""
+
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._is_trial_call_in_progress = False
+
+    def allow_request(self) -> bool:
+        """
+        Checks if a call to the external service is allowed.  A caller that is allowed has to report the result with
+        record_success() or record_failure().
+
+        :return: True if the call can be made.
+        """
+
+        with self._lock:
+            self._update_state()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN and not self._is_trial_call_in_progress:
+                self._is_trial_call_in_progress = True
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        """Records a successful call, which closes the circuit."""
+
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f'Circuit for {self.name} is now closed.')
+
+            self._state = self.CLOSED
+            self._num_failures = 0
+            self._is_trial_call_in_progress = False
+
+    def record_failure(self) -> None:
+        """Records a failed call, which opens the circuit if there have been too many failures in a row."""
+
+        with self._lock:
+            self._num_failures += 1
+
+            if self._state == self.HALF_OPEN or self._num_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f'Circuit for {self.name} is now open, after {self._num_failures} failures.')
+
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._is_trial_call_in_progress = False
@@ -0,0 +1,237 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Iterator
+
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/response_archive.log')
+
+# --------------------------------------------------
+
+
+class ArchivedResponse:
+    """
+    Writes one response body into a ResponseArchive, chunk by chunk, so that a streamed response can be archived while
+    it is being read.  This is a context manager: the body is added to the archive when the context exits without an
+    exception, and is discarded otherwise.
+
+    Archiving is best effort.  If the body can not be written, such as when the disk is full, then the error is logged
+    and the body is not archived, so that the response is still used.
+
+    Example:
+        with archive.open('seeder', url, params) as archived:
+            for chunk in resp.iter_content(chunk_size=65536):
+                archived.write(chunk)
+        digest = archived.digest
+    """
+
+    def __init__(self, archive: 'ResponseArchive', source: str, url: str, params: dict):
+        """
+        :param archive: The archive to add the body to.
+        :param source: What requested the response, such as "seeder", "updater", or "app".
+        :param url: The URL that was requested.
+        :param params: The query string parameters of the request.
+        """
+
+        self.archive = archive
+        self.source = source
+        self.url = url
+        self.params = params
+        self.digest = None
+
+        self._hash = hashlib.sha256()
+        self._num_bytes = 0
+        self._temp_file = None
+        self._gzip_file = None
+
+    def __enter__(self) -> 'ArchivedResponse':
+        if self.archive.directory is None:
+            return self
+
+        try:
+            os.makedirs(self.archive.objects_directory, exist_ok=True)
+            self._temp_file = tempfile.NamedTemporaryFile(
+                dir=self.archive.objects_directory, suffix='.tmp', delete=False)
+            # without a modification time, the same body is always compressed into the same bytes
+            self._gzip_file = gzip.GzipFile(fileobj=self._temp_file, mode='wb', mtime=0)
+        except OSError as e:
+            self._abandon(e)
+
+        return self
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Adds a chunk of the response body.  Does nothing if the archive is disabled.
+
+        :param chunk: The next bytes of the body.
+        """
+
+        if self._gzip_file is None:
+            return
+
+        try:
+            self._hash.update(chunk)
+            self._num_bytes += len(chunk)
+            self._gzip_file.write(chunk)
+        except OSError as e:
+            self._abandon(e)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._gzip_file is None:
+            return
+
+        if exc_type is not None:
+            self._abandon()
+            return
+
+        try:
+            self._gzip_file.close()
+            self._temp_file.close()
+
+            digest = self._hash.hexdigest()
+            path = self.archive.get_path(digest)
+
+            # a body that is already archived is only added to the index again
+            if os.path.exists(path):
+                os.remove(self._temp_file.name)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(self._temp_file.name, path)
+
+            self.archive.add_to_index({
+                'digest': digest,
+                'source': self.source,
+                'url': self.url,
+                'params': self.params,
+                'num_bytes': self._num_bytes,
+                'archived_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+            })
+        except OSError as e:
+            self._abandon(e)
+            return
+
+        self.digest = digest
+
+    def _abandon(self, error: OSError = None) -> None:
+        """Stops archiving the body and deletes what was written of it, logging the error that caused this, if any."""
+
+        if error is not None:
+            logger.error(f'Unable to archive the response from {self.url}.  It is not archived.\n'
+                         f'Error is {type(error)}:\n'
+                         f'{str(error)}')
+
+        self._gzip_file = None
+
+        if self._temp_file is not None:
+            try:
+                self._temp_file.close()
+                os.remove(self._temp_file.name)
+            except OSError:
+                pass
+
+
+class ResponseArchive:
+    """
+    Keeps the raw bodies of responses from Streaming Availability API on local disk, so that they can be transformed
+    again later, such as after the transform or the database schema changes, without requesting them again.
+
+    Each body is gzip-compressed and stored in a file that is named by the SHA-256 hash of the body
+    (objects/ab/abcd....json.gz), so the same body is only stored once.  Every archived response is also added to an
+    index (index.jsonl), one JSON line per response, in the order that they were archived, with the hash, the request,
+    and the time.  Responses can be archived from several threads.
+    """
+
+    INDEX_FILE_NAME = 'index.jsonl'
+
+    def __init__(self, directory: str | None):
+        """
+        :param directory: The directory to keep the archive in.  None disables archiving, so that nothing is written.
+        """
+
+        self.directory = directory
+        self._index_lock = threading.Lock()
+
+    @property
+    def objects_directory(self) -> str:
+        return os.path.join(self.directory, 'objects')
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE_NAME)
+
+    def get_path(self, digest: str) -> str:
+        """Gets the location of an archived body's file, from the body's hash."""
+
+        return os.path.join(self.objects_directory, digest[:2], f'{digest}.json.gz')
+
+    def open(self, source: str, url: str, params: dict = None) -> ArchivedResponse:
+        """
+        Starts archiving a response body, which is written with the returned ArchivedResponse.
+
+        :param source: What requested the response, such as "seeder", "updater", or "app".
+        :param url: The URL that was requested.
+        :param params: The query string parameters of the request.
+        :return: An ArchivedResponse, to be used as a context manager.
+        """
+
+        return ArchivedResponse(self, source, url, params or {})
+
+    def add(self, body: bytes, source: str, url: str, params: dict = None) -> str | None:
+        """
+        Archives a whole response body.
+
+        :param body: The response body.
+        :param source: What requested the response, such as "seeder", "updater", or "app".
+        :param url: The URL that was requested.
+        :param params: The query string parameters of the request.
+        :return: The SHA-256 hash of the body, or None if the archive is disabled or the body could not be archived.
+        """
+
+        with self.open(source, url, params) as archived:
+            archived.write(body)
+
+        return archived.digest
+
+    def add_to_index(self, entry: dict) -> None:
+        """Appends an entry to the index."""
+
+        with self._index_lock:
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+        logger.debug('Archived response %s.', entry)
+
+    def iter_entries(self) -> Iterator[dict]:
+        """
+        Reads the index, in the order that responses were archived.  Nothing is yielded if the archive is empty or
+        disabled.
+
+        :return: A generator of {'digest', 'source', 'url', 'params', 'num_bytes', 'archived_at'}.
+        """
+
+        if self.directory is None or not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read(self, digest: str) -> bytes:
+        """
+        Reads an archived body.
+
+        :param digest: The SHA-256 hash of the body.
+        :return: The body, decompressed.
+        :raise FileNotFoundError: If the body is not in the archive.
+        """
+
+        with gzip.open(self.get_path(digest), 'rb') as f:
+            return f.read()
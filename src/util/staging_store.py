@@ -0,0 +1,137 @@
+import json
+import sqlite3
+from typing import Iterator
+
+from src.util.column_batch import ColumnBatch
+from src.util.logger import create_logger
+
+# ==================================================
+
+logger = create_logger(__name__, 'src/logs/staging_store.log')
+
+# --------------------------------------------------
+
+
+class StagingStore:
+    """
+    Holds deduplicated rows for several tables, as ColumnBatches, until they are written to the database.
+
+    Rows are kept in memory until there are more than memory_budget_rows of them.  Then, all rows in memory are moved
+    (spilled) into a temporary SQLite database, where each table's rows are keyed by their key columns, so that rows
+    are still deduplicated (the last one is kept).  Rows are read back in chunks with iter_batches(), so that the rows
+    never all have to be in memory at once.
+
+    The temporary database is a file in SQLite's temporary directory (which can be set with the SQLITE_TMPDIR
+    environment variable).  SQLite deletes it when it is closed, by close() or when the store is garbage collected,
+    including when a run fails.
+    """
+
+    # pages of the temporary database that SQLite keeps in memory (negative means KiB)
+    SPILL_CACHE_SIZE = -8192
+
+    def __init__(self, empty_batches: dict[str, ColumnBatch], memory_budget_rows: int):
+        """
+        :param empty_batches: {table name: empty ColumnBatch}, which sets the tables and their columns.
+        :param memory_budget_rows: The max number of rows, of all tables, to keep in memory before spilling to disk.
+        """
+
+        self.memory_budget_rows = memory_budget_rows
+        self.num_spills = 0
+
+        self._batches = empty_batches
+        self._layouts = {name: (batch.column_names, batch.key_column_names) for name, batch in empty_batches.items()}
+        self._num_rows_in_memory = 0
+        self._connection = None
+
+    @property
+    def table_names(self) -> list[str]:
+        return list(self._layouts)
+
+    def extend(self, batches: dict) -> None:
+        """
+        Adds rows from batches of the same tables, such as from transform_page().  Keys that are not table names are
+        ignored.  Spills to disk if this goes over the memory budget.
+
+        :param batches: {table name: ColumnBatch, ...}.
+        """
+
+        for name, batch in self._batches.items():
+            if name in batches:
+                num_rows_before = len(batch)
+                batch.extend(batches[name])
+                self._num_rows_in_memory += len(batch) - num_rows_before
+
+        if self._num_rows_in_memory > self.memory_budget_rows:
+            self._spill()
+
+    def iter_batches(self, name: str, chunk_size: int) -> Iterator[ColumnBatch]:
+        """
+        Reads a table's rows back, in batches of at most chunk_size rows.  Nothing is yielded if there are no rows.
+
+        :param name: The table name.
+        :param chunk_size: The max number of rows per batch.
+        :return: A generator of ColumnBatches.
+        """
+
+        column_names, key_column_names = self._layouts[name]
+
+        if self._connection is None:
+            batch = self._batches[name]
+            if len(batch) <= chunk_size:
+                if len(batch):
+                    yield batch
+                return
+
+            rows = zip(*[batch.columns[column_name] for column_name in column_names])
+        else:
+            self._spill()
+            cursor = self._connection.execute(f'SELECT row FROM "{name}" ORDER BY rowid')
+            rows = (json.loads(row) for (row,) in cursor)
+
+        chunk = ColumnBatch(column_names, key_column_names)
+        for row in rows:
+            chunk.add_row(*row)
+
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = ColumnBatch(column_names, key_column_names)
+
+        if len(chunk):
+            yield chunk
+
+    def _spill(self) -> None:
+        """Moves all rows in memory into the temporary SQLite database, replacing rows with the same keys."""
+
+        if self._connection is None:
+            # an empty file name makes a temporary database on disk, which is deleted when it is closed
+            self._connection = sqlite3.connect('')
+            self._connection.execute(f'PRAGMA cache_size = {self.SPILL_CACHE_SIZE}')
+            self._connection.execute('PRAGMA journal_mode = OFF')
+            for name in self._batches:
+                self._connection.execute(f'CREATE TABLE "{name}" (key TEXT PRIMARY KEY, row TEXT NOT NULL)')
+
+        for name, batch in self._batches.items():
+            key_indexes = [batch.column_names.index(column_name) for column_name in batch.key_column_names]
+            rows = zip(*[batch.columns[column_name] for column_name in batch.column_names])
+
+            # replacing in place keeps the rowid, so rows are read back in the order that they were first added
+            self._connection.executemany(
+                f'INSERT INTO "{name}" (key, row) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET row = excluded.row',
+                ((json.dumps([row[i] for i in key_indexes]), json.dumps(row)) for row in rows)
+            )
+
+            self._batches[name] = ColumnBatch(batch.column_names, batch.key_column_names)
+
+        self._connection.commit()
+
+        if self._num_rows_in_memory:
+            self.num_spills += 1
+            logger.info('Spilled %d staged rows to disk.', self._num_rows_in_memory)
+        self._num_rows_in_memory = 0
+
+    def close(self) -> None:
+        """Deletes the temporary database, if there is one.  The store can not be used after this."""
+
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
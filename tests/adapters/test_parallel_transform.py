@@ -0,0 +1,93 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import json
+from unittest import TestCase
+
+from src.adapters.parallel_transform import (read_shows_from_response_body,
+                                             transform_pages)
+from src.adapters.streaming_availability_adapter import (make_page_batches,
+                                                        transform_page)
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+
+class TransformPagesUnitTests(TestCase):
+    """Unit tests for transform_pages()."""
+
+    def setUp(self):
+        catalog = SyntheticCatalog(2, 30, 2, 3)
+        shows = [catalog.make_show(index) for index in range(30)]
+
+        # pages overlap, so that rows of later pages replace rows of earlier pages
+        self.pages = [shows[i:i + 10] for i in range(0, 30, 5)]
+
+    def test_transform_pages_in_worker_processes(self):
+        """
+        Transforming pages in worker processes should yield the transformed pages in the same order as the pages, and
+        merging them should give the same rows, in the same order, as transforming the pages in one process.
+        """
+
+        # Arrange
+        expected_pages = [transform_page(page) for page in self.pages]
+
+        expected_merged_batches = make_page_batches()
+        for expected_page in expected_pages:
+            for name, batch in expected_merged_batches.items():
+                batch.extend(expected_page[name])
+
+        for num_workers in (1, 3):
+            with self.subTest(num_workers=num_workers):
+
+                # Act
+                transformed_pages = list(transform_pages(iter(self.pages), num_workers))
+
+                # Assert
+                self.assertEqual(transformed_pages, expected_pages)
+
+                merged_batches = make_page_batches()
+                for transformed_page in transformed_pages:
+                    for name, batch in merged_batches.items():
+                        batch.extend(transformed_page[name])
+
+                self.assertEqual(merged_batches, expected_merged_batches)
+
+    def test_transform_response_bodies(self):
+        """Pages that are response bodies should be parsed by read_page, in the worker processes, and transformed."""
+
+        # Arrange
+        bodies = [
+            json.dumps({'shows': self.pages[0], 'hasMore': True}).encode(),
+            json.dumps({'shows': {show['id']: show for show in self.pages[1]}, 'hasMore': False}).encode(),
+            json.dumps(self.pages[2][0]).encode()
+        ]
+
+        expected_pages = [
+            transform_page(self.pages[0]), transform_page(self.pages[1]), transform_page(self.pages[2][:1])
+        ]
+
+        for num_workers in (1, 2):
+            with self.subTest(num_workers=num_workers):
+
+                # Act
+                transformed_pages = list(transform_pages(bodies, num_workers, read_shows_from_response_body))
+
+                # Assert
+                self.assertEqual(transformed_pages, expected_pages)
+
+    def test_transform_no_pages(self):
+        """Transforming no pages should not yield anything."""
+
+        for num_workers in (1, 2):
+            with self.subTest(num_workers=num_workers):
+
+                # Act/Assert
+                self.assertEqual(list(transform_pages([], num_workers)), [])
@@ -14,12 +14,18 @@ from unittest import TestCase
 from unittest.mock import call, patch
 
 from src.adapters.streaming_availability_adapter import (
-    gather_streaming_options, transform_image_set_json_into_movie_poster_list,
+    apply_field_map, gather_streaming_options, make_field_map,
+    read_show_page, transform_image_set_json_into_movie_poster_list,
+    transform_page,
     transform_show, transform_show_json_into_movie_dict,
     transform_streaming_option_json_into_dict)
 from src.app import create_app
 from src.models.common import connect_db, db
+from src.models.movie import Movie
+from src.models.streaming_option import StreamingOption
+from src.util.case_transform import CamelToSnake
 from tests.data import show_stargate
+from tests.utilities import make_mock_json_response
 
 # ==================================================
 
@@ -36,6 +42,44 @@ db.create_all()
 class StreamingAvailabilityAdapterUnitTests(TestCase):
     """Unit tests for Streaming Availability Adapter functions."""
 
+    def test_make_field_map(self):
+        """A field map should map every column's camelCase JSON key to the column, including extra fields."""
+
+        for model in (Movie, StreamingOption):
+            with self.subTest(model=model.__name__):
+
+                # Arrange
+                converter = str.upper
+
+                # Act
+                field_map = make_field_map(model, {'extraField': ('extra_column', converter)})
+
+                # Assert
+                for json_key, (column_name, column_converter) in field_map.items():
+                    if json_key == 'extraField':
+                        self.assertEqual(column_name, 'extra_column')
+                        self.assertIs(column_converter, converter)
+                    else:
+                        self.assertEqual(CamelToSnake.transform(json_key), column_name)
+                        self.assertIsNone(column_converter)
+
+                self.assertEqual(len(field_map), len(model.__table__.columns) + 1)
+
+    def test_apply_field_map(self):
+        """Applying a field map should rename and convert known keys, and leave out unknown keys."""
+
+        # Arrange
+        field_map = {'releaseYear': ('release_year', None), 'service': ('service_id', lambda s: s['id'])}
+        data = {'releaseYear': 1994, 'service': {'id': 'tubi'}, 'unknownKey': 'value'}
+
+        expected_result = {'release_year': 1994, 'service_id': 'tubi'}
+
+        # Act
+        result = apply_field_map(field_map, data)
+
+        # Assert
+        self.assertEqual(result, expected_result)
+
     def test_transform_show_json_into_movie_dict(self):
         """A show JSON should successfully be transformed into a dict that Movie can use."""
 
@@ -364,3 +408,134 @@ class StreamingAvailabilityAdapterIntegrationTestsTransformShow(TestCase):
 
         # Assert
         self.assertEqual(result, expected_result)
+
+
+class StreamingAvailabilityAdapterIntegrationTestsTransformPage(TestCase):
+    """Integration tests for transform_page()."""
+
+    def test_page_transforms_into_batches(self):
+        """
+        Tests that a page of shows is transformed into batches with the same data as transform_show(), and that
+        a show that is on the page twice is only kept once.
+        """
+
+        # Arrange
+        shows = [deepcopy(show_stargate), deepcopy(show_stargate)]
+        shows[1]['title'] = 'Stargate (updated)'
+
+        expected_show_data = transform_show(deepcopy(shows[1]))
+        for streaming_option in expected_show_data['streaming_options']:
+            streaming_option.setdefault('expires_on', None)
+
+        # Act
+        result = transform_page(shows)
+
+        # Assert
+        for k in ('movies', 'movie_posters', 'streaming_options'):
+            self.assertEqual(result[k].to_dicts(), expected_show_data[k])
+
+    def test_page_summary_is_logged_once(self):
+        """Tests that one summary is logged for a page, with counts of the rows, instead of a line for each row."""
+
+        # Arrange
+        shows = [deepcopy(show_stargate), deepcopy(show_stargate)]
+        num_streaming_options = sum(len(streaming_options)
+                                    for streaming_options in show_stargate['streamingOptions'].values())
+
+        # Act
+        with self.assertLogs('src.adapters.streaming_availability_adapter', level='INFO') as logs:
+            result = transform_page(shows)
+
+        # Assert
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].args, (
+            2,
+            len(result['movies']),
+            len(result['movie_posters']),
+            len(result['streaming_options']),
+            0,
+            2 * num_streaming_options - 2 * len(result['streaming_options'])
+        ))
+
+    def test_malformed_show_is_skipped(self):
+        """Tests that a malformed show is skipped, with a warning that names the field, and other shows are kept."""
+
+        # Arrange
+        malformed_show = deepcopy(show_stargate)
+        malformed_show['id'] = '1'
+        del malformed_show['streamingOptions']['us'][1]['service']
+
+        # Act
+        with self.assertLogs('src.adapters.streaming_availability_adapter', level='WARNING') as logs:
+            result = transform_page([malformed_show, deepcopy(show_stargate)])
+
+        # Assert
+        self.assertEqual(result['movies'].columns['id'], [show_stargate['id']])
+        self.assertIn('show 1.streamingOptions.us[1].service', logs.output[0])
+
+    def test_empty_page_transforms_into_empty_batches(self):
+        """Tests that a page without shows is transformed into empty batches."""
+
+        # Act
+        result = transform_page([])
+
+        # Assert
+        for batch in result.values():
+            self.assertEqual(len(batch), 0)
+
+
+class StreamingAvailabilityAdapterUnitTestsReadShowPage(TestCase):
+    """Unit tests for read_show_page()."""
+
+    def test_read_shows_with_and_without_streaming(self):
+        """
+        With and without streaming, and for shows in a list or in a dict, the shows and the other fields of the body
+        should be read.
+        """
+
+        # Arrange
+        shows = [deepcopy(show_stargate), {'id': '2', 'title': 'Another Movie'}]
+        bodies = (
+            {'shows': shows, 'hasMore': True, 'nextCursor': '2:Another Movie'},
+            {'changes': [{'timestamp': 1}], 'shows': {show['id']: show for show in shows}, 'hasMore': True,
+             'nextCursor': '2:Another Movie'}
+        )
+
+        for body in bodies:
+            for stream in (False, True):
+                with self.subTest(shows_type=type(body['shows']), stream=stream):
+
+                    # Arrange
+                    mock_response = make_mock_json_response(200, body)
+
+                    expected_fields = deepcopy(body)
+                    del expected_fields['shows']
+
+                    # Act
+                    result_shows, result_fields = read_show_page(mock_response, stream)
+                    result_shows = list(result_shows)
+
+                    # Assert
+                    self.assertEqual(result_shows, shows)
+                    self.assertEqual(result_fields, expected_fields)
+
+    def test_read_shows_while_passing_on_the_body(self):
+        """With and without streaming, the whole raw body should be passed to on_chunk, once the shows are read."""
+
+        # Arrange
+        body = {'shows': [deepcopy(show_stargate)], 'hasMore': False}
+
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+
+                # Arrange
+                mock_response = make_mock_json_response(200, body)
+                chunks = []
+
+                # Act
+                result_shows, result_fields = read_show_page(mock_response, stream, on_chunk=chunks.append)
+                list(result_shows)
+
+                # Assert
+                self.assertEqual(b''.join(chunks), mock_response.content)
+                self.assertEqual(result_fields, {'hasMore': False})
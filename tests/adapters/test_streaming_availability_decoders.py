@@ -0,0 +1,155 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from copy import deepcopy
+from unittest import TestCase
+
+from src.adapters.streaming_availability_adapter import (
+    MOVIE_BATCH_COLUMNS, transform_show_json_into_movie_dict)
+from src.adapters.streaming_availability_decoders import (
+    DecodedStreamingOption, decode_show, decode_streaming_option)
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
+from tests.data import show_stargate
+
+# ==================================================
+
+
+class DecodeShowUnitTests(TestCase):
+    """Unit tests for decode_show()."""
+
+    def test_decode_show(self):
+        """Decoding a valid show should keep the Movie values, vertical posters, and streaming options."""
+
+        # Arrange
+        show = deepcopy(show_stargate)
+
+        expected_movie = transform_show_json_into_movie_dict(deepcopy(show_stargate))
+        expected_movie_values = tuple(expected_movie.get(column_name) for column_name in MOVIE_BATCH_COLUMNS)
+        expected_posters = tuple(('verticalPoster', size, link)
+                                 for size, link in show_stargate['imageSet']['verticalPoster'].items())
+
+        # Act
+        result = decode_show(show)
+
+        # Assert
+        self.assertEqual(result.id, show_stargate['id'])
+        self.assertEqual(result.title, show_stargate['title'])
+        self.assertEqual(result.movie_values, expected_movie_values)
+        self.assertEqual(result.posters, expected_posters)
+
+        self.assertEqual(list(result.streaming_options), ['us'])
+        self.assertEqual(len(result.streaming_options['us']), len(show_stargate['streamingOptions']['us']))
+
+        streaming_option = result.streaming_options['us'][2]
+        self.assertEqual(
+            (streaming_option.type, streaming_option.service_id, streaming_option.link,
+             streaming_option.expires_soon, streaming_option.expires_on),
+            ('free', 'tubi', 'https://tubitv.com/movies/475643/stargate', False, 1727740799)
+        )
+
+    def test_decoded_objects_do_not_have_dicts(self):
+        """Decoded objects should use slots instead of a __dict__ per object."""
+
+        # Act
+        result = decode_show(deepcopy(show_stargate))
+
+        # Assert
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertFalse(hasattr(result.streaming_options['us'][0], '__dict__'))
+
+    def test_errors_name_the_failing_field(self):
+        """A missing field or a field with the wrong type should raise an error that names the field."""
+
+        def remove_title(show):
+            del show['title']
+
+        def set_cast_item(show):
+            show['cast'][2] = None
+
+        def set_rating_to_bool(show):
+            show['rating'] = True
+
+        def set_poster_link(show):
+            show['imageSet']['verticalPoster']['w240'] = 1
+
+        def remove_poster_type(show):
+            del show['imageSet']['verticalPoster']
+
+        def set_service_id(show):
+            show['streamingOptions']['us'][1]['service']['id'] = 5
+
+        def set_streaming_options_to_dict(show):
+            show['streamingOptions']['us'] = {}
+
+        def remove_link(show):
+            del show['streamingOptions']['us'][0]['link']
+
+        cases = (
+            (remove_title, 'show 2332.title'),
+            (set_cast_item, 'show 2332.cast[2]'),
+            (set_rating_to_bool, 'show 2332.rating'),
+            (set_poster_link, 'show 2332.imageSet.verticalPoster.w240'),
+            (remove_poster_type, 'show 2332.imageSet.verticalPoster'),
+            (set_service_id, 'show 2332.streamingOptions.us[1].service.id'),
+            (set_streaming_options_to_dict, 'show 2332.streamingOptions.us'),
+            (remove_link, 'show 2332.streamingOptions.us[0].link'),
+        )
+
+        for make_malformed, expected_field in cases:
+            with self.subTest(expected_field=expected_field):
+
+                # Arrange
+                show = deepcopy(show_stargate)
+                make_malformed(show)
+
+                # Act/Assert
+                with self.assertRaises(StreamingAvailabilityPayloadError) as context:
+                    decode_show(show)
+
+                self.assertEqual(context.exception.field, expected_field)
+                self.assertIn(f'"{expected_field}"', context.exception.message)
+
+    def test_optional_fields_can_be_missing(self):
+        """Optional fields, such as releaseYear and expiresOn, can be missing."""
+
+        # Arrange
+        show = deepcopy(show_stargate)
+        del show['releaseYear']
+        del show['directors']
+
+        # Act
+        result = decode_show(show)
+
+        # Assert
+        self.assertIsNone(result.movie_values[MOVIE_BATCH_COLUMNS.index('release_year')])
+        self.assertIsNone(result.movie_values[MOVIE_BATCH_COLUMNS.index('directors')])
+        self.assertIsNone(result.streaming_options['us'][0].expires_on)
+
+
+class DecodeStreamingOptionUnitTests(TestCase):
+    """Unit tests for decode_streaming_option()."""
+
+    def test_decode_streaming_option(self):
+        """Decoding a streaming option should keep only the fields that are saved."""
+
+        # Arrange
+        streaming_option_data = deepcopy(show_stargate['streamingOptions']['us'][1])
+
+        # Act
+        result = decode_streaming_option(streaming_option_data)
+
+        # Assert
+        self.assertIsInstance(result, DecodedStreamingOption)
+        self.assertEqual(result.service_id, 'plutotv')
+        self.assertEqual(result.link, streaming_option_data['link'])
+        self.assertEqual(result.type, 'free')
+        self.assertFalse(result.expires_soon)
+        self.assertIsNone(result.expires_on)
@@ -0,0 +1,86 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.checkpoint import Checkpoint
+from src.models.common import connect_db, db
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class CheckpointIntegrationTests(TestCase):
+    """Integration tests for Checkpoint.get_checkpoints() and Checkpoint.upsert_database()."""
+
+    def setUp(self):
+        db.session.query(Checkpoint).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_get_checkpoints_when_there_are_none(self):
+        """Tests that getting checkpoints for a job without any returns an empty dict."""
+
+        # Act
+        result = Checkpoint.get_checkpoints('seeder')
+
+        # Assert
+        self.assertEqual(result, {})
+
+    def test_insert_and_get_checkpoints(self):
+        """Tests that new checkpoints are inserted as strings and only retrieved for their own job."""
+
+        # Arrange
+        seeder_checkpoints = {'ca': 'end', 'us': '123:A Movie'}
+        updater_checkpoints = {'us': 1700000000}
+
+        # Act
+        Checkpoint.upsert_database('seeder', seeder_checkpoints)
+        Checkpoint.upsert_database('updater', updater_checkpoints)
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(Checkpoint.get_checkpoints('seeder'), seeder_checkpoints)
+        self.assertEqual(Checkpoint.get_checkpoints('updater'), {'us': '1700000000'})
+
+    def test_update_existing_checkpoints(self):
+        """Tests that upserting checkpoints overwrites existing ones and keeps those that were not passed in."""
+
+        # Arrange
+        Checkpoint.upsert_database('seeder', {'ca': '1:A', 'us': '2:B'})
+        db.session.commit()
+
+        # Act
+        Checkpoint.upsert_database('seeder', {'us': 'end'})
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(Checkpoint.get_checkpoints('seeder'), {'ca': '1:A', 'us': 'end'})
+
+    def test_upsert_is_not_saved_without_commit(self):
+        """Tests that checkpoints are part of the session's transaction and are discarded on rollback."""
+
+        # Act
+        Checkpoint.upsert_database('seeder', {'us': 'end'})
+        db.session.rollback()
+
+        # Assert
+        self.assertEqual(Checkpoint.get_checkpoints('seeder'), {})
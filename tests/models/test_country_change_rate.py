@@ -0,0 +1,64 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.country_change_rate import CountryChangeRate
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class CountryChangeRateIntegrationTests(TestCase):
+    """Integration tests for CountryChangeRate.get_change_rates() and CountryChangeRate.upsert_database()."""
+
+    def setUp(self):
+        db.session.query(CountryChangeRate).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_upsert_and_get_change_rates(self):
+        """Tests that change rates are inserted and overwritten, and only retrieved for their own job."""
+
+        # Arrange
+        first_time = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        second_time = datetime(2024, 5, 2, tzinfo=timezone.utc)
+
+        CountryChangeRate.upsert_database('updater', {
+            'ca': {'changes_per_day': 1.5, 'next_poll_at': first_time},
+            'us': {'changes_per_day': 40, 'next_poll_at': first_time}
+        })
+        CountryChangeRate.upsert_database('updater:tubi', {'us': {'changes_per_day': 3, 'next_poll_at': first_time}})
+        db.session.commit()
+
+        # Act
+        CountryChangeRate.upsert_database('updater', {'us': {'changes_per_day': 30, 'next_poll_at': second_time}})
+        CountryChangeRate.upsert_database('updater', {})
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(CountryChangeRate.get_change_rates('updater'), {
+            'ca': {'changes_per_day': 1.5, 'next_poll_at': first_time},
+            'us': {'changes_per_day': 30, 'next_poll_at': second_time}
+        })
+        self.assertEqual(CountryChangeRate.get_change_rates('other job'), {})
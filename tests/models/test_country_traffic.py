@@ -0,0 +1,71 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from datetime import date, timedelta
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.country_traffic import CountryTraffic
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class CountryTrafficIntegrationTests(TestCase):
+    """Integration tests for CountryTraffic."""
+
+    def setUp(self):
+        db.session.query(CountryTraffic).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+        db.session.query(CountryTraffic).delete()
+        db.session.commit()
+
+    def test_add_counts_and_get_recent_counts(self):
+        """Tests that counts of the same day are added together, and that only recent days are counted."""
+
+        # Arrange
+        today = db.session.scalar(db.select(db.func.current_date()))
+        db.session.add(CountryTraffic(country_code='ca', day=today - timedelta(days=2), num_requests=5))
+        db.session.add(CountryTraffic(country_code='us', day=today - timedelta(days=10), num_requests=100))
+        db.session.commit()
+
+        # Act
+        CountryTraffic.add_counts({'ca': 1, 'us': 2})
+        CountryTraffic.add_counts({'us': 3})
+        CountryTraffic.add_counts({})
+
+        # Assert
+        self.assertEqual(CountryTraffic.get_recent_counts(7), {'ca': 6, 'us': 5})
+        self.assertEqual(CountryTraffic.get_recent_counts(30), {'ca': 6, 'us': 105})
+
+    def test_old_counts_are_deleted(self):
+        """Tests that adding counts deletes counts that are older than NUM_DAYS_KEPT days."""
+
+        # Arrange
+        db.session.add(CountryTraffic(country_code='ca', day=date(2000, 1, 1), num_requests=5))
+        db.session.commit()
+
+        # Act
+        CountryTraffic.add_counts({'us': 1})
+
+        # Assert
+        self.assertEqual([traffic.country_code for traffic in db.session.query(CountryTraffic).all()], ['us'])
@@ -0,0 +1,98 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.job_run import JobRun
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class JobRunIntegrationTests(TestCase):
+    """Integration tests for JobRun."""
+
+    def setUp(self):
+        db.session.query(JobRun).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_start_and_finish(self):
+        """Tests that a run is saved when it starts, and its results are saved when it finishes."""
+
+        # Act
+        run_id = JobRun.start('updater')
+        running_status = db.session.get(JobRun, run_id).status
+        db.session.rollback()
+
+        JobRun.finish(run_id, JobRun.Statuses.SUCCEEDED, num_requests=3, num_rows=40)
+
+        # Assert
+        self.assertEqual(running_status, JobRun.Statuses.RUNNING)
+
+        run = db.session.get(JobRun, run_id)
+        self.assertEqual((run.job, run.status, run.num_requests, run.num_rows, run.error),
+                         ('updater', JobRun.Statuses.SUCCEEDED, 3, 40, None))
+        self.assertGreaterEqual(run.duration_seconds, 0)
+
+    def test_get_last_start_time(self):
+        """Tests that the last start time of a job ignores skipped runs and runs of other jobs."""
+
+        # Arrange
+        first_run_id = JobRun.start('updater')
+        JobRun.start('updater', JobRun.Statuses.SKIPPED)
+        JobRun.start('seeder')
+
+        # Act
+        result = JobRun.get_last_start_time('updater')
+        no_result = JobRun.get_last_start_time('other job')
+
+        # Assert
+        self.assertEqual(result, db.session.get(JobRun, first_run_id).started_at)
+        self.assertIsNone(no_result)
+
+    def test_get_num_requests_since_and_get_average_rows_per_request(self):
+        """
+        Tests that requests are summed over all jobs or one job, and rows per request are averaged over successful runs.
+        """
+
+        # Arrange
+        for job, status, num_requests, num_rows in [
+            ('updater', JobRun.Statuses.SUCCEEDED, 4, 50),
+            ('updater', JobRun.Statuses.SUCCEEDED, 6, 30),
+            ('updater', JobRun.Statuses.FAILED, 5, 0),
+            ('seeder', JobRun.Statuses.SUCCEEDED, 3, 90)
+        ]:
+            JobRun.finish(JobRun.start(job), status, num_requests=num_requests, num_rows=num_rows)
+
+        # Act
+        num_requests = JobRun.get_num_requests_since(datetime.now(timezone.utc) - timedelta(days=1))
+        no_num_requests = JobRun.get_num_requests_since(datetime.now(timezone.utc) + timedelta(days=1))
+        num_seeder_requests = JobRun.get_num_requests_since(datetime.now(timezone.utc) - timedelta(days=1), 'seeder')
+        average_rows_per_request = JobRun.get_average_rows_per_request('updater')
+        no_average_rows_per_request = JobRun.get_average_rows_per_request('other job')
+
+        # Assert
+        self.assertEqual((num_requests, no_num_requests, num_seeder_requests), (18, 0, 3))
+        self.assertEqual(average_rows_per_request, 8)
+        self.assertIsNone(no_average_rows_per_request)
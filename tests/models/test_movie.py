@@ -11,9 +11,12 @@ sys.path.append(root_dir)  # nopep8
 from copy import deepcopy
 from unittest import TestCase
 
+from sqlalchemy import text
+
 from src.app import create_app
 from src.models.common import connect_db, db
 from src.models.movie import Movie
+from src.util.column_batch import ColumnBatch
 from tests.utilities import movie_generator
 
 # ==================================================
@@ -135,3 +138,95 @@ class MovieIntegrationTestsUpsertDatabase(TestCase):
         self.assertEqual(len(movies), len(initial_movies))
 
         self.assertEqual(movies, initial_movies)
+
+
+class MovieIntegrationTestsUpsertBatch(TestCase):
+    """Integration tests for Movie.upsert_batch()."""
+
+    def setUp(self):
+        db.session.query(Movie).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_insert_and_update_movies(self):
+        """Upserting a batch should insert new movies and update existing ones, including array columns."""
+
+        # Arrange
+        column_names = tuple(Movie.__table__.columns.keys())
+
+        initial_movie, new_movie = movie_generator(2)
+        db.session.add(initial_movie)
+        db.session.commit()
+
+        batch = ColumnBatch(column_names, ('id',))
+        for movie in (initial_movie, new_movie):
+            batch.add_row(*[getattr(movie, column_name) for column_name in column_names])
+
+        batch.columns['title'][0] = 'Updated Title'
+        batch.columns['cast'][0] = ['Actor "One"', 'Actor, Two', 'Actor \\ Three']
+        batch.columns['directors'][1] = None
+
+        # Act
+        Movie.upsert_batch(batch)
+        db.session.commit()
+
+        # Assert
+        movies = {movie.id: movie for movie in db.session.query(Movie).all()}
+
+        self.assertEqual(len(movies), 2)
+        for i, movie_id in enumerate(batch.columns['id']):
+            for column_name in column_names:
+                self.assertEqual(getattr(movies[movie_id], column_name), batch.columns[column_name][i],
+                                 msg=f'Assertion failed for movie "{movie_id}" -> attribute "{column_name}".')
+
+    def test_upsert_skips_unchanged_movies(self):
+        """
+        Upserting a batch should only write movies that are new or have changed, and should count the inserted,
+        updated, and unchanged movies.
+        """
+
+        # Arrange
+        column_names = tuple(Movie.__table__.columns.keys())
+
+        unchanged_movie, changed_movie, new_movie = movie_generator(3)
+        db.session.add_all((unchanged_movie, changed_movie))
+        db.session.commit()
+
+        batch = ColumnBatch(column_names, ('id',))
+        for movie in (unchanged_movie, changed_movie, new_movie):
+            batch.add_row(*[getattr(movie, column_name) for column_name in column_names])
+        batch.columns['directors'][1] = None
+
+        # the transaction that last wrote each row
+        select_row_versions = text('SELECT id, xmin::text FROM movies ORDER BY id')
+        initial_row_versions = dict(db.session.execute(select_row_versions).all())
+        db.session.commit()
+
+        # Act
+        result = Movie.upsert_batch(batch)
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(result, {'num_inserted': 1, 'num_updated': 1, 'num_unchanged': 1})
+
+        row_versions = dict(db.session.execute(select_row_versions).all())
+        self.assertEqual(row_versions[unchanged_movie.id], initial_row_versions[unchanged_movie.id])
+        self.assertNotEqual(row_versions[changed_movie.id], initial_row_versions[changed_movie.id])
+        self.assertIsNone(db.session.get(Movie, changed_movie.id).directors)
+
+    def test_upsert_empty_batch(self):
+        """When upserting an empty batch, the database should remain unchanged."""
+
+        # Arrange
+        initial_movies = movie_generator(2)
+        db.session.add_all(initial_movies)
+        db.session.commit()
+
+        # Act
+        Movie.upsert_batch(ColumnBatch(tuple(Movie.__table__.columns.keys()), ('id',)))
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(db.session.query(Movie).count(), len(initial_movies))
@@ -0,0 +1,88 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.movie import Movie
+from src.models.movie_content_hash import MovieContentHash
+from tests.utilities import movie_generator
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class MovieContentHashIntegrationTests(TestCase):
+    """Integration tests for MovieContentHash."""
+
+    def setUp(self):
+        db.session.query(MovieContentHash).delete()
+        db.session.query(Movie).delete()
+        db.session.add_all(movie_generator(2))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_upsert_and_get_content_hashes(self):
+        """Tests that hashes are inserted and overwritten, and only retrieved for the requested movies and countries."""
+
+        # Arrange
+        MovieContentHash.upsert_database({('0', 'us'): 'a', ('0', 'ca'): 'b', ('1', 'us'): 'c'})
+        db.session.commit()
+
+        # Act
+        MovieContentHash.upsert_database({('0', 'us'): 'd'})
+        MovieContentHash.upsert_database({})
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(MovieContentHash.get_content_hashes([('0', 'us'), ('1', 'us'), ('1', 'ca')]),
+                         {('0', 'us'): 'd', ('1', 'us'): 'c'})
+        self.assertEqual(MovieContentHash.get_content_hashes([]), {})
+
+    def test_delete_movies_in_countries(self):
+        """Tests that only the hashes of the given movies and countries are deleted."""
+
+        # Arrange
+        MovieContentHash.upsert_database({('0', 'us'): 'a', ('0', 'ca'): 'b', ('1', 'us'): 'c'})
+        db.session.commit()
+
+        # Act
+        MovieContentHash.delete_movies_in_countries([('0', 'us'), ('1', 'ca')])
+        MovieContentHash.delete_movies_in_countries([])
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(MovieContentHash.get_content_hashes([('0', 'us'), ('0', 'ca'), ('1', 'us')]),
+                         {('0', 'ca'): 'b', ('1', 'us'): 'c'})
+
+    def test_deleting_movie_deletes_content_hashes(self):
+        """Tests that a movie's hashes are deleted along with the movie."""
+
+        # Arrange
+        MovieContentHash.upsert_database({('0', 'us'): 'a', ('1', 'us'): 'c'})
+        db.session.commit()
+
+        # Act
+        db.session.query(Movie).filter_by(id='0').delete()
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(MovieContentHash.get_content_hashes([('0', 'us'), ('1', 'us')]), {('1', 'us'): 'c'})
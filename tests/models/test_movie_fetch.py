@@ -0,0 +1,116 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.movie import Movie
+from src.models.movie_fetch import MovieFetch
+from tests.utilities import movie_generator
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class MovieFetchIntegrationTests(TestCase):
+    """Integration tests for MovieFetch."""
+
+    def setUp(self):
+        db.session.query(MovieFetch).delete()
+        db.session.query(Movie).delete()
+        db.session.add_all(movie_generator(3))
+        db.session.commit()
+
+        self.first_time = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.second_time = datetime(2024, 5, 10, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def get_fetches(self) -> dict:
+        """Gets all movie fetches, as {(movie_id, country_code): (last_fetched_at, num_views)}."""
+
+        return {
+            (movie_fetch.movie_id, movie_fetch.country_code): (movie_fetch.last_fetched_at, movie_fetch.num_views)
+            for movie_fetch in db.session.query(MovieFetch).all()
+        }
+
+    def test_record_fetch_and_add_views(self):
+        """
+        Tests that views are only added to movies and countries with rows, and that a fetch updates all of the movie's
+        rows, adds rows for new countries, and starts the views over.
+        """
+
+        # Arrange
+        MovieFetch.record_fetch('0', ['us', 'ca'], self.first_time)
+        MovieFetch.record_fetch('1', [], self.first_time)
+        db.session.commit()
+
+        # Act
+        MovieFetch.add_views({('0', 'us'): 3, ('0', 'ca'): 1, ('0', 'gb'): 5, ('2', 'us'): 2})
+        MovieFetch.add_views({('0', 'us'): 2})
+        MovieFetch.add_views({})
+
+        # Assert
+        self.assertEqual(self.get_fetches(), {
+            ('0', 'ca'): (self.first_time, 1),
+            ('0', 'us'): (self.first_time, 5)
+        })
+
+        # Act
+        MovieFetch.record_fetch('0', ['gb', 'us'], self.second_time)
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(self.get_fetches(), {
+            ('0', 'ca'): (self.second_time, 0),
+            ('0', 'gb'): (self.second_time, 0),
+            ('0', 'us'): (self.second_time, 0)
+        })
+
+    def test_get_stale_movie_ids(self):
+        """
+        Tests that only movies fetched before a time, with enough views, are returned, with the most viewed first, and
+        then the least recently fetched.
+        """
+
+        # Arrange
+        MovieFetch.record_fetch('0', ['us', 'ca'], self.first_time)
+        MovieFetch.record_fetch('1', ['us'], self.second_time)
+        MovieFetch.record_fetch('2', ['us'], self.first_time)
+        db.session.commit()
+        MovieFetch.add_views({('0', 'us'): 1, ('0', 'ca'): 1, ('1', 'us'): 2, ('2', 'us'): 5})
+
+        cases = [
+            (datetime(2024, 6, 1, tzinfo=timezone.utc), 1, 10, ['2', '0', '1']),
+            (datetime(2024, 6, 1, tzinfo=timezone.utc), 1, 2, ['2', '0']),
+            (datetime(2024, 5, 5, tzinfo=timezone.utc), 1, 10, ['2', '0']),
+            (datetime(2024, 6, 1, tzinfo=timezone.utc), 3, 10, ['2']),
+            (datetime(2024, 6, 1, tzinfo=timezone.utc), 1, 0, [])
+        ]
+
+        for fetched_before, min_views, limit, expected_result in cases:
+            with self.subTest(fetched_before=fetched_before, min_views=min_views, limit=limit):
+
+                # Act
+                result = MovieFetch.get_stale_movie_ids(fetched_before, min_views, limit)
+
+                # Assert
+                self.assertEqual(result, expected_result)
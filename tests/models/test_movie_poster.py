@@ -13,6 +13,7 @@ from copy import deepcopy
 from unittest import TestCase
 from unittest.mock import call, patch
 
+from src.adapters.streaming_availability_adapter import make_page_batches
 from src.app import create_app
 from src.exceptions.UnrecognizedValueError import UnrecognizedValueError
 from src.models.common import connect_db, db
@@ -364,3 +365,69 @@ class MoviePosterIntegrationTestsUpsertDatabase(TestCase):
         self.assertEqual(len(movie_posters), len(initial_movie_posters))
 
         self.assertEqual(movie_posters, initial_movie_posters)
+
+
+class MoviePosterIntegrationTestsUpsertBatch(TestCase):
+    """Integration tests for MoviePoster.upsert_batch()."""
+
+    @classmethod
+    def setUpClass(cls):
+        db.session.query(Movie).delete()
+
+        cls.movies = movie_generator(2)
+        db.session.add_all(cls.movies)
+
+        db.session.commit()
+
+    def setUp(self):
+        db.session.query(MoviePoster).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_insert_and_update_movie_posters(self):
+        """Upserting a batch should insert new movie posters and update the links of existing ones."""
+
+        # Arrange
+        db.session.add(MoviePoster(movie_id=self.movies[0].id, type='verticalPoster', size='w240', link='old link'))
+        db.session.commit()
+
+        batch = make_page_batches()['movie_posters']
+        batch.add_row(self.movies[0].id, 'verticalPoster', 'w240', 'new link')
+        batch.add_row(self.movies[1].id, 'verticalPoster', 'w360', 'link2')
+
+        # Act
+        MoviePoster.upsert_batch(batch)
+        db.session.commit()
+
+        # Assert
+        movie_posters = db.session.query(MoviePoster).order_by(MoviePoster.movie_id).all()
+
+        self.assertEqual(
+            [{column_name: getattr(movie_poster, column_name) for column_name in batch.column_names}
+             for movie_poster in movie_posters],
+            batch.to_dicts()
+        )
+
+    def test_upsert_counts_movie_posters(self):
+        """Upserting a batch should count the inserted, updated, and unchanged movie posters."""
+
+        # Arrange
+        db.session.add_all([
+            MoviePoster(movie_id=self.movies[0].id, type='verticalPoster', size='w240', link='link1'),
+            MoviePoster(movie_id=self.movies[0].id, type='verticalPoster', size='w360', link='old link')
+        ])
+        db.session.commit()
+
+        batch = make_page_batches()['movie_posters']
+        batch.add_row(self.movies[0].id, 'verticalPoster', 'w240', 'link1')
+        batch.add_row(self.movies[0].id, 'verticalPoster', 'w360', 'new link')
+        batch.add_row(self.movies[1].id, 'verticalPoster', 'w360', 'link2')
+
+        # Act
+        result = MoviePoster.upsert_batch(batch)
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(result, {'num_inserted': 1, 'num_updated': 1, 'num_unchanged': 1})
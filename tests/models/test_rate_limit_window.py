@@ -0,0 +1,70 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.rate_limit_window import RateLimitWindow
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class RateLimitWindowIntegrationTests(TestCase):
+    """Integration tests for RateLimitWindow.try_acquire()."""
+
+    def setUp(self):
+        db.session.query(RateLimitWindow).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_acquire_within_window(self):
+        """
+        Tests that calls are recorded until the window is full, and that each name has its own windows.  A long
+        period is used, so that the calls are all in the same window.
+        """
+
+        # Act
+        results = [RateLimitWindow.try_acquire('api', 3, period=3600) for _ in range(5)]
+        other_result = RateLimitWindow.try_acquire('other api', 3, period=3600)
+
+        # Assert
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertTrue(other_result)
+
+        windows = db.session.query(RateLimitWindow).filter_by(name='api').all()
+        self.assertEqual([window.num_calls for window in windows], [3])
+
+    def test_old_windows_are_deleted(self):
+        """Tests that the first call of a window deletes windows that are too old."""
+
+        # Arrange
+        db.session.add(RateLimitWindow(name='api', window_start=1, num_calls=10))
+        db.session.add(RateLimitWindow(name='other api', window_start=1, num_calls=10))
+        db.session.commit()
+
+        # Act
+        result = RateLimitWindow.try_acquire('api', 3)
+
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(db.session.query(RateLimitWindow).filter_by(name='api').count(), 1)
+        self.assertEqual(db.session.query(RateLimitWindow).filter_by(name='other api').count(), 1)
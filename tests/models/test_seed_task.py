@@ -0,0 +1,152 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from sqlalchemy import func, update
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.models.seed_task import SeedTask
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class SeedTaskIntegrationTests(TestCase):
+    """Integration tests for SeedTask."""
+
+    def setUp(self):
+        db.session.query(SeedTask).delete()
+        db.session.commit()
+
+        SeedTask.enqueue({'ca': ['netflix'], 'gb': ['bbc'], 'us': ['tubi', 'pluto']}, {'gb': 'end', 'us': '5:Movie'})
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_enqueue_keeps_existing_tasks(self):
+        """Tests that enqueuing again only updates service IDs and adds new countries."""
+
+        # Arrange
+        SeedTask.complete_page('us', 'nobody', 'end')
+        db.session.execute(update(SeedTask).where(SeedTask.country_code == 'ca').values(cursor='9:Movie'))
+        db.session.commit()
+
+        # Act
+        SeedTask.enqueue({'ca': ['netflix', 'tubi'], 'fr': ['arte']}, {'ca': None})
+        db.session.commit()
+
+        # Assert
+        tasks = {task.country_code: task for task in db.session.query(SeedTask).all()}
+        self.assertEqual(set(tasks), {'ca', 'fr', 'gb', 'us'})
+        self.assertEqual((tasks['ca'].service_ids, tasks['ca'].cursor), (['netflix', 'tubi'], '9:Movie'))
+        self.assertEqual((tasks['fr'].cursor, tasks['fr'].is_done), (None, False))
+        self.assertTrue(tasks['gb'].is_done)
+
+    def test_claim_tasks(self):
+        """Tests that each task that is not done is only claimed once, and then there are none left to claim."""
+
+        # Act
+        first_task = SeedTask.claim('worker 1', 60)
+        second_task = SeedTask.claim('worker 2', 60)
+        third_task = SeedTask.claim('worker 1', 60)
+
+        # Assert
+        self.assertEqual(first_task, {'country_code': 'ca', 'service_ids': ['netflix'], 'cursor': None})
+        self.assertEqual(second_task, {'country_code': 'us', 'service_ids': ['tubi', 'pluto'], 'cursor': '5:Movie'})
+        self.assertIsNone(third_task)
+
+    def test_claim_skips_locked_and_excluded_tasks(self):
+        """Tests that a task that is locked by another transaction, or that is excluded, is skipped."""
+
+        # Arrange
+        db.session.query(SeedTask).filter_by(country_code='ca').with_for_update().one()
+
+        # Act
+        task = SeedTask.claim('worker 1', 60)
+        excluded_task = SeedTask.claim('worker 2', 60, ['us'])
+
+        # Assert
+        self.assertEqual(task['country_code'], 'us')
+        self.assertIsNone(excluded_task)
+
+    def test_claim_task_with_expired_lease(self):
+        """Tests that a task whose lease expired, such as when its worker crashed, can be claimed by another worker."""
+
+        # Arrange
+        SeedTask.claim('crashed worker', 60)
+        db.session.execute(update(SeedTask).where(SeedTask.country_code == 'ca')
+                           .values(lease_expires_at=func.now() - func.make_interval(0, 0, 0, 0, 0, 0, 1)))
+        db.session.commit()
+
+        # Act
+        task = SeedTask.claim('worker 2', 60)
+
+        # Assert
+        self.assertEqual(task['country_code'], 'ca')
+        self.assertEqual(db.session.get(SeedTask, 'ca').claimed_by, 'worker 2')
+
+    def test_complete_page(self):
+        """Tests that completing a page moves the task to its next cursor and releases it."""
+
+        # Arrange
+        SeedTask.claim('worker 1', 60)
+
+        # Act
+        is_claimed_by_other_worker = SeedTask.complete_page('ca', 'worker 2', '1:Movie')
+        is_claimed = SeedTask.complete_page('ca', 'worker 1', '1:Movie')
+        db.session.commit()
+
+        # Assert
+        self.assertFalse(is_claimed_by_other_worker)
+        self.assertTrue(is_claimed)
+
+        task = db.session.get(SeedTask, 'ca')
+        self.assertEqual((task.cursor, task.is_done, task.claimed_by, task.lease_expires_at),
+                         ('1:Movie', False, None, None))
+        self.assertEqual(SeedTask.claim('worker 2', 60)['cursor'], '1:Movie')
+
+    def test_complete_last_page(self):
+        """Tests that completing the last page marks the task as done, so it can not be claimed again."""
+
+        # Arrange
+        SeedTask.claim('worker 1', 60)
+        SeedTask.claim('worker 1', 60)
+
+        # Act
+        SeedTask.complete_page('ca', 'worker 1', 'end')
+        SeedTask.complete_page('us', 'worker 1', 'end')
+        db.session.commit()
+
+        # Assert
+        self.assertTrue(db.session.get(SeedTask, 'ca').is_done)
+        self.assertIsNone(SeedTask.claim('worker 2', 60))
+
+    def test_release(self):
+        """Tests that a released task can be claimed right away, with the same cursor."""
+
+        # Arrange
+        SeedTask.claim('worker 1', 60)
+
+        # Act
+        SeedTask.release('ca', 'worker 1')
+
+        # Assert
+        self.assertEqual(SeedTask.claim('worker 2', 60)['country_code'], 'ca')
@@ -11,6 +11,7 @@ sys.path.append(root_dir)  # nopep8
 from copy import deepcopy
 from unittest import TestCase
 
+from src.adapters.streaming_availability_adapter import make_page_batches
 from src.app import create_app
 from src.models.common import connect_db, db
 from src.models.movie import Movie
@@ -269,3 +270,119 @@ class StreamingOptionIntegrationTestsInsertDatabase(TestCase):
         self.assertEqual(len(streaming_options), len(initial_streaming_options))
 
         self.assertEqual(streaming_options, initial_streaming_options)
+
+
+class StreamingOptionIntegrationTestsInsertBatch(TestCase):
+    """Tests for StreamingOption.insert_batch()."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.country_code = 'us'
+
+        db.session.query(Service).delete()
+        db.session.query(Movie).delete()
+        db.session.commit()
+
+        service = service_generator(1)[0]
+        cls.service_id = service.id
+        movie = movie_generator(1)[0]
+        cls.movie_id = movie.id
+
+        db.session.add_all((service, movie))
+        db.session.commit()
+
+    def setUp(self):
+        db.session.query(StreamingOption).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_insert_new_streaming_options(self):
+        """Inserting a batch of new streaming options should store them in the database."""
+
+        # Arrange
+        batch = make_page_batches()['streaming_options']
+        batch.add_row(self.movie_id, self.country_code, self.service_id, 'link1', False, None)
+        batch.add_row(self.movie_id, self.country_code, self.service_id, 'link2', True, 1900000000)
+
+        # Act
+        StreamingOption.insert_batch(batch)
+        db.session.commit()
+
+        # Assert
+        streaming_options = db.session.query(StreamingOption).order_by(StreamingOption.link).all()
+
+        self.assertEqual(
+            [{column_name: getattr(streaming_option, column_name) for column_name in batch.column_names}
+             for streaming_option in streaming_options],
+            batch.to_dicts()
+        )
+
+
+class StreamingOptionIntegrationTestsDeleteMoviesInCountries(TestCase):
+    """Tests for StreamingOption.delete_movies_in_countries() and StreamingOption.delete_expired()."""
+
+    @classmethod
+    def setUpClass(cls):
+        db.session.query(Service).delete()
+        db.session.query(Movie).delete()
+        db.session.commit()
+
+        service = service_generator(1)[0]
+        cls.service_id = service.id
+        movies = movie_generator(2)
+        cls.movie_ids = [movie.id for movie in movies]
+
+        db.session.add_all((service, *movies))
+        db.session.commit()
+
+    def setUp(self):
+        db.session.query(StreamingOption).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_delete_streaming_options_of_movies_in_countries(self):
+        """Only the streaming options of the given movies, in the given countries, should be deleted."""
+
+        # Arrange
+        for movie_id in self.movie_ids:
+            for country_code in ('ca', 'us'):
+                db.session.add_all(streaming_option_generator(2, movie_id, country_code, self.service_id))
+        db.session.commit()
+
+        # Act
+        StreamingOption.delete_movies_in_countries([(self.movie_ids[0], 'us'), (self.movie_ids[1], 'ca')])
+        db.session.commit()
+
+        # Assert
+        remaining = db.session.query(StreamingOption.movie_id, StreamingOption.country_code).distinct().all()
+        self.assertEqual(set(remaining), {(self.movie_ids[0], 'ca'), (self.movie_ids[1], 'us')})
+        self.assertEqual(db.session.query(StreamingOption).count(), 4)
+
+    def test_delete_nothing(self):
+        """Deleting with no movies should not do anything."""
+
+        # Act/Assert
+        StreamingOption.delete_movies_in_countries([])
+
+    def test_delete_expired(self):
+        """Only the streaming options that expired before the given time should be deleted."""
+
+        # Arrange
+        streaming_options = streaming_option_generator(3, self.movie_ids[0], 'us', self.service_id)
+        streaming_options[0].expires_on = 1000
+        streaming_options[1].expires_on = 3000
+        db.session.add_all(streaming_options)
+        db.session.commit()
+
+        # Act
+        result = StreamingOption.delete_expired(2000)
+        db.session.commit()
+
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual({expires_on for (expires_on,) in db.session.query(StreamingOption.expires_on).all()},
+                         {3000, None})
@@ -0,0 +1,211 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import ANY, call, patch
+
+from src.app import create_app
+from src.models.common import connect_db, db
+from src.seed.movie_refresher import get_refresh_budget, refresh_stale_movies
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+from src.util.api_key_pool import ApiKeyPool
+from src.util.response_archive import ResponseArchive
+from tests.utilities import make_mock_json_response
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+TEST_API_KEY = 'test api key'
+
+STREAMING_AVAILABILITY_SHOWS_URL = 'https://streaming-availability.p.rapidapi.com/shows'
+
+# --------------------------------------------------
+
+
+@patch('src.seed.movie_refresher.get_num_requests_used_today', autospec=True)
+@patch('src.seed.movie_refresher.get_daily_limit', autospec=True)
+@patch('src.seed.movie_refresher.get_refresh_limit', autospec=True)
+@patch('src.seed.movie_refresher.JobRun', autospec=True)
+class GetRefreshBudgetUnitTests(TestCase):
+    """Unit tests for get_refresh_budget()."""
+
+    def test_get_refresh_budget(
+            self, mock_JobRun, mock_get_refresh_limit, mock_get_daily_limit, mock_get_num_requests_used_today
+    ):
+        """
+        Tests that the budget is what is left of the refresher's share after its own requests today, and no more than
+        what is left of the daily limit.
+        """
+
+        # Arrange
+        mock_get_refresh_limit.return_value = 5
+        mock_get_daily_limit.return_value = 100
+
+        cases = [(2, 50, 3), (2, 99, 1), (7, 50, 0)]
+
+        for num_requests_used_by_refresher, num_requests_used, expected_result in cases:
+            with self.subTest(num_requests_used_by_refresher=num_requests_used_by_refresher,
+                              num_requests_used=num_requests_used):
+
+                # Arrange mocks
+                mock_JobRun.get_num_requests_since.return_value = num_requests_used_by_refresher
+                mock_get_num_requests_used_today.return_value = num_requests_used
+
+                # Act
+                result = get_refresh_budget()
+
+                # Assert
+                self.assertEqual(result, expected_result)
+                mock_JobRun.get_num_requests_since.assert_called_with(ANY, 'refresher')
+
+
+@patch('src.seed.movie_refresher.db', autospec=True)
+@patch('src.seed.movie_refresher.MovieContentHash', autospec=True)
+@patch('src.seed.movie_refresher.StreamingOption', autospec=True)
+@patch('src.seed.movie_refresher.MoviePoster', autospec=True)
+@patch('src.seed.movie_refresher.Movie', autospec=True)
+@patch('src.seed.movie_refresher.MovieFetch', autospec=True)
+@patch('src.seed.movie_refresher.get_refresh_budget', autospec=True)
+@patch('src.seed.movie_refresher.requests', autospec=True)
+@patch('src.seed.movie_refresher.response_archive', new=ResponseArchive(None))
+class RefreshStaleMoviesUnitTests(TestCase):
+    """Unit tests for refresh_stale_movies()."""
+
+    def setUp(self):
+        catalog = SyntheticCatalog(2, 2, 2, 3)
+        self.show = catalog.make_show(0, ['ca', 'us'])
+
+    def test_refresh_stale_movies(
+            self,
+            mock_requests,
+            mock_get_refresh_budget,
+            mock_MovieFetch,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_MovieContentHash,
+            mock_db
+    ):
+        """
+        Tests that stale movies are requested within the budget, that a refreshed movie replaces its data in every
+        country, that a movie that is gone has its streaming options deleted, and that a failed movie is not recorded.
+        """
+
+        # Arrange mocks
+        mock_get_refresh_budget.return_value = 5
+        mock_MovieFetch.get_stale_movie_ids.return_value = [self.show['id'], 'gone', 'failed']
+        mock_requests.get.side_effect = [
+            make_mock_json_response(200, self.show),
+            make_mock_json_response(404, {'message': 'Not found.'}),
+            make_mock_json_response(400, {'message': 'Bad request.'})
+        ]
+
+        # Act
+        with patch('src.seed.movie_refresher.api_key_pool', new=ApiKeyPool([TEST_API_KEY])):
+            result = refresh_stale_movies(max_requests=3)
+
+        # Assert
+        mock_MovieFetch.get_stale_movie_ids.assert_called_once_with(ANY, ANY, 3)
+        self.assertEqual(mock_requests.get.call_args_list, [
+            call(f'{STREAMING_AVAILABILITY_SHOWS_URL}/{movie_id}', headers={'X-RapidAPI-Key': TEST_API_KEY})
+            for movie_id in [self.show['id'], 'gone', 'failed']
+        ])
+
+        self.assertEqual(mock_StreamingOption.delete_movies.call_args_list,
+                         [call([self.show['id']]), call(['gone'])])
+        self.assertEqual(mock_MovieContentHash.delete_movies.call_args_list,
+                         [call([self.show['id']]), call(['gone'])])
+
+        inserted_streaming_options = mock_StreamingOption.insert_batch.call_args.args[0]
+        self.assertEqual(set(inserted_streaming_options.columns['country_code']), {'ca', 'us'})
+        self.assertEqual(mock_Movie.upsert_batch.call_args.args[0].columns['id'], [self.show['id']])
+
+        self.assertEqual(len(mock_MovieFetch.record_fetch.call_args_list), 2)
+        movie_id, country_codes, fetched_at = mock_MovieFetch.record_fetch.call_args_list[0].args
+        self.assertEqual((movie_id, set(country_codes)), (self.show['id'], {'ca', 'us'}))
+        mock_MovieFetch.record_fetch.assert_called_with('gone', [], fetched_at)
+
+        mock_db.session.commit.assert_called_once()
+
+        num_movie_posters = len(mock_MoviePoster.upsert_batch.call_args.args[0])
+        self.assertEqual(result, {'num_requests': 3,
+                                  'num_rows': 1 + num_movie_posters + len(inserted_streaming_options)})
+
+    def test_stop_when_api_keys_are_exhausted(
+            self,
+            mock_requests,
+            mock_get_refresh_budget,
+            mock_MovieFetch,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_MovieContentHash,
+            mock_db
+    ):
+        """Tests that refreshing stops early when every API key is out of its daily quota."""
+
+        # Arrange mocks
+        mock_get_refresh_budget.return_value = 5
+        mock_MovieFetch.get_stale_movie_ids.return_value = [self.show['id'], 'second', 'third']
+        mock_requests.get.return_value = make_mock_json_response(200, self.show)
+
+        # Act
+        with patch('src.seed.movie_refresher.api_key_pool', new=ApiKeyPool([TEST_API_KEY], max_calls_per_day=1)):
+            result = refresh_stale_movies()
+
+        # Assert
+        mock_MovieFetch.get_stale_movie_ids.assert_called_once_with(ANY, ANY, 5)
+        mock_requests.get.assert_called_once()
+        mock_MovieFetch.record_fetch.assert_called_once()
+        mock_db.session.commit.assert_called_once()
+        self.assertEqual(result['num_requests'], 1)
+
+    def test_skip_malformed_movie(
+            self,
+            mock_requests,
+            mock_get_refresh_budget,
+            mock_MovieFetch,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_MovieContentHash,
+            mock_db
+    ):
+        """
+        Tests that a malformed movie is skipped, without deleting its streaming options or recording it as fetched, and
+        that the other movies are still refreshed and saved.
+        """
+
+        # Arrange
+        malformed_show = {**self.show, 'id': 'malformed', 'title': None}
+
+        # Arrange mocks
+        mock_get_refresh_budget.return_value = 5
+        mock_MovieFetch.get_stale_movie_ids.return_value = ['malformed', self.show['id']]
+        mock_requests.get.side_effect = [
+            make_mock_json_response(200, malformed_show),
+            make_mock_json_response(200, self.show)
+        ]
+
+        # Act
+        with patch('src.seed.movie_refresher.api_key_pool', new=ApiKeyPool([TEST_API_KEY])):
+            result = refresh_stale_movies()
+
+        # Assert
+        mock_StreamingOption.delete_movies.assert_called_once_with([self.show['id']])
+        mock_MovieContentHash.delete_movies.assert_called_once_with([self.show['id']])
+        mock_Movie.upsert_batch.assert_called_once()
+        self.assertEqual(mock_MovieFetch.record_fetch.call_args.args[0], self.show['id'])
+        mock_MovieFetch.record_fetch.assert_called_once()
+        mock_db.session.commit.assert_called_once()
+        self.assertEqual(result['num_requests'], 2)
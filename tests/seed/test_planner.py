@@ -0,0 +1,122 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.exc import DBAPIError
+
+from src.seed.planner import (allocate_requests_in_order,
+                              allocate_requests_in_turns, make_plan,
+                              read_for_plan)
+
+# ==================================================
+
+
+class AllocateRequestsUnitTests(TestCase):
+    """Unit tests for allocate_requests_in_order() and allocate_requests_in_turns()."""
+
+    def test_allocate_requests_in_order(self):
+        """Tests that countries get their estimated pages in order, and a country with unknown pages gets the rest."""
+
+        cases = [
+            ({'ca': 3, 'gb': 4, 'us': 5}, 10, {'ca': 3, 'gb': 4, 'us': 3}),
+            ({'ca': 3, 'gb': None, 'us': 5}, 10, {'ca': 3, 'gb': 7, 'us': 0}),
+            ({'ca': 3, 'gb': 4, 'us': 5}, 0, {'ca': 0, 'gb': 0, 'us': 0})
+        ]
+
+        for estimated_pages, budget, expected_allocation in cases:
+            with self.subTest(estimated_pages=estimated_pages, budget=budget):
+
+                # Act
+                result = allocate_requests_in_order(list(estimated_pages), budget, estimated_pages)
+
+                # Assert
+                self.assertEqual(result, expected_allocation)
+
+    def test_allocate_requests_in_turns(self):
+        """Tests that countries share the budget evenly, and earlier countries get the requests that are left over."""
+
+        # Act/Assert
+        self.assertEqual(allocate_requests_in_turns(['ca', 'gb', 'us'], 80), {'ca': 27, 'gb': 27, 'us': 26})
+        self.assertEqual(allocate_requests_in_turns(['ca', 'gb', 'us'], 2), {'ca': 1, 'gb': 1, 'us': 0})
+        self.assertEqual(allocate_requests_in_turns([], 80), {})
+        self.assertEqual(allocate_requests_in_turns(['us', 'ca', 'gb'], 10, {'us': 8, 'ca': 1, 'gb': 1}),
+                         {'us': 8, 'ca': 1, 'gb': 1})
+
+
+@patch('src.seed.planner.db', autospec=True)
+@patch('src.seed.planner.JobRun', autospec=True)
+class MakePlanUnitTests(TestCase):
+    """Unit tests for make_plan()."""
+
+    def test_make_plan(self, mock_JobRun, mock_db):
+        """Tests that rows are estimated from the job history, and that requests for the services are counted."""
+
+        # Arrange mocks
+        mock_JobRun.get_average_rows_per_request.return_value = 12.5
+
+        # Act
+        result = make_plan('seeder', {'ca': '1:Movie'}, {'ca': 2, 'us': None}, {'ca': 2, 'us': 5}, 8, 92, 2, 1)
+
+        # Assert
+        self.assertEqual(result['countries'], [
+            {'country_code': 'ca', 'checkpoint': '1:Movie', 'estimated_pages': 2, 'num_requests': 2},
+            {'country_code': 'us', 'checkpoint': None, 'estimated_pages': None, 'num_requests': 5}
+        ])
+        self.assertEqual((result['num_requests'], result['estimated_rows'], result['num_transactions']), (8, 100, 2))
+        self.assertEqual(result['warnings'], [])
+        mock_JobRun.get_average_rows_per_request.assert_called_once_with('seeder')
+        mock_db.session.rollback.assert_called_once()
+
+    def test_make_plan_without_history(self, mock_JobRun, mock_db):
+        """Tests that rows are unknown if there are no recent successful runs."""
+
+        # Arrange mocks
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = make_plan('updater', {}, {}, {'ca': 4}, 4, 0, 1)
+
+        # Assert
+        self.assertIsNone(result['estimated_rows'])
+
+
+class ReadForPlanUnitTests(TestCase):
+    """Unit tests for read_for_plan()."""
+
+    def test_read_for_plan(self):
+        """Tests that data is read as it is, without a warning."""
+
+        # Arrange
+        warnings = []
+
+        # Act
+        result = read_for_plan(lambda: {'ca': '1:Movie'}, 'checkpoints', warnings)
+
+        # Assert
+        self.assertEqual(result, {'ca': '1:Movie'})
+        self.assertEqual(warnings, [])
+
+    def test_read_for_plan_without_table(self):
+        """Tests that a table that can not be read is planned as empty, with a warning that names it."""
+
+        # Arrange
+        warnings = []
+
+        # Act
+        result = read_for_plan(
+            MagicMock(side_effect=DBAPIError('SELECT', {}, Exception('relation does not exist'))),
+            'country_change_rates', warnings)
+
+        # Assert
+        self.assertEqual(result, {})
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('country_change_rates', warnings[0])
@@ -0,0 +1,174 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.app import create_app
+from src.models.common import connect_db
+from src.seed.reprocess_archive import (reprocess_archive,
+                                        select_archived_responses)
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+from src.util.response_archive import ResponseArchive
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+# --------------------------------------------------
+
+
+class SelectArchivedResponsesUnitTests(TestCase):
+    """Unit tests for select_archived_responses()."""
+
+    def test_select_archived_responses(self):
+        """Tests that responses are selected by source and country, in order, and that missing bodies are skipped."""
+
+        with TemporaryDirectory() as directory:
+
+            # Arrange
+            archive = ResponseArchive(directory)
+            archive.add(b'{"shows": [], "hasMore": false}', 'seeder', 'url', {'country': 'us'})
+            archive.add(b'{"id": "1"}', 'app', 'url')
+            archive.add(b'{"shows": {}, "hasMore": false}', 'updater', 'url', {'country': 'ca'})
+            missing_digest = archive.add(b'{"shows": [{}], "hasMore": false}', 'updater', 'url', {'country': 'us'})
+            os.remove(archive.get_path(missing_digest))
+
+            cases = [
+                (None, None, [('seeder', 'us'), ('app', None), ('updater', 'ca')]),
+                (['updater'], None, [('updater', 'ca')]),
+                (None, ['us'], [('seeder', 'us')])
+            ]
+
+            for sources, country_codes, expected_responses in cases:
+                with self.subTest(sources=sources, country_codes=country_codes):
+
+                    # Act
+                    result = select_archived_responses(archive, sources, country_codes)
+
+                    # Assert
+                    self.assertEqual([(entry['source'], entry['params'].get('country')) for entry in result],
+                                     expected_responses)
+
+
+@patch('src.seed.reprocess_archive.db', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', autospec=True)
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+class ReprocessArchiveUnitTests(TestCase):
+    """Unit tests for reprocess_archive()."""
+
+    def test_reprocess_archive(
+            self, mock_Movie, mock_MoviePoster, mock_StreamingOption, mock_MovieContentHash, mock_db
+    ):
+        """
+        Tests that archived responses are rebuilt into rows, where the latest response for a movie in a country
+        replaces its streaming options.
+        """
+
+        # Arrange
+        catalog = SyntheticCatalog(2, 2, 2, 3)
+
+        with TemporaryDirectory() as directory:
+            archive = ResponseArchive(directory)
+            archive.add(json.dumps({'shows': [catalog.make_show(0, ['us']), catalog.make_show(1, ['us'])],
+                                    'hasMore': False}).encode(),
+                        'seeder', 'url', {'country': 'us'})
+            # the first movie later had no streaming options left in the country
+            archive.add(json.dumps({'shows': {'1': catalog.make_show(0, [])}, 'hasMore': False}).encode(),
+                        'updater', 'url', {'country': 'us'})
+
+            # Act
+            result = reprocess_archive(archive, num_workers=1)
+
+        # Assert
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once_with([('1', 'us'), ('2', 'us')])
+
+        inserted_streaming_options = mock_StreamingOption.insert_batch.call_args.args[0]
+        self.assertEqual(set(inserted_streaming_options.columns['movie_id']), {'2'})
+        self.assertEqual(len(inserted_streaming_options), 2)
+
+        self.assertEqual(mock_Movie.upsert_batch.call_args.args[0].columns['id'], ['1', '2'])
+        mock_MoviePoster.upsert_batch.assert_called_once()
+        self.assertEqual(list(mock_MovieContentHash.upsert_database.call_args.args[0]), [('1', 'us'), ('2', 'us')])
+        mock_MovieContentHash.get_content_hashes.assert_not_called()
+        mock_db.session.commit.assert_called_once()
+
+        self.assertEqual(result['num_requests'], 0)
+        self.assertEqual(result['num_rows'], 2 + len(mock_MoviePoster.upsert_batch.call_args.args[0]) + 2)
+
+    def test_reprocess_removed_changes(
+            self, mock_Movie, mock_MoviePoster, mock_StreamingOption, mock_MovieContentHash, mock_db
+    ):
+        """
+        Tests that a removed movie that is only in the changes of an archived page of removed changes has its streaming
+        options in the page's country deleted, and that a removed movie that is in the page's shows keeps its current
+        ones.
+        """
+
+        # Arrange
+        catalog = SyntheticCatalog(2, 2, 2, 3)
+
+        with TemporaryDirectory() as directory:
+            archive = ResponseArchive(directory)
+            archive.add(json.dumps({'shows': [catalog.make_show(0, ['us']), catalog.make_show(1, ['us'])],
+                                    'hasMore': False}).encode(),
+                        'seeder', 'url', {'country': 'us'})
+            archive.add(json.dumps({'changes': [{'showId': '1', 'timestamp': 1}, {'showId': '2', 'timestamp': 2}],
+                                    'shows': {'2': catalog.make_show(1, ['us'])},
+                                    'hasMore': False}).encode(),
+                        'updater', 'url', {'country': 'us', 'change_type': 'removed'})
+
+            # Act
+            reprocess_archive(archive, num_workers=1)
+
+        # Assert
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once_with([('1', 'us'), ('2', 'us')])
+
+        inserted_streaming_options = mock_StreamingOption.insert_batch.call_args.args[0]
+        self.assertEqual(set(inserted_streaming_options.columns['movie_id']), {'2'})
+
+    @patch('src.seed.reprocess_archive.get_countries_services', autospec=True)
+    def test_reprocess_movie_details(
+            self, mock_get_countries_services, mock_Movie, mock_MoviePoster, mock_StreamingOption,
+            mock_MovieContentHash, mock_db
+    ):
+        """
+        Tests that an archived movie's details replace the movie's streaming options in every country, including the
+        countries that it does not have streaming options in anymore.
+        """
+
+        # Arrange
+        catalog = SyntheticCatalog(2, 2, 2, 3)
+
+        # Arrange mocks
+        mock_get_countries_services.return_value = {'ca': ['service00'], 'us': ['service01']}
+
+        with TemporaryDirectory() as directory:
+            archive = ResponseArchive(directory)
+            archive.add(json.dumps({'shows': [catalog.make_show(0, ['us'])], 'hasMore': False}).encode(),
+                        'seeder', 'url', {'country': 'us'})
+            archive.add(json.dumps(catalog.make_show(0, ['ca'])).encode(), 'app', 'url')
+
+            # Act
+            reprocess_archive(archive, num_workers=1)
+
+        # Assert
+        self.assertEqual(set(mock_StreamingOption.delete_movies_in_countries.call_args.args[0]),
+                         {('1', 'ca'), ('1', 'us')})
+
+        inserted_streaming_options = mock_StreamingOption.insert_batch.call_args.args[0]
+        self.assertEqual(set(inserted_streaming_options.columns['country_code']), {'ca'})
@@ -0,0 +1,172 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.app import create_app
+from src.models.common import advisory_lock, connect_db, db
+from src.models.job_run import JobRun
+from src.seed.scheduler import run_due_jobs
+from src.seed.seed_updater_constants import SCHEDULER_RETRY_SECONDS
+from src.seed.seeder_updater_helpers import JOBS_LOCK_NAME, job_run, run_job
+
+# ==================================================
+
+app = create_app("freestreammovies_test", testing=True)
+connect_db(app)
+app.app_context().push()
+
+db.drop_all()
+db.create_all()
+
+# --------------------------------------------------
+
+
+class RunJobIntegrationTests(TestCase):
+    """Integration tests for run_job()."""
+
+    def setUp(self):
+        db.session.query(JobRun).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_run_job(self):
+        """Tests that a job is run while holding the lock, and that its run is recorded."""
+
+        # Arrange
+        def job():
+            with advisory_lock(JOBS_LOCK_NAME) as is_locked:
+                self.assertFalse(is_locked)
+            return {'num_requests': 2, 'num_rows': 30}
+
+        # Act
+        result = run_job('updater', job)
+
+        # Assert
+        self.assertEqual(result, JobRun.Statuses.SUCCEEDED)
+
+        run = db.session.query(JobRun).one()
+        self.assertEqual((run.job, run.status, run.num_requests, run.num_rows),
+                         ('updater', JobRun.Statuses.SUCCEEDED, 2, 30))
+        self.assertIsNotNone(run.finished_at)
+
+        with advisory_lock(JOBS_LOCK_NAME) as is_locked:
+            self.assertTrue(is_locked)
+
+    def test_run_job_when_another_job_is_running(self):
+        """Tests that a job is skipped, and recorded as skipped, when another process holds the lock."""
+
+        # Arrange
+        job = MagicMock(name='job')
+
+        # Act
+        with advisory_lock(JOBS_LOCK_NAME):
+            result = run_job('updater', job)
+
+        # Assert
+        self.assertEqual(result, JobRun.Statuses.SKIPPED)
+        job.assert_not_called()
+        self.assertEqual(db.session.query(JobRun).one().status, JobRun.Statuses.SKIPPED)
+
+    def test_run_job_that_fails(self):
+        """Tests that a job's exception is raised after its run is recorded as failed, and the lock is released."""
+
+        # Arrange
+        job = MagicMock(name='job', side_effect=ValueError('bad value'))
+
+        # Act/Assert
+        self.assertRaises(ValueError, run_job, 'updater', job)
+
+        run = db.session.query(JobRun).one()
+        self.assertEqual((run.status, run.error), (JobRun.Statuses.FAILED, 'ValueError: bad value'))
+
+        with advisory_lock(JOBS_LOCK_NAME) as is_locked:
+            self.assertTrue(is_locked)
+
+    def test_shared_job_runs(self):
+        """
+        Tests that shared job runs, such as seeding workers, run alongside each other, but not alongside other jobs, and
+        that progress added to a run is counted in the job history while it runs.
+        """
+
+        # Act/Assert
+        with job_run('seeder_worker', is_shared=True) as run_id:
+            self.assertIsNotNone(run_id)
+
+            with job_run('seeder_worker', is_shared=True) as other_run_id:
+                self.assertIsNotNone(other_run_id)
+                JobRun.finish(other_run_id, JobRun.Statuses.SUCCEEDED)
+
+            self.assertEqual(run_job('updater', MagicMock(name='job')), JobRun.Statuses.SKIPPED)
+
+            JobRun.add_progress(run_id, 1, 20)
+            JobRun.add_progress(run_id, 1, 0)
+            self.assertEqual(JobRun.get_num_requests_since(datetime.now(timezone.utc) - timedelta(days=1)), 2)
+
+            JobRun.finish(run_id, JobRun.Statuses.SUCCEEDED, 2, 20)
+
+        with advisory_lock(JOBS_LOCK_NAME) as is_locked:
+            self.assertTrue(is_locked)
+
+
+@patch('src.seed.scheduler.run_job', autospec=True)
+@patch('src.seed.scheduler.JobRun', autospec=True)
+class RunDueJobsUnitTests(TestCase):
+    """Unit tests for run_due_jobs()."""
+
+    def setUp(self):
+        self.now = datetime.now(timezone.utc)
+        self.updater = MagicMock(name='updater')
+        self.seeder = MagicMock(name='seeder')
+        self.jobs = {'updater': (self.updater, 3600), 'seeder': (self.seeder, 7200)}
+
+    def test_run_due_jobs(self, mock_JobRun, mock_run_job):
+        """Tests that only jobs that are due are run, and that the time until the next job is due is returned."""
+
+        # Arrange mocks
+        mock_JobRun.Statuses = JobRun.Statuses
+        mock_JobRun.get_last_start_time.side_effect = [
+            None, self.now,  # updater has never run, and then it ran
+            self.now - timedelta(seconds=1800)  # seeder ran 30 minutes ago
+        ]
+        mock_run_job.return_value = JobRun.Statuses.SUCCEEDED
+
+        # Act
+        result = run_due_jobs(self.jobs)
+
+        # Assert
+        mock_run_job.assert_called_once_with('updater', self.updater)
+        self.assertAlmostEqual(result, 3600, delta=5)
+
+    def test_run_due_jobs_when_skipped_or_failed(self, mock_JobRun, mock_run_job):
+        """
+        Tests that a skipped job is tried again after SCHEDULER_RETRY_SECONDS, and that a failed job does not stop
+        other jobs from running.
+        """
+
+        # Arrange mocks
+        mock_JobRun.Statuses = JobRun.Statuses
+        mock_JobRun.get_last_start_time.side_effect = [
+            None,  # updater is due, and then fails
+            self.now,
+            None  # seeder is due, and then is skipped
+        ]
+        mock_run_job.side_effect = [ValueError(), JobRun.Statuses.SKIPPED]
+
+        # Act
+        result = run_due_jobs(self.jobs)
+
+        # Assert
+        self.assertEqual(mock_run_job.call_count, 2)
+        self.assertEqual(result, SCHEDULER_RETRY_SECONDS)
@@ -0,0 +1,264 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from collections import deque
+from copy import deepcopy
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.adapters.streaming_availability_adapter import transform_page
+from src.seed.seeder_updater_helpers import (get_checkpoint_job,
+                                             get_country_weights,
+                                             group_streaming_options,
+                                             make_staging_store,
+                                             order_by_weight, pop_next_turn,
+                                             select_countries_services,
+                                             write_staged_data)
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+
+class GetCheckpointJobUnitTests(TestCase):
+    """Unit tests for get_checkpoint_job()."""
+
+    def test_get_checkpoint_job(self):
+        """Tests that runs for some services have their own checkpoint job, which does not depend on service order."""
+
+        # Act/Assert
+        self.assertEqual(get_checkpoint_job('seeder'), 'seeder')
+        self.assertEqual(get_checkpoint_job('seeder', ['tubi', 'plex']), 'seeder:plex,tubi')
+
+
+class SelectCountriesServicesUnitTests(TestCase):
+    """Unit tests for select_countries_services()."""
+
+    def setUp(self):
+        self.countries_services = {'ca': ['plex', 'tubi'], 'gb': ['plex'], 'us': ['tubi', 'pluto']}
+
+    def test_select_countries_services(self):
+        """Tests selecting countries, services, or both, and that countries left without services are dropped."""
+
+        cases = [
+            (None, None, self.countries_services),
+            (['gb', 'us'], None, {'gb': ['plex'], 'us': ['tubi', 'pluto']}),
+            (None, ['tubi'], {'ca': ['tubi'], 'us': ['tubi']}),
+            (['ca', 'gb'], ['tubi'], {'ca': ['tubi']}),
+            (['fr'], ['netflix'], {})
+        ]
+
+        for country_codes, service_ids, expected_result in cases:
+            with self.subTest(country_codes=country_codes, service_ids=service_ids):
+
+                # Act
+                result = select_countries_services(self.countries_services, country_codes, service_ids)
+
+                # Assert
+                self.assertEqual(result, expected_result)
+
+
+@patch('src.seed.seeder_updater_helpers.SA_TRAFFIC_MIN_WEIGHT', 0.1)
+@patch('src.seed.seeder_updater_helpers.CountryTraffic', autospec=True)
+class GetCountryWeightsUnitTests(TestCase):
+    """Unit tests for get_country_weights()."""
+
+    def test_get_country_weights(self, mock_CountryTraffic):
+        """Tests that countries are weighted by traffic, with a minimum, and that other countries are ignored."""
+
+        # Arrange mocks
+        mock_CountryTraffic.get_recent_counts.return_value = {'ca': 100, 'us': 900, 'fr': 5000}
+
+        # Act
+        result = get_country_weights(['ca', 'gb', 'us'])
+
+        # Assert
+        self.assertEqual(result, {'ca': 100, 'gb': 100, 'us': 900})
+
+    def test_get_country_weights_without_traffic(self, mock_CountryTraffic):
+        """Tests that countries have the same weight when there is no traffic."""
+
+        # Arrange mocks
+        mock_CountryTraffic.get_recent_counts.return_value = {}
+
+        # Act
+        result = get_country_weights(['ca', 'us'])
+
+        # Assert
+        self.assertEqual(result, {'ca': 1, 'us': 1})
+
+
+class WeightedTurnsUnitTests(TestCase):
+    """Unit tests for order_by_weight() and pop_next_turn()."""
+
+    def test_order_by_weight(self):
+        """Tests that countries are ordered from the highest weight, and countries with the same weight keep order."""
+
+        # Act
+        result = order_by_weight({'ca': ['s0'], 'gb': ['s1'], 'us': ['s2']}, {'ca': 1, 'gb': 5, 'us': 1})
+
+        # Assert
+        self.assertEqual(list(result.items()), [('gb', ['s1']), ('ca', ['s0']), ('us', ['s2'])])
+
+    def test_pop_next_turn(self):
+        """
+        Tests that countries take turns in proportion to their weights, that a country that stops waiting gives its
+        turns to the others, and that countries with the same weight take turns round-robin.
+        """
+
+        # Arrange
+        weights = {'us': 3, 'ca': 1, 'gb': 1}
+        waiting_country_codes = deque(weights)
+        num_turns = {}
+        turns = []
+
+        # Act
+        for i in range(10):
+            country_code = pop_next_turn(waiting_country_codes, num_turns, weights)
+            turns.append(country_code)
+
+            # gb runs out of changes after its first turn
+            if country_code != 'gb':
+                waiting_country_codes.append(country_code)
+
+        # Assert
+        self.assertEqual(turns, ['us', 'us', 'ca', 'gb', 'us', 'us', 'us', 'ca', 'us', 'us'])
+        self.assertEqual(num_turns, {'us': 7, 'ca': 2, 'gb': 1})
+
+
+class GroupStreamingOptionsUnitTests(TestCase):
+    """Unit tests for group_streaming_options()."""
+
+    def setUp(self):
+        catalog = SyntheticCatalog(2, 2, 1, 1)
+        self.show_with_options = catalog.make_show(0, ['us'])
+        self.show_without_options = catalog.make_show(1, [])
+
+    def test_group_page_of_one_country(self):
+        """Tests that every movie of a page for one country gets a group for that country, even without options."""
+
+        # Act
+        result = group_streaming_options(transform_page([self.show_with_options, self.show_without_options]), 'us')
+
+        # Assert
+        self.assertEqual(result.columns['movie_id'], ['1', '2'])
+        self.assertEqual(result.columns['country_code'], ['us', 'us'])
+        self.assertEqual(len(result.columns['streaming_options'][0]), 1)
+        self.assertEqual(result.columns['streaming_options'][1], [])
+
+    def test_group_page_with_removed_movies(self):
+        """Tests that removed movies that are not in the page get empty groups for the page's country."""
+
+        # Act
+        result = group_streaming_options(transform_page([self.show_with_options]), 'us', ['9'])
+
+        # Assert
+        self.assertEqual(result.columns['movie_id'], ['1', '9'])
+        self.assertEqual(result.columns['country_code'], ['us', 'us'])
+        self.assertEqual(result.columns['streaming_options'][1], [])
+        self.assertIsNone(result.columns['content_hash'][1])
+
+    def test_group_page_of_every_country(self):
+        """Tests that every movie of a page with streaming options in all countries gets a group for each country."""
+
+        # Act
+        result = group_streaming_options(transform_page([self.show_with_options]), ['ca', 'us'])
+
+        # Assert
+        self.assertEqual(list(zip(result.columns['movie_id'], result.columns['country_code'])),
+                         [('1', 'ca'), ('1', 'us')])
+        self.assertEqual(result.columns['streaming_options'][0], [])
+        self.assertEqual(len(result.columns['streaming_options'][1]), 1)
+
+    def test_group_page_without_country(self):
+        """Tests that movies of a page without a country only get groups for the countries that they have options in."""
+
+        # Act
+        result = group_streaming_options(transform_page([self.show_with_options, self.show_without_options]))
+
+        # Assert
+        self.assertEqual(result.columns['movie_id'], ['1'])
+        self.assertEqual(result.columns['country_code'], ['us'])
+
+    def test_content_hashes(self):
+        """
+        Tests that a group's content hash is the same for the same transformed data, and changes when the movie or its
+        streaming options change.
+        """
+
+        # Arrange
+        changed_movie_show = deepcopy(self.show_with_options)
+        changed_movie_show['title'] = 'Another Title'
+        changed_option_show = deepcopy(self.show_with_options)
+        changed_option_show['streamingOptions']['us'][0]['link'] = 'https://www.example.com/another-link'
+
+        # Act
+        content_hashes = [
+            group_streaming_options(transform_page([show]), 'us').columns['content_hash'][0]
+            for show in [self.show_with_options, deepcopy(self.show_with_options), changed_movie_show,
+                         changed_option_show]
+        ]
+
+        # Assert
+        self.assertEqual(content_hashes[0], content_hashes[1])
+        self.assertEqual(len(set(content_hashes)), 3)
+
+
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', autospec=True)
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+class WriteStagedDataUnitTests(TestCase):
+    """Unit tests for write_staged_data() with grouped streaming options."""
+
+    def setUp(self):
+        catalog = SyntheticCatalog(2, 2, 1, 1)
+        transformed_page = transform_page([catalog.make_show(0, ['us']), catalog.make_show(1, ['us'])])
+        self.groups = group_streaming_options(transformed_page, 'us')
+
+        self.store = make_staging_store(grouped_streaming_options=True)
+        self.store.extend({
+            'movies': transformed_page['movies'],
+            'movie_posters': transformed_page['movie_posters'],
+            'streaming_option_groups': self.groups
+        })
+
+    def test_skip_unchanged_content(self, mock_Movie, mock_MoviePoster, mock_StreamingOption, mock_MovieContentHash):
+        """
+        Tests that a movie whose content hash matches the stored one is skipped before anything is written, and that
+        the hashes of the written movies are stored.
+        """
+
+        # Arrange
+        unchanged_hash, changed_hash = self.groups.columns['content_hash']
+        mock_MovieContentHash.get_content_hashes.return_value = {('1', 'us'): unchanged_hash, ('2', 'us'): 'old'}
+
+        # Act
+        write_staged_data(self.store, skip_unchanged_content=True)
+
+        # Assert
+        mock_MovieContentHash.get_content_hashes.assert_called_once_with([('1', 'us'), ('2', 'us')])
+        self.assertEqual(mock_Movie.upsert_batch.call_args.args[0].columns['id'], ['2'])
+        self.assertEqual(set(mock_MoviePoster.upsert_batch.call_args.args[0].columns['movie_id']), {'2'})
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once_with([('2', 'us')])
+        self.assertEqual(mock_StreamingOption.insert_batch.call_args.args[0].columns['movie_id'], ['2'])
+        mock_MovieContentHash.upsert_database.assert_called_once_with({('2', 'us'): changed_hash})
+
+    def test_write_without_skipping(self, mock_Movie, mock_MoviePoster, mock_StreamingOption, mock_MovieContentHash):
+        """Tests that every movie is written, and its hash stored, when unchanged content is not skipped."""
+
+        # Act
+        write_staged_data(self.store)
+
+        # Assert
+        mock_MovieContentHash.get_content_hashes.assert_not_called()
+        self.assertEqual(mock_Movie.upsert_batch.call_args.args[0].columns['id'], ['1', '2'])
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once_with([('1', 'us'), ('2', 'us')])
+        mock_MovieContentHash.upsert_database.assert_called_once_with(
+            dict(zip([('1', 'us'), ('2', 'us')], self.groups.columns['content_hash'])))
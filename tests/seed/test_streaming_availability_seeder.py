@@ -8,17 +8,35 @@ sys.path.append(root_dir)  # nopep8
 
 # --------------------------------------------------
 
+from contextlib import contextmanager
 from copy import deepcopy
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import ANY, MagicMock, call, patch
 
 from requests.exceptions import RequestException
+from sqlalchemy.exc import DBAPIError
 
 from src.app import create_app
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
 from src.exceptions.base_exceptions import FreeStreamMoviesServerError
 from src.models.common import connect_db, db
+from src.models.country_service import CountryService
+from src.models.job_run import JobRun
+from src.models.service import Service
+from src.seed.planner import get_daily_limit, get_refresh_limit
+from src.seed.seed_updater_constants import (
+    SA_API_STREAM_RESPONSES,
+    STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY)
 from src.seed.streaming_availability_seeder import (
-    get_movies_and_streams_from_one_request, seed_movies_and_streams)
+    get_movies_and_streams_from_one_request, plan_seeding,
+    seed_movies_and_streams, seed_movies_and_streams_from_work_queue,
+    seed_services)
+from src.util.api_key_pool import ApiKeyPool
+from src.util.response_archive import ResponseArchive
+from tests.utilities import (TransformPageStub, make_batches,
+                             make_mock_json_response, make_same_weights,
+                             make_update_batches)
 
 # ==================================================
 
@@ -29,22 +47,30 @@ app.app_context().push()
 db.drop_all()
 db.create_all()
 
+TEST_API_KEY = 'test api key'
+
 # --------------------------------------------------
 
 
-@patch('src.seed.streaming_availability_seeder.make_unique_transformed_show_data', autospec=True)
-@patch('src.seed.streaming_availability_seeder.delete_country_movie_streaming_options', autospec=True)
+@contextmanager
+def fake_job_run(job: str, is_shared: bool = False):
+    """A stand-in for job_run(), where the run is never skipped."""
+
+    yield 1
+
+
+@patch('src.seed.streaming_availability_seeder.transform_page', autospec=True)
 @patch('src.seed.streaming_availability_seeder.requests', autospec=True)
-@patch('src.seed.streaming_availability_seeder.RAPID_API_KEY')
+@patch('src.seed.streaming_availability_seeder.api_key_pool', new_callable=lambda: ApiKeyPool([TEST_API_KEY]))
+@patch('src.seed.streaming_availability_seeder.response_archive', new=ResponseArchive(None))
 class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
     """Unit tests for get_movies_and_streams_from_one_request()."""
 
     def test_api_request_build(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """Tests that the API request is correct when requesting data for one and many services."""
 
@@ -61,7 +87,7 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
                 # Arrange expected
                 expected_url = "https://streaming-availability.p.rapidapi.com/shows/search/filters"
-                expected_headers = {'X-RapidAPI-Key': mock_RAPID_API_KEY}
+                expected_headers = {'X-RapidAPI-Key': TEST_API_KEY}
                 expected_params = {"country": country,
                                    "order_by": "original_title",
                                    "catalogs": ', '.join([service_id + '.free' for service_id in service_ids]),
@@ -72,17 +98,16 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
                 # Assert
                 mock_requests.get.assert_called_once_with(
-                    expected_url, headers=expected_headers, params=expected_params)
+                    expected_url, headers=expected_headers, params=expected_params, stream=SA_API_STREAM_RESPONSES)
 
                 # clean up
                 mock_requests.reset_mock()
 
     def test_api_request_build_with_cursor(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """Tests that the API request is correct when a cursor is present."""
 
@@ -93,7 +118,7 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
         # Arrange expected
         expected_url = "https://streaming-availability.p.rapidapi.com/shows/search/filters"
-        expected_headers = {'X-RapidAPI-Key': mock_RAPID_API_KEY}
+        expected_headers = {'X-RapidAPI-Key': TEST_API_KEY}
         expected_params = {"country": country,
                            "order_by": "original_title",
                            "catalogs": 'service00.free',
@@ -105,14 +130,13 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
         # Assert
         mock_requests.get.assert_called_once_with(
-            expected_url, headers=expected_headers, params=expected_params)
+            expected_url, headers=expected_headers, params=expected_params, stream=SA_API_STREAM_RESPONSES)
 
     def test_receiving_shows_and_there_is_more(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """
         If the API response indicates there is more data to be requested, then put the next cursor in the return.
@@ -125,41 +149,18 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         shows_input = [{'id': '1'}, {'id': '2'}]
 
         # Arrange mocks
-        mock_response = MagicMock(name='mock_response')
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_requests.get.return_value = make_mock_json_response(200, {
             'shows': deepcopy(shows_input),
             'nextCursor': '1234:56',
             'hasMore': True
-        }
-        mock_requests.get.return_value = mock_response
+        })
 
-        def side_effect_func(show):
-            return mock_make_unique_transformed_show_data_side_effect(country, service_ids, show)
-
-        mock_make_unique_transformed_show_data.side_effect = side_effect_func
+        transform_page_stub = TransformPageStub(make_batches(show['id'] for show in shows_input))
+        mock_transform_page.side_effect = transform_page_stub
 
         # Arrange expected
-        expected_delete_calls = [call(show['id'], country) for show in shows_input]
-
         expected_result = {
-            'movies': {movie['id']: movie for movie in shows_input},
-            'movie_posters': {
-                f'{movie['id']}-verticalPoster-w240': {
-                    'movie_id': movie['id'],
-                    'type': 'verticalPoster',
-                    'size': 'w240',
-                    'link': 'link' + movie['id']
-                } for movie in shows_input
-            },
-            'streaming_options': {
-                f'{movie['id']}-{country}-{service_ids[0]}-link{movie['id']}': {
-                    'movie_id': movie['id'],
-                    'country_code': country,
-                    'service_id': service_ids[0],
-                    'link': f'link{movie['id']}'
-                } for movie in shows_input
-            },
+            **make_update_batches((show['id'] for show in shows_input), country),
             'next_cursor': '1234:56'
         }
 
@@ -168,14 +169,14 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
         # Assert
         self.assertEqual(result, expected_result)
-        self.assertEqual(mock_delete_country_movie_streaming_options.mock_calls, expected_delete_calls)
+        mock_transform_page.assert_called_once()
+        self.assertEqual(transform_page_stub.shows, shows_input)
 
     def test_receiving_any_number_of_shows_and_there_is_no_more(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """Tests that the return includes the correct data when there are any number of shows in the API response."""
 
@@ -193,40 +194,17 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
                 service_ids = ['service00']
 
                 # Arrange mocks
-                mock_response = MagicMock(name='mock_response')
-                mock_response.status_code = 200
-                mock_response.json.return_value = {
+                mock_requests.get.return_value = make_mock_json_response(200, {
                     'shows': deepcopy(shows_input),
                     'hasMore': False
-                }
-                mock_requests.get.return_value = mock_response
-
-                def side_effect_func(show):
-                    return mock_make_unique_transformed_show_data_side_effect(country, service_ids, show)
+                })
 
-                mock_make_unique_transformed_show_data.side_effect = side_effect_func
+                transform_page_stub = TransformPageStub(make_batches(show['id'] for show in shows_input))
+                mock_transform_page.side_effect = transform_page_stub
 
                 # Arrange expected
-                expected_delete_calls = [call(show['id'], country) for show in shows_input]
-
                 expected_result = {
-                    'movies': {movie['id']: movie for movie in shows_input},
-                    'movie_posters': {
-                        f'{movie['id']}-verticalPoster-w240': {
-                            'movie_id': movie['id'],
-                            'type': 'verticalPoster',
-                            'size': 'w240',
-                            'link': 'link' + movie['id']
-                        } for movie in shows_input
-                    },
-                    'streaming_options': {
-                        f'{movie['id']}-{country}-{service_ids[0]}-link{movie['id']}': {
-                            'movie_id': movie['id'],
-                            'country_code': country,
-                            'service_id': service_ids[0],
-                            'link': f'link{movie['id']}'
-                        } for movie in shows_input
-                    },
+                    **make_update_batches((show['id'] for show in shows_input), country),
                     'next_cursor': 'end'
                 }
 
@@ -235,17 +213,90 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
                 # Assert
                 self.assertEqual(result, expected_result)
-                self.assertEqual(mock_delete_country_movie_streaming_options.mock_calls, expected_delete_calls)
+                mock_transform_page.assert_called_once()
+                self.assertEqual(transform_page_stub.shows, shows_input)
 
                 # clean up
-                mock_delete_country_movie_streaming_options.reset_mock()
+                mock_transform_page.reset_mock()
+
+    @patch('src.seed.streaming_availability_seeder.SA_API_STREAM_RESPONSES', False)
+    def test_receiving_shows_without_streaming(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """When responses are not streamed, the whole response body should be read at once, with the same result."""
+
+        # Arrange
+        country = 'us'
+        service_ids = ['service00']
+        shows_input = [{'id': '1'}, {'id': '2'}]
+
+        # Arrange mocks
+        mock_response = make_mock_json_response(200, {
+            'shows': deepcopy(shows_input),
+            'nextCursor': '1234:56',
+            'hasMore': True
+        })
+        mock_requests.get.return_value = mock_response
+
+        transform_page_stub = TransformPageStub(make_batches(show['id'] for show in shows_input))
+        mock_transform_page.side_effect = transform_page_stub
+
+        # Arrange expected
+        expected_result = {
+            **make_update_batches((show['id'] for show in shows_input), country),
+            'next_cursor': '1234:56'
+        }
+
+        # Act
+        result = get_movies_and_streams_from_one_request(country, service_ids)
+
+        # Assert
+        self.assertEqual(result, expected_result)
+        self.assertEqual(transform_page_stub.shows, shows_input)
+        self.assertEqual(mock_requests.get.call_args.kwargs['stream'], False)
+        mock_response.json.assert_called_once()
+        mock_response.iter_content.assert_not_called()
+
+    def test_archiving_the_response(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """The raw response body should be archived, along with the request, while it is read."""
+
+        # Arrange
+        country = 'us'
+        service_ids = ['service00']
+        shows_input = [{'id': '1'}, {'id': '2'}]
+
+        # Arrange mocks
+        mock_response = make_mock_json_response(200, {'shows': deepcopy(shows_input), 'hasMore': False})
+        mock_requests.get.return_value = mock_response
+        mock_transform_page.side_effect = TransformPageStub(make_batches(show['id'] for show in shows_input))
+
+        with TemporaryDirectory() as directory:
+            archive = ResponseArchive(directory)
+
+            # Act
+            with patch('src.seed.streaming_availability_seeder.response_archive', archive):
+                get_movies_and_streams_from_one_request(country, service_ids)
+
+            # Assert
+            entries = list(archive.iter_entries())
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(entries[0]['source'], 'seeder')
+            self.assertEqual(entries[0]['params']['country'], country)
+            self.assertEqual(archive.read(entries[0]['digest']), mock_response.content)
 
     def test_when_api_response_is_not_200(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """When the API response is not 200, return None."""
 
@@ -263,17 +314,19 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
         # Assert
         self.assertIsNone(result)
-        mock_delete_country_movie_streaming_options.assert_not_called()
-        mock_make_unique_transformed_show_data.assert_not_called()
+        mock_transform_page.assert_not_called()
 
+    @patch('src.util.resilience.time', autospec=True)
     def test_when_get_request_raises_an_exception(
             self,
-            mock_RAPID_API_KEY,
+            mock_time,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
-        """When the GET request raises an exception, it should be re-raised under an internal exception."""
+        """
+        When the GET request raises an exception, it should be retried, and then re-raised under an internal exception.
+        """
 
         # Arrange
         country = 'us'
@@ -284,16 +337,19 @@ class GetMoviesAndStreamsFromOneRequestUnitTests(TestCase):
 
         # Act/Assert
         self.assertRaises(FreeStreamMoviesServerError, get_movies_and_streams_from_one_request, country, service_ids)
-        mock_delete_country_movie_streaming_options.assert_not_called()
-        mock_make_unique_transformed_show_data.assert_not_called()
+        self.assertEqual(mock_requests.get.call_count, 4)
+        mock_transform_page.assert_not_called()
 
 
-@patch('src.seed.streaming_availability_seeder.StreamingOption', autospec=True)
-@patch('src.seed.streaming_availability_seeder.MoviePoster', autospec=True)
-@patch('src.seed.streaming_availability_seeder.Movie', autospec=True)
-@patch('src.seed.streaming_availability_seeder.write_json_file_helper', autospec=True)
+@patch('src.seed.streaming_availability_seeder.get_num_requests_used_today', new=MagicMock(return_value=0))
+@patch('src.seed.streaming_availability_seeder.get_country_weights', new=make_same_weights)
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', new=MagicMock(**{'get_content_hashes.return_value': {}}))
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+@patch('src.seed.streaming_availability_seeder.Checkpoint', autospec=True)
 @patch('src.seed.streaming_availability_seeder.get_movies_and_streams_from_one_request', autospec=True)
-@patch('src.seed.streaming_availability_seeder.read_json_file_helper', autospec=True)
+@patch('src.seed.streaming_availability_seeder.read_checkpoints', autospec=True)
 @patch('src.seed.streaming_availability_seeder.CountryService', autospec=True)
 @patch('src.seed.streaming_availability_seeder.db', autospec=True)
 class SeedMoviesAndStreamsUnitTests(TestCase):
@@ -308,9 +364,9 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -321,16 +377,10 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
 
-        # using strings in place of dictionaries in the lists should still work, since only the object matters
         def side_effect_func(country_code, service_ids, cursor):
-            return {
-                'movies': {f'movie_{country_code}': 'movie'},
-                'movie_posters': {f'movie_poster_{country_code}': 'movie_poster'},
-                'streaming_options': {f'streaming_option_{country_code}': 'streaming_option'},
-                'next_cursor': 'end'
-            }
+            return {**make_update_batches([f'movie_{country_code}'], country_code), 'next_cursor': 'end'}
         mock_get_movies_and_streams_from_one_request.side_effect = side_effect_func
 
         # Arrange expected
@@ -345,25 +395,25 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_movies_and_streams_from_one_request.assert_has_calls(
             [call('ca', self.countries_services_dict['ca'], None),
              call('us', self.countries_services_dict['us'], None)]
         )
-        mock_write_json_file_helper.assert_called_with(ANY, expected_cursors)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, expected_cursors)
 
-        num_countries = len(self.countries_services_dict)
-        mock_Movie.upsert_database.assert_called_once_with(['movie' for i in range(num_countries)])
-        mock_MoviePoster.upsert_database.assert_called_once_with(['movie_poster' for i in range(num_countries)])
-        mock_StreamingOption.insert_database.assert_called_once_with(['streaming_option' for i in range(num_countries)])
+        expected_batches = make_batches(f'movie_{country_code}' for country_code in self.countries_services_dict)
+        mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
 
     def test_seeding_when_cursors_has_saved_cursor(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -374,17 +424,11 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_read_json_file_helper.return_value = {
+        mock_read_checkpoints.return_value = {
             'ca': 'next ca movie', 'us': 'next us movie'}
 
-        # using strings in place of dictionaries in the lists should still work, since only the object matters
         def side_effect_func(country_code, service_ids, cursor):
-            return {
-                'movies': {f'movie_{country_code}': 'movie'},
-                'movie_posters': {f'movie_poster_{country_code}': 'movie_poster'},
-                'streaming_options': {f'streaming_option_{country_code}': 'streaming_option'},
-                'next_cursor': 'end'
-            }
+            return {**make_update_batches([f'movie_{country_code}'], country_code), 'next_cursor': 'end'}
         mock_get_movies_and_streams_from_one_request.side_effect = side_effect_func
 
         # Arrange expected
@@ -399,25 +443,59 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_movies_and_streams_from_one_request.assert_has_calls(
             [call('ca', self.countries_services_dict['ca'], 'next ca movie'),
              call('us', self.countries_services_dict['us'], 'next us movie')]
         )
-        mock_write_json_file_helper.assert_called_with(ANY, expected_cursors)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, expected_cursors)
+
+        expected_batches = make_batches(f'movie_{country_code}' for country_code in self.countries_services_dict)
+        mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
+
+    def test_seeding_selected_country_and_service_from_first_page(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that only the selected country and service are seeded, from the first page when the cursor is reset,
+        and that the cursor is saved separately from the cursors for all services.
+        """
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services_objs
 
-        num_countries = len(self.countries_services_dict)
-        mock_Movie.upsert_database.assert_called_once_with(['movie' for i in range(num_countries)])
-        mock_MoviePoster.upsert_database.assert_called_once_with(['movie_poster' for i in range(num_countries)])
-        mock_StreamingOption.insert_database.assert_called_once_with(['streaming_option' for i in range(num_countries)])
+        mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
+
+        mock_read_checkpoints.return_value = {'ca': 'next ca movie', 'us': 'next us movie'}
+
+        mock_get_movies_and_streams_from_one_request.return_value = {
+            **make_update_batches(['movie_us'], 'us'), 'next_cursor': 'end'}
+
+        # Act
+        seed_movies_and_streams(['us'], ['service01'], reset_cursor=True)
+
+        # Assert
+        mock_read_checkpoints.assert_called_once_with('seeder:service01', None)
+        mock_get_movies_and_streams_from_one_request.assert_called_once_with('us', ['service01'], None)
+        mock_Checkpoint.upsert_database.assert_called_once_with(
+            'seeder:service01', {'ca': 'next ca movie', 'us': 'end'})
 
     def test_seeding_when_cursors_has_end_cursor(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -428,7 +506,7 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_read_json_file_helper.return_value = {'ca': 'end', 'us': 'end'}
+        mock_read_checkpoints.return_value = {'ca': 'end', 'us': 'end'}
 
         # Arrange expected
         expected_db_call = call.session.query(mock_CountryService).all().call_list()
@@ -440,21 +518,22 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_movies_and_streams_from_one_request.assert_not_called()
-        mock_write_json_file_helper.assert_not_called()
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'ca': 'end', 'us': 'end'})
 
-        mock_Movie.upsert_database.assert_called_once_with([])
-        mock_MoviePoster.upsert_database.assert_called_once_with([])
-        mock_StreamingOption.insert_database.assert_called_once_with([])
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
 
     def test_seeding_when_response_gives_next_cursor(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -468,40 +547,21 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
 
-        # using strings in place of dictionaries in the lists should still work, since only the object matters
         def side_effect_func(country_code, service_ids, cursor):
             if country_code == 'ca':
                 if cursor is None:
-                    return {
-                        'movies': {f'movie_{country_code}_1': 'movie'},
-                        'movie_posters': {f'movie_poster_{country_code}_1': 'movie_poster'},
-                        'streaming_options': {f'streaming_option_{country_code}_1': 'streaming_option'},
-                        'next_cursor': '29583:A Dark Truth'
-                    }
+                    return {**make_update_batches([f'movie_{country_code}_1'], country_code),
+                            'next_cursor': '29583:A Dark Truth'}
                 elif cursor == '29583:A Dark Truth':
-                    return {
-                        'movies': {f'movie_{country_code}_2': 'movie'},
-                        'movie_posters': {f'movie_poster_{country_code}_2': 'movie_poster'},
-                        'streaming_options': {f'streaming_option_{country_code}_2': 'streaming_option'},
-                        'next_cursor': 'end'
-                    }
+                    return {**make_update_batches([f'movie_{country_code}_2'], country_code), 'next_cursor': 'end'}
             if country_code == 'us':
                 if cursor is None:
-                    return {
-                        'movies': {f'movie_{country_code}_3': 'movie'},
-                        'movie_posters': {f'movie_poster_{country_code}_3': 'movie_poster'},
-                        'streaming_options': {f'streaming_option_{country_code}_3': 'streaming_option'},
-                        'next_cursor': '210942:A Deeper Shade of Blue'
-                    }
+                    return {**make_update_batches([f'movie_{country_code}_3'], country_code),
+                            'next_cursor': '210942:A Deeper Shade of Blue'}
                 elif cursor == '210942:A Deeper Shade of Blue':
-                    return {
-                        'movies': {f'movie_{country_code}_4': 'movie'},
-                        'movie_posters': {f'movie_poster_{country_code}_4': 'movie_poster'},
-                        'streaming_options': {f'streaming_option_{country_code}_4': 'streaming_option'},
-                        'next_cursor': 'end'
-                    }
+                    return {**make_update_batches([f'movie_{country_code}_4'], country_code), 'next_cursor': 'end'}
         mock_get_movies_and_streams_from_one_request.side_effect = side_effect_func
 
         # Arrange expected
@@ -516,26 +576,27 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_movies_and_streams_from_one_request.assert_has_calls(
             [call('ca', self.countries_services_dict['ca'], None),
              call('ca', self.countries_services_dict['ca'], '29583:A Dark Truth'),
              call('us', self.countries_services_dict['us'], None),
              call('us', self.countries_services_dict['us'], '210942:A Deeper Shade of Blue')]
         )
-        mock_write_json_file_helper.assert_called_with(ANY, expected_cursors)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, expected_cursors)
 
-        mock_Movie.upsert_database.assert_called_once_with(['movie' for i in range(4)])
-        mock_MoviePoster.upsert_database.assert_called_once_with(['movie_poster' for i in range(4)])
-        mock_StreamingOption.insert_database.assert_called_once_with(['streaming_option' for i in range(4)])
+        expected_batches = make_batches(['movie_ca_1', 'movie_ca_2', 'movie_us_3', 'movie_us_4'])
+        mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
 
     def test_seeding_when_response_has_an_error(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -546,7 +607,7 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
 
         mock_get_movies_and_streams_from_one_request.return_value = None
 
@@ -560,24 +621,99 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_movies_and_streams_from_one_request.assert_has_calls(
             [call('ca', self.countries_services_dict['ca'], None),
              call('us', self.countries_services_dict['us'], None)]
         )
-        mock_write_json_file_helper.assert_not_called()
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {})
+
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
+
+    def test_seeding_when_api_keys_are_exhausted(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that seeding stops for every country when every API key is out of its daily quota, that the call that
+        was not made is not counted as a request, and that the data that was retrieved is still saved.
+        """
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services_objs
+
+        mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
+
+        mock_read_checkpoints.return_value = {}
+
+        mock_get_movies_and_streams_from_one_request.side_effect = [
+            {**make_update_batches(['movie_ca_1'], 'ca'), 'next_cursor': '29583:A Dark Truth'},
+            ApiKeysExhaustedError('')
+        ]
+
+        # Act
+        result = seed_movies_and_streams()
+
+        # Assert
+        self.assertEqual(result['num_requests'], 1)
+        self.assertEqual(mock_get_movies_and_streams_from_one_request.call_count, 2)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'ca': '29583:A Dark Truth'})
+        mock_Movie.upsert_batch.assert_called_once_with(make_batches(['movie_ca_1'])['movies'])
+        mock_db.session.commit.assert_called_once()
+
+    def test_seeding_within_budget(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that seeding stops when what is left of the daily request limit is used up, leaving the refresher's share
+        for it.
+        """
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services_objs
+
+        mock_CountryService.convert_list_to_dict.return_value = deepcopy(self.countries_services_dict)
 
-        mock_Movie.upsert_database.assert_called_once_with([])
-        mock_MoviePoster.upsert_database.assert_called_once_with([])
-        mock_StreamingOption.insert_database.assert_called_once_with([])
+        mock_read_checkpoints.return_value = {}
+
+        mock_get_movies_and_streams_from_one_request.side_effect = [
+            {**make_update_batches([f'movie_ca_{i}'], 'ca'), 'next_cursor': f'{i}:Movie'} for i in range(2)
+        ]
+
+        # Act
+        with patch('src.seed.streaming_availability_seeder.get_num_requests_used_today',
+                   return_value=get_daily_limit() - get_refresh_limit() - 2):
+            result = seed_movies_and_streams()
+
+        # Assert
+        self.assertEqual(result['num_requests'], 2)
+        self.assertEqual(mock_get_movies_and_streams_from_one_request.call_count, 2)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'ca': '1:Movie'})
+        mock_db.session.commit.assert_called_once()
 
     def test_seeding_when_there_are_no_countryservices(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption):
@@ -588,7 +724,7 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
 
         mock_CountryService.convert_list_to_dict.return_value = {}
 
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
 
         # Arrange expected
         expected_db_call = call.session.query(mock_CountryService).all().call_list()
@@ -601,32 +737,432 @@ class SeedMoviesAndStreamsUnitTests(TestCase):
         self.assertEqual(mock_db.mock_calls, expected_db_call)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services_objs)
         mock_get_movies_and_streams_from_one_request.assert_not_called()
-        mock_write_json_file_helper.assert_not_called()
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {})
 
-        mock_Movie.upsert_database.assert_called_once_with([])
-        mock_MoviePoster.upsert_database.assert_called_once_with([])
-        mock_StreamingOption.insert_database.assert_called_once_with([])
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
 
     # Maybe add one more test for one country and service, for when there are 20+ pages or cursors.
 
-# ==================================================
 
+@patch('src.seed.streaming_availability_seeder.get_num_requests_used_today', new=MagicMock(return_value=0))
+@patch('src.seed.streaming_availability_seeder.JobRun', new=MagicMock())
+@patch('src.seed.streaming_availability_seeder.job_run', new=fake_job_run)
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', new=MagicMock(**{'get_content_hashes.return_value': {}}))
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+@patch('src.seed.streaming_availability_seeder.Checkpoint', autospec=True)
+@patch('src.seed.streaming_availability_seeder.get_movies_and_streams_from_one_request', autospec=True)
+@patch('src.seed.streaming_availability_seeder.DatabaseRateLimiter', autospec=True)
+@patch('src.seed.streaming_availability_seeder.SeedTask', autospec=True)
+@patch('src.seed.streaming_availability_seeder.enqueue_seed_tasks', autospec=True)
+@patch('src.seed.streaming_availability_seeder.db', autospec=True)
+class SeedMoviesAndStreamsFromWorkQueueUnitTests(TestCase):
+    """Unit tests for seed_movies_and_streams_from_work_queue()."""
+
+    def setUp(self):
+        self.tasks = [
+            {'country_code': 'ca', 'service_ids': ['service00'], 'cursor': None},
+            {'country_code': 'ca', 'service_ids': ['service00'], 'cursor': '2:Movie'},
+            {'country_code': 'us', 'service_ids': ['service01'], 'cursor': None}
+        ]
+
+    def test_seeding_pages_of_claimed_tasks(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that each claimed task's page is requested within the shared rate limit, and saved in its own transaction
+        with the task's next cursor and checkpoint, until there are no tasks left to claim.
+        """
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [*self.tasks, None]
+        mock_SeedTask.complete_page.return_value = True
+
+        next_cursors = ['2:Movie', 'end', 'end']
+        mock_get_movies_and_streams_from_one_request.side_effect = [
+            {**make_update_batches([f'movie{i}'], 'ca'), 'next_cursor': next_cursor}
+            for i, next_cursor in enumerate(next_cursors)
+        ]
+
+        # Act
+        result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 3)
+        mock_enqueue_seed_tasks.assert_called_once()
+        self.assertEqual(mock_DatabaseRateLimiter.return_value.acquire.call_count, 3)
+        mock_get_movies_and_streams_from_one_request.assert_has_calls([
+            call('ca', ['service00'], None), call('ca', ['service00'], '2:Movie'), call('us', ['service01'], None)
+        ])
+        mock_SeedTask.complete_page.assert_has_calls([
+            call('ca', 'worker 1', '2:Movie'), call('ca', 'worker 1', 'end'), call('us', 'worker 1', 'end')
+        ])
+        mock_Checkpoint.upsert_database.assert_has_calls([
+            call(ANY, {'ca': '2:Movie'}), call(ANY, {'ca': 'end'}), call(ANY, {'us': 'end'})
+        ])
+        self.assertEqual(mock_Movie.upsert_batch.call_args_list,
+                         [call(make_batches([f'movie{i}'])['movies']) for i in range(3)])
+        self.assertEqual(mock_db.session.commit.call_count, 3)
+        mock_db.session.rollback.assert_not_called()
+
+    def test_seeding_records_the_run(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that each request is added to the worker's run as it is made, including an unsuccessful one, and that the
+        run is recorded as succeeded with its totals.
+        """
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [self.tasks[0], self.tasks[2], None]
+        mock_SeedTask.complete_page.return_value = True
+        mock_get_movies_and_streams_from_one_request.side_effect = [
+            {**make_update_batches(['movie0'], 'ca'), 'next_cursor': 'end'}, None]
+
+        # Act
+        with patch('src.seed.streaming_availability_seeder.JobRun') as mock_JobRun:
+            mock_JobRun.Statuses = JobRun.Statuses
+            result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 1)
+        num_rows = mock_JobRun.add_progress.call_args_list[0].args[2]
+        self.assertGreater(num_rows, 0)
+        self.assertEqual(mock_JobRun.add_progress.call_args_list, [call(1, 1, num_rows), call(1, 1, 0)])
+        mock_JobRun.finish.assert_called_once_with(1, JobRun.Statuses.SUCCEEDED, 2, num_rows)
+
+    def test_seeding_when_daily_limit_is_used_up(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that a worker stops claiming tasks once the requests in the job history, such as those of other workers,
+        reach the daily request limit, other than the refresher's share.
+        """
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [*self.tasks, None]
+        mock_SeedTask.complete_page.return_value = True
+        mock_get_movies_and_streams_from_one_request.return_value = {
+            **make_update_batches(['movie0'], 'ca'), 'next_cursor': '2:Movie'}
+
+        # Act
+        seeding_limit = get_daily_limit() - get_refresh_limit()
+        with patch('src.seed.streaming_availability_seeder.get_num_requests_used_today',
+                   side_effect=[seeding_limit - 1, seeding_limit]):
+            result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 1)
+        mock_SeedTask.claim.assert_called_once()
+        mock_get_movies_and_streams_from_one_request.assert_called_once()
+
+    def test_seeding_when_another_job_is_running(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """Tests that a worker does not claim any tasks while a job that is not a worker is running."""
+
+        # Arrange mocks
+        @contextmanager
+        def skipped_job_run(job, is_shared=False):
+            yield None
+
+        # Act
+        with patch('src.seed.streaming_availability_seeder.job_run', new=skipped_job_run):
+            result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 0)
+        mock_enqueue_seed_tasks.assert_not_called()
+        mock_SeedTask.claim.assert_not_called()
+
+    def test_seeding_when_response_is_unsuccessful(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """Tests that a task whose request is unsuccessful is released, and is not claimed again by the same worker."""
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [self.tasks[0], None]
+        mock_get_movies_and_streams_from_one_request.return_value = None
+
+        # Act
+        result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 0)
+        mock_SeedTask.release.assert_called_once_with('ca', 'worker 1')
+        self.assertEqual(mock_SeedTask.claim.call_args, call('worker 1', ANY, {'ca'}))
+        mock_SeedTask.complete_page.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+    def test_seeding_when_api_keys_are_exhausted(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that a worker releases its task and stops claiming tasks when every API key is out of its daily quota.
+        """
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [*self.tasks, None]
+        mock_get_movies_and_streams_from_one_request.side_effect = ApiKeysExhaustedError('')
+
+        # Act
+        result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 0)
+        mock_SeedTask.claim.assert_called_once()
+        mock_SeedTask.release.assert_called_once_with('ca', 'worker 1')
+        mock_SeedTask.complete_page.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+    def test_seeding_when_claim_is_lost(
+            self,
+            mock_db,
+            mock_enqueue_seed_tasks,
+            mock_SeedTask,
+            mock_DatabaseRateLimiter,
+            mock_get_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption):
+        """
+        Tests that a page is not saved if its task was claimed by another worker, such as after a slow request, and
+        that the page's movies only have their old streaming options deleted in the transaction that is rolled back.
+        """
+
+        # Arrange mocks
+        mock_SeedTask.claim.side_effect = [self.tasks[0], None]
+        mock_SeedTask.complete_page.return_value = False
+        mock_get_movies_and_streams_from_one_request.return_value = {
+            **make_update_batches(['movie0'], 'ca'), 'next_cursor': 'end'}
+
+        # Act
+        result = seed_movies_and_streams_from_work_queue('worker 1')
+
+        # Assert
+        self.assertEqual(result, 0)
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once()
+        self.assertIn(('movie0', 'ca'), mock_StreamingOption.delete_movies_in_countries.call_args.args[0])
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
+
+
+@patch('src.seed.streaming_availability_seeder.get_country_weights', new=make_same_weights)
+@patch('src.seed.planner.JobRun', autospec=True)
+@patch('src.seed.streaming_availability_seeder.StreamingOption', autospec=True)
+@patch('src.seed.streaming_availability_seeder.read_checkpoints', autospec=True)
+@patch('src.seed.streaming_availability_seeder.get_countries_services', autospec=True)
+class PlanSeedingUnitTests(TestCase):
+    """Unit tests for plan_seeding()."""
+
+    def test_plan_seeding(
+            self,
+            mock_get_countries_services,
+            mock_read_checkpoints,
+            mock_StreamingOption,
+            mock_JobRun):
+        """
+        Tests that pages left are estimated from the countries that are done, and that what is left of the daily quota,
+        other than the refresher's share, is allocated in order to the countries that are not done.
+        """
+
+        # Arrange mocks
+        mock_get_countries_services.return_value = {'au': ['s0'], 'ca': ['s0'], 'gb': ['s0'], 'us': ['s0']}
+        mock_read_checkpoints.return_value = {'au': 'end', 'ca': '100:Movie', 'gb': 'end'}
+        mock_StreamingOption.count_movies_by_country.return_value = {'au': 1000, 'ca': 400, 'gb': 1200}
+        mock_JobRun.get_num_requests_since.return_value = 10
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = plan_seeding()
+
+        # Assert
+        expected_budget = STREAMING_AVAILABILITY_API_REQUEST_RATE_LIMIT_PER_DAY - get_refresh_limit() - 10
+        self.assertEqual(result['budget'], expected_budget)
+        self.assertEqual(result['countries'], [
+            {'country_code': 'ca', 'checkpoint': '100:Movie', 'estimated_pages': 35, 'num_requests': 35},
+            {'country_code': 'us', 'checkpoint': None, 'estimated_pages': 55,
+             'num_requests': min(55, expected_budget - 35)}
+        ])
+        self.assertEqual((result['job'], result['num_transactions'], result['warnings']), ('seeder', 1, []))
+
+    def test_plan_seeding_as_worker(
+            self,
+            mock_get_countries_services,
+            mock_read_checkpoints,
+            mock_StreamingOption,
+            mock_JobRun):
+        """
+        Tests that a worker commits its seed tasks and then each page on its own, and that seeding the services first
+        takes one more request and transaction.
+        """
+
+        # Arrange mocks
+        mock_get_countries_services.return_value = {'ca': ['s0'], 'gb': ['s0']}
+        mock_read_checkpoints.return_value = {'ca': 'end', 'gb': '100:Movie'}
+        mock_StreamingOption.count_movies_by_country.return_value = {'ca': 1000, 'gb': 400}
+        mock_JobRun.get_num_requests_since.return_value = 10
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = plan_seeding(is_worker=True, is_seeding_services=True)
+
+        # Assert
+        self.assertEqual(result['job'], 'seeder_worker')
+        self.assertEqual(result['countries'], [
+            {'country_code': 'gb', 'checkpoint': '100:Movie', 'estimated_pages': 30, 'num_requests': 30}
+        ])
+        self.assertEqual((result['num_service_requests'], result['num_requests'], result['num_transactions']),
+                         (1, 31, 1 + 30 + 1))
+
+    def test_plan_seeding_without_checkpoints_table(
+            self,
+            mock_get_countries_services,
+            mock_read_checkpoints,
+            mock_StreamingOption,
+            mock_JobRun):
+        """Tests that if the checkpoints table can not be read, then every country starts over, with a warning."""
+
+        # Arrange mocks
+        mock_get_countries_services.return_value = {'ca': ['s0'], 'us': ['s0']}
+        mock_read_checkpoints.side_effect = DBAPIError('SELECT', {}, Exception('relation does not exist'))
+        mock_StreamingOption.count_movies_by_country.return_value = {}
+        mock_JobRun.get_num_requests_since.return_value = 0
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = plan_seeding()
+
+        # Assert
+        self.assertEqual([country['checkpoint'] for country in result['countries']], [None, None])
+        self.assertEqual(len(result['warnings']), 1)
+        self.assertIn('checkpoints', result['warnings'][0])
+
+
+def make_countries_body(countries_services: dict[str, list[str]], service_name: str = 'Service') -> dict:
+    """
+    Creates a body of a response from Streaming Availability API's /countries endpoint.
+
+    :param countries_services: {country_code: [free service ID, ...]}.
+    :param service_name: The name to give every service.
+    :return: {country_code: {'services': [...]}}.
+    """
 
-def mock_make_unique_transformed_show_data_side_effect(country: str, service_ids: list, show: dict) -> dict:
     return {
-        'movies': {
-            show['id']: {'id': show['id']}
-        },
-        'movie_posters': {
-            f'{show['id']}-verticalPoster-w240': {'movie_id': show['id'],
-                                                  'type': 'verticalPoster',
-                                                  'size': 'w240',
-                                                  'link': 'link' + show['id']}
-        },
-        'streaming_options': {
-            f'{show['id']}-{country}-{service_ids[0]}-{'link' + show['id']}': {'movie_id': show['id'],
-                                                                               'country_code': country,
-                                                                               'service_id': service_ids[0],
-                                                                               'link': 'link' + show['id']}
-        }
+        country_code: {'services': [
+            {'id': service_id, 'name': service_name, 'homePage': f'https://{service_id}.example.com',
+             'themeColorCode': '#000000', 'streamingOptionTypes': {'free': True},
+             'imageSet': {'lightThemeImage': 'light.svg', 'darkThemeImage': 'dark.svg', 'whiteImage': 'white.svg'}}
+            for service_id in service_ids
+        ]}
+        for country_code, service_ids in countries_services.items()
     }
+
+
+@patch('src.seed.streaming_availability_seeder.requests', autospec=True)
+@patch('src.seed.streaming_availability_seeder.api_key_pool', new_callable=lambda: ApiKeyPool([TEST_API_KEY]))
+class SeedServicesIntegrationTests(TestCase):
+    """Integration tests for seed_services()."""
+
+    def setUp(self):
+        db.session.query(CountryService).delete()
+        db.session.query(Service).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
+    def test_seed_services_again(self, mock_api_key_pool, mock_requests):
+        """
+        Tests that seeding services again updates the services, adds new mappings of countries and services, and
+        deletes the mappings that are no longer in the response, while keeping every service.
+        """
+
+        # Arrange
+        mock_requests.get.return_value = make_mock_json_response(
+            200, make_countries_body({'ca': ['service00'], 'us': ['service00', 'service01']}))
+        seed_services()
+
+        mock_requests.get.return_value = make_mock_json_response(
+            200, make_countries_body({'ca': ['service00', 'service02'], 'us': ['service00']}, 'New Name'))
+
+        # Act
+        result = seed_services()
+
+        # Assert
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            CountryService.convert_list_to_dict(
+                db.session.query(CountryService).order_by(CountryService.country_code, CountryService.service_id)),
+            {'ca': ['service00', 'service02'], 'us': ['service00']})
+        self.assertEqual(
+            db.session.query(Service.id, Service.name).order_by(Service.id).all(),
+            [('service00', 'New Name'), ('service01', 'Service'), ('service02', 'New Name')])
+
+    def test_seed_services_without_free_services(self, mock_api_key_pool, mock_requests):
+        """Tests that a response without any free services does not delete the saved mappings."""
+
+        # Arrange
+        mock_requests.get.return_value = make_mock_json_response(200, make_countries_body({'us': ['service00']}))
+        seed_services()
+
+        mock_requests.get.return_value = make_mock_json_response(200, make_countries_body({'us': []}))
+
+        # Act
+        seed_services()
+
+        # Assert
+        self.assertEqual(CountryService.convert_list_to_dict(db.session.query(CountryService)), {'us': ['service00']})
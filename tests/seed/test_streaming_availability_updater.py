@@ -8,21 +8,37 @@ sys.path.append(root_dir)  # nopep8
 
 # --------------------------------------------------
 
+import json
 from copy import deepcopy
+from datetime import datetime, timedelta, timezone
 from math import ceil
 from unittest import TestCase
 from unittest.mock import ANY, MagicMock, call, patch
 
+from requests.exceptions import RequestException
+from sqlalchemy.exc import DBAPIError
+
+from src.adapters.streaming_availability_adapter import make_page_batches
 from src.app import create_app
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
 from src.exceptions.StreamingAvailabilityApiError import \
     StreamingAvailabilityApiError
 from src.models.common import connect_db, db
-from src.seed.seed_updater_constants import \
-    SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY
+from src.seed.seed_updater_constants import (
+    SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY, SA_API_STREAM_RESPONSES,
+    SA_UPDATE_CHANGES_PER_POLL, SA_UPDATE_MAX_POLL_INTERVAL_DAYS)
+from src.seed.seeder_updater_helpers import group_streaming_options
 from src.seed.streaming_availability_updater import (
+    get_change_type_checkpoint_job, get_poll_interval,
     get_updated_movies_and_streaming_options,
-    get_updated_movies_and_streams_from_one_request)
-from tests.utilities import CopyingMock
+    get_updated_movies_and_streams_from_one_request, measure_change_rate,
+    next_timestamps_file_location, parse_since, plan_updates,
+    refresh_services, select_due_countries)
+from src.util.api_key_pool import ApiKeyPool
+from src.util.response_archive import ResponseArchive
+from tests.utilities import (TransformPageStub, make_batches,
+                             make_mock_json_response, make_same_weights,
+                             make_update_batches)
 
 # ==================================================
 
@@ -33,23 +49,31 @@ app.app_context().push()
 db.drop_all()
 db.create_all()
 
+TEST_API_KEY = 'test api key'
+
 STREAMING_AVAILABILITY_CHANGES_URL = 'https://streaming-availability.p.rapidapi.com/changes'
 
 # --------------------------------------------------
 
 
+@patch('src.seed.streaming_availability_updater.refresh_services', new=MagicMock(return_value=0))
+@patch('src.seed.streaming_availability_updater.SA_UPDATE_CHANGE_TYPES', new=('updated',))
+@patch('src.seed.streaming_availability_updater.CountryChangeRate',
+       new=MagicMock(**{'get_change_rates.return_value': {}}))
+@patch('src.seed.streaming_availability_updater.get_country_weights', new=make_same_weights)
 @patch('src.seed.streaming_availability_updater.StreamingOption', autospec=True)
-@patch('src.seed.streaming_availability_updater.MoviePoster', autospec=True)
-@patch('src.seed.streaming_availability_updater.Movie', autospec=True)
-@patch('src.seed.streaming_availability_updater.write_json_file_helper', new_callable=CopyingMock())
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', new=MagicMock(**{'get_content_hashes.return_value': {}}))
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+@patch('src.seed.streaming_availability_updater.Checkpoint', autospec=True)
 @patch('src.seed.streaming_availability_updater.get_updated_movies_and_streams_from_one_request', autospec=True)
-@patch('src.seed.streaming_availability_updater.read_json_file_helper', autospec=True)
+@patch('src.seed.streaming_availability_updater.read_checkpoints', autospec=True)
 @patch('src.seed.streaming_availability_updater.CountryService', autospec=True)
 @patch('src.seed.streaming_availability_updater.db', autospec=True)
 class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
     """
     Unit tests for get_updated_movies_and_streaming_options().
-    Note that all patched imports using CopyingMock need to be reset after each test, since only one instance is used.
     """
 
     def setUp(self):
@@ -59,12 +83,13 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """Tests that requests to retrieve updates are done with and without the "from" timestamps."""
 
@@ -84,12 +109,9 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
 
                 expected_next_from_timestamp = 9999
 
-                # using strings in place of dictionaries in the lists should still work, since only the object matters
-                def side_effect_func(country_code, service_ids, from_timestamp):
+                def side_effect_func(country_code, service_ids, from_timestamp, change_type):
                     return {
-                        'movies': {f'movie_{country_code}': 'movie'},
-                        'movie_posters': {f'movie_poster_{country_code}': 'movie_poster'},
-                        'streaming_options': {f'streaming_option_{country_code}': 'streaming_option'},
+                        **make_update_batches([f'movie_{country_code}']),
                         'has_more': False,
                         'next_from_timestamp': expected_next_from_timestamp
                     }
@@ -97,7 +119,7 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
                 # Arrange mocks
                 mock_db.session.query.return_value.all.return_value = self.mock_countries_services
                 mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-                mock_read_json_file_helper.return_value = test_parameter['from_timestamps']
+                mock_read_checkpoints.return_value = test_parameter['from_timestamps']
                 mock_get_updated_movies_and_streams_from_one_request.side_effect = side_effect_func
 
                 # Arrange expected
@@ -108,20 +130,14 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
                     call(
                         country_code,
                         countries_services[country_code],
-                        test_parameter['expected_from_timestamp'][country_code]
+                        test_parameter['expected_from_timestamp'][country_code],
+                        'updated'
                     )
                     for country_code in countries_services
                 ]
 
-                # get base from_timestamps then deepcopy and add to new calls
-                expected_write_json_calls = []
-                temp_from_timestamps = deepcopy(test_parameter['from_timestamps'])
-                for country_code in countries_services:
-                    temp_from_timestamps |= {country_code: expected_next_from_timestamp}
-                    expected_write_json_calls.append(call(
-                        ANY,
-                        deepcopy(temp_from_timestamps)
-                    ))
+                expected_checkpoints = {country_code: expected_next_from_timestamp
+                                        for country_code in countries_services}
 
                 # Act
                 get_updated_movies_and_streaming_options()
@@ -129,47 +145,142 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
                 # Assert
                 self.assertEqual(mock_db.mock_calls, expected_db_calls)
                 mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-                mock_read_json_file_helper.assert_called_once()
+                mock_read_checkpoints.assert_called_once()
                 mock_get_updated_movies_and_streams_from_one_request.assert_has_calls(
                     expected_get_updated_movies_and_streams_from_one_request_calls
                 )
-                mock_write_json_file_helper.assert_has_calls(expected_write_json_calls)
+                mock_Checkpoint.upsert_database.assert_called_once_with(ANY, expected_checkpoints)
 
-                num_countries = len(countries_services)
-                mock_Movie.upsert_database.assert_called_once_with(
-                    ['movie' for i in range(num_countries)])
-                mock_MoviePoster.upsert_database.assert_called_once_with(
-                    ['movie_poster' for i in range(num_countries)])
-                mock_StreamingOption.insert_database.assert_called_once_with(
-                    ['streaming_option' for i in range(num_countries)])
+                expected_batches = make_batches(f'movie_{country_code}' for country_code in countries_services)
+                mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+                mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+                mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
 
                 # clean up
                 mock_db.reset_mock()
                 mock_CountryService.reset_mock()
-                mock_read_json_file_helper.reset_mock()
+                mock_read_checkpoints.reset_mock()
                 mock_get_updated_movies_and_streams_from_one_request.reset_mock()
-                mock_write_json_file_helper.reset_mock()
+                mock_Checkpoint.reset_mock()
                 mock_Movie.reset_mock()
                 mock_MoviePoster.reset_mock()
                 mock_StreamingOption.reset_mock()
 
+
+    def test_get_updates_for_selected_country_and_service_since_a_time(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that only the selected country and service are updated, from the given time instead of the saved
+        timestamp, and that the timestamp is saved separately from the timestamps for all services.
+        """
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services
+        mock_CountryService.convert_list_to_dict.return_value = {'ca': ['service00', 'service01'],
+                                                                 'us': ['service01', 'service02']}
+        mock_read_checkpoints.return_value = {'ca': '1000', 'us': '2000'}
+        mock_get_updated_movies_and_streams_from_one_request.return_value = {
+            **make_update_batches(['movie_us']),
+            'has_more': False,
+            'next_from_timestamp': 9999
+        }
+
+        # Act
+        get_updated_movies_and_streaming_options(['us'], ['service02'], since=1500)
+
+        # Assert
+        mock_read_checkpoints.assert_called_once_with('updater:service02', None)
+        mock_get_updated_movies_and_streams_from_one_request.assert_called_once_with(
+            'us', ['service02'], 1500, 'updated')
+        mock_Checkpoint.upsert_database.assert_called_once_with('updater:service02', {'ca': 1000, 'us': 9999})
+
+    def test_get_updates_of_every_change_type(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that each country gets every type of changes, one type after another, from each type's own timestamps,
+        and that the streaming options of changed movies are replaced and expired streaming options are deleted.
+        """
+
+        # Arrange
+        change_types = ('new', 'updated', 'removed')
+        next_from_timestamps = {'new': 2001, 'updated': 2002, 'removed': 2003}
+
+        def side_effect_func(country_code, service_ids, from_timestamp, change_type):
+            return {
+                **make_update_batches([f'movie_{change_type}']),
+                'has_more': False,
+                'next_from_timestamp': next_from_timestamps[change_type]
+            }
+
+        # Arrange mocks
+        mock_CountryService.convert_list_to_dict.return_value = {'us': ['service00']}
+        mock_read_checkpoints.return_value = {'us': 1000}
+        mock_get_updated_movies_and_streams_from_one_request.side_effect = side_effect_func
+
+        # Act
+        with patch('src.seed.streaming_availability_updater.SA_UPDATE_CHANGE_TYPES', change_types):
+            get_updated_movies_and_streaming_options()
+
+        # Assert
+        mock_read_checkpoints.assert_has_calls([
+            call('updater/new', None),
+            call('updater', next_timestamps_file_location),
+            call('updater/removed', None)
+        ])
+        mock_get_updated_movies_and_streams_from_one_request.assert_has_calls([
+            call('us', ['service00'], 1000, change_type) for change_type in change_types
+        ])
+        mock_Checkpoint.upsert_database.assert_has_calls([
+            call('updater/new', {'us': 2001}),
+            call('updater', {'us': 2002}),
+            call('updater/removed', {'us': 2003})
+        ])
+
+        expected_movie_ids = [f'movie_{change_type}' for change_type in change_types]
+        mock_StreamingOption.delete_movies_in_countries.assert_called_once_with(
+            [(movie_id, movie_id) for movie_id in expected_movie_ids])
+        mock_StreamingOption.insert_batch.assert_called_once_with(
+            make_batches(expected_movie_ids)['streaming_options'])
+        mock_updater_StreamingOption.delete_expired.assert_called_once()
+
     def test_get_updates_when_there_are_no_updates(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """
         Tests for the condition of when there are no updates, the next "from" timestamp is not saved and no more
         requests are made.
 
         Essentially tests that get_updated_movies_and_streams_from_one_request() returns
-        'movies': {}, 'movie_posters': {}, 'streaming_options': {}, has_more = false, and
+        empty batches for 'movies', 'movie_posters', and 'streaming_options', has_more = false, and
         next_from_timestamp = None.
         """
 
@@ -179,11 +290,9 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Arrange mocks
         mock_db.session.query.return_value.all.return_value = self.mock_countries_services
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
         mock_get_updated_movies_and_streams_from_one_request.return_value = {
-            'movies': {},
-            'movie_posters': {},
-            'streaming_options': {},
+            **make_page_batches(),
             'has_more': False,
             'next_from_timestamp': None
         }
@@ -198,25 +307,27 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_calls)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_updated_movies_and_streams_from_one_request.assert_called_once_with(
-            'us', countries_services['us'], None)
-        mock_write_json_file_helper.assert_not_called()
+            'us', countries_services['us'], None, 'updated')
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {})
 
-        mock_Movie.upsert_database.assert_called_once_with([])
-        mock_MoviePoster.upsert_database.assert_called_once_with([])
-        mock_StreamingOption.insert_database.assert_called_once_with([])
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
 
     def test_get_updates_when_there_is_only_one_page_of_updates(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """
         Tests that when getting updates and receiving only one page of updates, the next "from" timestamp is saved and
@@ -233,11 +344,9 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Arrange mocks
         mock_db.session.query.return_value.all.return_value = self.mock_countries_services
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
         mock_get_updated_movies_and_streams_from_one_request.return_value = {
-            'movies': {'movie1': 'movie'},
-            'movie_posters': {'poster1': 'movie_poster'},
-            'streaming_options': {'option1': 'streaming_option'},
+            **make_update_batches(['movie1']),
             'has_more': False,
             'next_from_timestamp': expected_next_from_timestamp
         }
@@ -252,32 +361,27 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_calls)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_updated_movies_and_streams_from_one_request.assert_called_once_with(
-            'us', countries_services['us'], None)
-        mock_write_json_file_helper.assert_called_once_with(ANY, {'us': expected_next_from_timestamp})
-
-        num_countries = len(countries_services)
-        mock_Movie.upsert_database.assert_called_once_with(
-            ['movie' for i in range(num_countries)])
-        mock_MoviePoster.upsert_database.assert_called_once_with(
-            ['movie_poster' for i in range(num_countries)])
-        mock_StreamingOption.insert_database.assert_called_once_with(
-            ['streaming_option' for i in range(num_countries)])
+            'us', countries_services['us'], None, 'updated')
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'us': expected_next_from_timestamp})
 
-        # clean up
-        mock_write_json_file_helper.reset_mock()
+        expected_batches = make_batches(['movie1'])
+        mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
 
     def test_get_updates_when_there_is_more_to_get(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """
         Tests that when getting updates and receiving only one page of updates, the next "from" timestamp is saved and
@@ -291,21 +395,16 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         countries_services = {'us': ['service00']}
         expected_next_from_timestamps = [1000, 2000]
 
-        # using strings in place of dictionaries in the lists should still work, since only the object matters
-        def side_effect_func(country_code, service_ids, from_timestamp):
+        def side_effect_func(country_code, service_ids, from_timestamp, change_type):
             if not from_timestamp:
                 return {
-                    'movies': {'movie1': 'movie'},
-                    'movie_posters': {'poster1': 'movie_poster'},
-                    'streaming_options': {'option1': 'streaming_option'},
+                    **make_update_batches(['movie1']),
                     'has_more': True,
                     'next_from_timestamp': expected_next_from_timestamps[0]
                 }
             else:
                 return {
-                    'movies': {'movie2': 'movie'},
-                    'movie_posters': {'poster2': 'movie_poster'},
-                    'streaming_options': {'option2': 'streaming_option'},
+                    **make_update_batches(['movie2']),
                     'has_more': False,
                     'next_from_timestamp': expected_next_from_timestamps[1]
                 }
@@ -313,7 +412,7 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Arrange mocks
         mock_db.session.query.return_value.all.return_value = self.mock_countries_services
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
         mock_get_updated_movies_and_streams_from_one_request.side_effect = side_effect_func
 
         # Arrange expected
@@ -326,36 +425,29 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_calls)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         mock_get_updated_movies_and_streams_from_one_request.assert_has_calls([
-            call('us', countries_services['us'], None),
-            call('us', countries_services['us'], 1000)
+            call('us', countries_services['us'], None, 'updated'),
+            call('us', countries_services['us'], 1000, 'updated')
         ])
-        mock_write_json_file_helper.assert_has_calls([
-            call(ANY, {'us': expected_next_from_timestamp})
-            for expected_next_from_timestamp in expected_next_from_timestamps
-        ])
-
-        mock_Movie.upsert_database.assert_called_once_with(
-            ['movie' for i in range(2)])
-        mock_MoviePoster.upsert_database.assert_called_once_with(
-            ['movie_poster' for i in range(2)])
-        mock_StreamingOption.insert_database.assert_called_once_with(
-            ['streaming_option' for i in range(2)])
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'us': expected_next_from_timestamps[-1]})
 
-        # clean up
-        mock_write_json_file_helper.reset_mock()
+        expected_batches = make_batches(['movie1', 'movie2'])
+        mock_Movie.upsert_batch.assert_called_once_with(expected_batches['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(expected_batches['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(expected_batches['streaming_options'])
 
     def test_get_updates_is_within_rate_limits(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """
         Tests that the number of requests does not go near the rate limit.  This only considers multiple countries,
@@ -368,12 +460,10 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
                               'us': ['service01', 'service02']}
         expected_next_from_timestamp = 12345
 
-        def side_effect(country_code, service_ids, from_timestamp):
+        def side_effect(country_code, service_ids, from_timestamp, change_type):
             # empty because unimportant
             transformed_request_data = {
-                'movies': {},
-                'movie_posters': {},
-                'streaming_options': {}
+                **make_page_batches()
             }
 
             # Since there are >1 countries, stop requests for first country at 50% call count.
@@ -392,7 +482,7 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Arrange mocks
         mock_db.session.query.return_value.all.return_value = self.mock_countries_services
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
         mock_get_updated_movies_and_streams_from_one_request.side_effect = side_effect
 
         # Arrange expected
@@ -406,36 +496,85 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_calls)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
         self.assertEqual(mock_get_updated_movies_and_streams_from_one_request.call_count,
                          expected_max_request_count)
         for country_code in countries_services:
             mock_get_updated_movies_and_streams_from_one_request.assert_any_call(
-                country_code, countries_services[country_code], expected_next_from_timestamp)
-        self.assertEqual(mock_write_json_file_helper.call_count,
-                         expected_max_request_count)
-        mock_write_json_file_helper.assert_called_with(
+                country_code, countries_services[country_code], expected_next_from_timestamp, 'updated')
+        mock_Checkpoint.upsert_database.assert_called_once_with(
             ANY,
             {'ca': expected_next_from_timestamp, 'us': expected_next_from_timestamp}
         )
 
-        mock_Movie.upsert_database.assert_called_once()
-        mock_MoviePoster.upsert_database.assert_called_once()
-        mock_StreamingOption.insert_database.assert_called_once()
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
 
-        # clean up
-        mock_write_json_file_helper.reset_mock()
+    def test_get_updates_shares_requests_between_countries(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that countries take turns making requests, so that countries later in the list still get requests made
+        for them when there are more updates than the request limit allows.  Also tests that each country's "from"
+        timestamp is advanced independently.
+        """
+
+        # Arrange
+        countries_services = {'ca': ['service00'],
+                              'mx': ['service00'],
+                              'us': ['service00']}
+        max_request_count = 6
+
+        def side_effect(country_code, service_ids, from_timestamp, change_type):
+            return {
+                **make_page_batches(),
+                'has_more': True,
+                'next_from_timestamp': (from_timestamp or 0) + 1
+            }
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services
+        mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
+        mock_read_checkpoints.return_value = {}
+        mock_get_updated_movies_and_streams_from_one_request.side_effect = side_effect
+
+        # Act
+        with patch('src.seed.streaming_availability_updater.SA_API_PREFERRED_REQUEST_RATE_LIMIT_PER_DAY',
+                   max_request_count):
+            get_updated_movies_and_streaming_options()
+
+        # Assert
+        self.assertEqual(mock_get_updated_movies_and_streams_from_one_request.call_count, max_request_count)
+        for country_code in countries_services:
+            mock_get_updated_movies_and_streams_from_one_request.assert_any_call(
+                country_code, countries_services[country_code], None, 'updated')
+            mock_get_updated_movies_and_streams_from_one_request.assert_any_call(
+                country_code, countries_services[country_code], 1, 'updated')
+
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'ca': 2, 'mx': 2, 'us': 2})
 
     def test_get_updates_returns_error(
             self,
             mock_db,
             mock_CountryService,
-            mock_read_json_file_helper,
+            mock_read_checkpoints,
             mock_get_updated_movies_and_streams_from_one_request,
-            mock_write_json_file_helper,
+            mock_Checkpoint,
             mock_Movie,
             mock_MoviePoster,
-            mock_StreamingOption
+            mock_StreamingOption,
+            mock_updater_StreamingOption
     ):
         """
         If a Streaming Availability API call results in an error, then exit without saving the next "from" timestamp,
@@ -450,7 +589,7 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Arrange mocks
         mock_db.session.query.return_value.all.return_value = self.mock_countries_services
         mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
-        mock_read_json_file_helper.return_value = {}
+        mock_read_checkpoints.return_value = {}
         mock_get_updated_movies_and_streams_from_one_request.side_effect = StreamingAvailabilityApiError("")
 
         # Arrange expected
@@ -463,20 +602,211 @@ class GetUpdatedMoviesAndStreamingOptionsUnitTests(TestCase):
         # Assert
         self.assertEqual(mock_db.mock_calls, expected_db_calls)
         mock_CountryService.convert_list_to_dict.assert_called_once_with(self.mock_countries_services)
-        mock_read_json_file_helper.assert_called_once()
+        mock_read_checkpoints.assert_called_once()
+        mock_get_updated_movies_and_streams_from_one_request.assert_called_once_with(
+            'us', countries_services['us'], None, 'updated')
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {})
+
+        # nothing is written when there are no rows
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
+
+    def test_get_updates_when_api_keys_are_exhausted(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that requests stop when every API key is out of its daily quota, and that the request that could not be
+        made is not counted.
+        """
+
+        # Arrange
+        countries_services = {'us': ['service00']}
+
+        # Arrange mocks
+        mock_db.session.query.return_value.all.return_value = self.mock_countries_services
+        mock_CountryService.convert_list_to_dict.return_value = deepcopy(countries_services)
+        mock_read_checkpoints.return_value = {}
+        mock_get_updated_movies_and_streams_from_one_request.side_effect = [
+            {**make_page_batches(), 'has_more': True, 'next_from_timestamp': 12345},
+            ApiKeysExhaustedError('')
+        ]
+
+        # Act
+        result = get_updated_movies_and_streaming_options()
+
+        # Assert
+        self.assertEqual(mock_get_updated_movies_and_streams_from_one_request.call_count, 2)
+        self.assertEqual(result['num_requests'], 1)
+        mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'us': 12345})
+
+    def test_get_updates_when_response_body_can_not_be_read(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that a response body that is truncated or is missing a field stops the requests, is counted, and that the
+        data and timestamps retrieved before it are still saved.
+        """
+
+        errors = [json.JSONDecodeError('Expecting value', '{"shows": [', 11), KeyError('changes')]
+
+        for error in errors:
+            with self.subTest(error=error):
+
+                # Arrange mocks
+                mock_db.session.query.return_value.all.return_value = self.mock_countries_services
+                mock_CountryService.convert_list_to_dict.return_value = {'us': ['service00']}
+                mock_read_checkpoints.return_value = {}
+                mock_get_updated_movies_and_streams_from_one_request.side_effect = [
+                    {**make_update_batches(['movie1']), 'has_more': True, 'next_from_timestamp': 12345},
+                    error
+                ]
+
+                # Act
+                result = get_updated_movies_and_streaming_options()
+
+                # Assert
+                self.assertEqual(mock_get_updated_movies_and_streams_from_one_request.call_count, 2)
+                self.assertEqual(result['num_requests'], 2)
+                mock_Checkpoint.upsert_database.assert_called_once_with(ANY, {'us': 12345})
+                mock_Movie.upsert_batch.assert_called_once_with(make_batches(['movie1'])['movies'])
+                mock_db.session.commit.assert_called_once()
+
+                # clean up
+                mock_db.reset_mock()
+                mock_get_updated_movies_and_streams_from_one_request.reset_mock()
+                mock_Checkpoint.reset_mock()
+                mock_Movie.reset_mock()
+
+
+@patch('src.seed.streaming_availability_updater.refresh_services', new=MagicMock(return_value=0))
+@patch('src.seed.streaming_availability_updater.SA_UPDATE_CHANGE_TYPES', new=('updated',))
+@patch('src.seed.streaming_availability_updater.get_country_weights', new=make_same_weights)
+@patch('src.seed.streaming_availability_updater.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MovieContentHash', new=MagicMock(**{'get_content_hashes.return_value': {}}))
+@patch('src.seed.seeder_updater_helpers.StreamingOption', autospec=True)
+@patch('src.seed.seeder_updater_helpers.MoviePoster', autospec=True)
+@patch('src.seed.seeder_updater_helpers.Movie', autospec=True)
+@patch('src.seed.streaming_availability_updater.CountryChangeRate', autospec=True)
+@patch('src.seed.streaming_availability_updater.Checkpoint', autospec=True)
+@patch('src.seed.streaming_availability_updater.get_updated_movies_and_streams_from_one_request', autospec=True)
+@patch('src.seed.streaming_availability_updater.read_checkpoints', autospec=True)
+@patch('src.seed.streaming_availability_updater.CountryService', autospec=True)
+@patch('src.seed.streaming_availability_updater.db', autospec=True)
+class AdaptivePollingUnitTests(TestCase):
+    """Unit tests for polling countries by their change rates, in get_updated_movies_and_streaming_options()."""
+
+    def test_only_due_countries_are_updated(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_get_updated_movies_and_streams_from_one_request,
+            mock_Checkpoint,
+            mock_CountryChangeRate,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_updater_StreamingOption
+    ):
+        """
+        Tests that a country whose next poll is not due is skipped, and that the change rate of a country that has no
+        more changes is measured and saved.
+        """
+
+        # Arrange
+        now = datetime.now(timezone.utc)
+        from_timestamp = int((now - timedelta(days=2)).timestamp())
+
+        # Arrange mocks
+        mock_CountryService.convert_list_to_dict.return_value = {'ca': ['service00'], 'us': ['service01']}
+        mock_read_checkpoints.return_value = {'ca': from_timestamp, 'us': from_timestamp}
+        mock_CountryChangeRate.get_change_rates.return_value = {
+            'ca': {'changes_per_day': 0.1, 'next_poll_at': now + timedelta(days=5)},
+            'us': {'changes_per_day': 20, 'next_poll_at': now - timedelta(hours=1)}
+        }
+        mock_get_updated_movies_and_streams_from_one_request.return_value = {
+            **make_update_batches([f'movie_{i}' for i in range(10)]),
+            'has_more': False,
+            'next_from_timestamp': 9999
+        }
+
+        # Act
+        get_updated_movies_and_streaming_options()
+
+        # Assert
         mock_get_updated_movies_and_streams_from_one_request.assert_called_once_with(
-            'us', countries_services['us'], None)
-        mock_write_json_file_helper.assert_not_called()
+            'us', ['service01'], from_timestamp, 'updated')
+
+        change_rates = mock_CountryChangeRate.upsert_database.call_args.args[1]
+        self.assertEqual(list(change_rates), ['us'])
+        self.assertAlmostEqual(change_rates['us']['changes_per_day'], (10 / 2 + 20) / 2, places=2)
+
+
+class ChangeRateUnitTests(TestCase):
+    """Unit tests for get_poll_interval(), measure_change_rate(), and select_due_countries()."""
 
-        mock_Movie.upsert_database.assert_called_once()
-        mock_MoviePoster.upsert_database.assert_called_once()
-        mock_StreamingOption.insert_database.assert_called_once()
+    def test_get_poll_interval(self):
+        """Tests that countries are polled once enough changes build up, and at least every max interval."""
 
+        # Act/Assert
+        self.assertEqual(get_poll_interval(SA_UPDATE_CHANGES_PER_POLL * 4), timedelta(days=0.25))
+        self.assertEqual(get_poll_interval(0.001), timedelta(days=SA_UPDATE_MAX_POLL_INTERVAL_DAYS))
+        self.assertEqual(get_poll_interval(0), timedelta(days=SA_UPDATE_MAX_POLL_INTERVAL_DAYS))
+
+    def test_measure_change_rate(self):
+        """Tests that a first measurement is used as is, and that later measurements are averaged."""
+
+        # Arrange
+        now = datetime(2024, 5, 11, tzinfo=timezone.utc)
+        from_timestamp = int(datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp())
+
+        # Act
+        first_result = measure_change_rate(None, 50, from_timestamp, now)
+        later_result = measure_change_rate({'changes_per_day': 15, 'next_poll_at': now}, 50, from_timestamp, now)
+
+        # Assert
+        self.assertEqual(first_result['changes_per_day'], 5)
+        self.assertEqual(first_result['next_poll_at'], now + get_poll_interval(5))
+        self.assertEqual(later_result['changes_per_day'], 10)
+
+    def test_select_due_countries(self):
+        """Tests that countries are due once their next poll time has passed, or if they do not have a change rate."""
+
+        # Arrange
+        now = datetime(2024, 5, 11, tzinfo=timezone.utc)
+        change_rates = {'ca': {'changes_per_day': 1, 'next_poll_at': now},
+                        'gb': {'changes_per_day': 1, 'next_poll_at': now + timedelta(seconds=1)}}
+
+        # Act
+        result = select_due_countries({'ca': ['s0'], 'gb': ['s0'], 'us': ['s0']}, change_rates, now)
+
+        # Assert
+        self.assertEqual(result, {'ca': ['s0'], 'us': ['s0']})
 
-@patch('src.seed.streaming_availability_updater.make_unique_transformed_show_data', autospec=True)
-@patch('src.seed.streaming_availability_updater.delete_country_movie_streaming_options', autospec=True)
+
+@patch('src.seed.streaming_availability_updater.transform_page', autospec=True)
 @patch('src.seed.streaming_availability_updater.requests', autospec=True)
-@patch('src.seed.streaming_availability_updater.RAPID_API_KEY')
+@patch('src.seed.streaming_availability_updater.api_key_pool', new_callable=lambda: ApiKeyPool([TEST_API_KEY]))
+@patch('src.seed.streaming_availability_updater.response_archive', new=ResponseArchive(None))
 class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
     """Unit tests for get_updated_movies_and_streams_from_one_request()."""
 
@@ -485,24 +815,23 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         self.service_ids = ['service00', 'service01']
         self.expected_catalogs = 'service00.free, service01.free'
 
-        # using strings in place of dictionaries in the dict values should still work, since only the object matters
-        self.unique_transformed_show_data = {
-            'movies': {'movie1': 'movie1'},
-            'movie_posters': {'poster1': 'poster1'},
-            'streaming_options': {'option1': 'option1'}
+        self.transformed_page = make_batches(['movie1'])
+        self.expected_batches = {
+            'movies': self.transformed_page['movies'],
+            'movie_posters': self.transformed_page['movie_posters'],
+            'streaming_option_groups': group_streaming_options(self.transformed_page, self.country_code)
         }
 
     def test_get_updates_from_one_request_when_there_is_more_data_to_retrieve(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """
         Tests retrieving updated changes, with and without providing a "from" timestamp, and when there are changes
         returned and there is more data to retrieve.  It should return a dict {'movies', 'movie_posters',
-        'streaming_options', 'has_more', 'next_from_timestamp'}.
+        'streaming_option_groups', 'has_more', 'next_from_timestamp'}.
         """
 
         # Arrange subtest parameters
@@ -517,19 +846,17 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
                 has_more = True
 
                 # Arrange mocks
-                mock_response = MagicMock(name='mock_response')
-                mock_response.status_code = 200
-                mock_response.json.return_value = {
-                    'changes': [],
+                mock_requests.get.return_value = make_mock_json_response(200, {
+                    'changes': [{'showId': show_id, 'timestamp': 5000}],
                     'shows': {
                         show_id: deepcopy(show)
                     },
                     'hasMore': has_more,
                     'nextCursor': f'{expected_next_from_timestamp}:6666'
-                }
-                mock_requests.get.return_value = mock_response
+                })
 
-                mock_make_unique_transformed_show_data.return_value = deepcopy(self.unique_transformed_show_data)
+                transform_page_stub = TransformPageStub(self.transformed_page)
+                mock_transform_page.side_effect = transform_page_stub
 
                 # Arrange expected
                 expected_query_string = {'change_type': 'updated', 'country': self.country_code, 'item_type': 'show',
@@ -537,7 +864,7 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
                 if from_timestamp:
                     expected_query_string['from'] = from_timestamp
 
-                expected_result = deepcopy(self.unique_transformed_show_data)
+                expected_result = deepcopy(self.expected_batches)
                 expected_result |= {'has_more': has_more, 'next_from_timestamp': expected_next_from_timestamp}
 
                 # Act
@@ -547,25 +874,24 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
                 # Assert
                 mock_requests.get.assert_called_once_with(
                     STREAMING_AVAILABILITY_CHANGES_URL,
-                    headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-                    params=expected_query_string)
+                    headers={'X-RapidAPI-Key': TEST_API_KEY},
+                    params=expected_query_string,
+                    stream=SA_API_STREAM_RESPONSES)
 
-                mock_delete_country_movie_streaming_options.assert_called_once_with(show_id, self.country_code)
-                mock_make_unique_transformed_show_data.assert_called_once_with(show)
+                mock_transform_page.assert_called_once()
+                self.assertEqual(transform_page_stub.shows, [show])
 
                 self.assertEqual(result, expected_result)
 
                 # clean up
                 mock_requests.reset_mock()
-                mock_delete_country_movie_streaming_options.reset_mock()
-                mock_make_unique_transformed_show_data.reset_mock()
+                mock_transform_page.reset_mock()
 
     def test_get_updates_from_one_request_and_receive_no_updates(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """Tests retrieving updated changes, but there aren't any changes in the response."""
 
@@ -574,14 +900,14 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         has_more = False
 
         # Arrange mocks
-        mock_response = MagicMock(name='mock_response')
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_requests.get.return_value = make_mock_json_response(200, {
             'changes': [],
             'shows': {},
             'hasMore': has_more
-        }
-        mock_requests.get.return_value = mock_response
+        })
+
+        transform_page_stub = TransformPageStub(make_page_batches())
+        mock_transform_page.side_effect = transform_page_stub
 
         # Arrange expected
         expected_query_string = {'change_type': 'updated', 'country': self.country_code, 'item_type': 'show',
@@ -596,20 +922,19 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         # Assert
         mock_requests.get.assert_called_once_with(
             STREAMING_AVAILABILITY_CHANGES_URL,
-            headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-            params=expected_query_string)
+            headers={'X-RapidAPI-Key': TEST_API_KEY},
+            params=expected_query_string,
+            stream=SA_API_STREAM_RESPONSES)
 
-        mock_delete_country_movie_streaming_options.assert_not_called()
-        mock_make_unique_transformed_show_data.assert_not_called()
+        self.assertEqual(transform_page_stub.shows, [])
 
         self.assertEqual(result, expected_result)
 
     def test_get_updates_from_one_request_and_body_has_no_more(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """
         Tests retrieving updated changes and there are changes returned, but there are no more changes after those.
@@ -622,25 +947,23 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         last_changes_timestamp = 99
 
         # Arrange mocks
-        mock_response = MagicMock(name='mock_response')
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_requests.get.return_value = make_mock_json_response(200, {
             'changes': [{'timestamp': last_changes_timestamp - 1}, {'timestamp': last_changes_timestamp}],
             'shows': {
                 shows[0]['id']: deepcopy(shows[0]),
                 shows[1]['id']: deepcopy(shows[1])
             },
             'hasMore': has_more
-        }
-        mock_requests.get.return_value = mock_response
+        })
 
-        mock_make_unique_transformed_show_data.return_value = deepcopy(self.unique_transformed_show_data)
+        transform_page_stub = TransformPageStub(self.transformed_page)
+        mock_transform_page.side_effect = transform_page_stub
 
         # Arrange expected
         expected_query_string = {'change_type': 'updated', 'country': self.country_code, 'item_type': 'show',
                                  'show_type': 'movie', 'catalogs': self.expected_catalogs, 'from': from_timestamp}
 
-        expected_result = deepcopy(self.unique_transformed_show_data)
+        expected_result = deepcopy(self.expected_batches)
         expected_result['has_more'] = has_more
         expected_result['next_from_timestamp'] = last_changes_timestamp + 1
 
@@ -651,30 +974,139 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         # Assert
         mock_requests.get.assert_called_once_with(
             STREAMING_AVAILABILITY_CHANGES_URL,
-            headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-            params=expected_query_string)
+            headers={'X-RapidAPI-Key': TEST_API_KEY},
+            params=expected_query_string,
+            stream=SA_API_STREAM_RESPONSES)
 
-        mock_delete_country_movie_streaming_options.assert_has_calls([
-            call('1', self.country_code),
-            call('2', self.country_code)
-        ])
-        mock_make_unique_transformed_show_data.assert_has_calls([
-            call(shows[0]),
-            call(shows[1])
-        ])
+        mock_transform_page.assert_called_once()
+        self.assertEqual(transform_page_stub.shows, shows)
 
         self.assertEqual(result, expected_result)
 
+    def test_get_updates_from_one_request_when_every_show_is_malformed(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """
+        Tests that a page of changes whose shows are all skipped when transforming still returns the next "from"
+        timestamp and whether there is more, so that the page is not requested again.
+        """
+
+        # Arrange
+        expected_next_from_timestamp = 5555
+
+        # Arrange mocks
+        mock_requests.get.return_value = make_mock_json_response(200, {
+            'changes': [{'showId': 'malformed', 'timestamp': 5000}],
+            'shows': {
+                'malformed': {'id': 'malformed'}
+            },
+            'hasMore': True,
+            'nextCursor': f'{expected_next_from_timestamp}:6666'
+        })
+
+        mock_transform_page.side_effect = TransformPageStub(make_page_batches())
+
+        # Act
+        result = get_updated_movies_and_streams_from_one_request(self.country_code, self.service_ids, 4444)
+
+        # Assert
+        self.assertEqual(len(result['movies']), 0)
+        self.assertEqual(len(result['streaming_option_groups']), 0)
+        self.assertTrue(result['has_more'])
+        self.assertEqual(result['next_from_timestamp'], expected_next_from_timestamp)
+
+    def test_get_removed_changes_from_one_request(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """
+        Tests retrieving removed changes, where a removed movie that is not in the response's shows gets an empty group
+        of streaming options, so that its streaming options in the country are deleted.
+        """
+
+        # Arrange
+        show = {'id': 'movie1'}
+        last_changes_timestamp = 99
+
+        # Arrange mocks
+        mock_requests.get.return_value = make_mock_json_response(200, {
+            'changes': [{'showId': 'movie1', 'timestamp': last_changes_timestamp - 1},
+                        {'showId': 'movie2', 'timestamp': last_changes_timestamp}],
+            'shows': {
+                show['id']: deepcopy(show)
+            },
+            'hasMore': False
+        })
+
+        mock_transform_page.side_effect = TransformPageStub(self.transformed_page)
+
+        # Act
+        result = get_updated_movies_and_streams_from_one_request(
+            self.country_code, self.service_ids, change_type='removed')
+
+        # Assert
+        self.assertEqual(mock_requests.get.call_args.kwargs['params']['change_type'], 'removed')
+
+        groups = result['streaming_option_groups']
+        self.assertEqual(list(zip(groups.columns['movie_id'], groups.columns['country_code'])),
+                         [('movie1', 'us'), ('movie2', 'us'), ('movie1', 'movie1')])
+        self.assertEqual(groups.columns['streaming_options'][1], [])
+
+        self.assertEqual(result['next_from_timestamp'], last_changes_timestamp + 1)
+
+    def test_get_removed_changes_from_one_request_with_malformed_show(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """
+        Tests that a removed movie that is in the response's shows, but is skipped as malformed, does not get an empty
+        group of streaming options, so that its streaming options in the country are kept.
+        """
+
+        # Arrange
+        malformed_show = {'id': 'movie1', 'title': None}
+        last_changes_timestamp = 99
+
+        # Arrange mocks
+        mock_requests.get.return_value = make_mock_json_response(200, {
+            'changes': [{'showId': 'movie1', 'timestamp': last_changes_timestamp - 1},
+                        {'showId': 'movie2', 'timestamp': last_changes_timestamp}],
+            'shows': {
+                malformed_show['id']: deepcopy(malformed_show)
+            },
+            'hasMore': False
+        })
+
+        transform_page_stub = TransformPageStub(make_page_batches())
+        mock_transform_page.side_effect = transform_page_stub
+
+        # Act
+        result = get_updated_movies_and_streams_from_one_request(
+            self.country_code, self.service_ids, change_type='removed')
+
+        # Assert
+        self.assertEqual(transform_page_stub.shows, [malformed_show])
+
+        groups = result['streaming_option_groups']
+        self.assertEqual(list(zip(groups.columns['movie_id'], groups.columns['country_code'])),
+                         [('movie2', 'us')])
+        self.assertEqual(groups.columns['streaming_options'][0], [])
+
     def test_get_updates_from_one_request_with_too_old_timestamp(
             self,
-            mock_RAPID_API_KEY,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
         """
         Tests that passing a "from" timestamp that is too old will cause a retry without a "from" timestamp.
-        Note that the expected result doesn't have movie data, because it is unimportant for this test.
         """
 
         # Arrange
@@ -689,20 +1121,21 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         mock_failed_response.json.return_value = {
             'message': 'parameter "from" cannot be more than 31 days in the past'}
 
-        mock_successful_response = MagicMock(name='mock_response')
-        mock_successful_response.status_code = 200
-        mock_successful_response.json.return_value = {
-            'changes': [],
+        mock_successful_response = make_mock_json_response(200, {
+            'changes': [{'showId': show['id'], 'timestamp': 5000}],
             'shows': {
                 show['id']: deepcopy(show)
             },
             'hasMore': has_more,
             'nextCursor': f'{expected_next_from_timestamp}:6666'
-        }
+        })
 
-        mock_requests.get.side_effect = lambda url, headers, params: \
+        mock_requests.get.side_effect = lambda url, headers, params, stream: \
             mock_failed_response if 'from' in params else mock_successful_response
 
+        transform_page_stub = TransformPageStub(self.transformed_page)
+        mock_transform_page.side_effect = transform_page_stub
+
         # Arrange expected
         expected_failed_query_string = {'change_type': 'updated',
                                         'country': self.country_code,
@@ -714,9 +1147,7 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         del expected_successful_query_string['from']
 
         expected_result = {
-            'movies': {},
-            'movie_posters': {},
-            'streaming_options': {},
+            **deepcopy(self.expected_batches),
             'has_more': has_more,
             'next_from_timestamp': expected_next_from_timestamp
         }
@@ -729,29 +1160,35 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         mock_requests.get.assert_has_calls([
             call(
                 STREAMING_AVAILABILITY_CHANGES_URL,
-                headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-                params=expected_failed_query_string
+                headers={'X-RapidAPI-Key': TEST_API_KEY},
+                params=expected_failed_query_string,
+                stream=SA_API_STREAM_RESPONSES
             ),
             call(
                 STREAMING_AVAILABILITY_CHANGES_URL,
-                headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-                params=expected_successful_query_string
+                headers={'X-RapidAPI-Key': TEST_API_KEY},
+                params=expected_successful_query_string,
+                stream=SA_API_STREAM_RESPONSES
             )
         ])
 
-        mock_delete_country_movie_streaming_options.assert_called_once_with(show['id'], self.country_code)
-        mock_make_unique_transformed_show_data.assert_called_once_with(show)
+        mock_transform_page.assert_called_once()
+        self.assertEqual(transform_page_stub.shows, [show])
 
         self.assertEqual(result, expected_result)
 
+    @patch('src.util.resilience.time', autospec=True)
     def test_get_updates_from_one_request_and_not_get_status_code_200(
             self,
-            mock_RAPID_API_KEY,
+            mock_time,
+            mock_api_key_pool,
             mock_requests,
-            mock_delete_country_movie_streaming_options,
-            mock_make_unique_transformed_show_data
+            mock_transform_page
     ):
-        """Tests that getting a response with an unexpected status code should raise an error."""
+        """
+        Tests that getting a response with an unexpected status code should raise an error, after retrying if
+        the status code means that the API is failing.
+        """
 
         # Arrange
         from_timestamp = 4444
@@ -759,6 +1196,7 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
         # Arrange mocks
         mock_response = MagicMock(name='mock_response')
         mock_response.status_code = 500
+        mock_response.headers = {}
         mock_requests.get.return_value = mock_response
 
         # Arrange expected
@@ -773,10 +1211,147 @@ class GetUpdatedMoviesAndStreamsFromOneRequestUnitTests(TestCase):
             self.service_ids,
             from_timestamp)
 
-        mock_requests.get.assert_called_once_with(
+        mock_requests.get.assert_called_with(
             STREAMING_AVAILABILITY_CHANGES_URL,
-            headers={'X-RapidAPI-Key': mock_RAPID_API_KEY},
-            params=expected_query_string)
+            headers={'X-RapidAPI-Key': TEST_API_KEY},
+            params=expected_query_string,
+            stream=SA_API_STREAM_RESPONSES)
+        self.assertEqual(mock_requests.get.call_count, 4)
+        self.assertEqual(mock_time.sleep.call_count, 3)
+
+        mock_transform_page.assert_not_called()
+
+    def test_get_updates_from_one_request_with_too_old_timestamp_error_without_timestamp(
+            self,
+            mock_api_key_pool,
+            mock_requests,
+            mock_transform_page
+    ):
+        """Tests that a "from" timestamp error, when there is no "from" timestamp, raises an error without retrying."""
+
+        # Arrange mocks
+        mock_response = MagicMock(name='mock_response')
+        mock_response.status_code = 400
+        mock_response.json.return_value = {
+            'message': 'parameter "from" cannot be more than 31 days in the past'}
+        mock_requests.get.return_value = mock_response
+
+        # Act/Assert
+        self.assertRaises(
+            StreamingAvailabilityApiError,
+            get_updated_movies_and_streams_from_one_request,
+            self.country_code,
+            self.service_ids)
+
+        mock_requests.get.assert_called_once()
+        mock_transform_page.assert_not_called()
+
 
-        mock_delete_country_movie_streaming_options.assert_not_called()
-        mock_make_unique_transformed_show_data.assert_not_called()
+@patch('src.seed.streaming_availability_updater.get_country_weights', new=make_same_weights)
+@patch('src.seed.planner.JobRun', autospec=True)
+@patch('src.seed.streaming_availability_updater.CountryChangeRate', autospec=True)
+@patch('src.seed.streaming_availability_updater.read_checkpoints', autospec=True)
+@patch('src.seed.streaming_availability_updater.CountryService', autospec=True)
+@patch('src.seed.streaming_availability_updater.db', autospec=True)
+class PlanUpdatesUnitTests(TestCase):
+    """Unit tests for plan_updates()."""
+
+    def test_plan_updates(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_CountryChangeRate,
+            mock_JobRun):
+        """
+        Tests that the request that refreshes the services is made out of the budget, and that the services and the
+        changes are committed in two transactions.
+        """
+
+        # Arrange mocks
+        mock_CountryService.convert_list_to_dict.return_value = {'ca': ['service00'], 'us': ['service01']}
+        mock_read_checkpoints.return_value = {'ca': 1700000000}
+        mock_CountryChangeRate.get_change_rates.return_value = {}
+        mock_JobRun.get_num_requests_since.return_value = 0
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = plan_updates()
+
+        # Assert
+        self.assertEqual(sum(country['num_requests'] for country in result['countries']), result['budget'] - 1)
+        self.assertEqual((result['num_service_requests'], result['num_requests'], result['num_transactions']),
+                         (1, result['budget'], 2))
+        self.assertEqual(result['countries'][0]['checkpoint'], '2023-11-14T22:13+00:00')
+        self.assertEqual(result['warnings'], [])
+
+    def test_plan_updates_without_tables(
+            self,
+            mock_db,
+            mock_CountryService,
+            mock_read_checkpoints,
+            mock_CountryChangeRate,
+            mock_JobRun):
+        """
+        Tests that if the checkpoints and country_change_rates tables can not be read, then every country is planned as
+        due and from the start, with a warning for each table.
+        """
+
+        # Arrange mocks
+        mock_CountryService.convert_list_to_dict.return_value = {'ca': ['service00'], 'us': ['service01']}
+        mock_read_checkpoints.side_effect = DBAPIError('SELECT', {}, Exception('relation does not exist'))
+        mock_CountryChangeRate.get_change_rates.side_effect = DBAPIError(
+            'SELECT', {}, Exception('relation does not exist'))
+        mock_CountryChangeRate.__tablename__ = 'country_change_rates'
+        mock_JobRun.get_num_requests_since.return_value = 0
+        mock_JobRun.get_average_rows_per_request.return_value = None
+
+        # Act
+        result = plan_updates()
+
+        # Assert
+        self.assertEqual([country['country_code'] for country in result['countries']], ['ca', 'us'])
+        self.assertEqual([country['checkpoint'] for country in result['countries']], [None, None])
+        self.assertEqual(len(result['warnings']), 2)
+        self.assertIn('country_change_rates', result['warnings'][0])
+        self.assertIn('checkpoints', result['warnings'][1])
+
+
+@patch('src.seed.streaming_availability_updater.seed_services', autospec=True)
+class RefreshServicesUnitTests(TestCase):
+    """Unit tests for refresh_services()."""
+
+    def test_refresh_services(self, mock_seed_services):
+        """Tests that services are seeded, and that a failure to seed them is logged instead of stopping the update."""
+
+        # Arrange
+        mock_seed_services.return_value = 1
+
+        # Act/Assert
+        self.assertEqual(refresh_services(), 1)
+
+        mock_seed_services.side_effect = RequestException()
+        self.assertEqual(refresh_services(), 0)
+
+
+class GetChangeTypeCheckpointJobUnitTests(TestCase):
+    """Unit tests for get_change_type_checkpoint_job()."""
+
+    def test_get_change_type_checkpoint_job(self):
+        """Tests that "updated" changes keep the job's name and that other types of changes have their own names."""
+
+        # Act/Assert
+        self.assertEqual(get_change_type_checkpoint_job('updater', 'updated'), 'updater')
+        self.assertEqual(get_change_type_checkpoint_job('updater:plex', 'removed'), 'updater:plex/removed')
+
+
+class ParseSinceUnitTests(TestCase):
+    """Unit tests for parse_since()."""
+
+    def test_parse_since(self):
+        """Tests that ISO dates and times are parsed into timestamps, in UTC if there is no time zone."""
+
+        # Act/Assert
+        self.assertEqual(parse_since('2024-05-01'), 1714521600)
+        self.assertEqual(parse_since('2024-05-01T02:00+02:00'), 1714521600)
+        self.assertRaises(ValueError, parse_since, 'yesterday')
@@ -10,14 +10,21 @@ sys.path.append(root_dir)  # nopep8
 
 from copy import deepcopy
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
+from src.adapters.streaming_availability_adapter import make_page_batches
 from src.app import create_app
 from src.exceptions.StreamingAvailabilityApiError import \
     StreamingAvailabilityApiError
+from src.exceptions.StreamingAvailabilityApiUnavailableError import \
+    StreamingAvailabilityApiUnavailableError
+from src.exceptions.StreamingAvailabilityPayloadError import \
+    StreamingAvailabilityPayloadError
 from src.exceptions.UpsertError import UpsertError
 from src.models.common import connect_db, db
 from src.services.app_service import AppService
+from src.util.api_key_pool import ApiKeyPool
+from tests.utilities import make_batches
 
 # ==================================================
 
@@ -42,7 +49,7 @@ class AppServiceSearchMoviesByTitleUnitTests(TestCase):
         self.country_code = 'us'
         self.title = 'batman'
 
-        self.app_service = AppService(self.api_key)
+        self.app_service = AppService(ApiKeyPool([self.api_key]))
         self.url = f'{self.app_service.STREAMING_AVAILABILITY_BASE_URL}/shows/search/title'
 
         # Arrange expected
@@ -109,13 +116,65 @@ class AppServiceSearchMoviesByTitleUnitTests(TestCase):
             params=self.expected_query_string
         )
 
+    def test_failures_open_circuit(
+            self,
+            mock_requests
+    ):
+        """
+        After enough 5xx responses in a row, the API should not be called, and an unavailable exception should be
+        raised instead.
+        """
+
+        # Arrange mocks
+        mock_response = MagicMock(name='mock_response')
+        mock_response.status_code = 503
+        mock_requests.get.return_value = mock_response
+
+        failure_threshold = self.app_service.circuit_breaker.failure_threshold
+        for i in range(failure_threshold):
+            with self.assertRaises(StreamingAvailabilityApiError):
+                self.app_service.search_movies_by_title(self.country_code, self.title)
+
+        # Act/Assert
+        self.assertRaises(
+            StreamingAvailabilityApiUnavailableError,
+            self.app_service.search_movies_by_title,
+            self.country_code,
+            self.title
+        )
+        self.assertEqual(mock_requests.get.call_count, failure_threshold)
+
+    def test_client_errors_do_not_open_circuit(
+            self,
+            mock_requests
+    ):
+        """Responses with a 4xx status code, other than 429, should not count as API failures."""
 
+        # Arrange mocks
+        mock_response = MagicMock(name='mock_response')
+        mock_response.status_code = 404
+        mock_requests.get.return_value = mock_response
+
+        failure_threshold = self.app_service.circuit_breaker.failure_threshold
+
+        # Act
+        for i in range(failure_threshold + 1):
+            with self.assertRaises(StreamingAvailabilityApiError) as context:
+                self.app_service.search_movies_by_title(self.country_code, self.title)
+
+        # Assert
+            self.assertNotIsInstance(context.exception, StreamingAvailabilityApiUnavailableError)
+
+        self.assertEqual(mock_requests.get.call_count, failure_threshold + 1)
+
+
+@patch('src.services.app_service.MovieFetch', autospec=True)
 @patch('src.services.app_service.convert_show_json_into_movie_object', autospec=True)
 @patch('src.services.app_service.db', autospec=True)
 @patch('src.services.app_service.StreamingOption', autospec=True)
 @patch('src.services.app_service.MoviePoster', autospec=True)
 @patch('src.services.app_service.Movie', autospec=True)
-@patch('src.services.app_service.transform_show', autospec=True)
+@patch('src.services.app_service.transform_page', autospec=True)
 @patch('src.services.app_service.requests', autospec=True)
 class AppServiceGetMovieDataUnitTests(TestCase):
     """Unit tests for AppService.get_movie_data()."""
@@ -125,22 +184,32 @@ class AppServiceGetMovieDataUnitTests(TestCase):
     def setUp(self):
         self.movie_id = "123"
 
-        self.app_service = AppService(self.api_key)
+        self.app_service = AppService(ApiKeyPool([self.api_key]))
         self.url = f'{self.app_service.STREAMING_AVAILABILITY_BASE_URL}/shows/{self.movie_id}'
 
         self.returned_show_json = {'id': '1', 'title': 'movie1'}
 
+        self.transformed_page = make_batches([self.returned_show_json['id']])
+        self.transformed_page['streaming_options'] = make_page_batches()['streaming_options']
+        for country_code in ['ca', 'gb']:
+            self.transformed_page['streaming_options'].add_row(
+                '1', country_code, 'service00', f'https://www.example.com/{country_code}', False, None)
+
     def test_gets_movie_data(
             self,
             mock_requests,
-            mock_transform_show,
+            mock_transform_page,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption,
             mock_db,
-            mock_convert_show_json_into_movie_object
+            mock_convert_show_json_into_movie_object,
+            mock_MovieFetch
     ):
-        """Retrieves movie data from Streaming Availability API and returns a Movie object."""
+        """
+        Retrieves movie data from Streaming Availability API and returns a Movie object, recording the fetch for the
+        movie's countries and the visitor's country.
+        """
 
         # Arrange mocks
         mock_response = MagicMock(name='mock_response')
@@ -148,14 +217,7 @@ class AppServiceGetMovieDataUnitTests(TestCase):
         mock_response.json.return_value = deepcopy(self.returned_show_json)
         mock_requests.get.return_value = mock_response
 
-        mock_movies = MagicMock(name='mock_movies')
-        mock_movie_posters = MagicMock(name='mock_movie_posters')
-        mock_streaming_options = MagicMock(name='mock_streaming_options')
-        mock_transform_show.return_value = {
-            'movies': mock_movies,
-            'movie_posters': mock_movie_posters,
-            'streaming_options': mock_streaming_options
-        }
+        mock_transform_page.return_value = self.transformed_page
 
         mock_movie_object = MagicMock(name='mock_movie_object')
         mock_convert_show_json_into_movie_object.return_value = mock_movie_object
@@ -164,7 +226,7 @@ class AppServiceGetMovieDataUnitTests(TestCase):
         expected_headers = {'X-RapidAPI-Key': self.api_key}
 
         # Act
-        result = self.app_service.get_movie_data(self.movie_id)
+        result = self.app_service.get_movie_data(self.movie_id, 'us')
 
         # Assert
         self.assertIs(result, mock_movie_object)
@@ -174,24 +236,58 @@ class AppServiceGetMovieDataUnitTests(TestCase):
             headers=expected_headers
         )
 
-        mock_transform_show.assert_called_once_with(self.returned_show_json)
-        mock_Movie.upsert_database.assert_called_once_with(mock_movies)
-        mock_MoviePoster.upsert_database.assert_called_once_with(mock_movie_posters)
-        mock_StreamingOption.insert_database.assert_called_once_with(mock_streaming_options)
+        mock_transform_page.assert_called_once_with([self.returned_show_json])
+        mock_Movie.upsert_batch.assert_called_once_with(self.transformed_page['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(self.transformed_page['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(self.transformed_page['streaming_options'])
+        mock_MovieFetch.record_fetch.assert_called_once_with(self.returned_show_json['id'], {'ca', 'gb', 'us'}, ANY)
 
         mock_db.session.commit.assert_called_once()
 
         mock_convert_show_json_into_movie_object.assert_called_once_with(self.returned_show_json)
 
+    def test_archives_movie_data(
+            self,
+            mock_requests,
+            mock_transform_page,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_db,
+            mock_convert_show_json_into_movie_object,
+            mock_MovieFetch
+    ):
+        """The raw response body is archived, if there is a response archive."""
+
+        # Arrange
+        mock_response_archive = MagicMock(name='mock_response_archive')
+        app_service = AppService(ApiKeyPool([self.api_key]), response_archive=mock_response_archive)
+
+        # Arrange mocks
+        mock_response = MagicMock(name='mock_response')
+        mock_response.status_code = 200
+        mock_response.content = b'{"id": "1", "title": "movie1"}'
+        mock_response.json.return_value = deepcopy(self.returned_show_json)
+        mock_requests.get.return_value = mock_response
+
+        mock_transform_page.return_value = self.transformed_page
+
+        # Act
+        app_service.get_movie_data(self.movie_id)
+
+        # Assert
+        mock_response_archive.add.assert_called_once_with(mock_response.content, 'app', self.url)
+
     def test_status_code_not_200(
             self,
             mock_requests,
-            mock_transform_show,
+            mock_transform_page,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption,
             mock_db,
-            mock_convert_show_json_into_movie_object
+            mock_convert_show_json_into_movie_object,
+            mock_MovieFetch
     ):
         """Receiving a response status code that is not 200 should throw an exception."""
 
@@ -214,7 +310,7 @@ class AppServiceGetMovieDataUnitTests(TestCase):
             headers=expected_headers
         )
 
-        mock_transform_show.assert_not_called()
+        mock_transform_page.assert_not_called()
         mock_Movie.assert_not_called()
         mock_MoviePoster.assert_not_called()
         mock_StreamingOption.assert_not_called()
@@ -224,12 +320,13 @@ class AppServiceGetMovieDataUnitTests(TestCase):
     def test_database_commit_fail(
             self,
             mock_requests,
-            mock_transform_show,
+            mock_transform_page,
             mock_Movie,
             mock_MoviePoster,
             mock_StreamingOption,
             mock_db,
-            mock_convert_show_json_into_movie_object
+            mock_convert_show_json_into_movie_object,
+            mock_MovieFetch
     ):
         """If committing the SQLAlchemy session throws an exception, then an exception should be thrown."""
 
@@ -239,14 +336,7 @@ class AppServiceGetMovieDataUnitTests(TestCase):
         mock_response.json.return_value = deepcopy(self.returned_show_json)
         mock_requests.get.return_value = mock_response
 
-        mock_movies = MagicMock(name='mock_movies')
-        mock_movie_posters = MagicMock(name='mock_movie_posters')
-        mock_streaming_options = MagicMock(name='mock_streaming_options')
-        mock_transform_show.return_value = {
-            'movies': mock_movies,
-            'movie_posters': mock_movie_posters,
-            'streaming_options': mock_streaming_options
-        }
+        mock_transform_page.return_value = self.transformed_page
 
         mock_db.session.commit.side_effect = UpsertError("")
 
@@ -265,9 +355,45 @@ class AppServiceGetMovieDataUnitTests(TestCase):
             headers=expected_headers
         )
 
-        mock_transform_show.assert_called_once_with(self.returned_show_json)
-        mock_Movie.upsert_database.assert_called_once_with(mock_movies)
-        mock_MoviePoster.upsert_database.assert_called_once_with(mock_movie_posters)
-        mock_StreamingOption.insert_database.assert_called_once_with(mock_streaming_options)
+        mock_transform_page.assert_called_once_with([self.returned_show_json])
+        mock_Movie.upsert_batch.assert_called_once_with(self.transformed_page['movies'])
+        mock_MoviePoster.upsert_batch.assert_called_once_with(self.transformed_page['movie_posters'])
+        mock_StreamingOption.insert_batch.assert_called_once_with(self.transformed_page['streaming_options'])
+
+        mock_convert_show_json_into_movie_object.assert_not_called()
+
+    def test_malformed_show(
+            self,
+            mock_requests,
+            mock_transform_page,
+            mock_Movie,
+            mock_MoviePoster,
+            mock_StreamingOption,
+            mock_db,
+            mock_convert_show_json_into_movie_object,
+            mock_MovieFetch
+    ):
+        """A show that is skipped as malformed when transforming should throw an exception, without saving anything."""
+
+        # Arrange mocks
+        mock_response = MagicMock(name='mock_response')
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'id': '1'}
+        mock_requests.get.return_value = mock_response
+
+        mock_transform_page.return_value = make_page_batches()
+
+        # Act/Assert
+        self.assertRaises(
+            StreamingAvailabilityPayloadError,
+            self.app_service.get_movie_data,
+            self.movie_id
+        )
 
+        mock_transform_page.assert_called_once_with([{'id': '1'}])
+        mock_Movie.upsert_batch.assert_not_called()
+        mock_MoviePoster.upsert_batch.assert_not_called()
+        mock_StreamingOption.insert_batch.assert_not_called()
+        mock_MovieFetch.record_fetch.assert_not_called()
+        mock_db.session.commit.assert_not_called()
         mock_convert_show_json_into_movie_object.assert_not_called()
@@ -0,0 +1,225 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import json
+import tempfile
+import time
+from unittest import TestCase
+
+from src.stand_in.streaming_availability_stand_in import (
+    CHANGES_PAGE_SIZE, FROM_TOO_OLD_MESSAGE, SEARCH_PAGE_SIZE,
+    create_stand_in_app)
+from src.stand_in.synthetic_catalog import SyntheticCatalog
+
+# ==================================================
+
+HEADERS = {'X-RapidAPI-Key': 'key'}
+
+# --------------------------------------------------
+
+
+class SyntheticCatalogUnitTests(TestCase):
+    """Unit tests for SyntheticCatalog."""
+
+    def test_catalog_is_deterministic(self):
+        """Tests that the same parameters create the same shows."""
+
+        # Arrange
+        catalog_1 = SyntheticCatalog(num_countries=3, num_shows=10, seed=1, now=1000000000)
+        catalog_2 = SyntheticCatalog(num_countries=3, num_shows=10, seed=1, now=1000000000)
+
+        # Act/Assert
+        for i in range(10):
+            self.assertEqual(catalog_1.make_show(i), catalog_2.make_show(i))
+
+    def test_catalog_size(self):
+        """Tests that the catalog has the requested number of unique countries, services, and streaming options."""
+
+        # Arrange
+        catalog = SyntheticCatalog(num_countries=20, num_shows=5, num_options=4, num_services=3)
+
+        # Act
+        countries = catalog.get_countries()
+        show = catalog.make_show(0)
+
+        # Assert
+        self.assertEqual(len(countries), 20)
+        self.assertEqual(len(set(catalog.country_codes)), 20)
+        self.assertEqual(len(countries['us']['services']), 3)
+        self.assertEqual(set(show['streamingOptions']), set(catalog.country_codes))
+        self.assertEqual(len(show['streamingOptions']['us']), 4)
+
+
+class StandInServerTests(TestCase):
+    """Tests for the Streaming Availability API stand-in server."""
+
+    def setUp(self):
+        self.catalog = SyntheticCatalog(num_countries=2, num_shows=50, num_options=2, num_services=3, seed=0)
+        self.app = create_stand_in_app(self.catalog)
+        self.client = self.app.test_client()
+
+    def test_missing_api_key(self):
+        """Tests that requests without an API key are rejected."""
+
+        # Act
+        resp = self.client.get('/countries')
+
+        # Assert
+        self.assertEqual(resp.status_code, 403)
+        self.assertIn('message', resp.json)
+
+    def test_get_countries(self):
+        """Tests that countries contain services in the same format as the real API."""
+
+        # Act
+        resp = self.client.get('/countries', headers=HEADERS)
+
+        # Assert
+        self.assertEqual(resp.status_code, 200)
+        service = resp.json['us']['services'][0]
+        for key in ('id', 'name', 'homePage', 'themeColorCode', 'imageSet', 'streamingOptionTypes'):
+            self.assertIn(key, service)
+        self.assertTrue(service['streamingOptionTypes']['free'])
+
+    def test_search_shows_by_filters_pages_through_whole_catalog(self):
+        """Tests that following the cursors returns every show exactly once, in original title order."""
+
+        # Arrange
+        params = {'country': 'us', 'catalogs': 'service00.free, service01.free, service02.free',
+                  'order_by': 'original_title', 'show_type': 'movie'}
+        show_ids = []
+        num_pages = 0
+
+        # Act
+        while True:
+            resp = self.client.get('/shows/search/filters', headers=HEADERS, query_string=params)
+            self.assertEqual(resp.status_code, 200)
+            body = resp.json
+
+            num_pages += 1
+            show_ids.extend(show['id'] for show in body['shows'])
+            self.assertLessEqual(len(body['shows']), SEARCH_PAGE_SIZE)
+            for show in body['shows']:
+                self.assertEqual(list(show['streamingOptions']), ['us'])
+
+            if not body['hasMore']:
+                break
+            params['cursor'] = body['nextCursor']
+
+        # Assert
+        self.assertEqual(show_ids, [str(i) for i in range(1, 51)])
+        self.assertEqual(num_pages, 3)
+
+    def test_get_changes_pages_and_timestamps(self):
+        """Tests that changes are paged with a "timestamp:id" cursor, and that shows are included for changes."""
+
+        # Arrange
+        params = {'change_type': 'updated', 'item_type': 'show', 'country': 'ca', 'show_type': 'movie',
+                  'catalogs': 'service00.free'}
+
+        # Act
+        resp = self.client.get('/changes', headers=HEADERS, query_string=params)
+
+        # Assert
+        body = resp.json
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(body['changes']), CHANGES_PAGE_SIZE)
+        self.assertTrue(body['hasMore'])
+        self.assertEqual(set(body['shows']), {change['showId'] for change in body['changes']})
+
+        timestamps = [change['timestamp'] for change in body['changes']]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertGreater(int(body['nextCursor'].split(':', 1)[0]), timestamps[-1] - 1)
+
+        # Act (next "from" timestamp, like the updater does)
+        params['from'] = int(body['nextCursor'].split(':', 1)[0])
+        resp = self.client.get('/changes', headers=HEADERS, query_string=params)
+
+        # Assert
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(set(resp.json['shows']) & set(body['shows']))
+
+    def test_get_changes_with_too_old_from_timestamp(self):
+        """Tests that a "from" timestamp older than 31 days is rejected with the same message as the real API."""
+
+        # Arrange
+        params = {'change_type': 'updated', 'item_type': 'show', 'country': 'us',
+                  'from': int(time.time()) - 32 * 24 * 60 * 60}
+
+        # Act
+        resp = self.client.get('/changes', headers=HEADERS, query_string=params)
+
+        # Assert
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn(FROM_TOO_OLD_MESSAGE, resp.json['message'])
+
+    def test_get_show(self):
+        """Tests getting one show, and getting a show that does not exist."""
+
+        # Act
+        resp = self.client.get('/shows/7', headers=HEADERS)
+        missing_resp = self.client.get('/shows/9999', headers=HEADERS)
+
+        # Assert
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json, self.catalog.make_show(6))
+        self.assertEqual(missing_resp.status_code, 404)
+
+    def test_rate_limit_per_second(self):
+        """Tests that requests over the rate limit per second get a 429 response."""
+
+        # Arrange
+        app = create_stand_in_app(self.catalog, rate_limit_per_second=2)
+        client = app.test_client()
+
+        # Act
+        status_codes = [client.get('/countries', headers=HEADERS).status_code for i in range(3)]
+
+        # Assert
+        self.assertEqual(status_codes, [200, 200, 429])
+        self.assertEqual(app.extensions['stand_in'].request_counts['/countries'], 2)
+        self.assertEqual(app.extensions['stand_in'].rejected_counts['/countries'], 1)
+
+    def test_rate_limit_per_day(self):
+        """Tests that requests over the rate limit per day get a 429 response, for each API key separately."""
+
+        # Arrange
+        client = create_stand_in_app(self.catalog, rate_limit_per_day=1).test_client()
+
+        # Act
+        first_status_code = client.get('/countries', headers=HEADERS).status_code
+        second_status_code = client.get('/countries', headers=HEADERS).status_code
+        other_key_status_code = client.get('/countries', headers={'X-RapidAPI-Key': 'key2'}).status_code
+
+        # Assert
+        self.assertEqual((first_status_code, second_status_code, other_key_status_code), (200, 429, 200))
+
+    def test_replay_recorded_responses(self):
+        """Tests that recorded responses are replayed in order, and that other requests use the synthetic catalog."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            for i, status in enumerate((500, 200)):
+                with open(join(directory, f'{i:03d}.json'), 'w') as f:
+                    json.dump({'path': '/shows/1', 'params': {'country': 'us'},
+                               'status': status, 'body': {'recording': i}}, f)
+
+            client = create_stand_in_app(self.catalog, recordings_directory=directory).test_client()
+
+            # Act
+            responses = [client.get('/shows/1', headers=HEADERS, query_string={'country': 'us'})
+                         for i in range(3)]
+            not_recorded_resp = client.get('/shows/1', headers=HEADERS)
+
+            # Assert
+            self.assertEqual([resp.status_code for resp in responses], [500, 200, 200])
+            self.assertEqual([resp.json for resp in responses],
+                             [{'recording': 0}, {'recording': 1}, {'recording': 1}])
+            self.assertEqual(not_recorded_resp.json['id'], '1')
@@ -0,0 +1,177 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.exceptions.ApiKeysExhaustedError import ApiKeysExhaustedError
+from src.util.api_key_pool import ApiKeyPool
+
+# ==================================================
+
+
+def make_response(status_code: int, headers: dict = None) -> MagicMock:
+    """Makes a mock response with a status code and headers."""
+
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+
+@patch('src.util.api_key_pool.time', autospec=True)
+class ApiKeyPoolUnitTests(TestCase):
+    """Unit tests for ApiKeyPool."""
+
+    def test_acquire_spreads_calls_over_keys(self, mock_time):
+        """Tests that each call uses the key with the most calls left today."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1', 'key2'], max_calls_per_day=3)
+
+        # Act
+        keys = [pool.acquire() for _ in range(4)]
+
+        # Assert
+        self.assertEqual(keys, ['key1', 'key2', 'key1', 'key2'])
+        self.assertEqual(pool.get_num_calls_left_today(), 2)
+
+    def test_acquire_waits_for_per_second_rate_limit(self, mock_time):
+        """Tests that a call waits for the rest of the second when every key has used its calls for the second."""
+
+        # Arrange
+        times = iter([100.0, 100.2, 101.0])
+        mock_time.monotonic.side_effect = lambda: next(times)
+        pool = ApiKeyPool(['key1'], max_calls_per_second=1)
+
+        # Act
+        pool.acquire()
+        result = pool.acquire()
+
+        # Assert
+        self.assertEqual(result, 'key1')
+        mock_time.sleep.assert_called_once()
+        self.assertAlmostEqual(mock_time.sleep.call_args.args[0], 0.8)
+
+    def test_rate_limited_key_cools_down(self, mock_time):
+        """Tests that a key with a 429 response is taken out of rotation for the time in Retry-After."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1', 'key2'], cooldown_seconds=60)
+
+        # Act/Assert
+        pool.report('key1', make_response(429, {'Retry-After': '30'}))
+        self.assertEqual([pool.acquire() for _ in range(3)], ['key2', 'key2', 'key2'])
+
+        mock_time.monotonic.return_value = 130.0
+        self.assertEqual(pool.acquire(), 'key1')
+
+    def test_acquire_skips_key_at_per_second_rate_limit(self, mock_time):
+        """Tests that a key that has used its calls for the second is skipped when another key can make a call."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1', 'key2'], max_calls_per_second=1)
+
+        # Act
+        keys = [pool.acquire() for _ in range(2)]
+
+        # Assert
+        self.assertEqual(keys, ['key1', 'key2'])
+        mock_time.sleep.assert_not_called()
+
+    def test_acquire_waits_when_every_key_is_cooling_down(self, mock_time):
+        """Tests that a call waits until the first key is back in rotation, when every key is cooling down."""
+
+        # Arrange
+        times = iter([100.0, 100.0, 100.0, 130.0])
+        mock_time.monotonic.side_effect = lambda: next(times)
+        pool = ApiKeyPool(['key1', 'key2'])
+
+        # Act
+        pool.report('key1', make_response(429, {'Retry-After': '60'}))
+        pool.report('key2', make_response(429, {'Retry-After': '30'}))
+        result = pool.acquire()
+
+        # Assert
+        self.assertEqual(result, 'key2')
+        mock_time.sleep.assert_called_once_with(30.0)
+
+    def test_refused_key_is_removed(self, mock_time):
+        """Tests that a key with a 403 response is not used again, and that no keys left raises an error."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1', 'key2'], max_calls_per_day=5)
+
+        # Act/Assert
+        pool.report('key1', make_response(403))
+        self.assertEqual(pool.acquire(), 'key2')
+        self.assertEqual(pool.get_num_calls_left_today(), 4)
+
+        pool.report('key2', make_response(403))
+        with self.assertRaises(ApiKeysExhaustedError):
+            pool.acquire()
+
+    def test_daily_quota(self, mock_time):
+        """Tests that keys out of their daily quota raise an error, until calls are more than a day old."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1'], max_calls_per_day=1)
+        pool.acquire()
+
+        # Act/Assert
+        with self.assertRaises(ApiKeysExhaustedError):
+            pool.acquire()
+
+        mock_time.monotonic.return_value = 100.0 + ApiKeyPool.SECONDS_PER_DAY
+        self.assertEqual(pool.acquire(), 'key1')
+
+    @patch('src.util.api_key_pool.RateLimitWindow', autospec=True)
+    def test_shared_daily_quota(self, mock_RateLimitWindow, mock_time):
+        """
+        Tests that each call is counted in its key's shared daily quota, and that a key that is out of its shared daily
+        quota is left out until the end of the day, even if it has calls left in this process.
+        """
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        mock_time.time.return_value = ApiKeyPool.SECONDS_PER_DAY * 1000 + 600.0
+        mock_RateLimitWindow.try_acquire.side_effect = [False, True, True]
+        pool = ApiKeyPool(['key1', 'key2'], max_calls_per_day=5, shared_quota_name='api')
+
+        # Act/Assert
+        self.assertEqual(pool.acquire(), 'key2')
+        self.assertEqual(pool.get_num_calls_left_today(), 4)
+
+        names = [call.args[0] for call in mock_RateLimitWindow.try_acquire.call_args_list]
+        self.assertTrue(names[0].startswith('api:'))
+        self.assertNotIn('key1', names[0])
+        self.assertNotEqual(names[0], names[1])
+        self.assertEqual(mock_RateLimitWindow.try_acquire.call_args.args[1:], (5, ApiKeyPool.SECONDS_PER_DAY))
+
+        mock_time.monotonic.return_value = 100.0 + ApiKeyPool.SECONDS_PER_DAY - 600.0
+        self.assertEqual(pool.acquire(), 'key1')
+
+    def test_call(self, mock_time):
+        """Tests that a request is made with a key from the pool, and that its response is reported."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        pool = ApiKeyPool(['key1', 'key2'])
+        make_request = MagicMock(name='make_request', return_value=make_response(403))
+
+        # Act
+        result = pool.call(make_request)
+
+        # Assert
+        self.assertEqual(result.status_code, 403)
+        make_request.assert_called_once_with('key1')
+        self.assertEqual(pool.acquire(), 'key2')
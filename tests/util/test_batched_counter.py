@@ -0,0 +1,60 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from src.util.batched_counter import BatchedCounter
+
+# ==================================================
+
+
+@patch('src.util.batched_counter.time', autospec=True)
+class BatchedCounterUnitTests(TestCase):
+    """Unit tests for BatchedCounter."""
+
+    def test_increment(self, mock_time):
+        """Tests that counts are flushed together, once the flush interval has passed, and then start from 0."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        flush = MagicMock(name='flush')
+        counter = BatchedCounter(flush, 60)
+
+        # Act/Assert
+        counter.increment('ca')
+        counter.increment('us', 2)
+        mock_time.monotonic.return_value = 159.0
+        counter.increment('ca')
+        flush.assert_not_called()
+
+        mock_time.monotonic.return_value = 160.0
+        counter.increment('us')
+        flush.assert_called_once_with({'ca': 2, 'us': 3})
+
+        counter.increment('ca')
+        counter.flush()
+        self.assertEqual(flush.call_args_list[-1].args, ({'ca': 1},))
+
+    def test_flush_when_there_is_an_error(self, mock_time):
+        """Tests that counts that can not be flushed are dropped, without raising the error."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        flush = MagicMock(name='flush', side_effect=[RuntimeError(), None])
+        counter = BatchedCounter(flush, 60)
+
+        # Act
+        counter.increment('ca')
+        counter.flush()
+        counter.flush()
+
+        # Assert
+        flush.assert_called_once_with({'ca': 1})
@@ -0,0 +1,88 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from src.util.column_batch import ColumnBatch
+
+# ==================================================
+
+
+class ColumnBatchUnitTests(TestCase):
+    """Unit tests for ColumnBatch."""
+
+    def setUp(self):
+        self.column_names = ('movie_id', 'type', 'size', 'link')
+        self.key_column_names = ('movie_id', 'type', 'size')
+
+    def test_add_rows(self):
+        """Adding rows should append each value to its column's list."""
+
+        # Arrange
+        batch = ColumnBatch(self.column_names, self.key_column_names)
+
+        # Act
+        batch.add_row('1', 'verticalPoster', 'w240', 'link1')
+        batch.add_row('2', 'verticalPoster', 'w240', 'link2')
+
+        # Assert
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.columns, {
+            'movie_id': ['1', '2'],
+            'type': ['verticalPoster', 'verticalPoster'],
+            'size': ['w240', 'w240'],
+            'link': ['link1', 'link2']
+        })
+
+    def test_add_row_with_existing_key(self):
+        """Adding a row with the same key as an earlier row should replace the earlier row in place."""
+
+        # Arrange
+        batch = ColumnBatch(self.column_names, self.key_column_names)
+        batch.add_row('1', 'verticalPoster', 'w240', 'old link')
+        batch.add_row('2', 'verticalPoster', 'w240', 'link2')
+
+        # Act
+        batch.add_row('1', 'verticalPoster', 'w240', 'new link')
+
+        # Assert
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.columns['movie_id'], ['1', '2'])
+        self.assertEqual(batch.columns['link'], ['new link', 'link2'])
+
+    def test_extend(self):
+        """Extending a batch should add the other batch's rows, replacing rows with the same key."""
+
+        # Arrange
+        batch = ColumnBatch(self.column_names, self.key_column_names)
+        batch.add_row('1', 'verticalPoster', 'w240', 'old link')
+
+        other_batch = ColumnBatch(self.column_names, self.key_column_names)
+        other_batch.add_row('1', 'verticalPoster', 'w240', 'new link')
+        other_batch.add_row('2', 'verticalPoster', 'w240', 'link2')
+
+        # Act
+        batch.extend(other_batch)
+
+        # Assert
+        self.assertEqual(batch.to_dicts(), [
+            {'movie_id': '1', 'type': 'verticalPoster', 'size': 'w240', 'link': 'new link'},
+            {'movie_id': '2', 'type': 'verticalPoster', 'size': 'w240', 'link': 'link2'}
+        ])
+
+    def test_extend_with_different_columns(self):
+        """Extending a batch with a batch for a different table should raise an error."""
+
+        # Arrange
+        batch = ColumnBatch(self.column_names, self.key_column_names)
+        other_batch = ColumnBatch(('id', 'title'), ('id',))
+
+        # Act/Assert
+        self.assertRaises(ValueError, batch.extend, other_batch)
@@ -0,0 +1,119 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import json
+from unittest import TestCase
+
+from src.util.json_stream import JsonObjectStream
+
+# ==================================================
+
+
+def split_into_chunks(data: bytes, chunk_size: int) -> list[bytes]:
+    """Splits bytes into chunks of chunk_size bytes."""
+
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+# --------------------------------------------------
+
+
+class JsonObjectStreamUnitTests(TestCase):
+    """Unit tests for JsonObjectStream."""
+
+    def setUp(self):
+        self.shows = [
+            {'id': str(i), 'title': f'Movie "{i}" \\ é', 'rating': 70 + i, 'cast': ['A', 'B'], 'runtime': None}
+            for i in range(5)
+        ]
+
+    def test_stream_array_items(self):
+        """
+        For different chunk sizes, including chunks that split multi-byte characters, numbers, and literals, the
+        items of the streamed array and the other fields should be parsed.
+        """
+
+        # Arrange
+        body = {'shows': self.shows, 'hasMore': True, 'nextCursor': '123:Movie', 'total': 1234567}
+        data = json.dumps(body, ensure_ascii=False, indent=1).encode()
+
+        for chunk_size in (1, 3, 16, len(data)):
+            with self.subTest(chunk_size=chunk_size):
+
+                # Act
+                stream = JsonObjectStream(split_into_chunks(data, chunk_size), 'shows')
+                items = list(stream.iter_items())
+
+                # Assert
+                self.assertEqual(items, self.shows)
+                self.assertEqual(stream.fields, {'hasMore': True, 'nextCursor': '123:Movie', 'total': 1234567})
+
+    def test_stream_object_values(self):
+        """The values of a streamed object should be yielded, and fields before and after it should be parsed."""
+
+        # Arrange
+        body = {
+            'changes': [{'timestamp': 1}, {'timestamp': 2}],
+            'shows': {show['id']: show for show in self.shows},
+            'hasMore': False
+        }
+        data = json.dumps(body).encode()
+
+        # Act
+        stream = JsonObjectStream(split_into_chunks(data, 7), 'shows')
+        items = list(stream.iter_items())
+
+        # Assert
+        self.assertEqual(items, self.shows)
+        self.assertEqual(stream.fields, {'changes': body['changes'], 'hasMore': False})
+
+    def test_items_are_yielded_before_whole_body_is_read(self):
+        """The first item should be yielded after reading only the chunks that it is in."""
+
+        # Arrange
+        data = json.dumps({'shows': self.shows}).encode()
+        chunks = split_into_chunks(data, 8)
+        num_chunks_read = 0
+
+        def read_chunks():
+            nonlocal num_chunks_read
+            for chunk in chunks:
+                num_chunks_read += 1
+                yield chunk
+
+        # Act
+        first_item = next(JsonObjectStream(read_chunks(), 'shows').iter_items())
+
+        # Assert
+        self.assertEqual(first_item, self.shows[0])
+        self.assertLess(num_chunks_read, len(chunks) / 2)
+
+    def test_empty_streamed_member(self):
+        """An empty array, an empty object, or a missing streamed member should not yield any items."""
+
+        for body in ({'shows': [], 'hasMore': False}, {'shows': {}, 'hasMore': False}, {'hasMore': False}):
+            with self.subTest(body=body):
+
+                # Act
+                stream = JsonObjectStream([json.dumps(body).encode()], 'shows')
+                items = list(stream.iter_items())
+
+                # Assert
+                self.assertEqual(items, [])
+                self.assertEqual(stream.fields, {'hasMore': False})
+
+    def test_invalid_json(self):
+        """Invalid or incomplete JSON should raise JSONDecodeError."""
+
+        for data in (b'{"shows": [1, 2', b'{"shows": [1]} extra', b'[1, 2]', b'{"shows" [1]}', b''):
+            with self.subTest(data=data):
+
+                # Act/Assert
+                with self.assertRaises(json.JSONDecodeError):
+                    list(JsonObjectStream(split_into_chunks(data, 4), 'shows').iter_items())
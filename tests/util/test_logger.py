@@ -0,0 +1,69 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import logging
+from unittest import TestCase
+
+from src.util.logger import SamplingFilter
+
+# ==================================================
+
+
+def make_record(lineno: int, is_sampled: bool) -> logging.LogRecord:
+    """Creates a log record from a line, which is marked as sampled or not."""
+
+    record = logging.LogRecord('test', logging.DEBUG, 'test.py', lineno, 'message', None, None)
+    if is_sampled:
+        record.sampled = True
+    return record
+
+# --------------------------------------------------
+
+
+class SamplingFilterUnitTests(TestCase):
+    """Unit tests for SamplingFilter."""
+
+    def test_samples_marked_records_per_line(self):
+        """1 of every n marked records should be let through, counting each line separately."""
+
+        # Arrange
+        sampling_filter = SamplingFilter(3)
+
+        # Act
+        results_line_1 = [sampling_filter.filter(make_record(1, True)) for i in range(7)]
+        results_line_2 = [sampling_filter.filter(make_record(2, True)) for i in range(2)]
+
+        # Assert
+        self.assertEqual(results_line_1, [True, False, False, True, False, False, True])
+        self.assertEqual(results_line_2, [True, False])
+
+    def test_unmarked_records_are_not_sampled(self):
+        """Records that are not marked as sampled should always be let through."""
+
+        # Arrange
+        sampling_filter = SamplingFilter(3)
+
+        # Act
+        results = [sampling_filter.filter(make_record(1, False)) for i in range(5)]
+
+        # Assert
+        self.assertTrue(all(results))
+
+    def test_sampling_can_be_turned_off(self):
+        """When n is 1, every marked record should be let through."""
+
+        # Arrange
+        sampling_filter = SamplingFilter(1)
+
+        # Act
+        results = [sampling_filter.filter(make_record(1, True)) for i in range(5)]
+
+        # Assert
+        self.assertTrue(all(results))
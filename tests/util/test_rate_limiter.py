@@ -0,0 +1,80 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.util.rate_limiter import RateLimiter
+
+# ==================================================
+
+
+@patch('src.util.rate_limiter.time', autospec=True)
+class RateLimiterAcquireUnitTests(TestCase):
+    """Unit tests for RateLimiter.acquire()."""
+
+    def test_acquire_within_rate_limit(self, mock_time):
+        """Tests that calls within the rate limit do not wait."""
+
+        # Arrange
+        max_calls = 3
+        rate_limiter = RateLimiter(max_calls, 1)
+
+        # Arrange mocks
+        mock_time.monotonic.return_value = 100.0
+
+        # Act
+        for i in range(max_calls):
+            rate_limiter.acquire()
+
+        # Assert
+        mock_time.sleep.assert_not_called()
+
+    def test_acquire_over_rate_limit(self, mock_time):
+        """Tests that a call over the rate limit waits until the oldest call is outside of the window."""
+
+        # Arrange
+        max_calls = 2
+        rate_limiter = RateLimiter(max_calls, 1)
+
+        # Arrange mocks
+        current_time = [100.0]
+        mock_time.monotonic.side_effect = lambda: current_time[0]
+
+        def sleep(seconds):
+            current_time[0] += seconds
+        mock_time.sleep.side_effect = sleep
+
+        # Act
+        for i in range(max_calls):
+            rate_limiter.acquire()
+        current_time[0] += 0.25
+        rate_limiter.acquire()
+
+        # Assert
+        mock_time.sleep.assert_called_once_with(0.75)
+        self.assertEqual(current_time[0], 101.0)
+
+    def test_acquire_after_window_has_passed(self, mock_time):
+        """Tests that calls outside of the window are no longer counted."""
+
+        # Arrange
+        max_calls = 1
+        rate_limiter = RateLimiter(max_calls, 1)
+
+        # Arrange mocks
+        mock_time.monotonic.side_effect = [100.0, 101.5]
+
+        # Act
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+
+        # Assert
+        mock_time.sleep.assert_not_called()
@@ -0,0 +1,225 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from requests.exceptions import RequestException
+
+from src.util.resilience import CircuitBreaker, call_with_backoff
+
+# ==================================================
+
+
+def make_mock_response(status_code: int, headers: dict = None) -> MagicMock:
+    """Creates a mock response with a status code and headers."""
+
+    mock_response = MagicMock(name=f'mock_response_{status_code}')
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    return mock_response
+
+# --------------------------------------------------
+
+
+@patch('src.util.resilience.time', autospec=True)
+class CallWithBackoffUnitTests(TestCase):
+    """Unit tests for call_with_backoff()."""
+
+    def test_successful_response_is_not_retried(self, mock_time):
+        """Tests that a successful response is returned without retrying."""
+
+        # Arrange
+        response = make_mock_response(200)
+        make_request = MagicMock(return_value=response)
+
+        # Act
+        result = call_with_backoff(make_request)
+
+        # Assert
+        self.assertIs(result, response)
+        make_request.assert_called_once()
+        mock_time.sleep.assert_not_called()
+
+    def test_client_error_is_not_retried(self, mock_time):
+        """Tests that a response with a client error status code is returned without retrying."""
+
+        # Arrange
+        response = make_mock_response(400)
+        make_request = MagicMock(return_value=response)
+
+        # Act
+        result = call_with_backoff(make_request)
+
+        # Assert
+        self.assertIs(result, response)
+        make_request.assert_called_once()
+        mock_time.sleep.assert_not_called()
+
+    def test_retries_until_successful(self, mock_time):
+        """Tests that 429 and 5xx responses are retried, with increasing delays, until a successful response."""
+
+        # Arrange
+        responses = [make_mock_response(503), make_mock_response(429), make_mock_response(200)]
+        make_request = MagicMock(side_effect=responses)
+
+        # Act
+        result = call_with_backoff(make_request, max_attempts=4, base_delay=1)
+
+        # Assert
+        self.assertIs(result, responses[-1])
+        self.assertEqual(make_request.call_count, 3)
+        self.assertEqual(mock_time.sleep.call_count, 2)
+
+        first_delay = mock_time.sleep.call_args_list[0].args[0]
+        second_delay = mock_time.sleep.call_args_list[1].args[0]
+        self.assertTrue(0.5 <= first_delay <= 1)
+        self.assertTrue(1 <= second_delay <= 2)
+
+    def test_returns_last_response_after_max_attempts(self, mock_time):
+        """Tests that the last failed response is returned after making the max number of attempts."""
+
+        # Arrange
+        max_attempts = 3
+        make_request = MagicMock(return_value=make_mock_response(500))
+
+        # Act
+        result = call_with_backoff(make_request, max_attempts=max_attempts)
+
+        # Assert
+        self.assertEqual(result.status_code, 500)
+        self.assertEqual(make_request.call_count, max_attempts)
+        self.assertEqual(mock_time.sleep.call_count, max_attempts - 1)
+
+    def test_waits_for_retry_after(self, mock_time):
+        """Tests that the Retry-After header is used as the delay."""
+
+        # Arrange
+        responses = [make_mock_response(429, {'Retry-After': '7'}), make_mock_response(200)]
+        make_request = MagicMock(side_effect=responses)
+
+        # Act
+        call_with_backoff(make_request, max_delay=10)
+
+        # Assert
+        mock_time.sleep.assert_called_once_with(7.0)
+
+    def test_does_not_wait_for_long_retry_after(self, mock_time):
+        """Tests that the request is not retried if Retry-After is longer than the max delay."""
+
+        # Arrange
+        response = make_mock_response(429, {'Retry-After': '3600'})
+        make_request = MagicMock(return_value=response)
+
+        # Act
+        result = call_with_backoff(make_request, max_delay=60)
+
+        # Assert
+        self.assertIs(result, response)
+        make_request.assert_called_once()
+        mock_time.sleep.assert_not_called()
+
+    def test_retries_request_exception(self, mock_time):
+        """Tests that a RequestException is retried, and re-raised after the max number of attempts."""
+
+        # Arrange
+        make_request = MagicMock(side_effect=RequestException())
+
+        # Act/Assert
+        self.assertRaises(RequestException, call_with_backoff, make_request, max_attempts=2)
+        self.assertEqual(make_request.call_count, 2)
+        mock_time.sleep.assert_called_once()
+
+
+@patch('src.util.resilience.time', autospec=True)
+class CircuitBreakerUnitTests(TestCase):
+    """Unit tests for CircuitBreaker."""
+
+    def setUp(self):
+        self.failure_threshold = 3
+        self.reset_timeout = 30
+
+    def test_opens_after_failure_threshold(self, mock_time):
+        """Tests that the circuit opens after the number of failures in a row reaches the threshold."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        circuit_breaker = CircuitBreaker('test', self.failure_threshold, self.reset_timeout)
+
+        # Act
+        for i in range(self.failure_threshold - 1):
+            circuit_breaker.record_failure()
+        is_allowed_before_threshold = circuit_breaker.allow_request()
+
+        circuit_breaker.record_failure()
+        is_allowed_after_threshold = circuit_breaker.allow_request()
+
+        # Assert
+        self.assertTrue(is_allowed_before_threshold)
+        self.assertFalse(is_allowed_after_threshold)
+        self.assertEqual(circuit_breaker.state, CircuitBreaker.OPEN)
+
+    def test_success_resets_failures(self, mock_time):
+        """Tests that a success resets the number of failures in a row."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        circuit_breaker = CircuitBreaker('test', self.failure_threshold, self.reset_timeout)
+
+        # Act
+        for i in range(self.failure_threshold - 1):
+            circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+
+        # Assert
+        self.assertTrue(circuit_breaker.allow_request())
+        self.assertEqual(circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_allows_one_trial_request_after_reset_timeout(self, mock_time):
+        """Tests that one trial request is allowed after the reset timeout, and that its success closes the circuit."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        circuit_breaker = CircuitBreaker('test', self.failure_threshold, self.reset_timeout)
+        for i in range(self.failure_threshold):
+            circuit_breaker.record_failure()
+
+        # Act
+        mock_time.monotonic.return_value = 100.0 + self.reset_timeout
+        is_trial_allowed = circuit_breaker.allow_request()
+        is_second_request_allowed = circuit_breaker.allow_request()
+
+        circuit_breaker.record_success()
+        is_allowed_after_success = circuit_breaker.allow_request()
+
+        # Assert
+        self.assertTrue(is_trial_allowed)
+        self.assertFalse(is_second_request_allowed)
+        self.assertTrue(is_allowed_after_success)
+
+    def test_failed_trial_request_opens_circuit_again(self, mock_time):
+        """Tests that a failed trial request opens the circuit for another reset timeout."""
+
+        # Arrange
+        mock_time.monotonic.return_value = 100.0
+        circuit_breaker = CircuitBreaker('test', self.failure_threshold, self.reset_timeout)
+        for i in range(self.failure_threshold):
+            circuit_breaker.record_failure()
+
+        mock_time.monotonic.return_value = 100.0 + self.reset_timeout
+        circuit_breaker.allow_request()
+
+        # Act
+        circuit_breaker.record_failure()
+
+        # Assert
+        self.assertFalse(circuit_breaker.allow_request())
+        self.assertEqual(circuit_breaker.state, CircuitBreaker.OPEN)
@@ -0,0 +1,102 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+import gzip
+import hashlib
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.util.response_archive import ResponseArchive
+
+# ==================================================
+
+
+class ResponseArchiveUnitTests(TestCase):
+    """Unit tests for ResponseArchive."""
+
+    def setUp(self):
+        self.temp_directory = TemporaryDirectory()
+        self.archive = ResponseArchive(self.temp_directory.name)
+
+    def tearDown(self):
+        self.temp_directory.cleanup()
+
+    def test_add(self):
+        """Tests that bodies are stored compressed, by their hash, and only once, with an index entry for each."""
+
+        # Arrange
+        body = b'{"shows": [], "hasMore": false}'
+        expected_digest = hashlib.sha256(body).hexdigest()
+
+        # Act
+        digests = [
+            self.archive.add(body, 'seeder', 'url1', {'country': 'us'}),
+            self.archive.add(body, 'updater', 'url2')
+        ]
+
+        # Assert
+        self.assertEqual(digests, [expected_digest, expected_digest])
+        self.assertEqual(self.archive.read(expected_digest), body)
+
+        with open(self.archive.get_path(expected_digest), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), body)
+
+        self.assertEqual(os.listdir(os.path.dirname(self.archive.get_path(expected_digest))),
+                         [f'{expected_digest}.json.gz'])
+
+        entries = list(self.archive.iter_entries())
+        self.assertEqual([(entry['digest'], entry['source'], entry['url'], entry['params']) for entry in entries], [
+            (expected_digest, 'seeder', 'url1', {'country': 'us'}),
+            (expected_digest, 'updater', 'url2', {})
+        ])
+        self.assertEqual(entries[0]['num_bytes'], len(body))
+
+    def test_write_in_chunks(self):
+        """Tests that a body written in chunks is archived the same as a whole body."""
+
+        # Arrange
+        body = b'{"shows": [{"id": "1"}], "hasMore": false}'
+
+        # Act
+        with self.archive.open('seeder', 'url') as archived:
+            for i in range(0, len(body), 5):
+                archived.write(body[i:i + 5])
+
+        # Assert
+        self.assertEqual(archived.digest, hashlib.sha256(body).hexdigest())
+        self.assertEqual(self.archive.read(archived.digest), body)
+
+    def test_discard_on_exception(self):
+        """Tests that a body is not archived if an exception is raised while it is written."""
+
+        # Act
+        with self.assertRaises(ValueError):
+            with self.archive.open('seeder', 'url') as archived:
+                archived.write(b'{"shows": [')
+                raise ValueError()
+
+        # Assert
+        self.assertIsNone(archived.digest)
+        self.assertEqual(list(self.archive.iter_entries()), [])
+        self.assertEqual(os.listdir(self.archive.objects_directory), [])
+
+    def test_disabled_archive(self):
+        """Tests that a disabled archive does not write anything."""
+
+        # Arrange
+        archive = ResponseArchive(None)
+
+        # Act
+        result = archive.add(b'{}', 'app', 'url')
+
+        # Assert
+        self.assertIsNone(result)
+        self.assertEqual(list(archive.iter_entries()), [])
@@ -0,0 +1,120 @@
+import sys
+from os.path import abspath, dirname, join
+
+# Adds root folder as a working directory.
+# This is needed so that imports can be found.
+root_dir = abspath(join(dirname(__file__), '../../'))  # nopep8
+sys.path.append(root_dir)  # nopep8
+
+# --------------------------------------------------
+
+from unittest import TestCase
+
+from src.util.column_batch import ColumnBatch
+from src.util.staging_store import StagingStore
+
+# ==================================================
+
+COLUMN_NAMES = ('id', 'title', 'cast')
+KEY_COLUMN_NAMES = ('id',)
+
+# --------------------------------------------------
+
+
+def make_batches(*rows) -> dict[str, ColumnBatch]:
+    """Creates {'movies': ColumnBatch} with the given rows."""
+
+    batch = ColumnBatch(COLUMN_NAMES, KEY_COLUMN_NAMES)
+    for row in rows:
+        batch.add_row(*row)
+
+    return {'movies': batch}
+
+
+def read_rows(store: StagingStore, chunk_size: int) -> list[list[dict]]:
+    """Reads the rows of each batch from a store."""
+
+    return [batch.to_dicts() for batch in store.iter_batches('movies', chunk_size)]
+
+# --------------------------------------------------
+
+
+class StagingStoreUnitTests(TestCase):
+    """Unit tests for StagingStore."""
+
+    def setUp(self):
+        self.rows = [(str(i), f'Movie {i}', ['A', 'B']) for i in range(5)]
+        self.expected_rows = [{'id': str(i), 'title': f'Movie {i}', 'cast': ['A', 'B']} for i in range(5)]
+
+    def test_rows_within_budget(self):
+        """Rows within the memory budget should be kept in memory and deduplicated."""
+
+        # Arrange
+        store = StagingStore(make_batches(), memory_budget_rows=10)
+
+        # Act
+        store.extend({**make_batches(*self.rows[:3]), 'has_more': True})
+        store.extend(make_batches(('0', 'old', []), *self.rows[3:]))
+        store.extend(make_batches(self.rows[0]))
+
+        # Assert
+        self.assertEqual(store.num_spills, 0)
+        self.assertEqual(read_rows(store, 10), [self.expected_rows])
+
+        store.close()
+
+    def test_rows_over_budget(self):
+        """
+        Rows over the memory budget should be spilled to disk, and the rows that are read back should be the same,
+        deduplicated, and in the order that they were first added.
+        """
+
+        # Arrange
+        store = StagingStore(make_batches(), memory_budget_rows=2)
+
+        # Act
+        store.extend(make_batches(('0', 'old', []), *self.rows[1:3]))
+        store.extend(make_batches(*self.rows[3:]))
+        store.extend(make_batches(self.rows[0]))
+
+        # Assert
+        self.assertEqual(store.num_spills, 2)
+        self.assertEqual(read_rows(store, 10), [self.expected_rows])
+
+        store.close()
+
+    def test_read_in_chunks(self):
+        """Rows should be read back in batches of at most chunk_size rows, whether or not they were spilled."""
+
+        for memory_budget_rows in (10, 1):
+            with self.subTest(memory_budget_rows=memory_budget_rows):
+
+                # Arrange
+                store = StagingStore(make_batches(), memory_budget_rows)
+                store.extend(make_batches(*self.rows))
+
+                # Act
+                rows = read_rows(store, 2)
+
+                # Assert
+                self.assertEqual(rows, [self.expected_rows[:2], self.expected_rows[2:4], self.expected_rows[4:]])
+
+                store.close()
+
+    def test_no_rows(self):
+        """No batches should be read back when there are no rows."""
+
+        for memory_budget_rows in (10, 0):
+            with self.subTest(memory_budget_rows=memory_budget_rows):
+
+                # Arrange
+                store = StagingStore(make_batches(), memory_budget_rows)
+                store.extend(make_batches())
+
+                # Act
+                rows = read_rows(store, 2)
+
+                # Assert
+                self.assertEqual(rows, [])
+
+                store.close()
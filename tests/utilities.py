@@ -1,10 +1,13 @@
+import json
 from copy import deepcopy
 from unittest.mock import MagicMock
 
+from src.adapters.streaming_availability_adapter import make_page_batches
 from src.models.movie import Movie
 from src.models.movie_poster import MoviePoster
 from src.models.service import Service
 from src.models.streaming_option import StreamingOption
+from src.seed.seeder_updater_helpers import group_streaming_options
 
 # ==================================================
 
@@ -145,3 +148,90 @@ class CopyingMock(MagicMock):
         args = deepcopy(args)
         kwargs = deepcopy(kwargs)
         return super().__call__(*args, **kwargs)
+
+
+def make_batches(movie_ids) -> dict:
+    """
+    Creates page batches (as made by transform_page()) with one row per movie ID in every table, using the movie ID
+    for every value.
+
+    :param movie_ids: The movie IDs to create rows for.
+    :return: {'movies': ColumnBatch, 'movie_posters': ColumnBatch, 'streaming_options': ColumnBatch}
+    """
+
+    batches = make_page_batches()
+    for movie_id in movie_ids:
+        for batch in batches.values():
+            batch.add_row(*[movie_id for column_name in batch.column_names])
+
+    return batches
+
+
+def make_update_batches(movie_ids, country_code: str = None) -> dict:
+    """
+    Creates batches like the ones returned by get_updated_movies_and_streams_from_one_request() and
+    get_movies_and_streams_from_one_request(), which are the batches from make_batches() with the streaming options
+    grouped by movie and country.
+
+    :param movie_ids: The movie IDs to create rows for.
+    :param country_code: The country that the page was requested for, or None (see group_streaming_options()).
+    :return: {'movies': ColumnBatch, 'movie_posters': ColumnBatch, 'streaming_option_groups': ColumnBatch}
+    """
+
+    batches = make_batches(movie_ids)
+    batches['streaming_option_groups'] = group_streaming_options(batches, country_code)
+    del batches['streaming_options']
+
+    return batches
+
+
+def make_same_weights(country_codes) -> dict:
+    """
+    Weights every country the same, as get_country_weights() does when there is no traffic.  This can replace
+    get_country_weights(), so that countries keep their order.
+
+    :param country_codes: The countries to weight.
+    :return: {country_code: 1}.
+    """
+
+    return {country_code: 1 for country_code in country_codes}
+
+
+def make_mock_json_response(status_code: int, body: dict, name: str = 'mock_response',
+                            chunk_size: int = 16) -> MagicMock:
+    """
+    Creates a mock of a requests.Response with a JSON body, which can be read either with json() or, when streaming,
+    with iter_content().  The body is split into small chunks, so that reading it has to join chunks.
+
+    :param status_code: The response's status code.
+    :param body: The response's JSON body.
+    :param name: The name of the mock.
+    :param chunk_size: The number of bytes in each chunk returned by iter_content().
+    :return: The mock response.
+    """
+
+    content = json.dumps(body).encode()
+
+    mock_response = MagicMock(name=name)
+    mock_response.status_code = status_code
+    mock_response.content = content
+    mock_response.json.side_effect = lambda: deepcopy(body)
+    mock_response.iter_content.side_effect = lambda *args, **kwargs: \
+        iter([content[i:i + chunk_size] for i in range(0, len(content), chunk_size)])
+
+    return mock_response
+
+
+class TransformPageStub:
+    """
+    A side effect for a mock of transform_page().  Like transform_page(), this reads all the shows that it is given,
+    which can then be checked, and it returns the given batches.
+    """
+
+    def __init__(self, batches: dict):
+        self.batches = batches
+        self.shows = []
+
+    def __call__(self, shows):
+        self.shows.extend(shows)
+        return deepcopy(self.batches)
@@ -16,7 +16,7 @@ from urllib import parse
 from flask import url_for
 
 from src.app import (COOKIE_COUNTRY_CODE_NAME, STREAMING_AVAILABILITY_BASE_URL,
-                     create_app)
+                     app_service, create_app)
 from src.models.common import connect_db, db
 from src.models.movie import Movie
 from src.models.movie_poster import MoviePoster
@@ -47,6 +47,16 @@ db.create_all()
 class MovieSearchViewIntegrationTests(TestCase):
     """Integration tests for views involving movie searches.  This mocks calls to external API."""
 
+    def setUp(self):
+        db.session.query(StreamingOption).delete()
+        db.session.query(Service).delete()
+        db.session.query(Movie).delete()
+        db.session.query(MoviePoster).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+
     def test_search_title(self, mock_requests):
         """Tests for successfully searching for a movie title and displaying results."""
 
@@ -155,7 +165,41 @@ class MovieSearchViewIntegrationTests(TestCase):
 
             mock_requests.get.assert_called_once_with(expected_api_url, headers=ANY, params=expected_api_params)
 
+    def test_search_title_when_ext_api_is_unavailable(self, mock_requests):
+        """When the external API is unavailable, movies in the local database should be searched instead."""
 
+        # Arrange
+        country_code = 'us'
+
+        service = service_generator(1)[0]
+        movies = movie_generator(2)
+        streaming_option = streaming_option_generator(1, movies[0].id, country_code, service.id)[0]
+        movie_posters = movie_poster_generator([movies[0].id])
+
+        db.session.add_all([service, *movies, streaming_option, *movie_posters])
+        db.session.commit()
+
+        url = url_for("search_titles")
+        query_string = {"title": "movie"}
+
+        # Act
+        with patch.object(app_service.circuit_breaker, 'allow_request', return_value=False):
+            with app.test_client() as client:
+                client.set_cookie(COOKIE_COUNTRY_CODE_NAME, country_code)
+                resp = client.get(url, query_string=query_string)
+                html = resp.get_data(as_text=True)
+
+        # Assert
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("Search is temporarily limited", html)
+        self.assertIn(movies[0].title, html)
+        self.assertNotIn(movies[1].title, html)  # no streaming options in country
+        self.assertIn(f'www.example.com/{movies[0].id}/verticalPoster/w240', html)
+
+        mock_requests.get.assert_not_called()
+
+
+@patch('src.app.app_service.response_archive', new=None)
 @patch('src.services.app_service.requests', autospec=True)
 class MovieDetailsViewIntegrationTests(TestCase):
     """Integration tests for the view of a movie's details page.  This mocks calls to external API."""
@@ -319,3 +363,24 @@ class MovieDetailsViewIntegrationTests(TestCase):
             self.assertIn(reason, html)
 
             mock_requests.get.assert_called_once_with(expected_api_url, headers=ANY)
+
+    def test_movie_details_page_without_movie_data_when_ext_api_is_unavailable(self, mock_requests):
+        """
+        Tests that a movie's details page fails fast, without calling the external API, if the movie is not in
+        the local database and the external API is unavailable.
+        """
+
+        # Arrange
+        url = url_for('movie_details_page', movie_id='2332')
+
+        # Act
+        with patch.object(app_service.circuit_breaker, 'allow_request', return_value=False):
+            with app.test_client() as client:
+                resp = client.get(url)
+                html = resp.get_data(as_text=True)
+
+        # Assert
+        self.assertEqual(resp.status_code, 503)
+        self.assertIn('temporarily unavailable', html)
+
+        mock_requests.get.assert_not_called()